@@ -26,6 +26,7 @@ import { isVisionFeatureEnabled, refreshSettingsCache } from './services/setting
 import { createAppTray, destroyAppTray } from './menu/tray'
 import { getPointerScale } from './services/pointerMetrics'
 import { captureSelectedText } from './services/textSelectionService'
+import { prefetchDocument } from './services/documentPrefetch'
 import { openGuideWindow } from './windows/guideWindow'
 import { isGuideSuppressedLocally } from './services/startupGuideFlag'
 
@@ -84,6 +85,7 @@ function buildBaseSessionPayload(
 async function launchSessionForFile(filePath: string) {
   const trimmedPath = filePath.trim()
   if (!trimmedPath) return
+  void prefetchDocument(trimmedPath)
   const display = screen.getDisplayNearestPoint(screen.getCursorScreenPoint()) ?? screen.getPrimaryDisplay()
   const payload = buildBaseSessionPayload(display, buildTextSelectionPayload(trimmedPath), null)
   try {
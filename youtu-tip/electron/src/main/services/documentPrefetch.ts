@@ -0,0 +1,22 @@
+import { mainLogger } from './logger'
+import { fetchJson } from './sidecarRequest'
+
+interface DocumentPrefetchResponse {
+  queued: boolean
+  path: string
+}
+
+// 「用 Tip 打开」的文件提前交给 sidecar 后台解析，首次提问即可命中文档缓存。
+export async function prefetchDocument(filePath: string): Promise<boolean> {
+  try {
+    const result = await fetchJson<DocumentPrefetchResponse>('/documents/prefetch', {
+      method: 'POST',
+      body: JSON.stringify({ path: filePath }),
+    })
+    mainLogger.debug('document prefetch requested', { filePath, queued: result.queued })
+    return result.queued
+  } catch (error) {
+    mainLogger.debug('document prefetch failed', { filePath, error: (error as Error)?.message })
+    return false
+  }
+}
@@ -12,9 +12,20 @@ export interface GuiAgentLogEvent {
   message?: string
   step?: number
   status?: string
+  seq?: number
   result_dir?: string
   resultDir?: string
-  assets?: Array<{ type?: string; path?: string; relative_path?: string; relativePath?: string }>
+  // `thumbnail` assets are small WebP previews for the timeline; load the `screenshot` path only on demand.
+  assets?: Array<{
+    type?: string
+    path?: string
+    relative_path?: string
+    relativePath?: string
+    source?: string
+    width?: number
+    height?: number
+    mime_type?: string
+  }>
   [key: string]: unknown
 }
 
@@ -56,12 +67,19 @@ export async function cancelGuiAgentRun(runId: string): Promise<void> {
 
 export class GuiAgentSocket {
   private socket: WebSocket | null = null
+  private cursor = 0
+
+  /** Sequence number of the last event received; pass it as `since` to resume after a reconnect. */
+  get lastSeq(): number {
+    return this.cursor
+  }
 
   async connect(
     runId: string,
     sessionId: string,
     onEvent: GuiAgentEventCallback,
     onClosed: () => void,
+    since?: number,
   ): Promise<void> {
     const baseUrl = await getSidecarBaseUrl()
     const url = new URL(`${baseUrl.replace('http', 'ws')}/gui-agent/stream`)
@@ -69,12 +87,20 @@ export class GuiAgentSocket {
     if (sessionId) {
       url.searchParams.set('session_id', sessionId)
     }
+    if (since && since > 0) {
+      url.searchParams.set('since', String(since))
+    }
+    this.cursor = since ?? 0
     this.socket = new WebSocket(url.toString())
     this.socket.onmessage = (event) => {
       try {
         const payload = JSON.parse(event.data)
         if (payload?.event === 'gui_agent_log' && payload.payload) {
-          onEvent(payload.payload as GuiAgentLogEvent)
+          const logEvent = payload.payload as GuiAgentLogEvent
+          if (typeof logEvent.seq === 'number') {
+            this.cursor = logEvent.seq
+          }
+          onEvent(logEvent)
         }
       } catch (error) {
         console.warn('gui agent socket parse error', error)
@@ -0,0 +1,36 @@
+# File: python/app/api/routes_documents.py
+# Project: Tip Desktop Assistant
+# Description: Endpoints to pre-parse documents into the document cache and report cache statistics.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from ..core.deps import get_document_cache
+from ..schemas.documents import DocumentPrefetchRequest, DocumentPrefetchResponse
+from ..services.document_cache import DocumentCache
+
+router = APIRouter(prefix='/documents', tags=['documents'])
+
+
+@router.post('/prefetch', response_model=DocumentPrefetchResponse)
+def prefetch_document(
+    payload: DocumentPrefetchRequest,
+    cache: DocumentCache = Depends(get_document_cache),
+) -> DocumentPrefetchResponse:
+    """Queue background parsing so the agent's first question about the file is a cache hit."""
+    path = payload.path.strip()
+    queued = cache.prefetch(path, payload.parser) if payload.parser else cache.prefetch(path)
+    return DocumentPrefetchResponse(queued=queued, path=path)
+
+
+@router.get('/cache')
+def document_cache_stats(cache: DocumentCache = Depends(get_document_cache)) -> Dict[str, Any]:
+    return cache.stats()
@@ -70,10 +70,17 @@ async def gui_agent_stream(
     if session_id and not chat_manager.get_session(session_id):
         await websocket.close(code=4404)
         return
+    # ?since=<seq> resumes after the last event this client saw (reconnects, extra viewers).
+    since_param = websocket.query_params.get('since')
+    try:
+        since = int(since_param) if since_param else None
+    except ValueError:
+        await websocket.close(code=4000)
+        return
 
     await websocket.accept()
-    logger.info('gui_agent stream connected', run_id=run_id, session_id=session_id)
-    stream = service.stream_events(run_id)
+    logger.info('gui_agent stream connected', run_id=run_id, session_id=session_id, since=since)
+    stream = service.stream_events(run_id, since=since)
     try:
         async for event in stream:
             await websocket.send_json({'event': 'gui_agent_log', 'payload': event})
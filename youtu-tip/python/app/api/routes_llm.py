@@ -11,6 +11,7 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from ..core.deps import get_llm_service
 from ..services.llm import LLMService, LLMProviderUnavailableError
+from ..services.llm_scheduler import llm_scheduler_stats
 from ..schemas.llm import LLMImageProbeRequest, LLMImageProbeResponse
 
 router = APIRouter(prefix='/llm', tags=['llm'])
@@ -25,6 +26,12 @@ async def check_ollama_status(llm_service: LLMService = Depends(get_llm_service)
     return {'status': 'ok'}
 
 
+@router.get('/scheduler')
+async def llm_scheduler_status() -> dict:
+    """Per-provider admission queues: active/queued calls and wait times by priority class."""
+    return llm_scheduler_stats()
+
+
 @router.post('/vision-probe', response_model=LLMImageProbeResponse)
 async def probe_image_capability(
     payload: LLMImageProbeRequest,
@@ -77,6 +77,7 @@ def delete_skill(skill_id: str, repo: SkillRepository = Depends(get_skill_reposi
 
 @router.post("/refresh", response_model=SkillRefreshResponse)
 def refresh_skills(repo: SkillRepository = Depends(get_skill_repository)) -> SkillRefreshResponse:
+    # 增量刷新：仅重新解析 mtime/size 变化的文件（监听器通常已自动完成）。
     repo.refresh()
-    count = len(repo.list_titles())
+    count = len(repo)
     return SkillRefreshResponse(count=count)
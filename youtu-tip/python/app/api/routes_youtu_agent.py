@@ -9,25 +9,20 @@
 
 from __future__ import annotations
 
-from dataclasses import asdict, is_dataclass
-import json
 from typing import Any, Dict, AsyncGenerator
 
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
 import structlog
 
+from ..core.config import YOUTU_STREAM_RAW_LOG_EVERY
 from ..core.deps import get_youtu_agent_service, get_youtu_agent_service_ws
 from ..schemas.youtu_agent import YoutuAgentReloadResponse, YoutuAgentRunRequest, YoutuAgentRunResponse
 from ..services.youtu_agent_service import YoutuAgentService
-
-try:  # pragma: no cover - optional dependency
-    from agents.stream_events import AgentUpdatedStreamEvent, RawResponsesStreamEvent, RunItemStreamEvent
-except ImportError:  # pragma: no cover
-    RawResponsesStreamEvent = RunItemStreamEvent = AgentUpdatedStreamEvent = None  # type: ignore
+from ..services.youtu_stream_events import is_raw_response_event, raw_response_summary, serialize_stream_event
 
 # API surface mirrors the FastAPI router used by the Electron shell.
-# When the optional agents package is absent we degrade gracefully by treating
-# stream events as opaque payloads instead of structured dataclasses.
+# Stream events are serialized by class name (see services.youtu_stream_events),
+# so the optional agents package is not needed to forward them.
 router = APIRouter(prefix='/youtu-agent', tags=['youtu-agent'])
 logger = structlog.get_logger(__name__)
 
@@ -136,23 +131,28 @@ async def youtu_agent_stream(
                 continue
 
             logger.info('youtu_agent stream connected', session=session_id)
+            event_count = 0
+            raw_count = 0
             try:
                 async for event in stream:
-                    # Raw response events are mostly for debugging; log them compactly.
-                    if _is_raw_response_event(event):
-                        try:
+                    event_count += 1
+                    # Raw response events arrive per token; only a sampled digest is logged.
+                    if is_raw_response_event(event):
+                        raw_count += 1
+                        if YOUTU_STREAM_RAW_LOG_EVERY and raw_count % YOUTU_STREAM_RAW_LOG_EVERY == 0:
                             logger.info(
                                 'youtu_agent.raw_response',
                                 session=session_id,
-                                raw=_json_safe(getattr(event, 'data', event)),
+                                index=raw_count,
+                                **raw_response_summary(event),
                             )
-                        except Exception:
-                            logger.warning('youtu_agent.raw_response_log_failed', session=session_id)
                     if isinstance(event, dict) and event.get('event') == 'final_output':
                         logger.info(
                             'youtu_agent.stream.final',
                             session=session_id,
                             output_len=len(event.get('output') or ''),
+                            events=event_count,
+                            raw_events=raw_count,
                         )
                         await websocket.send_json(
                             {
@@ -164,7 +164,7 @@ async def youtu_agent_stream(
                         )
                         continue
                     # Non-final events are forwarded as incremental chunks for UI streaming.
-                    payload = _serialize_stream_event(event)
+                    payload = serialize_stream_event(event)
                     await websocket.send_json({'event': 'chunk', 'payload': payload, 'session_id': session_id})
             except WebSocketDisconnect:
                 # Client dropped the socket mid-run; just stop without raising.
@@ -204,96 +204,9 @@ async def reload_youtu_agent(
     return YoutuAgentReloadResponse(config=config_name, provider=service.current_provider())
 
 
-def _serialize_stream_event(event: Any) -> Dict[str, Any]:
-    """Convert Youtu-Agent stream events into JSON-serializable payloads."""
-    # Event classes may not be available (optional dependency); we guard each branch.
-    # Unknown events fall back to repr-safe JSON conversion so clients can still render logs.
-    if RawResponsesStreamEvent and isinstance(event, RawResponsesStreamEvent):
-        data = _json_safe(event.data)
-    elif RunItemStreamEvent and isinstance(event, RunItemStreamEvent):
-        data = {"item": _json_safe(_simplify_run_item(event.item))}
-    elif AgentUpdatedStreamEvent and isinstance(event, AgentUpdatedStreamEvent):
-        data = {"new_agent": _json_safe(_simplify_agent(event.new_agent))}
-    else:
-        data = _json_safe(event)
-    return {"type": event.__class__.__name__, "data": data}
-
-
-def _simplify_run_item(item: Any) -> Dict[str, Any]:
-    # Flatten frequently used fields so the frontend does not need the full model.
-    payload: Dict[str, Any] = {
-        "type": getattr(item, "type", item.__class__.__name__),
-    }
-    # Optional agent meta when present (e.g., nested agent orchestration).
-    agent = getattr(item, "agent", None)
-    agent_name = getattr(agent, "name", None)
-    if agent_name:
-        payload["agent"] = agent_name
-    output = getattr(item, "output", None)
-    if output:
-        payload["output"] = output
-    raw_item = getattr(item, "raw_item", None)
-    if raw_item:
-        payload["raw_item"] = _simplify_raw_tool_item(raw_item)
-    return payload
-
-
-def _simplify_raw_tool_item(raw_item: Any) -> Dict[str, Any]:
-    # Convert raw tool outputs into a minimal JSON-friendly shape.
-    payload: Dict[str, Any] = {}
-    name = getattr(raw_item, "name", None)
-    if name:
-        payload["name"] = name
-    arguments = getattr(raw_item, "arguments", None)
-    if arguments:
-        payload["arguments"] = arguments
-    output = getattr(raw_item, "output", None)
-    if output:
-        payload["output"] = output
-    item_type = getattr(raw_item, "type", None)
-    if item_type:
-        payload["type"] = item_type
-    return payload
-
-
-def _simplify_agent(agent: Any) -> Dict[str, Any]:
-    # AgentUpdated events only need identity information.
-    return {
-        "name": getattr(agent, "name", None),
-        "id": getattr(agent, "id", None),
-    }
-
-
-def _is_raw_response_event(event: Any) -> bool:
-    """Check whether the stream event contains the raw LLM response."""
-    if RawResponsesStreamEvent and isinstance(event, RawResponsesStreamEvent):
-        return True
-    return event.__class__.__name__ == "RawResponsesStreamEvent"
-
-
-def _json_safe(value: Any) -> Any:
-    """Best-effort conversion to JSON-serializable structures."""
-    if isinstance(value, (str, int, float, bool)) or value is None:
-        return value
-    if isinstance(value, dict):
-        return {str(key): _json_safe(val) for key, val in value.items()}
-    if isinstance(value, (list, tuple, set)):
-        return [_json_safe(item) for item in value]
-    if hasattr(value, "model_dump"):
-        try:
-            return _json_safe(value.model_dump())
-        except TypeError:
-            try:
-                return _json_safe(json.loads(value.model_dump_json()))
-            except Exception:
-                return repr(value)
-    if is_dataclass(value):
-        try:
-            return _json_safe(asdict(value))
-        except Exception:
-            return repr(value)
-    if hasattr(value, "__dict__"):
-        # Drop private attributes to avoid leaking internals (e.g., clients, locks).
-        return _json_safe({k: v for k, v in value.__dict__.items() if not k.startswith("_")})
-    # Fallback to repr for objects with no obvious serialisation hooks.
-    return repr(value)
+@router.get('/stats')
+async def youtu_agent_stats(
+    service: YoutuAgentService = Depends(get_youtu_agent_service),
+) -> Dict[str, Any]:
+    """Agent pool metrics: hit rate, build latency, idle/leased agents and live sessions."""
+    return service.pool_stats()
@@ -21,6 +21,16 @@ def _get_env_bool(key: str, default: bool = False) -> bool:
     return value.strip().lower() in {'1', 'true', 'yes', 'on'}
 
 
+def _get_env_int(key: str, default: int) -> int:
+    value = os.environ.get(key)
+    if value is None or not value.strip():
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
 def _resolve_base_dir() -> Path:
     frozen_root = getattr(sys, '_MEIPASS', None)
     if frozen_root:
@@ -46,3 +56,32 @@ USER_SETTINGS_FILE = _resolve_path(
 LOG_DIR = _resolve_path('TIP_LOG_DIR', Path.home() / '.tip' / 'logs')
 CACHE_DIR = _resolve_path('TIP_CACHE_DIR', Path.home() / 'Library' / 'Caches' / 'Tip')
 DEBUG_REPORT_DIR = _resolve_path('TIP_DEBUG_DIR', CACHE_DIR / 'debug-reports')
+
+# GUI Agent 调度：默认单并发、不排队（保持桌面独占语义）；模拟环境批量评测可调大。
+GUI_AGENT_MAX_CONCURRENCY = max(1, _get_env_int('TIP_GUI_AGENT_MAX_CONCURRENCY', 1))
+GUI_AGENT_MAX_QUEUE = max(0, _get_env_int('TIP_GUI_AGENT_MAX_QUEUE', 0))
+
+# 设置写盘：连续修改合并为一次原子写入（静默 debounce 毫秒后落盘，最长推迟 max_delay 毫秒）。
+SETTINGS_WRITE_DEBOUNCE_MS = max(0, _get_env_int('TIP_SETTINGS_WRITE_DEBOUNCE_MS', 250))
+SETTINGS_WRITE_MAX_DELAY_MS = max(0, _get_env_int('TIP_SETTINGS_WRITE_MAX_DELAY_MS', 2000))
+
+# 技能目录监听：外部编辑的 Markdown 自动增量加载；无 watchdog 时按秒轮询。
+SKILLS_WATCH_ENABLED = _get_env_bool('TIP_SKILLS_WATCH', True)
+SKILLS_POLL_INTERVAL = max(1, _get_env_int('TIP_SKILLS_POLL_INTERVAL', 2))
+
+# LLM 准入调度：按 provider 端点限制并发，意图 > 聊天 > Agent 工具循环；本地模型默认串行。
+LLM_LOCAL_CONCURRENCY = max(1, _get_env_int('TIP_LLM_LOCAL_CONCURRENCY', 1))
+LLM_REMOTE_CONCURRENCY = max(1, _get_env_int('TIP_LLM_REMOTE_CONCURRENCY', 4))
+LLM_MAX_QUEUE = max(0, _get_env_int('TIP_LLM_MAX_QUEUE', 64))
+
+# Youtu Agent 池：预构建 Agent 供新会话租用；空闲会话/Agent 超时后归还或清理（秒）。
+YOUTU_AGENT_POOL_SIZE = max(0, _get_env_int('TIP_YOUTU_AGENT_POOL_SIZE', 2))
+YOUTU_AGENT_POOL_WARM = max(0, _get_env_int('TIP_YOUTU_AGENT_POOL_WARM', 1))
+YOUTU_AGENT_IDLE_TTL = max(30, _get_env_int('TIP_YOUTU_AGENT_IDLE_TTL', 600))
+YOUTU_AGENT_SESSION_TTL = max(30, _get_env_int('TIP_YOUTU_AGENT_SESSION_TTL', 1800))
+# 逐 token 的原始响应事件默认不写日志；设为 N 时每 N 个事件记录一条摘要。
+YOUTU_STREAM_RAW_LOG_EVERY = max(0, _get_env_int('TIP_YOUTU_STREAM_RAW_LOG_EVERY', 0))
+
+# 文档解析缓存：解析结果按内容哈希落盘，总量超过上限时按 LRU 淘汰（MB）。
+DOCUMENT_PARSER = os.environ.get('TIP_DOCUMENT_PARSER', 'unstructured').strip() or 'unstructured'
+DOCUMENT_CACHE_MAX_MB = max(16, _get_env_int('TIP_DOCUMENT_CACHE_MAX_MB', 512))
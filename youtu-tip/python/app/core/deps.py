@@ -17,6 +17,7 @@ from ..services.debug_report import DebugReportService
 from ..services.text_selection import TextSelectionService
 from ..services.gui_agent import GuiAgentService
 from ..services.youtu_agent_service import YoutuAgentService
+from ..services.document_cache import DocumentCache
 from ..gui_agent.skills import SkillRepository
 
 
@@ -66,3 +67,7 @@ def get_youtu_agent_service(request: Request) -> YoutuAgentService:
 
 def get_youtu_agent_service_ws(websocket: WebSocket) -> YoutuAgentService:
     return websocket.app.state.youtu_agent_service
+
+
+def get_document_cache(request: Request) -> DocumentCache:
+    return request.app.state.document_cache
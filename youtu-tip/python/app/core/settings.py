@@ -10,16 +10,44 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, Literal, Optional
+from typing import Any, Dict, Literal, Optional, Tuple
 
-from pydantic import BaseModel, Field, RootModel, ConfigDict
+from pydantic import BaseModel, Field, RootModel, ConfigDict, field_validator
 
 from .config import DEFAULT_SETTINGS_FILE
 
 
+class _ReadOnlyDict(dict):
+    """dict that rejects mutation, so a frozen snapshot cannot be changed through its headers."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError('settings snapshots are read-only; use SettingsManager to change them')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self) -> "_ReadOnlyDict":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "_ReadOnlyDict":
+        return self
+
+    def __reduce__(self) -> Any:
+        return (type(self), (dict(self),))
+
+
 class LLMHeaders(RootModel[Dict[str, str]]):
     """Wrapper around per-provider HTTP headers to keep type info consistent."""
-    root: Dict[str, str] = Field(default_factory=dict)
+    root: Dict[str, str] = Field(default_factory=_ReadOnlyDict)
+
+    model_config = ConfigDict(frozen=True)
+
+    @field_validator('root', mode='after')
+    @classmethod
+    def _freeze(cls, value: Dict[str, str]) -> Dict[str, str]:
+        return _ReadOnlyDict(value)
 
     def to_dict(self) -> Dict[str, str]:
         """Return a shallow copy so callers cannot mutate internal state."""
@@ -48,14 +76,16 @@ class LLMProfile(BaseModel):
     openaiBaseUrl: Optional[str] = Field(default=None, alias='openaiBaseUrl')
     isLocked: bool = Field(default=False, alias='isLocked')
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
 
 
 class ShortcutSettings(BaseModel):
     """Keyboard and gesture shortcuts shared by renderer and main process."""
-    holdToSense: list[str]
+    holdToSense: Tuple[str, ...]
     cancelThresholdPx: int = 6
 
+    model_config = ConfigDict(frozen=True)
+
 
 class PathSettings(BaseModel):
     """Filesystem layout calculated at startup."""
@@ -63,6 +93,8 @@ class PathSettings(BaseModel):
     settingsFile: str
     logsDir: str
 
+    model_config = ConfigDict(frozen=True)
+
 
 class FeatureSettings(BaseModel):
     """Feature toggles used to gate experimental or heavy modules."""
@@ -72,19 +104,28 @@ class FeatureSettings(BaseModel):
     youtuAgentConfig: str = Field(default='agents/simple/base')
     startupGuideEnabled: bool = True
 
+    model_config = ConfigDict(frozen=True)
+
 
 class Settings(BaseModel):
-    """Top-level settings container persisted on disk."""
+    """
+    Top-level settings container persisted on disk.
+
+    Instances are frozen snapshots shared by every reader; changes are made by
+    ``SettingsManager`` through ``model_copy(update=...)``, never in place.
+    Nested containers are immutable too (profiles are a tuple, headers a
+    read-only dict), so a reader cannot alter the snapshot other readers see.
+    """
     settingsVersion: str = ""
     language: str = "system"
-    llmProfiles: list[LLMProfile] = Field(default_factory=list, alias='llmProfiles')
+    llmProfiles: Tuple[LLMProfile, ...] = Field(default_factory=tuple, alias='llmProfiles')
     llmActiveId: str = Field(default='tip_cloud', alias='llmActiveId')
     vlmActiveId: str = Field(default='', alias='vlmActiveId')
     shortcuts: ShortcutSettings
     paths: PathSettings
     features: FeatureSettings = Field(default_factory=FeatureSettings)
 
-    model_config = ConfigDict(populate_by_name=True)
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
 
     def get_active_llm_profile(self) -> LLMProfile:
         """Return the active profile or fall back to Tip Cloud when missing."""
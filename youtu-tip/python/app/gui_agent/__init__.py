@@ -1,6 +1,6 @@
 # File: python/app/gui_agent/__init__.py
 # Project: Tip Desktop Assistant
-# Description: Package exports for GUI agent integration (run_prompt, build_default_args).
+# Description: Package exports for GUI agent integration (run_prompt, arun_prompt, build_default_args).
 
 # Copyright (C) 2025 Tencent. All rights reserved.
 # License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
@@ -9,6 +9,7 @@
 
 """GUI agent integration for Tip sidecar."""
 
-from .runner import run_prompt, build_default_args
+from .llm_config import AgentLLMConfig
+from .runner import arun_prompt, run_prompt, build_default_args
 
-__all__ = ["run_prompt", "build_default_args"]
+__all__ = ["AgentLLMConfig", "arun_prompt", "run_prompt", "build_default_args"]
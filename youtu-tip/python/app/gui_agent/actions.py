@@ -0,0 +1,229 @@
+# File: python/app/gui_agent/actions.py
+# Project: Tip Desktop Assistant
+# Description: Typed GUI actions emitted by the response parser and consumed by the action executor.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Structured actions for the GUI agent.
+
+An ``Action`` is a ``str`` subclass whose string value is the legacy pyautogui
+snippet (``"pyautogui.click(10, 20)"``, ``"DONE"`` ...), so trajectories, step
+events and the renderer formatter keep working unchanged, while executors
+dispatch on ``kind`` / ``params`` instead of compiling code with ``exec``.
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+import re
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+ACTION_KINDS = (
+    "click",
+    "move",
+    "drag",
+    "scroll",
+    "type",
+    "hotkey",
+    "press",
+    "wait",
+    "done",
+    "fail",
+)
+TERMINAL_KINDS = frozenset({"done", "fail"})
+CONTROL_KINDS = frozenset({"wait", "done", "fail"})
+
+_CLICK_FUNCS = {
+    ("left", 1): "click",
+    ("left", 2): "doubleClick",
+    ("right", 1): "rightClick",
+    ("middle", 1): "middleClick",
+}
+
+
+class Action(str):
+    """A GUI action that is also its pyautogui code string."""
+
+    kind: str
+    params: Mapping[str, Any]
+
+    def __new__(cls, kind: str, code: str, **params: Any) -> "Action":
+        if kind not in ACTION_KINDS:
+            raise ValueError(f"Unknown action kind: {kind}")
+        obj = super().__new__(cls, code)
+        obj.kind = kind
+        obj.params = MappingProxyType(dict(params))
+        return obj
+
+    def __reduce__(self):
+        # str subclasses pickle through __new__; keep kind/params across process boundaries.
+        return (_rebuild_action, (self.kind, str(self), dict(self.params)))
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.kind in TERMINAL_KINDS
+
+    @property
+    def is_control(self) -> bool:
+        """WAIT/DONE/FAIL are handled by the environment, not the input backend."""
+        return self.kind in CONTROL_KINDS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, **self.params}
+
+    # ----------------------------
+    # Constructors
+    # ----------------------------
+    @classmethod
+    def click(
+        cls,
+        x: Optional[int] = None,
+        y: Optional[int] = None,
+        *,
+        button: str = "left",
+        clicks: int = 1,
+    ) -> "Action":
+        func = _CLICK_FUNCS.get((button, clicks))
+        if func is None:
+            raise ValueError(f"Unsupported click: button={button} clicks={clicks}")
+        return cls("click", f"pyautogui.{func}({_xy(x, y)})", x=x, y=y, button=button, clicks=clicks)
+
+    @classmethod
+    def move(cls, x: int, y: int) -> "Action":
+        return cls("move", f"pyautogui.moveTo({x}, {y})", x=x, y=y)
+
+    @classmethod
+    def drag(cls, x: int, y: int, duration: float = 0.5) -> "Action":
+        return cls("drag", f"pyautogui.dragTo({x}, {y}, duration={duration})", x=x, y=y, duration=duration)
+
+    @classmethod
+    def scroll(cls, amount: int) -> "Action":
+        return cls("scroll", f"pyautogui.scroll({amount})", amount=amount)
+
+    @classmethod
+    def type_text(cls, text: str) -> "Action":
+        safe_text = json.dumps(str(text), ensure_ascii=False)
+        # Legacy form pastes through the clipboard to avoid typing latency and keep unicode intact.
+        code = (
+            "import pyperclip; "
+            f"text_to_type = {safe_text}; "
+            "pyperclip.copy(text_to_type); "
+            "pyautogui.hotkey('command', 'v')"
+        )
+        return cls("type", code, text=str(text))
+
+    @classmethod
+    def hotkey(cls, keys: Iterable[str]) -> "Action":
+        keys = tuple(str(key) for key in keys)
+        if not keys:
+            raise ValueError("hotkey needs at least one key")
+        if len(keys) == 1:
+            return cls.press(keys[0])
+        keys_str = ", ".join(f"'{key}'" for key in keys)
+        return cls("hotkey", f"pyautogui.hotkey({keys_str})", keys=keys)
+
+    @classmethod
+    def press(cls, key: str) -> "Action":
+        return cls("press", f"pyautogui.press('{key}')", key=str(key))
+
+    @classmethod
+    def wait(cls) -> "Action":
+        return cls("wait", "WAIT")
+
+    @classmethod
+    def done(cls) -> "Action":
+        return cls("done", "DONE")
+
+    @classmethod
+    def fail(cls) -> "Action":
+        return cls("fail", "FAIL")
+
+
+def _rebuild_action(kind: str, code: str, params: Dict[str, Any]) -> Action:
+    return Action(kind, code, **params)
+
+
+def _xy(x: Optional[int], y: Optional[int]) -> str:
+    return "" if x is None or y is None else f"{x}, {y}"
+
+
+_CALL_RE = re.compile(r"^pyautogui\.(\w+)\((.*)\)$", re.DOTALL)
+_PASTE_RE = re.compile(
+    r"^import pyperclip; text_to_type = (.*); pyperclip\.copy\(text_to_type\); "
+    r"pyautogui\.hotkey\('command', 'v'\)$",
+    re.DOTALL,
+)
+
+
+def parse_action_code(code: str) -> Optional[Action]:
+    """
+    Recover a typed action from a legacy code string (e.g. replayed ``traj.jsonl``).
+
+    Only the single-call forms produced by the response parser are recognised;
+    anything else returns None so callers can decide how to handle it.
+    """
+    if isinstance(code, Action):
+        return code
+    text = (code or "").strip()
+    if text in {"WAIT", "DONE", "FAIL"}:
+        return getattr(Action, text.lower())()
+    paste = _PASTE_RE.match(text)
+    if paste:
+        try:
+            return Action.type_text(json.loads(paste.group(1)))
+        except (json.JSONDecodeError, TypeError):
+            return None
+    call = _CALL_RE.match(text)
+    if not call:
+        return None
+    func, raw_args = call.groups()
+    try:
+        args, kwargs = _literal_args(raw_args)
+    except (ValueError, SyntaxError):
+        return None
+    try:
+        for (button, clicks), name in _CLICK_FUNCS.items():
+            if func == name:
+                x, y = (args + [None, None])[:2]
+                return Action.click(_int(x), _int(y), button=button, clicks=clicks)
+        if func == "moveTo" and len(args) >= 2:
+            return Action.move(_int(args[0]), _int(args[1]))
+        if func == "dragTo" and len(args) >= 2:
+            return Action.drag(_int(args[0]), _int(args[1]), float(kwargs.get("duration", 0.5)))
+        if func == "scroll" and args:
+            return Action.scroll(int(args[0]))
+        if func == "hotkey" and args:
+            return Action.hotkey(args)
+        if func == "press" and len(args) == 1 and isinstance(args[0], str):
+            return Action.press(args[0])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def _literal_args(raw: str) -> Tuple[list, Dict[str, Any]]:
+    node = ast.parse(f"f({raw})", mode="eval").body
+    if not isinstance(node, ast.Call):
+        raise ValueError("not a call")
+    args = [ast.literal_eval(arg) for arg in node.args]
+    kwargs = {kw.arg: ast.literal_eval(kw.value) for kw in node.keywords if kw.arg}
+    return args, kwargs
+
+
+def _int(value: Any) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+__all__ = [
+    "ACTION_KINDS",
+    "Action",
+    "CONTROL_KINDS",
+    "TERMINAL_KINDS",
+    "parse_action_code",
+]
@@ -0,0 +1,301 @@
+# File: python/app/gui_agent/artifact_writer.py
+# Project: Tip Desktop Assistant
+# Description: Background artifact writer that persists screenshots and trajectory lines
+# off the agent thread with a bounded queue and batched flushes.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Asynchronous artifact persistence for GUI agent runs.
+
+The run loop used to open ``traj.jsonl`` and write PNG files inline for every
+action, so disk latency was added directly to step time. ``ArtifactWriter``
+moves that work to a single background thread:
+
+* a bounded queue applies backpressure instead of growing without limit;
+* ``traj.jsonl`` is opened once and flushed in batches;
+* ``drain()`` / ``close()`` guarantee everything queued reaches disk before the
+  run reports completion or cancellation;
+* screenshots also get a small WebP preview under ``thumbs/`` so viewers can
+  show the step timeline without decoding full-resolution PNGs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .thumbnails import DEFAULT_MAX_SIDE, THUMBNAIL_DIR, make_thumbnail, thumbnail_relative_path
+
+logger = logging.getLogger("desktopenv.artifact_writer")
+
+_STOP = object()
+
+
+class ArtifactWriter:
+    """Persist screenshots, trajectory lines and skill records on a worker thread."""
+
+    def __init__(
+        self,
+        result_dir: str,
+        *,
+        traj_filename: str = "traj.jsonl",
+        max_queue: int = 32,
+        flush_every: int = 8,
+        flush_interval: float = 1.0,
+        thumbnail_max_side: Optional[int] = DEFAULT_MAX_SIDE,
+    ) -> None:
+        self.result_dir = result_dir
+        self._traj_path = os.path.join(result_dir, traj_filename)
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_queue))
+        self._flush_every = max(1, flush_every)
+        self._flush_interval = max(0.0, flush_interval)
+        # None/0 disables previews (e.g. benchmarks that only measure raw writes).
+        self._thumbnail_max_side = thumbnail_max_side or None
+        # A single handle is kept for the whole run; lines are flushed in batches.
+        self._traj_handle = open(self._traj_path, "a", encoding="utf-8")
+        self._pending_lines = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._written = 0
+        self._bytes_written = 0
+        self._errors = 0
+        self._max_queue_depth = 0
+        self._total_write_ms = 0.0
+        self._max_write_ms = 0.0
+        self._last_write_ms = 0.0
+        self._thumbnails = 0
+        self._thumbnail_bytes = 0
+        self._total_thumbnail_ms = 0.0
+        self._thread = threading.Thread(
+            target=self._worker,
+            name="gui-agent-artifact-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def write_screenshot(
+        self,
+        filename: str,
+        data: bytes,
+        *,
+        on_written: Optional[Callable[[Optional[str], Optional[Dict[str, Any]]], None]] = None,
+    ) -> str:
+        """Queue a screenshot for writing and return its final path.
+
+        ``on_written(path, thumbnail)`` is invoked on the writer thread once the
+        file (and its preview, when enabled) exists, so consumers that open the
+        path (renderer, debug reports) never race the write. ``thumbnail`` is an
+        asset dict (path, relative_path, width, height, mime_type) or None. If
+        the write fails the callback still fires, with ``path=None``, so the
+        consumer can report the missing frame instead of waiting for it.
+        """
+        path = os.path.join(self.result_dir, filename)
+        self._submit(("screenshot", path, data, on_written))
+        return path
+
+    def write_trajectory(self, record: Dict[str, Any]) -> None:
+        """Queue one JSON line for ``traj.jsonl``."""
+        line = json.dumps(record, ensure_ascii=False)
+        self._submit(("traj", line, None))
+
+    def write_skill_record(self, record: Dict[str, Any]) -> None:
+        """Skill lookups share the trajectory file so replays keep their order."""
+        payload = dict(record)
+        payload.setdefault("action", "skill")
+        self.write_trajectory(payload)
+
+    def write_text(self, filename: str, text: str) -> str:
+        """Queue a small text artifact (e.g. result.txt) for writing."""
+        path = os.path.join(self.result_dir, filename)
+        self._submit(("file", path, text.encode("utf-8"), None))
+        return path
+
+    def drain(self) -> None:
+        """Block until every queued artifact has been written and flushed."""
+        if self._closed:
+            return
+        self._queue.join()
+
+    def close(self) -> None:
+        """Drain outstanding work, stop the worker and release the trajectory handle."""
+        if self._closed:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._closed = True
+        try:
+            self._traj_handle.flush()
+            self._traj_handle.close()
+        except OSError as exc:
+            logger.error("Failed to close trajectory file: %s", exc)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and write latency figures for logging/events."""
+        with self._stats_lock:
+            written = self._written
+            return {
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self._max_queue_depth,
+                "written": written,
+                "bytes_written": self._bytes_written,
+                "errors": self._errors,
+                "avg_write_ms": round(self._total_write_ms / written, 3) if written else 0.0,
+                "max_write_ms": round(self._max_write_ms, 3),
+                "last_write_ms": round(self._last_write_ms, 3),
+                "thumbnails": self._thumbnails,
+                "thumbnail_bytes": self._thumbnail_bytes,
+                "avg_thumbnail_ms": (
+                    round(self._total_thumbnail_ms / self._thumbnails, 3) if self._thumbnails else 0.0
+                ),
+            }
+
+    def __enter__(self) -> "ArtifactWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ----------------------------
+    # Internal helpers
+    # ----------------------------
+    def _submit(self, item: Any) -> None:
+        if self._closed:
+            raise RuntimeError("ArtifactWriter is closed")
+        # put() blocks when the queue is full so a slow disk throttles the producer
+        # instead of buffering an unbounded number of frames in memory.
+        self._queue.put(item)
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            if depth > self._max_queue_depth:
+                self._max_queue_depth = depth
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._flush()
+                    return
+                try:
+                    self._handle(item)
+                except Exception as exc:  # noqa: BLE001 - one bad item must not kill the writer thread
+                    self._handle_failure(item, exc)
+                # Flush eagerly once the queue is idle so readers see fresh lines.
+                if self._queue.empty():
+                    self._flush()
+            finally:
+                self._queue.task_done()
+
+    def _handle(self, item: Any) -> None:
+        kind = item[0]
+        started = time.perf_counter()
+        size = 0
+        callback = None
+        target = None
+        if kind in {"file", "screenshot"}:
+            _, target, data, callback = item
+            with open(target, "wb") as handle:
+                handle.write(data)
+            size = len(data)
+        elif kind == "traj":
+            _, line, _ = item
+            self._traj_handle.write(line)
+            self._traj_handle.write("\n")
+            size = len(line) + 1
+            self._pending_lines += 1
+            if (
+                self._pending_lines >= self._flush_every
+                or time.monotonic() - self._last_flush >= self._flush_interval
+            ):
+                self._flush()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._written += 1
+            self._bytes_written += size
+            self._total_write_ms += elapsed_ms
+            self._last_write_ms = elapsed_ms
+            if elapsed_ms > self._max_write_ms:
+                self._max_write_ms = elapsed_ms
+        # The preview is produced after the full frame so on_written can reference both.
+        thumbnail = self._write_thumbnail(target, data) if kind == "screenshot" else None
+        self._notify(kind, callback, target, thumbnail)
+
+    def _handle_failure(self, item: Any, exc: Exception) -> None:
+        kind = item[0] if isinstance(item, tuple) and item else "unknown"
+        target = item[1] if kind in {"file", "screenshot"} and len(item) > 1 else kind
+        logger.error("Failed to write artifact %s: %s", target, exc)
+        with self._stats_lock:
+            self._errors += 1
+        # 写入失败也要回调（path=None），否则事件流里这一帧会悄无声息地消失
+        callback = item[-1] if kind in {"file", "screenshot"} and len(item) == 4 else None
+        self._notify(kind, callback, None, None)
+
+    def _notify(
+        self,
+        kind: str,
+        callback: Optional[Callable[..., None]],
+        path: Optional[str],
+        thumbnail: Optional[Dict[str, Any]],
+    ) -> None:
+        if callback is None:
+            return
+        try:
+            if kind == "screenshot":
+                callback(path, thumbnail)
+            else:
+                callback(path)
+        except Exception as exc:  # noqa: BLE001 - callbacks must not kill the writer
+            logger.error("Artifact callback failed for %s: %s", path, exc)
+
+    def _write_thumbnail(self, source_path: str, data: bytes) -> Optional[Dict[str, Any]]:
+        """Write the preview next to the run artifacts; failures only drop the preview."""
+        if not self._thumbnail_max_side:
+            return None
+        started = time.perf_counter()
+        try:
+            thumb = make_thumbnail(data, max_side=self._thumbnail_max_side)
+            relative_path = thumbnail_relative_path(source_path, thumb.extension)
+            thumb_path = os.path.join(self.result_dir, relative_path)
+            os.makedirs(os.path.join(self.result_dir, THUMBNAIL_DIR), exist_ok=True)
+            with open(thumb_path, "wb") as handle:
+                handle.write(thumb.data)
+        except Exception as exc:  # noqa: BLE001 - undecodable frames still keep the full image
+            logger.warning("Failed to write thumbnail for %s: %s", source_path, exc)
+            return None
+        with self._stats_lock:
+            self._thumbnails += 1
+            self._thumbnail_bytes += len(thumb.data)
+            self._total_thumbnail_ms += (time.perf_counter() - started) * 1000
+        return {
+            "path": thumb_path,
+            "relative_path": relative_path,
+            "width": thumb.width,
+            "height": thumb.height,
+            "mime_type": thumb.mime_type,
+        }
+
+    def _flush(self) -> None:
+        if not self._pending_lines:
+            return
+        try:
+            self._traj_handle.flush()
+        except OSError as exc:
+            logger.error("Failed to flush trajectory file: %s", exc)
+        self._pending_lines = 0
+        self._last_flush = time.monotonic()
+
+
+__all__ = ["ArtifactWriter"]
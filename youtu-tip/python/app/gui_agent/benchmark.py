@@ -0,0 +1,346 @@
+# File: python/app/gui_agent/benchmark.py
+# Project: Tip Desktop Assistant
+# Description: Offline benchmark that replays recorded trajectories on the simulated desktop and reports stage timings.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Replay GUI agent trajectories without a desktop or a model endpoint.
+
+Each ``traj.jsonl`` written by ``run_loop`` is turned back into a scripted
+agent: the recorded model responses are returned from ``call_llm`` (optionally
+after a fixed delay standing in for network latency) while the real
+preprocess / parse code paths run against ``SimulatedDesktopEnv``. Run with:
+
+    python -m app.gui_agent.benchmark results_core/prompt_*/traj.jsonl --repeat 3
+
+Without arguments the built-in login-form trajectories (one action per
+response, and the same task batched into multi-action responses) are replayed;
+multi-action responses execute one step at a time unless ``--batch`` enables
+batch mode (``TIP_GUI_BATCH_ACTIONS=1`` in the app) for comparison.
+``--stream`` feeds each response through the streaming parser in small deltas;
+add ``--stream-stop-early`` to see how cutting the stream after the first tool
+call leaves nothing to batch (fewer executed actions, failed score).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from . import run_loop
+from .llm_config import AgentLLMConfig
+from .qwen_agent import Qwen3VLAgent
+from .runner import build_default_args
+from .simulated_env import SimulatedDesktopEnv
+from .timing import STAGES, StageTimer
+
+logger = logging.getLogger("desktopenv.benchmark")
+
+
+def _tool_call(action: str, **arguments: Any) -> str:
+    payload = {"name": "computer_use", "arguments": {"action": action, **arguments}}
+    return f"<tool_call>\n{json.dumps(payload)}\n</tool_call>"
+
+
+# 坐标为 0-1000 相对坐标，对应 1440x900 登录场景中的控件中心
+BUILTIN_TRAJECTORY: Dict[str, Any] = {
+    "name": "builtin_login",
+    "instruction": "Sign in as alice with password hunter2 and tick 'Remember me'.",
+    "sim": {
+        "scene": "login",
+        "goal": {
+            "text": {"username": "alice", "password": "hunter2"},
+            "checked": {"remember": True},
+            "clicked": ["sign_in"],
+        },
+    },
+    "responses": [
+        "Action: Click the username field.\n" + _tool_call("left_click", coordinate=[500, 411]),
+        "Action: Type the username.\n" + _tool_call("type", text="alice"),
+        "Action: Click the password field.\n" + _tool_call("left_click", coordinate=[500, 489]),
+        "Action: Type the password.\n" + _tool_call("type", text="hunter2"),
+        "Action: Tick 'Remember me'.\n" + _tool_call("left_click", coordinate=[369, 552]),
+        "Action: Press the Sign in button.\n" + _tool_call("left_click", coordinate=[500, 636]),
+        "Action: The form is submitted.\n" + _tool_call("terminate", status="success"),
+    ],
+}
+
+
+# 同一任务，但每次回复包含多个 tool call，用于衡量批量执行节省的截图与写盘
+BUILTIN_BATCH_TRAJECTORY: Dict[str, Any] = {
+    "name": "builtin_login_batched",
+    "instruction": BUILTIN_TRAJECTORY["instruction"],
+    "sim": BUILTIN_TRAJECTORY["sim"],
+    "responses": [
+        "Action: Fill in the username.\n"
+        + _tool_call("left_click", coordinate=[500, 411])
+        + "\n"
+        + _tool_call("type", text="alice"),
+        "Action: Fill in the password, tick 'Remember me' and sign in.\n"
+        + _tool_call("left_click", coordinate=[500, 489])
+        + "\n"
+        + _tool_call("type", text="hunter2")
+        + "\n"
+        + _tool_call("left_click", coordinate=[369, 552])
+        + "\n"
+        + _tool_call("left_click", coordinate=[500, 636]),
+        "Action: The form is submitted.\n" + _tool_call("terminate", status="success"),
+    ],
+}
+
+
+class ReplayAgent(Qwen3VLAgent):
+    """Qwen agent whose LLM calls return recorded responses in order."""
+
+    def __init__(
+        self,
+        responses: List[str],
+        *,
+        llm_latency: float = 0.0,
+        stream_chunk_chars: int = 8,
+        **kwargs,
+    ):
+        # Pin a config so reset() never reads provider credentials from the environment.
+        kwargs.setdefault("llm_config", AgentLLMConfig(provider="static_openai"))
+        super().__init__(**kwargs)
+        self._responses = list(responses)
+        self._response_idx = 0
+        self.llm_latency = llm_latency
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+
+    def reset(self, _logger=None):
+        super().reset(_logger)
+        self._response_idx = 0
+
+    def call_llm(self, payload, model):  # type: ignore[override]
+        if self.llm_latency > 0:
+            time.sleep(self.llm_latency)
+        if self.stream:
+            return self._collect_stream(self._replay_deltas(self._next_response()))
+        return self._next_response()
+
+    async def acall_llm(self, payload, model):  # type: ignore[override]
+        if self.llm_latency > 0:
+            await asyncio.sleep(self.llm_latency)
+        if self.stream:
+            return await self._acollect_stream(self._areplay_deltas(self._next_response()))
+        return self._next_response()
+
+    def _replay_deltas(self, response: str):
+        size = self.stream_chunk_chars
+        for start in range(0, len(response), size):
+            yield response[start : start + size]
+
+    async def _areplay_deltas(self, response: str):
+        for delta in self._replay_deltas(response):
+            yield delta
+
+    def _next_response(self) -> str:
+        if self._response_idx >= len(self._responses):
+            # Trajectory exhausted before the recorded run finished: stop cleanly.
+            return _tool_call("terminate", status="failure")
+        response = self._responses[self._response_idx]
+        self._response_idx += 1
+        return response
+
+
+def load_trajectory(path: Path) -> Dict[str, Any]:
+    """Read a run_loop ``traj.jsonl`` into ``{"name", "instruction", "responses"}``.
+
+    Several actions from one model turn share a step number, so only the first
+    response per step is kept; skill records carry no tool call and are skipped.
+    """
+    instruction = ""
+    responses: List[str] = []
+    seen_steps = set()
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("action") == "reset":
+                instruction = record.get("instruction") or instruction
+                continue
+            if record.get("action") == "skill":
+                continue
+            step = record.get("step_num")
+            response = record.get("response")
+            if not response or step in seen_steps:
+                continue
+            seen_steps.add(step)
+            responses.append(response)
+    if not responses:
+        raise ValueError(f"No replayable responses in {path}")
+    return {
+        "name": path.parent.name or path.stem,
+        "instruction": instruction or "Replay recorded trajectory",
+        "responses": responses,
+        "sim": {},
+    }
+
+
+def run_benchmark(
+    trajectory: Dict[str, Any],
+    *,
+    repeat: int = 1,
+    llm_latency: float = 0.0,
+    result_root: Optional[str] = None,
+    screen_size: tuple = (1440, 900),
+    batch_actions: bool = False,
+    use_async: bool = False,
+    stream: bool = False,
+    stream_stop_early: bool = False,
+) -> Dict[str, Any]:
+    """Replay ``trajectory`` ``repeat`` times and return stage timings plus scores."""
+    timer = StageTimer()
+    scores: List[Optional[float]] = []
+    steps = 0
+    wall_ms: List[float] = []
+    write_stats: List[Dict[str, Any]] = []
+    root = Path(result_root or tempfile.mkdtemp(prefix="tip_gui_bench_"))
+
+    args = build_default_args(
+        max_steps=len(trajectory["responses"]) + 1,
+        sleep_after_execution=0.0,
+        batch_actions=batch_actions,
+    )
+    for run_idx in range(max(1, repeat)):
+        env = SimulatedDesktopEnv(
+            screen_width=screen_size[0],
+            screen_height=screen_size[1],
+            stage_timer=timer,
+        )
+        agent = ReplayAgent(
+            trajectory["responses"],
+            llm_latency=llm_latency,
+            platform="macos",
+            model=args.model,
+            max_tokens=args.max_tokens,
+            top_p=args.top_p,
+            temperature=args.temperature,
+            action_space=args.action_space,
+            coordinate_type=args.coord,
+            max_steps=args.max_steps,
+            observation_mode=args.observation_mode,
+            history_policy=args.history_policy,
+            stream=stream,
+            stream_stop_after_first=stream_stop_early,
+        )
+        agent.stage_timer = timer
+        example = {
+            "id": f"{trajectory['name']}_{run_idx}",
+            "instruction": trajectory["instruction"],
+            "sim": trajectory.get("sim") or {},
+        }
+        result_dir = root / example["id"]
+        result_dir.mkdir(parents=True, exist_ok=True)
+
+        events: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        run_args = (agent, env, example, args.max_steps, trajectory["instruction"], args, str(result_dir), scores)
+        if use_async:
+            asyncio.run(run_loop.arun_single_example(*run_args, log_callback=events.append))
+        else:
+            run_loop.run_single_example(*run_args, log_callback=events.append)
+        wall_ms.append((time.perf_counter() - started) * 1000)
+        env.close()
+        steps += env.steps
+        complete = next((e for e in reversed(events) if e.get("type") == "complete"), {})
+        artifacts = (complete.get("details") or {}).get("artifacts")
+        if artifacts:
+            write_stats.append(artifacts)
+
+    stages = timer.summary()
+    # 写盘发生在 ArtifactWriter 的后台线程，这里取其自身统计而非主循环耗时
+    if write_stats:
+        written = sum(item.get("written", 0) for item in write_stats)
+        total = sum(item.get("avg_write_ms", 0.0) * item.get("written", 0) for item in write_stats)
+        stages["write"] = {
+            "count": written,
+            "total_ms": round(total, 3),
+            "mean_ms": round(total / written, 3) if written else 0.0,
+            "max_ms": max(item.get("max_write_ms", 0.0) for item in write_stats),
+        }
+    return {
+        "trajectory": trajectory["name"],
+        "runs": max(1, repeat),
+        "steps": steps,
+        "scores": scores,
+        "wall_ms": round(sum(wall_ms) / len(wall_ms), 3) if wall_ms else 0.0,
+        "llm_latency_ms": round(llm_latency * 1000, 3),
+        "stream": ("stop_early" if stream_stop_early else "full") if stream else None,
+        "stages": {name: stages[name] for name in STAGES if name in stages},
+        "result_root": str(root),
+    }
+
+
+def _format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['trajectory']}: {report['runs']} run(s), {report['steps']} step(s), "
+        f"scores={report['scores']}, mean wall {report['wall_ms']:.1f} ms"
+        + (f", stream={report['stream']}" if report.get("stream") else ""),
+        f"  {'stage':<11}{'count':>7}{'mean ms':>11}{'p95 ms':>11}{'max ms':>11}{'total ms':>12}",
+    ]
+    for name, stats in report["stages"].items():
+        lines.append(
+            f"  {name:<11}{stats['count']:>7}{stats['mean_ms']:>11.2f}"
+            f"{stats.get('p95_ms', stats['max_ms']):>11.2f}{stats['max_ms']:>11.2f}{stats['total_ms']:>12.2f}"
+        )
+    return "\n".join(lines)
+
+
+def _main() -> None:
+    parser = argparse.ArgumentParser(description="Replay GUI agent trajectories on the simulated desktop.")
+    parser.add_argument("trajectories", nargs="*", help="Paths to traj.jsonl files (default: built-in login task)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replays per trajectory")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated seconds per LLM call")
+    parser.add_argument("--result-root", help="Directory for replay artifacts (default: temp dir)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--batch", action="store_true", help="Execute multi-action responses as one batch")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the asyncio run loop")
+    parser.add_argument("--stream", action="store_true", help="Replay responses through the streaming parser")
+    parser.add_argument(
+        "--stream-stop-early",
+        action="store_true",
+        help="With --stream, close the stream after the first tool call (drops later batched actions)",
+    )
+    cli_args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    trajectories = [load_trajectory(Path(p)) for p in cli_args.trajectories] or [BUILTIN_TRAJECTORY, BUILTIN_BATCH_TRAJECTORY]
+    # The agent prints its progress to stdout; keep stdout for the report only.
+    with contextlib.redirect_stdout(sys.stderr):
+        reports = [
+            run_benchmark(
+                trajectory,
+                repeat=cli_args.repeat,
+                llm_latency=cli_args.llm_latency,
+                result_root=cli_args.result_root,
+                batch_actions=cli_args.batch,
+                use_async=cli_args.use_async,
+                stream=cli_args.stream or cli_args.stream_stop_early,
+                stream_stop_early=cli_args.stream_stop_early,
+            )
+            for trajectory in trajectories
+        ]
+    if cli_args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        print("\n\n".join(_format_report(report) for report in reports))
+
+
+if __name__ == "__main__":
+    _main()
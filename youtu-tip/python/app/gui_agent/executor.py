@@ -0,0 +1,333 @@
+# File: python/app/gui_agent/executor.py
+# Project: Tip Desktop Assistant
+# Description: Dispatches typed GUI actions to input backends (pyautogui, Quartz) instead of exec()-ing generated code.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Structured action execution for the GUI agent.
+
+Environments used to ``exec`` the pyautogui snippet returned by the parser,
+paying for compilation on every step and relying on substring checks to
+special-case shortcuts. ``ActionExecutor`` dispatches on ``Action.kind`` to an
+``ActionBackend`` method; plain strings (e.g. replayed trajectories) are parsed
+back into actions first and only unrecognised code falls back to ``exec``.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+from abc import ABC, abstractmethod
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+from .actions import Action, parse_action_code
+from .timing import StageTimer, stage
+
+logger = logging.getLogger("desktopenv.executor")
+
+try:  # Quartz（pyobjc）为可选依赖，仅 macOS 可用
+    import Quartz  # type: ignore[import-not-found]
+except ImportError:  # pragma: no cover - optional dependency
+    Quartz = None  # type: ignore[assignment]
+
+# command+control+shift+3：截图到剪贴板，pyautogui 无法可靠触发，改用 screencapture
+_CLIPBOARD_SCREENSHOT_KEYS = frozenset({"command", "control", "shift", "3"})
+_KEY_ALIASES = {"cmd": "command", "ctrl": "control", "option": "alt", "return": "enter"}
+
+
+def _normalize_keys(keys: Iterable[str]) -> List[str]:
+    return [_KEY_ALIASES.get(str(key).lower(), str(key).lower()) for key in keys]
+
+
+@dataclass
+class ActionResult:
+    kind: str
+    ok: bool
+    elapsed_ms: float
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"kind": self.kind, "ok": self.ok, "elapsed_ms": round(self.elapsed_ms, 3)}
+        if self.error:
+            payload["error"] = self.error
+        return payload
+
+
+class ActionBackend(ABC):
+    """Input primitives an executor dispatches to; a backend must implement every primitive."""
+
+    name = "base"
+
+    @abstractmethod
+    def click(self, x: Optional[int], y: Optional[int], *, button: str = "left", clicks: int = 1) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def scroll(self, amount: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def type_text(self, text: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def hotkey(self, keys: Sequence[str]) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def press(self, key: str) -> None:
+        raise NotImplementedError
+
+    def run_code(self, code: str) -> None:
+        """Legacy fallback for code the action parser does not recognise."""
+        raise NotImplementedError(f"{self.name} backend cannot run raw code")
+
+
+class PyAutoGUIBackend(ActionBackend):
+    """pyautogui/pyperclip backend; mirrors what the exec()-ed snippets used to do."""
+
+    name = "pyautogui"
+
+    def __init__(self) -> None:
+        # 延迟导入：pyautogui 在导入时就需要显示服务
+        import pyautogui
+
+        self._gui = pyautogui
+
+    def click(self, x: Optional[int], y: Optional[int], *, button: str = "left", clicks: int = 1) -> None:
+        if x is None or y is None:
+            self._gui.click(clicks=clicks, button=button)
+        else:
+            self._gui.click(x, y, clicks=clicks, button=button)
+
+    def move_to(self, x: int, y: int) -> None:
+        self._gui.moveTo(x, y)
+
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        self._gui.dragTo(x, y, duration=duration)
+
+    def scroll(self, amount: int) -> None:
+        self._gui.scroll(amount)
+
+    def type_text(self, text: str) -> None:
+        # Clipboard paste avoids per-character latency and keeps unicode intact.
+        import pyperclip
+
+        pyperclip.copy(text)
+        self._gui.hotkey("command", "v")
+
+    def hotkey(self, keys: Sequence[str]) -> None:
+        if set(_normalize_keys(keys)) == _CLIPBOARD_SCREENSHOT_KEYS and self._screencapture_to_clipboard():
+            return
+        self._gui.hotkey(*keys)
+
+    def press(self, key: str) -> None:
+        self._gui.press(key)
+
+    def run_code(self, code: str) -> None:
+        # keyDown/keyUp 序列形式的截图快捷键仍走原生命令
+        lowered = code.replace('"', "'")
+        if (
+            all(f"keyDown('{key}')" in lowered for key in ("command", "control", "shift"))
+            and ("keyDown('3')" in lowered or "press('3')" in lowered)
+            and self._screencapture_to_clipboard()
+        ):
+            return
+        exec(code, {"pyautogui": self._gui, "time": time})
+
+    @staticmethod
+    def _screencapture_to_clipboard() -> bool:
+        logger.info("Detected screenshot to clipboard command, using native screencapture")
+        try:
+            subprocess.run(["screencapture", "-c"], check=True)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            logger.error(f"screencapture command failed: {exc}")
+            return False
+        return True
+
+
+class QuartzBackend(PyAutoGUIBackend):
+    """
+    Posts CoreGraphics events directly for pointer and text input.
+
+    Skips pyautogui's per-call bookkeeping and types unicode without touching
+    the clipboard. Key combinations still go through pyautogui, which already
+    owns the macOS keycode table.
+    """
+
+    name = "quartz"
+
+    _BUTTONS = {
+        "left": ("kCGEventLeftMouseDown", "kCGEventLeftMouseUp", "kCGMouseButtonLeft"),
+        "right": ("kCGEventRightMouseDown", "kCGEventRightMouseUp", "kCGMouseButtonRight"),
+        "middle": ("kCGEventOtherMouseDown", "kCGEventOtherMouseUp", "kCGMouseButtonCenter"),
+    }
+
+    def __init__(self) -> None:
+        if Quartz is None:
+            raise RuntimeError("Quartz backend requires pyobjc-framework-Quartz")
+        super().__init__()
+
+    def click(self, x: Optional[int], y: Optional[int], *, button: str = "left", clicks: int = 1) -> None:
+        down_type, up_type, button_id = (getattr(Quartz, name) for name in self._BUTTONS[button])
+        point = self._point(x, y)
+        for index in range(1, clicks + 1):
+            for event_type in (down_type, up_type):
+                event = Quartz.CGEventCreateMouseEvent(None, event_type, point, button_id)
+                # clickState 让系统把连续点击识别为双击
+                Quartz.CGEventSetIntegerValueField(event, Quartz.kCGMouseEventClickState, index)
+                Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def move_to(self, x: int, y: int) -> None:
+        event = Quartz.CGEventCreateMouseEvent(
+            None, Quartz.kCGEventMouseMoved, (x, y), Quartz.kCGMouseButtonLeft
+        )
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def scroll(self, amount: int) -> None:
+        event = Quartz.CGEventCreateScrollWheelEvent(None, Quartz.kCGScrollEventUnitLine, 1, int(amount))
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def type_text(self, text: str) -> None:
+        # 每个事件最多携带 20 个 UTF-16 单元
+        for start in range(0, len(text), 20):
+            chunk = text[start : start + 20]
+            for key_down in (True, False):
+                event = Quartz.CGEventCreateKeyboardEvent(None, 0, key_down)
+                Quartz.CGEventKeyboardSetUnicodeString(event, len(chunk), chunk)
+                Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+    def _point(self, x: Optional[int], y: Optional[int]):
+        if x is None or y is None:
+            return Quartz.CGEventGetLocation(Quartz.CGEventCreate(None))
+        return (x, y)
+
+
+BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    QuartzBackend.name: QuartzBackend,
+}
+
+
+def build_backend(name: str = "pyautogui") -> ActionBackend:
+    """Instantiate a backend by name; an unavailable Quartz falls back to pyautogui."""
+    backend_cls = BACKENDS.get((name or "pyautogui").lower())
+    if backend_cls is None:
+        raise ValueError(f"Unknown action backend: {name}")
+    try:
+        return backend_cls()
+    except RuntimeError as exc:
+        logger.warning(f"{exc}; falling back to pyautogui backend")
+        return PyAutoGUIBackend()
+
+
+class ActionExecutor:
+    """Execute actions against a backend and keep per-kind latency counters."""
+
+    def __init__(
+        self,
+        backend: ActionBackend,
+        *,
+        stage_timer: Optional[StageTimer] = None,
+        allow_code_fallback: bool = True,
+    ) -> None:
+        self.backend = backend
+        self.stage_timer = stage_timer
+        self.allow_code_fallback = allow_code_fallback
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def execute(self, action: Union[Action, str]) -> ActionResult:
+        """Run one action; failures are reported in the result rather than raised."""
+        parsed = parse_action_code(action)
+        kind = parsed.kind if parsed is not None else "code"
+        started = time.perf_counter()
+        error: Optional[str] = None
+        with stage(self.stage_timer, "execute"):
+            try:
+                if parsed is not None:
+                    self._dispatch(parsed)
+                elif self.allow_code_fallback:
+                    logger.debug("Falling back to exec for unrecognised action: %s", action)
+                    self.backend.run_code(str(action))
+                else:
+                    raise ValueError(f"Unrecognised action: {action}")
+            except Exception as exc:  # noqa: BLE001 - envs report errors in step info
+                error = str(exc) or exc.__class__.__name__
+                logger.error(f"Error executing {kind} action: {error}")
+        result = ActionResult(kind=kind, ok=error is None, elapsed_ms=(time.perf_counter() - started) * 1000, error=error)
+        self._record(result)
+        return result
+
+    def execute_many(self, actions: Iterable[Union[Action, str]]) -> List[ActionResult]:
+        """Execute in order, stopping after the first failure."""
+        results: List[ActionResult] = []
+        for action in actions:
+            result = self.execute(action)
+            results.append(result)
+            if not result.ok:
+                break
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            kind: {
+                "count": int(entry["count"]),
+                "errors": int(entry["errors"]),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 3) if entry["count"] else 0.0,
+            }
+            for kind, entry in self._stats.items()
+        }
+
+    def _dispatch(self, action: Action) -> None:
+        params = action.params
+        backend = self.backend
+        if action.is_control:
+            # WAIT/DONE/FAIL 由环境自身处理
+            return
+        if action.kind == "click":
+            backend.click(params["x"], params["y"], button=params["button"], clicks=params["clicks"])
+        elif action.kind == "move":
+            backend.move_to(params["x"], params["y"])
+        elif action.kind == "drag":
+            backend.drag_to(params["x"], params["y"], params["duration"])
+        elif action.kind == "scroll":
+            backend.scroll(params["amount"])
+        elif action.kind == "type":
+            backend.type_text(params["text"])
+        elif action.kind == "hotkey":
+            backend.hotkey(params["keys"])
+        elif action.kind == "press":
+            backend.press(params["key"])
+        else:  # pragma: no cover - ACTION_KINDS is closed
+            raise ValueError(f"Unsupported action kind: {action.kind}")
+
+    def _record(self, result: ActionResult) -> None:
+        entry = self._stats.setdefault(result.kind, {"count": 0, "errors": 0, "total_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += result.elapsed_ms
+        if not result.ok:
+            entry["errors"] += 1
+
+
+__all__ = [
+    "ActionBackend",
+    "ActionExecutor",
+    "ActionResult",
+    "PyAutoGUIBackend",
+    "QuartzBackend",
+    "build_backend",
+]
@@ -0,0 +1,81 @@
+# File: python/app/gui_agent/llm_config.py
+# Project: Tip Desktop Assistant
+# Description: Per-run LLM provider configuration for the GUI agent, replacing process-wide env patching.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+DEFAULT_OLLAMA_BASE_URL = "http://127.0.0.1:11434"
+
+
+@dataclass(frozen=True)
+class AgentLLMConfig:
+    """
+    Provider settings for one GUI agent run.
+
+    The sidecar builds one of these per run from the active VLM profile, so
+    concurrent runs never share (or race on) ``os.environ``. The CLI keeps
+    working through ``from_env`` which reads the legacy TIP_* variables.
+    """
+
+    provider: str = "tip_cloud"
+    model: Optional[str] = None
+    timeout: float = 60.0
+    base_url: Optional[str] = None
+    openai_base_url: Optional[str] = None
+    openai_api_key: str = ""
+    headers: Dict[str, str] = field(default_factory=dict)
+    ollama_base_url: str = DEFAULT_OLLAMA_BASE_URL
+    ollama_model: Optional[str] = None
+
+    @classmethod
+    def from_env(cls) -> "AgentLLMConfig":
+        headers: Dict[str, str] = {}
+        # Optional headers support both JSON blob and raw Authorization strings.
+        extra_headers = os.environ.get("TIP_LLM_HEADERS")
+        if extra_headers:
+            try:
+                headers = dict(json.loads(extra_headers))
+            except (json.JSONDecodeError, TypeError, ValueError):
+                headers = {"Authorization": extra_headers}
+        return cls(
+            provider=(os.environ.get("TIP_LLM_PROVIDER") or "tip_cloud").lower(),
+            model=os.environ.get("TIP_LLM_MODEL") or os.environ.get("MODEL_NAME"),
+            timeout=float(os.environ.get("TIP_LLM_TIMEOUT", 60)),
+            base_url=os.environ.get("TIP_LLM_BASE_URL"),
+            openai_base_url=os.environ.get("TIP_OPENAI_BASE_URL"),
+            openai_api_key=(
+                os.environ.get("TIP_OPENAI_API_KEY")
+                or os.environ.get("OPENAI_API_KEY")
+                or ""
+            ).strip(),
+            headers=headers,
+            ollama_base_url=os.environ.get("TIP_OLLAMA_BASE_URL") or DEFAULT_OLLAMA_BASE_URL,
+            ollama_model=os.environ.get("TIP_OLLAMA_MODEL"),
+        )
+
+    def redacted(self) -> Dict[str, object]:
+        """Loggable view without secrets."""
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "timeout": self.timeout,
+            "base_url": self.base_url,
+            "openai_base_url": self.openai_base_url,
+            "ollama_base_url": self.ollama_base_url,
+            "ollama_model": self.ollama_model,
+            "has_api_key": bool(self.openai_api_key),
+            "header_keys": sorted(self.headers),
+        }
+
+
+__all__ = ["AgentLLMConfig", "DEFAULT_OLLAMA_BASE_URL"]
@@ -11,11 +11,13 @@ import logging
 import time
 import pyautogui
 import threading
-from typing import Dict, Any, Tuple, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from io import BytesIO
 from PIL import Image
 import numpy as np
 
+from .executor import ActionExecutor, build_backend
+
 logger = logging.getLogger("desktopenv.local_macos")
 
 
@@ -32,6 +34,7 @@ class LocalMacOSEnv:
         screen_height: int = None,
         platform: str = "macos",
         downsample_factor: int = 2,  # 下采样倍数
+        backend: str = "pyautogui",
     ):
         """
         初始化本地MacOS环境
@@ -42,6 +45,7 @@ class LocalMacOSEnv:
             screen_height: 屏幕高度（如果为None，会自动获取）
             platform: 平台类型，默认为"macos"
             downsample_factor: 截图下采样倍数，默认为2（即长宽各缩小2倍）
+            backend: 动作执行后端，"pyautogui" 或 "quartz"
         """
         self.action_space = action_space
         self.platform = platform
@@ -62,6 +66,10 @@ class LocalMacOSEnv:
         # 设置pyautogui的安全设置
         pyautogui.FAILSAFE = True  # 鼠标移到屏幕角落可以中止
         pyautogui.PAUSE = 0.5  # 每个pyautogui调用之间的暂停时间
+
+        # 结构化动作执行器，替代 exec() 生成代码
+        self.executor = ActionExecutor(build_backend(backend))
+        logger.info(f"Action backend: {self.executor.backend.name}")
         
         # 用于兼容性的属性
         self.env_id = "local_macos"
@@ -138,7 +146,7 @@ class LocalMacOSEnv:
         执行一个动作
         
         Args:
-            action: pyautogui代码字符串
+            action: Action（或等价的 pyautogui 代码字符串）
             pause: 执行后的暂停时间（秒）
             
         Returns:
@@ -151,55 +159,7 @@ class LocalMacOSEnv:
         info = {}
         
         try:
-            # 检查是否是特殊动作
-            if action == "DONE":
-                logger.info("Task marked as DONE")
-                done = True
-                reward = 1.0
-                info["termination"] = "success"
-            elif action == "FAIL":
-                logger.info("Task marked as FAIL")
-                done = True
-                reward = 0.0
-                info["termination"] = "failure"
-            elif action == "WAIT":
-                logger.info("Waiting...")
-                time.sleep(2)
-            else:
-                # 特殊处理：macOS 截图到剪贴板（Command+Control+Shift+3）
-                # 检测是否是截图快捷键组合
-                is_screenshot_to_clipboard = (
-                    "keyDown('command')" in action and
-                    "keyDown('control')" in action and
-                    "keyDown('shift')" in action and
-                    ("keyDown('3')" in action or "press('3')" in action)
-                )
-                
-                if is_screenshot_to_clipboard:
-                    logger.info("Detected screenshot to clipboard command, using native screencapture")
-                    import subprocess
-                    try:
-                        # 使用 macOS 原生命令截图到剪贴板
-                        # -c 参数表示复制到剪贴板
-                        subprocess.run(['screencapture', '-c'], check=True)
-                        logger.info("Screenshot captured to clipboard using screencapture")
-                    except subprocess.CalledProcessError as e:
-                        logger.error(f"screencapture command failed: {e}")
-                        # 如果失败，回退到 pyautogui 方式
-                        safe_globals = {
-                            "pyautogui": pyautogui,
-                            "time": time,
-                        }
-                        exec(action, safe_globals)
-                else:
-                    # 执行pyautogui代码
-                    # 为了安全，使用受限的命名空间
-                    safe_globals = {
-                        "pyautogui": pyautogui,
-                        "time": time,
-                    }
-                    exec(action, safe_globals)
-                    logger.info("Action executed successfully")
+            reward, done, info = self._apply_action(action)
             
             # 等待指定时间
             time.sleep(pause)
@@ -235,6 +195,118 @@ class LocalMacOSEnv:
             info["error"] = str(e)
             return obs, 0.0, False, info
     
+    def step_batch(
+        self,
+        actions: Sequence[str],
+        pause: float = 0.5,
+        *,
+        settle: float = 0.1,
+        on_action: Optional[Callable[[int, str], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        连续执行同一次回复中的多个动作，只在最后截一次图
+        
+        中间动作之间只做短暂的稳定检查（settle），不再逐个截图；
+        遇到 DONE/FAIL、执行错误或取消时提前结束，剩余动作不执行。
+        
+        流式模式下若开启 stream_stop_after_first（TIP_GUI_STREAM_STOP_EARLY），
+        回复在第一个 </tool_call> 处截断，每轮只剩一个动作，批量执行不再生效；
+        默认读完整轮回复，批量执行正常。可用 benchmark 的 --stream /
+        --stream-stop-early 对比。
+        
+        Args:
+            actions: 动作列表
+            pause: 最后一个动作后的暂停时间（秒）
+            settle: 相邻动作之间最长的稳定等待时间（秒）
+            on_action: 每个动作执行前的回调 (index, action)
+            stop_event: 取消信号
+            
+        Returns:
+            (observation, results)，results 为每个已执行动作的 {action, reward, done, info}
+        """
+        results: List[Dict[str, Any]] = []
+        # pyautogui.PAUSE 会在每次调用后固定休眠，批量执行时改由 settle 检查控制节奏
+        saved_pause = pyautogui.PAUSE
+        pyautogui.PAUSE = 0
+        try:
+            for index, action in enumerate(actions):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                if index > 0:
+                    self._settle(actions[index - 1], settle)
+                if on_action is not None:
+                    on_action(index, action)
+                logger.info(f"Executing action {index + 1}/{len(actions)}: {action}")
+                try:
+                    reward, done, info = self._apply_action(action)
+                except Exception as e:
+                    logger.error(f"Error executing action: {e}")
+                    reward, done, info = 0.0, False, {"error": str(e)}
+                results.append({"action": action, "reward": reward, "done": done, "info": info})
+                if done or info.get("error"):
+                    break
+        finally:
+            pyautogui.PAUSE = saved_pause
+        
+        time.sleep(pause)
+        try:
+            obs = self._get_obs()
+        except Exception as e:
+            logger.error(f"Error capturing screenshot after batch: {e}")
+            obs = {"screenshot": b"", "accessibility_tree": None}
+        return obs, results
+    
+    def _apply_action(self, action: str) -> Tuple[float, bool, Dict[str, Any]]:
+        """执行单个动作（不截图），返回 (reward, done, info)"""
+        done = False
+        reward = 0.0
+        info: Dict[str, Any] = {}
+        # 检查是否是特殊动作
+        if action == "DONE":
+            logger.info("Task marked as DONE")
+            done = True
+            reward = 1.0
+            info["termination"] = "success"
+        elif action == "FAIL":
+            logger.info("Task marked as FAIL")
+            done = True
+            reward = 0.0
+            info["termination"] = "failure"
+        elif action == "WAIT":
+            logger.info("Waiting...")
+            time.sleep(2)
+        else:
+            # 按动作类型分发到输入后端；截图快捷键等特殊组合由后端处理
+            result = self.executor.execute(action)
+            info["action"] = result.to_dict()
+            if result.ok:
+                logger.info(f"Action executed successfully in {result.elapsed_ms:.1f}ms")
+            else:
+                info["error"] = result.error
+        return reward, done, info
+    
+    def _settle(self, previous: str, timeout: float) -> None:
+        """
+        稳定检查：指针动作等待光标到位，其余动作给界面一个最短的响应时间
+        """
+        if timeout <= 0:
+            return
+        params = getattr(previous, "params", None) or {}
+        target = (params.get("x"), params.get("y"))
+        deadline = time.monotonic() + timeout
+        if getattr(previous, "kind", None) in {"click", "move", "drag"} and None not in target:
+            while time.monotonic() < deadline:
+                x, y = pyautogui.position()
+                if abs(x - target[0]) <= 1 and abs(y - target[1]) <= 1:
+                    break
+                time.sleep(0.01)
+        # 按键与输入需要让目标应用处理事件队列
+        time.sleep(max(0.0, min(0.05, deadline - time.monotonic())))
+    
+    # evaluate() 不做真实校验，回放缓存不能把它的分数当作成功信号
+    verifies_success = False
+
     def evaluate(self) -> float:
         """
         评估任务完成情况
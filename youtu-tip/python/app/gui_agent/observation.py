@@ -0,0 +1,195 @@
+# File: python/app/gui_agent/observation.py
+# Project: Tip Desktop Assistant
+# Description: Change-focused observations: detects changed regions between frames and builds
+# crop transforms so the agent can send only the active region to the VLM.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+OBSERVATION_MODES = ("full", "crop", "thumbnail", "both")
+
+
+@dataclass(frozen=True)
+class CropTransform:
+    """Rectangle of the original screen that was sent to the model."""
+
+    left: int
+    top: int
+    width: int
+    height: int
+
+    @property
+    def box(self) -> Tuple[int, int, int, int]:
+        return (self.left, self.top, self.left + self.width, self.top + self.height)
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """Map a point in crop pixels back to screen pixels."""
+        return int(self.left + x), int(self.top + y)
+
+    def to_normalized(self, screen_width: int, screen_height: int, base: float = 1000.0) -> Dict[str, int]:
+        """Describe the crop on the model's 0-1000 full-screen grid (for prompts/logs)."""
+        left, top, right, bottom = self.box
+        return {
+            "left": int(left / screen_width * base),
+            "top": int(top / screen_height * base),
+            "right": int(right / screen_width * base),
+            "bottom": int(bottom / screen_height * base),
+        }
+
+
+class ChangeDetector:
+    """
+    Find the dominant changed region between consecutive screenshots.
+
+    Frames are downsampled to grayscale and split into a coarse grid; changed
+    cells are grouped into 4-connected components and the largest component
+    wins, so small unrelated updates (clock, cursor, the status overlay) do
+    not blow the crop up to the whole desktop.
+    """
+
+    def __init__(
+        self,
+        *,
+        downsample: int = 8,
+        cell_size: int = 8,
+        pixel_threshold: int = 18,
+        cell_ratio: float = 0.02,
+        padding: int = 48,
+        min_width: int = 480,
+        min_height: int = 320,
+        max_area_ratio: float = 0.6,
+    ) -> None:
+        self.downsample = downsample
+        self.cell_size = cell_size
+        self.pixel_threshold = pixel_threshold
+        self.cell_ratio = cell_ratio
+        self.padding = padding
+        self.min_width = min_width
+        self.min_height = min_height
+        self.max_area_ratio = max_area_ratio
+        self._previous: Optional[np.ndarray] = None
+        self._previous_size: Optional[Tuple[int, int]] = None
+
+    def reset(self) -> None:
+        self._previous = None
+        self._previous_size = None
+
+    def update(self, image: Image.Image) -> Optional[CropTransform]:
+        """Store ``image`` as the latest frame and return the changed region, if useful."""
+        width, height = image.size
+        small = np.asarray(
+            image.convert("L").resize(
+                (max(1, width // self.downsample), max(1, height // self.downsample))
+            ),
+            dtype=np.int16,
+        )
+        previous, previous_size = self._previous, self._previous_size
+        self._previous, self._previous_size = small, (width, height)
+        if previous is None or previous_size != (width, height):
+            return None
+
+        changed = np.abs(small - previous) > self.pixel_threshold
+        box = self._largest_changed_box(changed)
+        if box is None:
+            return None
+        return self._to_transform(box, width, height)
+
+    def _largest_changed_box(self, changed: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        rows = max(1, changed.shape[0] // self.cell_size)
+        cols = max(1, changed.shape[1] // self.cell_size)
+        trimmed = changed[: rows * self.cell_size, : cols * self.cell_size]
+        if trimmed.size == 0:
+            return None
+        cells = trimmed.reshape(rows, self.cell_size, cols, self.cell_size).mean(axis=(1, 3)) > self.cell_ratio
+        if not cells.any():
+            return None
+
+        seen = np.zeros_like(cells, dtype=bool)
+        best: Optional[Tuple[int, Tuple[int, int, int, int]]] = None
+        for start in zip(*np.nonzero(cells)):
+            if seen[start]:
+                continue
+            count, box = self._flood(cells, seen, start)
+            if best is None or count > best[0]:
+                best = (count, box)
+        if best is None:
+            return None
+        r0, c0, r1, c1 = best[1]
+        scale = self.cell_size * self.downsample
+        return (c0 * scale, r0 * scale, (c1 + 1) * scale, (r1 + 1) * scale)
+
+    @staticmethod
+    def _flood(cells: np.ndarray, seen: np.ndarray, start: Tuple[int, int]):
+        queue = deque([start])
+        seen[start] = True
+        r0 = r1 = start[0]
+        c0 = c1 = start[1]
+        count = 0
+        while queue:
+            r, c = queue.popleft()
+            count += 1
+            r0, r1, c0, c1 = min(r0, r), max(r1, r), min(c0, c), max(c1, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if 0 <= nr < cells.shape[0] and 0 <= nc < cells.shape[1] and cells[nr, nc] and not seen[nr, nc]:
+                    seen[nr, nc] = True
+                    queue.append((nr, nc))
+        return count, (r0, c0, r1, c1)
+
+    def _to_transform(self, box: Tuple[int, int, int, int], width: int, height: int) -> Optional[CropTransform]:
+        left, top, right, bottom = box
+        left, top = left - self.padding, top - self.padding
+        right, bottom = right + self.padding, bottom + self.padding
+        left, right = _grow(left, right, self.min_width, width)
+        top, bottom = _grow(top, bottom, self.min_height, height)
+        crop_w, crop_h = right - left, bottom - top
+        if crop_w <= 0 or crop_h <= 0:
+            return None
+        if crop_w * crop_h > self.max_area_ratio * width * height:
+            # Most of the screen changed (app switch, scroll); a crop would not save much.
+            return None
+        return CropTransform(left=left, top=top, width=crop_w, height=crop_h)
+
+
+def _grow(start: int, end: int, minimum: int, limit: int) -> Tuple[int, int]:
+    """Expand [start, end) to at least ``minimum`` and clamp it into [0, limit)."""
+    minimum = min(minimum, limit)
+    if end - start < minimum:
+        extra = minimum - (end - start)
+        start -= extra // 2
+        end += extra - extra // 2
+    if start < 0:
+        end, start = end - start, 0
+    if end > limit:
+        start, end = max(0, start - (end - limit)), limit
+    return start, end
+
+
+def crop_image(image: Image.Image, transform: CropTransform) -> Image.Image:
+    return image.crop(transform.box)
+
+
+def load_frame(image_bytes: bytes) -> Image.Image:
+    image = Image.open(BytesIO(image_bytes))
+    image.load()
+    return image
+
+
+__all__: List[str] = [
+    "OBSERVATION_MODES",
+    "ChangeDetector",
+    "CropTransform",
+    "crop_image",
+    "load_frame",
+]
@@ -7,36 +7,49 @@
 # Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
 # Modifications must retain this notice.
 
-import base64
+import asyncio
 import json
 import logging
-import os
 import re
-from io import BytesIO
-from typing import Dict, List, Optional, Tuple
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 
 import backoff
 import httpx
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from PIL import Image
 
+from .actions import Action, parse_action_code
+from .llm_config import DEFAULT_OLLAMA_BASE_URL, AgentLLMConfig
+from .observation import OBSERVATION_MODES, ChangeDetector, CropTransform, crop_image, load_frame
+from .qwen_history import build_history_policy
+from .qwen_image_encoder import AdaptiveImageEncoder, EncodedImage
 from .qwen_prompting import PromptBuilder
+from .qwen_response_parser import StreamingToolCallParser
 from .qwen_response_parser import parse_response as parse_tool_response
 from .qwen_skills import SkillManager
-from .qwen_vl_utils import process_image
+from .replay_cache import ReplaySession, TrajectoryCache
 from .skills import SkillRepository
+from .timing import StageTimer, stage
 
 
-logger = None
-
-# API base URLs are resolved lazily so they can be overridden by environment at runtime.
-# Ollama keeps a local default to simplify offline testing scenarios.
-# These defaults mirror the sidecar configuration to avoid divergence between services.
+# Provider endpoints/credentials come from a per-run AgentLLMConfig; when none is
+# passed the legacy TIP_* environment variables are read at reset() time.
 MAX_RETRY_TIMES = 5
 MAX_SKILL_TURNS = 3
-DEFAULT_TIP_BASE_URL = os.environ.get("TIP_LLM_BASE_URL")
-DEFAULT_OPENAI_BASE_URL = os.environ.get("TIP_OPENAI_BASE_URL")
-DEFAULT_OLLAMA_BASE_URL = os.environ.get("TIP_OLLAMA_BASE_URL") or "http://127.0.0.1:11434"
+THUMBNAIL_TOKENS = 256
+
+
+@dataclass
+class _TurnContext:
+    """Sizing info carried from observation encoding to action parsing."""
+
+    width: int
+    height: int
+    processed_width: int
+    processed_height: int
+    crop_transform: Optional[CropTransform]
 
 
 class Qwen3VLAgent:
@@ -53,6 +66,10 @@ class Qwen3VLAgent:
         presence_penalty: float = 1.5,
         action_space: str = "pyautogui",
         observation_type: str = "screenshot",
+        observation_mode: str = "full",
+        history_policy: str = "sliding",
+        stream: bool = False,
+        stream_stop_after_first: bool = False,
         max_steps: int = 15,
         history_n: int = 4,  # kept for backward compatibility
         add_thought_prefix: bool = False,
@@ -60,11 +77,13 @@ class Qwen3VLAgent:
         enable_thinking: bool = False,
         thinking_budget: int = 32768,
         skills_repo: Optional[SkillRepository] = None,
+        llm_config: Optional[AgentLLMConfig] = None,
     ):
+        self._explicit_llm_config = llm_config
+        self.llm_config = llm_config or AgentLLMConfig.from_env()
         resolved_model = (
             model
-            or os.environ.get("TIP_LLM_MODEL")
-            or os.environ.get("MODEL_NAME")
+            or self.llm_config.model
             or "Qwen3-32B"
         )
         self.platform = platform
@@ -84,10 +103,35 @@ class Qwen3VLAgent:
         self.skill_manager = SkillManager(skills_repo)
         self.prompt_builder = PromptBuilder()
         self.latest_skill_outputs: List[Dict[str, str]] = []
+        self.logger: Optional[logging.Logger] = None
+        # 编码器依赖运行时的 TIP_LLM_PROVIDER，因此在 reset() 中按 provider 创建
+        self.image_encoder: Optional[AdaptiveImageEncoder] = None
+        self.latest_image_stats: Dict[str, object] = {}
+        self.observation_mode = observation_mode
+        self.change_detector = ChangeDetector()
+        self._force_full_frame = False
+        self.history_policy = build_history_policy(history_policy)
+        self.latest_history_stats: Dict[str, object] = {}
+        # Streaming mode surfaces partial thoughts through event_callback (set by run_loop).
+        # The turn is read to the end because one response may carry several actions;
+        # stream_stop_after_first aborts generation once the first block closes instead.
+        self.stream = stream
+        self.stream_stop_after_first = stream_stop_after_first
+        self.event_callback: Optional[Callable[[Dict], None]] = None
+        self.latest_stream_stats: Dict[str, object] = {}
+        # Optional profiler (benchmark harness); None keeps the hot path free of timing calls.
+        self.stage_timer: Optional[StageTimer] = None
+        # Set by the runner: recorded successful trajectories are replayed without model calls
+        # while the screen keeps matching; the first divergence hands over to the model.
+        self.replay_cache: Optional[TrajectoryCache] = None
+        self._replay: Optional[ReplaySession] = None
+        self._replay_checked = False
+        self.latest_replay_stats: Dict[str, object] = {}
 
         # Guard rails to avoid sending unsupported control types.
         assert action_space in ["pyautogui"], "Invalid action space"
         assert observation_type in ["screenshot"], "Invalid observation type"
+        assert observation_mode in OBSERVATION_MODES, "Invalid observation mode"
 
         # Conversation state is tracked so each predict call can continue the thread.
         # Screen width/height are cached to rebuild prompts only when layout changes.
@@ -103,82 +147,173 @@ class Qwen3VLAgent:
         Predict the next action(s) based on the current observation.
         Returns (response, pyautogui_code).
         """
+        replayed = self._try_replay(instruction, obs)
+        if replayed is not None:
+            return replayed
+        turn = self._prepare_turn(instruction, obs)
+        response_raw = self._chat_with_skills()
+        return self._finish_turn(response_raw, turn)
+
+    async def apredict(self, instruction: str, obs: Dict) -> List:
+        """
+        Asyncio variant of ``predict``.
+
+        Image encoding runs in a worker thread and the LLM request is awaited,
+        so cancelling the calling task aborts the in-flight HTTP request (and
+        any pending retry sleep) instead of waiting for it to finish.
+        """
+        replayed = await asyncio.to_thread(self._try_replay, instruction, obs)
+        if replayed is not None:
+            return replayed
+        turn = await asyncio.to_thread(self._prepare_turn, instruction, obs)
+        response_raw = await self._achat_with_skills()
+        return self._finish_turn(response_raw, turn)
+
+    def _try_replay(self, instruction: str, obs: Dict) -> Optional[Tuple[str, List]]:
+        """Return the next cached (response, actions) while the screen matches the recording."""
+        if self.replay_cache is None:
+            return None
+        if not self._replay_checked:
+            # Only a fresh conversation can start a replay; the lookup happens once per run.
+            self._replay_checked = True
+            if not self.conversation_started:
+                self._replay = self.replay_cache.start_session(instruction, obs["screenshot"])
+        if self._replay is None or not self._replay.active:
+            return None
+        step = self._replay.next_step(obs["screenshot"])
+        self.latest_replay_stats = self._replay.stats()
+        if step is None:
+            self._emit_status(
+                "Screen differs from the cached run, asking the model",
+                {"replay": self.latest_replay_stats},
+            )
+            return None
+
+        actions = [parse_action_code(code) or code for code in step.actions]
+        match = re.search(r"Action:\s*(.+)", step.response)
+        self.executed_actions.append(match.group(1).strip() if match else "Replayed cached step")
+        self.latest_skill_outputs = []
+        self.latest_image_stats = {}
+        self.latest_history_stats = {}
+        self.latest_stream_stats = {}
+        self.logger.info(f"Replaying cached step {self._replay.index}: {step.actions}")
+        self._emit_status(
+            f"Replaying cached step {self._replay.index}/{len(self._replay.trajectory.steps)}",
+            {"replay": self.latest_replay_stats},
+        )
+        return self._strip_skill_markers(step.response), actions
+
+    def _prepare_turn(self, instruction: str, obs: Dict) -> _TurnContext:
+        """Encode the observation and append the user turn to the transcript."""
         # Vision inputs are available as raw bytes; both original and processed sizes are tracked.
         # Coordinate scaling depends on these dimensions to keep actions accurate on screen.
         # Decode screenshot payload to collect sizing info for coordinate scaling.
         screenshot_bytes = obs["screenshot"]
 
-        image = Image.open(BytesIO(screenshot_bytes))
-        width, height = image.size
-        print(f"Original screen resolution: {width}x{height}")
-
-        processed_image = process_image(screenshot_bytes)
-        processed_img = Image.open(BytesIO(base64.b64decode(processed_image)))
-        processed_width, processed_height = processed_img.size
-        print(
-            "Processed image resolution: "
-            f"{processed_width}x{processed_height}"
+        if self.image_encoder is None:
+            self.image_encoder = AdaptiveImageEncoder(provider=self.llm_config.provider)
+        with stage(self.stage_timer, "preprocess"):
+            frame = load_frame(screenshot_bytes)
+            width, height = frame.size
+            encoded, context_images, crop_transform, note = self._build_observation(frame)
+        processed_image = encoded.base64
+        processed_width, processed_height = encoded.width, encoded.height
+        self.logger.info(
+            "Screen %dx%d -> processed %dx%d (%s visual tokens, %s bytes, %s)",
+            width,
+            height,
+            processed_width,
+            processed_height,
+            self.latest_image_stats["visual_tokens"],
+            self.latest_image_stats["bytes"],
+            self.latest_image_stats["observation"],
         )
 
         # Ensure system prompt reflects latest canvas size and skill catalog.
-        self._ensure_system_prompt(width, height)
+        self._ensure_system_prompt(width, height, instruction)
         if not self.conversation_started:
             initial_message = self.prompt_builder.build_user_message(
                 text=instruction,
                 image_base64=processed_image,
+                mime_type=encoded.mime_type,
+                context_images=context_images,
+                note=note,
             )
             self.messages.append(initial_message)
             self.conversation_started = True
         else:
+            # Large skill libraries only list top-k titles up front; surface newly
+            # relevant ones for this step without touching the system prompt.
+            last_action = self.executed_actions[-1] if self.executed_actions else ""
+            skill_hint = self.skill_manager.build_step_hint(f"{instruction}\n{last_action}")
+            note = "\n\n".join(part for part in (note, skill_hint) if part) or None
             followup_message = self.prompt_builder.build_user_message(
                 text=None,
                 image_base64=processed_image,
+                mime_type=encoded.mime_type,
+                context_images=context_images,
+                note=note,
             )
             self.messages.append(followup_message)
 
         # Track the whole transcript so the agent can refine plans while preserving context.
         # Each turn may carry at most one image to keep payloads small for the backend.
         # Text-only turns skip attaching the user instruction after the first call.
-        # Send the updated transcript to LLM and capture raw response.
         self._log_conversation_transcript("LLM conversation context")
-        response_raw = self._chat_with_skills()
+        return _TurnContext(
+            width=width,
+            height=height,
+            processed_width=processed_width,
+            processed_height=processed_height,
+            crop_transform=crop_transform,
+        )
 
+    def _finish_turn(self, response_raw: str, turn: _TurnContext) -> List:
+        """Parse the final response of a turn into (response, pyautogui_code)."""
         response_for_parse = self._strip_skill_markers(response_raw)
         response_display = response_for_parse
 
-        logger.info(f"Qwen3VL Output: {response_display}")
+        self.logger.info(f"Qwen3VL Output: {response_display}")
 
         # Parse structured action output into low-level instructions and code.
-        low_level_instruction, pyautogui_code = parse_tool_response(
-            response_for_parse,
-            coordinate_type=self.coordinate_type,
-            logger=logger,
-            original_width=width,
-            original_height=height,
-            processed_width=processed_width,
-            processed_height=processed_height,
-        )
+        with stage(self.stage_timer, "parse"):
+            low_level_instruction, pyautogui_code = parse_tool_response(
+                response_for_parse,
+                coordinate_type=self.coordinate_type,
+                logger=self.logger,
+                original_width=turn.width,
+                original_height=turn.height,
+                processed_width=turn.processed_width,
+                processed_height=turn.processed_height,
+                crop_transform=turn.crop_transform,
+            )
+
+        # Skill-only turns carry no action but are not parse failures.
+        if pyautogui_code or not self.latest_skill_outputs:
+            self.image_encoder.record_result(bool(pyautogui_code))
+            # A crop that did not yield an action is retried with the full screen, and
+            # `wait` is how the region prompt asks for one when the target is off-crop.
+            self._force_full_frame = not pyautogui_code or any(
+                getattr(action, "kind", None) == "wait" for action in pyautogui_code
+            )
 
-        logger.info(f"Low level instruction: {low_level_instruction}")
-        logger.info(f"Pyautogui code: {pyautogui_code}")
+        self.logger.info(f"Low level instruction: {low_level_instruction}")
+        self.logger.info(f"Pyautogui code: {pyautogui_code}")
 
-        # 打印当前动作（彩色输出）
-        print(f"\033[1;35m🎯 Current Action:\033[0m")
+        # 当前动作摘要（过长时截断）
         action_display = (
             low_level_instruction
             if len(low_level_instruction) <= 200
             else low_level_instruction[:67] + "..."
         )
-        print(f"   {action_display}")
-        
+        self.logger.info("Current action: %s", action_display)
         if pyautogui_code:
             code_display = (
                 pyautogui_code[0]
                 if len(pyautogui_code[0]) <= 200
                 else pyautogui_code[0][:67] + "..."
             )
-            print(f"\033[1;34m💻 Code:\033[0m {code_display}")
-        print()
+            self.logger.info("Action code: %s", code_display)
 
         self.executed_actions.append(low_level_instruction or "Skill interaction")
 
@@ -193,13 +328,64 @@ class Qwen3VLAgent:
             # Hard stop prevents the agent from looping endlessly when UI is unresponsive.
             # We still emit a FAIL code so upstream can surface a clear status.
             # The low-level instruction is overwritten to clarify the reason to the user.
-            logger.warning(f"Reached maximum steps {self.max_steps}. Forcing termination.")
+            self.logger.warning(f"Reached maximum steps {self.max_steps}. Forcing termination.")
             low_level_instruction = 'Fail the task because reaching the maximum step limit.'
-            pyautogui_code = ['FAIL']
+            pyautogui_code = [Action.fail()]
 
         return response_display, pyautogui_code
 
 
+    def _build_observation(
+        self,
+        frame: Image.Image,
+    ) -> Tuple[EncodedImage, List[Tuple[str, str]], Optional[CropTransform], Optional[str]]:
+        """
+        Encode the observation according to ``observation_mode``.
+        Returns (image to act on, context images, crop transform, prompt note).
+        """
+        width, height = frame.size
+        region = None
+        if self.observation_mode in ("crop", "both"):
+            # The detector must see every frame so the next diff is against the latest one.
+            region = self.change_detector.update(frame)
+            if self._force_full_frame:
+                region = None
+        self._force_full_frame = False
+
+        context_images: List[Tuple[str, str]] = []
+        note = None
+        context_tokens = 0
+        if region is not None:
+            encoded = self.image_encoder.encode(crop_image(frame, region))
+            if self.observation_mode == "both":
+                thumbnail = self.image_encoder.encode(frame, token_budget=THUMBNAIL_TOKENS)
+                context_images.append((thumbnail.base64, thumbnail.mime_type))
+                context_tokens = thumbnail.visual_tokens
+            normalized = region.to_normalized(width, height)
+            note = self.prompt_builder.build_region_note(
+                region=normalized,
+                has_context=bool(context_images),
+            )
+            observation = self.observation_mode
+        elif self.observation_mode == "thumbnail":
+            encoded = self.image_encoder.encode(frame, token_budget=THUMBNAIL_TOKENS)
+            normalized = None
+            observation = "thumbnail"
+        else:
+            encoded = self.image_encoder.encode(frame)
+            normalized = None
+            observation = "full"
+
+        self.latest_image_stats = {
+            **encoded.stats(),
+            **self.image_encoder.state(),
+            "observation": observation,
+            "region": normalized,
+            "context_tokens": context_tokens,
+            "visual_tokens": encoded.visual_tokens + context_tokens,
+        }
+        return encoded, context_images, region, note
+
     def _chat_with_skills(self) -> str:
         """
         Run the LLM conversation loop, handling skill lookups inline.
@@ -211,61 +397,91 @@ class Qwen3VLAgent:
         skill_turns = 0
 
         while True:
-            # Prepare payload in OpenAI-compatible format so multiple providers work.
-            # Messages are trimmed just before sending to avoid oversized bodies.
-            # Sampling params are kept small because downstream tool parsing is brittle.
-            payload = {
-                "model": self.model,
-                "messages": self._prepare_messages_for_send(),
-                "max_tokens": self.max_tokens,
-                "top_p": self.top_p,
-                "temperature": self.temperature,
-            }
-            response_raw = self.call_llm(payload, self.model)
-            self.messages.append(
-                {
-                    "role": "assistant",
-                    "content": [{"type": "text", "text": response_raw}],
-                }
-            )
-
-            # Detect inline skill requests (<skill> markers) and resolve them before continuing.
-            skill_refs = self.skill_manager.extract_requests(response_raw)
-            if not skill_refs:
+            with stage(self.stage_timer, "llm"):
+                response_raw = self.call_llm(self._build_chat_payload(), self.model)
+            if not self._absorb_response(response_raw):
+                break
+            skill_turns += 1
+            if skill_turns >= MAX_SKILL_TURNS:
+                # Avoid infinite loops when the model keeps asking for skills.
+                self.logger.warning("Skill lookup loop exceeded limit, returning latest response.")
                 break
 
-            self.latest_skill_outputs = []
-            for ref in skill_refs:
-                # Each skill request is immediately answered inline, letting the LLM iterate.
-                reply_text, found = self.skill_manager.build_skill_reply(ref)
-                self.latest_skill_outputs.append(
-                    {
-                        "title": ref,
-                        "body": reply_text,
-                        "available": found,
-                    }
-                )
-                self.messages.append(
-                    {
-                        "role": "user",
-                        "content": [{"type": "text", "text": reply_text}],
-                    }
-                )
+        return response_raw
+
+    async def _achat_with_skills(self) -> str:
+        """Awaitable twin of ``_chat_with_skills``; shares payload and skill handling."""
+        response_raw = ""
+        self.latest_skill_outputs = []
+        skill_turns = 0
 
+        while True:
+            with stage(self.stage_timer, "llm"):
+                response_raw = await self.acall_llm(self._build_chat_payload(), self.model)
+            if not self._absorb_response(response_raw):
+                break
             skill_turns += 1
             if skill_turns >= MAX_SKILL_TURNS:
-                # Avoid infinite loops when the model keeps asking for skills.
-                logger.warning("Skill lookup loop exceeded limit, returning latest response.")
+                self.logger.warning("Skill lookup loop exceeded limit, returning latest response.")
                 break
 
         return response_raw
 
-    def _ensure_system_prompt(self, width: int, height: int) -> None:
+    def _build_chat_payload(self) -> Dict:
+        # Prepare payload in OpenAI-compatible format so multiple providers work.
+        # Messages are trimmed just before sending to avoid oversized bodies.
+        # Sampling params are kept small because downstream tool parsing is brittle.
+        return {
+            "model": self.model,
+            "messages": self._prepare_messages_for_send(),
+            "max_tokens": self.max_tokens,
+            "top_p": self.top_p,
+            "temperature": self.temperature,
+        }
+
+    def _absorb_response(self, response_raw: str) -> bool:
+        """
+        Append the assistant turn and answer any inline skill requests.
+        Returns True when skills were requested and the model should be asked again.
+        """
+        self.messages.append(
+            {
+                "role": "assistant",
+                "content": [{"type": "text", "text": response_raw}],
+            }
+        )
+
+        # Detect inline skill requests (<skill> markers) and resolve them before continuing.
+        skill_refs = self.skill_manager.extract_requests(response_raw)
+        if not skill_refs:
+            return False
+
+        self.latest_skill_outputs = []
+        for ref in skill_refs:
+            # Each skill request is immediately answered inline, letting the LLM iterate.
+            reply_text, found = self.skill_manager.build_skill_reply(ref)
+            self.latest_skill_outputs.append(
+                {
+                    "title": ref,
+                    "body": reply_text,
+                    "available": found,
+                }
+            )
+            self.messages.append(
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": reply_text}],
+                }
+            )
+        return True
+
+    def _ensure_system_prompt(self, width: int, height: int, instruction: Optional[str] = None) -> None:
         # Skip rebuilding prompt when viewport unchanged to reduce token churn.
         if self.screen_width == width and self.screen_height == height and self.messages:
             return
 
-        skill_section = self.skill_manager.build_catalog_section()
+        # The catalog is ranked against the task so large libraries stay within a top-k budget.
+        skill_section = self.skill_manager.build_catalog_section(instruction)
         # The system prompt bundles viewport dimensions and skill catalog.
         # This is rehydrated into the first message so downstream models stay aligned.
         system_prompt = self.prompt_builder.build_system_prompt(
@@ -294,8 +510,8 @@ class Qwen3VLAgent:
         return re.sub(r"<skill>.*?</skill>", "", response, flags=re.IGNORECASE | re.DOTALL).strip()
 
     def reset(self, _logger=None):
-        global logger
-        logger = (
+        # Logger is per instance so concurrent runs write to their own runtime.log.
+        self.logger = (
             _logger if _logger is not None
             else logging.getLogger("desktopenv.qwen3vl_agent")
         )
@@ -308,6 +524,19 @@ class Qwen3VLAgent:
         self.screen_height = None
         self.latest_skill_outputs = []
         self.skill_manager.reset_cache()
+        if self._explicit_llm_config is None:
+            # CLI runs may change TIP_* variables between runs; re-read them here.
+            self.llm_config = AgentLLMConfig.from_env()
+        self.image_encoder = AdaptiveImageEncoder(provider=self.llm_config.provider)
+        self.latest_image_stats = {}
+        self.change_detector.reset()
+        self._force_full_frame = False
+        self.history_policy.reset()
+        self.latest_history_stats = {}
+        self.latest_stream_stats = {}
+        self._replay = None
+        self._replay_checked = False
+        self.latest_replay_stats = {}
     
     @backoff.on_exception(
         backoff.constant,
@@ -317,28 +546,43 @@ class Qwen3VLAgent:
     )
     def call_llm(self, payload, model):
         # Dispatch to configured provider; defaults to Tip Cloud compatible endpoint.
-        provider = (os.environ.get("TIP_LLM_PROVIDER") or "tip_cloud").lower()
+        provider = (self.llm_config.provider or "tip_cloud").lower()
+        if self.stream:
+            if provider == "ollama":
+                return self._collect_stream(self._stream_ollama_deltas(payload, model))
+            return self._collect_stream(self._stream_openai_deltas(payload, model))
         if provider == "ollama":
             return self._call_llm_ollama(payload, model)
         if provider in {"static_openai", "tip_cloud"}:
             return self._call_llm_openai(payload, model)
         return self._call_llm_openai(payload, model)
 
+    @backoff.on_exception(
+        backoff.constant,
+        (httpx.HTTPError, RuntimeError),
+        interval=3,
+        max_tries=5,
+    )
+    async def acall_llm(self, payload, model):
+        # Same dispatch and retry policy as call_llm; backoff sleeps with asyncio.sleep,
+        # so task cancellation also interrupts a pending retry.
+        provider = (self.llm_config.provider or "tip_cloud").lower()
+        if self.stream:
+            if provider == "ollama":
+                return await self._acollect_stream(self._astream_ollama_deltas(payload, model))
+            return await self._acollect_stream(self._astream_openai_deltas(payload, model))
+        if provider == "ollama":
+            return await self._acall_llm_ollama(payload, model)
+        return await self._acall_llm_openai(payload, model)
+
     def _call_llm_tip(self, payload, model):
         """Call the Tip API provider (OpenAI compatible chat/completions)."""
-        base_url = os.environ.get("TIP_LLM_BASE_URL", DEFAULT_TIP_BASE_URL)
-        url = base_url.rstrip("/") + "/chat/completions"
+        config = self.llm_config
+        url = (config.base_url or "").rstrip("/") + "/chat/completions"
 
         headers = {"Content-Type": "application/json"}
-        # Optional headers support both JSON blob and raw Authorization strings.
-        extra_headers = os.environ.get("TIP_LLM_HEADERS")
-        if extra_headers:
-            try:
-                headers.update(json.loads(extra_headers))
-            except json.JSONDecodeError:
-                headers["Authorization"] = extra_headers
-
-        timeout = float(os.environ.get("TIP_LLM_TIMEOUT", 60))
+        headers.update(config.headers)
+        timeout = config.timeout
 
         body = dict(payload)
         body["model"] = model or self.model
@@ -349,7 +593,7 @@ class Qwen3VLAgent:
         body["extra_body"] = {"reasoning": {"enabled": False}}
 
         # Use plain POST instead of SDK to minimize dependencies in the sidecar.
-        logger.info(f"[TipLLM] POST {url} model={body['model']}")
+        self.logger.info(f"[TipLLM] POST {url} model={body['model']}")
         response = httpx.post(url, json=body, headers=headers, timeout=timeout)
         response.raise_for_status()
         data = response.json()
@@ -360,58 +604,166 @@ class Qwen3VLAgent:
         return text
 
     def _call_llm_openai(self, payload, model):
-        base_url = os.environ.get("TIP_OPENAI_BASE_URL", DEFAULT_OPENAI_BASE_URL).rstrip("/")
-        api_key = (
-            os.environ.get("TIP_OPENAI_API_KEY")
-            or os.environ.get("OPENAI_API_KEY")
-            or ""
-        ).strip()
+        client, body, timeout = self._build_openai_request(payload, model)
+        body["stream"] = False
+        try:
+            response = client.chat.completions.create(timeout=timeout, **body)
+        finally:
+            client.close()
+        data = response.model_dump()
+        text = self._extract_text_from_tip_response(data)
+        if not text:
+            raise RuntimeError("OpenAI response missing content")
+        return text
+
+    def _stream_openai_deltas(self, payload, model) -> Iterator[str]:
+        client, body, timeout = self._build_openai_request(payload, model)
+        body["stream"] = True
+        try:
+            stream = client.chat.completions.create(timeout=timeout, **body)
+            try:
+                for chunk in stream:
+                    for choice in chunk.choices or []:
+                        content = getattr(choice.delta, "content", None)
+                        if content:
+                            yield content
+            finally:
+                # Closing the HTTP response is what makes the server stop generating.
+                stream.close()
+        finally:
+            client.close()
+
+    async def _acall_llm_openai(self, payload, model):
+        client, body, timeout = self._build_openai_request(payload, model, use_async=True)
+        body["stream"] = False
+        try:
+            response = await client.chat.completions.create(timeout=timeout, **body)
+        finally:
+            await client.close()
+        data = response.model_dump()
+        text = self._extract_text_from_tip_response(data)
+        if not text:
+            raise RuntimeError("OpenAI response missing content")
+        return text
+
+    async def _astream_openai_deltas(self, payload, model) -> AsyncIterator[str]:
+        client, body, timeout = self._build_openai_request(payload, model, use_async=True)
+        body["stream"] = True
+        try:
+            stream = await client.chat.completions.create(timeout=timeout, **body)
+            try:
+                async for chunk in stream:
+                    for choice in chunk.choices or []:
+                        content = getattr(choice.delta, "content", None)
+                        if content:
+                            yield content
+            finally:
+                await stream.close()
+        finally:
+            await client.close()
+
+    def _build_openai_request(
+        self,
+        payload,
+        model,
+        *,
+        use_async: bool = False,
+    ) -> Tuple[OpenAI, Dict, float]:
+        config = self.llm_config
+        api_key = config.openai_api_key
         if not api_key:
             raise RuntimeError("OpenAI API Key not configured")
-        extra_headers = os.environ.get("TIP_LLM_HEADERS")
-        default_headers = None
-        if extra_headers:
-            try:
-                default_headers = json.loads(extra_headers)
-            except json.JSONDecodeError:
-                default_headers = {"Authorization": extra_headers}
         # Build client per-call to keep configuration localized.
         client_kwargs = {
             "api_key": api_key,
-            "base_url": base_url,
+            "base_url": (config.openai_base_url or "").rstrip("/") or None,
         }
-        if default_headers:
-            client_kwargs["default_headers"] = default_headers
+        if config.headers:
+            client_kwargs["default_headers"] = dict(config.headers)
 
         body = dict(payload)
         body["model"] = model or self.model
         body.setdefault("max_tokens", self.max_tokens)
         body.setdefault("temperature", self.temperature)
         body.setdefault("top_p", self.top_p)
-        body["stream"] = False
 
         # Client is created per-call so different runs can swap API keys on the fly.
-        client = OpenAI(**client_kwargs)
-        timeout = float(os.environ.get("TIP_LLM_TIMEOUT", 60))
-        response = client.chat.completions.create(timeout=timeout, **body)
-        data = response.model_dump()
-        text = self._extract_text_from_tip_response(data)
+        client = (AsyncOpenAI if use_async else OpenAI)(**client_kwargs)
+        return client, body, config.timeout
+
+    def _call_llm_ollama(self, payload, model):
+        chat_url, body, timeout = self._build_ollama_request(payload, model)
+        # Ollama endpoint is local; prefer short timeouts to surface errors quickly.
+        self.logger.info(f"[Ollama] POST {chat_url} model={body['model']}")
+        response = httpx.post(chat_url, json=body, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        text = self._extract_text_from_ollama_response(data)
         if not text:
-            raise RuntimeError("OpenAI response missing content")
+            raise RuntimeError("Ollama response missing content")
         return text
 
-    def _call_llm_ollama(self, payload, model):
-        base_url = os.environ.get("TIP_OLLAMA_BASE_URL", DEFAULT_OLLAMA_BASE_URL).rstrip("/")
-        chat_url = base_url + "/api/chat"
-        resolved_model = os.environ.get("TIP_OLLAMA_MODEL") or model or self.model
-        timeout = float(os.environ.get("TIP_LLM_TIMEOUT", 60))
+    def _stream_ollama_deltas(self, payload, model) -> Iterator[str]:
+        chat_url, body, timeout = self._build_ollama_request(payload, model)
+        body["stream"] = True
+        self.logger.info(f"[Ollama] POST {chat_url} model={body['model']} (stream)")
+        # Leaving the context manager closes the connection, which aborts generation.
+        with httpx.stream("POST", chat_url, json=body, timeout=timeout) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {data['error']}")
+                content = (data.get("message") or {}).get("content")
+                if content:
+                    yield content
+                if data.get("done"):
+                    break
+
+    async def _acall_llm_ollama(self, payload, model):
+        chat_url, body, timeout = self._build_ollama_request(payload, model)
+        self.logger.info(f"[Ollama] POST {chat_url} model={body['model']}")
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.post(chat_url, json=body)
+        response.raise_for_status()
+        text = self._extract_text_from_ollama_response(response.json())
+        if not text:
+            raise RuntimeError("Ollama response missing content")
+        return text
+
+    async def _astream_ollama_deltas(self, payload, model) -> AsyncIterator[str]:
+        chat_url, body, timeout = self._build_ollama_request(payload, model)
+        body["stream"] = True
+        self.logger.info(f"[Ollama] POST {chat_url} model={body['model']} (stream)")
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            async with client.stream("POST", chat_url, json=body) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama stream error: {data['error']}")
+                    content = (data.get("message") or {}).get("content")
+                    if content:
+                        yield content
+                    if data.get("done"):
+                        break
+
+    def _build_ollama_request(self, payload, model) -> Tuple[str, Dict, float]:
+        config = self.llm_config
+        chat_url = (config.ollama_base_url or DEFAULT_OLLAMA_BASE_URL).rstrip("/") + "/api/chat"
+        resolved_model = config.ollama_model or model or self.model
+        timeout = config.timeout
         options = {
             "temperature": payload.get("temperature", self.temperature),
             "num_predict": payload.get("max_tokens", self.max_tokens),
         }
         # Keep only essential fields to match Ollama chat API surface.
         # Messages are normalised so images live in a dedicated array.
-        # Streaming is disabled here because the agent loop expects full text.
+        # Non-streaming callers get the full text in one response.
         messages = self._normalize_ollama_messages(payload.get("messages") or [])
         body = {
             "model": resolved_model,
@@ -419,15 +771,83 @@ class Qwen3VLAgent:
             "stream": False,
             "options": options,
         }
-        # Ollama endpoint is local; prefer short timeouts to surface errors quickly.
-        logger.info(f"[Ollama] POST {chat_url} model={resolved_model}")
-        response = httpx.post(chat_url, json=body, timeout=timeout)
-        response.raise_for_status()
-        data = response.json()
-        text = self._extract_text_from_ollama_response(data)
-        if not text:
-            raise RuntimeError("Ollama response missing content")
-        return text
+        return chat_url, body, timeout
+
+    def _collect_stream(self, deltas: Iterator[str]) -> str:
+        """
+        Drain a token stream through the incremental parser, emitting thought
+        deltas. Reads to the end of the turn unless ``stream_stop_after_first``.
+        """
+        parser = StreamingToolCallParser(stop_after_first=self.stream_stop_after_first)
+        started = time.perf_counter()
+        first_token_ms = None
+        try:
+            for delta in deltas:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                if self._feed_stream(parser, delta):
+                    break
+        finally:
+            deltas.close()
+        return self._finish_stream(parser, started, first_token_ms)
+
+    async def _acollect_stream(self, deltas: AsyncIterator[str]) -> str:
+        parser = StreamingToolCallParser(stop_after_first=self.stream_stop_after_first)
+        started = time.perf_counter()
+        first_token_ms = None
+        try:
+            async for delta in deltas:
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                if self._feed_stream(parser, delta):
+                    break
+        finally:
+            # Closing the generator closes the HTTP response, which stops generation.
+            await deltas.aclose()
+        return self._finish_stream(parser, started, first_token_ms)
+
+    def _feed_stream(self, parser: StreamingToolCallParser, delta: str) -> bool:
+        """Feed one delta; returns True once the parser wants the stream closed."""
+        thought = parser.feed(delta)
+        if thought:
+            self._emit_thought(thought)
+        return parser.complete
+
+    def _finish_stream(
+        self,
+        parser: StreamingToolCallParser,
+        started: float,
+        first_token_ms: Optional[float],
+    ) -> str:
+        tail = parser.flush()
+        if tail:
+            self._emit_thought(tail)
+        self.latest_stream_stats = {
+            "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "chars": len(parser.text),
+            "blocks": parser.blocks,
+            "stopped_early": parser.complete,
+        }
+        if not parser.text.strip():
+            raise RuntimeError("Streamed LLM response missing content")
+        return parser.text
+
+    def _emit_thought(self, text: str) -> None:
+        if self.event_callback is None:
+            return
+        try:
+            self.event_callback({"type": "thought", "message": text, "details": {"partial": True}})
+        except Exception as exc:  # noqa: BLE001 - UI callbacks must not break the agent loop
+            self.logger.warning(f"Thought callback failed: {exc}")
+
+    def _emit_status(self, message: str, details: Dict) -> None:
+        if self.event_callback is None:
+            return
+        try:
+            self.event_callback({"type": "status", "message": message, "details": details})
+        except Exception as exc:  # noqa: BLE001 - UI callbacks must not break the agent loop
+            self.logger.warning(f"Status callback failed: {exc}")
 
     @staticmethod
     def _extract_text_from_tip_response(resp: Dict) -> str:
@@ -508,7 +928,7 @@ class Qwen3VLAgent:
         return ""
 
     def _log_conversation_transcript(self, prefix: str) -> None:
-        if logger is None:
+        if self.logger is None:
             return
         lines = []
         for idx, message in enumerate(self.messages, start=1):
@@ -526,58 +946,14 @@ class Qwen3VLAgent:
             text = " ".join(fragments).strip() or "(empty)"
             lines.append(f"{idx}. [{role}] {text}")
         if lines:
-            logger.debug("%s\n%s", prefix, "\n".join(lines))
+            self.logger.debug("%s\n%s", prefix, "\n".join(lines))
 
-    def _prepare_messages_for_send(
-        self,
-        *,
-        max_messages: int = 12,
-        max_images: int = 1,
-    ) -> List[Dict]:
+    def _prepare_messages_for_send(self) -> List[Dict]:
         """
-        Trim conversation to avoid oversized payloads:
-        - Always keep system prompt if present.
-        - Limit total messages and inline images (keep only the latest image).
-        - Older image messages have their images stripped and replaced with a short note.
+        Build the payload transcript via the configured history policy:
+        - sliding: legacy 12-message window keeping only the latest observation's images.
+        - append_only: byte-stable prefix with rare bulk compaction (KV-cache friendly).
         """
-        if not self.messages:
-            return []
-
-        # A shallow copy lets us remove system prompt temporarily without mutating state.
-        # The method is intentionally conservative: it never adds new content,
-        # it only discards items that would otherwise bloat the payload.
-        system_msg = None
-        remaining = list(self.messages)
-        if remaining and (remaining[0].get("role") == "system"):
-            system_msg = remaining.pop(0)
-
-        trimmed: List[Dict] = []
-        image_budget = max_images
-        for raw in reversed(remaining):
-            role = raw.get("role", "user")
-            parts = raw.get("content", [])
-            text_parts = [p for p in parts if p.get("type") == "text"]
-            image_parts = [p for p in parts if p.get("type") == "image_url"]
-
-            content: List[Dict] = []
-            if image_parts and image_budget > 0:
-                image_budget -= 1
-                if text_parts:
-                    content.extend(text_parts)
-                content.append(image_parts[0])
-            else:
-                if text_parts:
-                    content.extend(text_parts)
-                elif image_parts:
-                    content.append({"type": "text", "text": "(previous screenshot omitted)"})
-
-            trimmed.append({"role": role, "content": content})
-            if len(trimmed) >= max_messages:
-                break
-
-        # Restore chronological order and reattach system prompt if present.
-        # This keeps downstream models aligned with the original conversation flow.
-        trimmed.reverse()
-        if system_msg:
-            trimmed.insert(0, system_msg)
-        return trimmed
+        payload = self.history_policy.prepare(self.messages)
+        self.latest_history_stats = dict(self.history_policy.last_stats)
+        return payload
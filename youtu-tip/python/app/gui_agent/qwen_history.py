@@ -0,0 +1,287 @@
+# File: python/app/gui_agent/qwen_history.py
+# Project: Tip Desktop Assistant
+# Description: Message history policies for the Qwen agent: the legacy sliding window and an
+# append-only policy that keeps the prompt prefix byte-stable for server-side KV caching.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+OMITTED_SCREENSHOT_TEXT = "(previous screenshot omitted)"
+HISTORY_POLICIES = ("sliding", "append_only")
+
+
+class HistoryPolicy(ABC):
+    """Base class: turns the agent transcript into the payload actually sent."""
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self.last_stats: Dict[str, object] = {}
+        self._previous_serialized: List[str] = []
+        self._serialized_cache: Dict[Hashable, str] = {}
+
+    def reset(self) -> None:
+        self.last_stats = {}
+        self._previous_serialized = []
+        self._serialized_cache = {}
+
+    def prepare(self, messages: List[Dict]) -> List[Dict]:
+        payload = self._build(messages)
+        self._record_stats(payload)
+        return payload
+
+    @abstractmethod
+    def _build(self, messages: List[Dict]) -> List[Dict]:
+        """Return the messages to send for this step."""
+
+    def _record_stats(self, payload: List[Dict], **extra: object) -> None:
+        # Prefix reuse is estimated per message: the leading messages whose
+        # serialization is byte-identical to the previous request can be served
+        # from the provider's prefix/KV cache.
+        keys = [_content_key(message) for message in payload]
+        serialized = [self._serialize(message, key) for message, key in zip(payload, keys)]
+        total = sum(len(item) for item in serialized) or 1
+        reused = 0
+        for current, previous in zip(serialized, self._previous_serialized):
+            if current != previous:
+                break
+            reused += len(current)
+        self._previous_serialized = serialized
+        self._serialized_cache = dict(zip(keys, serialized))
+        self.last_stats = {
+            "policy": self.name,
+            "messages": len(payload),
+            "images": sum(_count_images(message) for message in payload),
+            "prefix_reuse": round(reused / total, 4),
+            "reused_bytes": reused,
+            "total_bytes": total,
+            **extra,
+        }
+
+    def _serialize(self, message: Dict, key: Hashable) -> str:
+        # Keyed on content, not identity: the agent rewrites the system prompt in place.
+        cached = self._serialized_cache.get(key)
+        if cached is not None:
+            return cached
+        return json.dumps(message, ensure_ascii=False, sort_keys=True)
+
+
+class SlidingWindowHistory(HistoryPolicy):
+    """
+    Legacy behaviour: keep the system prompt, the last ``max_messages`` turns and
+    only the latest observation's images. Older images become a short note, so
+    the prefix shifts every step.
+    """
+
+    name = "sliding"
+
+    def __init__(self, *, max_messages: int = 12, max_images: int = 1) -> None:
+        super().__init__()
+        self.max_messages = max_messages
+        self.max_images = max_images
+
+    def _build(self, messages: List[Dict]) -> List[Dict]:
+        if not messages:
+            return []
+
+        # A shallow copy lets us remove system prompt temporarily without mutating state.
+        # The method is intentionally conservative: it never adds new content,
+        # it only discards items that would otherwise bloat the payload.
+        system_msg, remaining = _split_system(messages)
+
+        trimmed: List[Dict] = []
+        image_budget = self.max_images
+        for raw in reversed(remaining):
+            role = raw.get("role", "user")
+            parts = raw.get("content", [])
+            if any(p.get("type") == "image_url" for p in parts) and image_budget > 0:
+                image_budget -= 1
+                # Keep every image of the latest observation (e.g. thumbnail + crop) in order.
+                content = [p for p in parts if p.get("type") in ("text", "image_url")]
+            else:
+                content = _strip_images(parts)
+
+            trimmed.append({"role": role, "content": content})
+            if len(trimmed) >= self.max_messages:
+                break
+
+        # Restore chronological order and reattach system prompt if present.
+        # This keeps downstream models aligned with the original conversation flow.
+        trimmed.reverse()
+        if system_msg:
+            trimmed.insert(0, system_msg)
+        return trimmed
+
+
+class AppendOnlyHistory(HistoryPolicy):
+    """
+    Keep the sent transcript append-only so the request prefix stays byte-identical
+    between steps. When the window grows past ``max_messages`` or ``max_images``,
+    everything but the last ``keep_recent`` turns is folded into one summary
+    message in a single compaction step; the result is then frozen again.
+    """
+
+    name = "append_only"
+
+    def __init__(self, *, max_messages: int = 40, max_images: int = 6, keep_recent: int = 8) -> None:
+        super().__init__()
+        self.max_messages = max_messages
+        self.max_images = max_images
+        self.keep_recent = max(2, keep_recent)
+        self._prefix: List[Dict] = []
+        self._consumed = 0
+        self.compactions = 0
+
+    def reset(self) -> None:
+        super().reset()
+        self._prefix = []
+        self._consumed = 0
+        self.compactions = 0
+
+    def prepare(self, messages: List[Dict]) -> List[Dict]:
+        payload, compacted = self._build_with_flag(messages)
+        self._record_stats(payload, compacted=compacted, compactions=self.compactions)
+        return payload
+
+    def _build(self, messages: List[Dict]) -> List[Dict]:
+        return self._build_with_flag(messages)[0]
+
+    def _build_with_flag(self, messages: List[Dict]) -> Tuple[List[Dict], bool]:
+        if not messages:
+            return [], False
+        system_msg, remaining = _split_system(messages)
+        if self._consumed > len(remaining):
+            # Transcript was reset underneath us; start a fresh prefix.
+            self._prefix, self._consumed = [], 0
+
+        window = self._prefix + remaining[self._consumed:]
+        compacted = False
+        if len(window) > self.max_messages or sum(_count_images(m) for m in window) > self.max_images:
+            window = self._compact(window)
+            self._prefix = window
+            self._consumed = len(remaining)
+            self.compactions += 1
+            compacted = True
+
+        payload = list(window)
+        if system_msg:
+            payload.insert(0, system_msg)
+        return payload, compacted
+
+    def _compact(self, window: List[Dict]) -> List[Dict]:
+        cut = max(1, len(window) - self.keep_recent)
+        # Start the kept tail on an assistant turn so roles keep alternating after the summary.
+        while cut < len(window) - 1 and window[cut].get("role") != "assistant":
+            cut += 1
+        summary = {
+            "role": "user",
+            "content": [{"type": "text", "text": _summarize(window[:cut])}],
+        }
+        recent = window[cut:]
+        # Only the newest observation keeps its images; the rest are frozen as text.
+        latest_image_idx: Optional[int] = None
+        for idx in range(len(recent) - 1, -1, -1):
+            if _count_images(recent[idx]):
+                latest_image_idx = idx
+                break
+        kept: List[Dict] = []
+        for idx, message in enumerate(recent):
+            if idx == latest_image_idx or not _count_images(message):
+                kept.append(message)
+            else:
+                kept.append({"role": message.get("role", "user"), "content": _strip_images(message.get("content", []))})
+        return [summary] + kept
+
+
+def build_history_policy(name: Optional[str]) -> HistoryPolicy:
+    key = (name or "sliding").strip().lower()
+    if key == "append_only":
+        return AppendOnlyHistory()
+    if key == "sliding":
+        return SlidingWindowHistory()
+    raise ValueError(f"Unknown history policy: {name}")
+
+
+_ACTION_RE = re.compile(r"Action:\s*(.*)", re.IGNORECASE)
+_SUMMARY_HEADER = "Summary of earlier steps (screenshots omitted):"
+
+
+def _summarize(messages: List[Dict]) -> str:
+    lines: List[str] = []
+    step = 0
+    for message in messages:
+        text = " ".join(
+            part.get("text", "") for part in message.get("content", []) if part.get("type") == "text"
+        ).strip()
+        if not text:
+            continue
+        if text.startswith(_SUMMARY_HEADER):
+            # Fold a previous summary in verbatim so compactions compose.
+            lines.extend(text[len(_SUMMARY_HEADER):].strip().splitlines())
+            step = sum(1 for line in lines if line[:1].isdigit())
+            continue
+        role = message.get("role")
+        if role == "assistant":
+            match = _ACTION_RE.search(text)
+            action = match.group(1) if match else text
+            for marker in ("<tool_call", "<skill"):
+                action = action.split(marker, 1)[0]
+            step += 1
+            lines.append(f"{step}. {_shorten(action.strip() or 'tool call')}")
+        elif role == "user" and not lines:
+            # The first user turn carries the task instruction.
+            lines.append(f"Task: {_shorten(text, 400)}")
+        elif role == "user" and text != OMITTED_SCREENSHOT_TEXT and not text.startswith("###"):
+            lines.append(f"   note: {_shorten(text)}")
+    return "\n".join([_SUMMARY_HEADER] + lines)
+
+
+def _shorten(text: str, limit: int = 160) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _split_system(messages: List[Dict]) -> Tuple[Optional[Dict], List[Dict]]:
+    if messages and messages[0].get("role") == "system":
+        return messages[0], list(messages[1:])
+    return None, list(messages)
+
+
+def _content_key(value: Any) -> Hashable:
+    """Hashable snapshot of a message; str hashes are cached, so base64 images stay cheap."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _content_key(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_content_key(item) for item in value)
+    return value
+
+
+def _count_images(message: Dict) -> int:
+    return sum(1 for part in message.get("content", []) if part.get("type") == "image_url")
+
+
+def _strip_images(parts: List[Dict]) -> List[Dict]:
+    text_parts = [p for p in parts if p.get("type") == "text"]
+    if text_parts:
+        return text_parts
+    if any(p.get("type") == "image_url" for p in parts):
+        return [{"type": "text", "text": OMITTED_SCREENSHOT_TEXT}]
+    return []
+
+
+__all__ = [
+    "HISTORY_POLICIES",
+    "AppendOnlyHistory",
+    "HistoryPolicy",
+    "SlidingWindowHistory",
+    "build_history_policy",
+]
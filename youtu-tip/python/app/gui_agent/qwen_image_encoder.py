@@ -0,0 +1,233 @@
+# File: python/app/gui_agent/qwen_image_encoder.py
+# Project: Tip Desktop Assistant
+# Description: Token-budget-aware screenshot encoder that adapts resolution/quality per provider
+# and learns from parse success of previous steps.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import base64
+import os
+import time
+from dataclasses import dataclass, replace
+from io import BytesIO
+from typing import Dict, Optional, Union
+
+from PIL import Image, features
+
+from .qwen_vl_utils import update_image_size_
+
+
+@dataclass(frozen=True)
+class EncoderBudget:
+    """Visual-token / payload budget for one provider."""
+
+    max_visual_tokens: int
+    max_bytes: int
+    max_long_side: int = 1600
+    min_scale: float = 0.55  # lowest fraction of max_visual_tokens the encoder may drop to
+    quality: int = 72
+    min_quality: int = 50
+    max_quality: int = 85
+    image_format: str = "jpeg"  # jpeg | webp
+    patch_size: int = 16  # Qwen3-VL patch; Qwen2.5-VL uses 14
+    merge_base: int = 2
+
+
+# 默认预算与旧版 process_image (~1.5MP / 1600px / q72) 对齐，避免精度回退；
+# 本地 Ollama 预填充更慢，因此默认预算更小。
+PROVIDER_BUDGETS: Dict[str, EncoderBudget] = {
+    "tip_cloud": EncoderBudget(max_visual_tokens=1464, max_bytes=600_000),
+    "static_openai": EncoderBudget(max_visual_tokens=1464, max_bytes=600_000),
+    "ollama": EncoderBudget(max_visual_tokens=1024, max_bytes=400_000, min_scale=0.6),
+}
+
+_SCALE_STEP = 0.1
+_QUALITY_STEP = 6
+_SUCCESS_STREAK_TO_SHRINK = 3
+
+
+@dataclass
+class EncodedImage:
+    base64: str
+    mime_type: str
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+    visual_tokens: int
+    byte_size: int
+    quality: int
+    image_format: str
+    encode_ms: float
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "visual_tokens": self.visual_tokens,
+            "bytes": self.byte_size,
+            "width": self.width,
+            "height": self.height,
+            "format": self.image_format,
+            "quality": self.quality,
+            "encode_ms": round(self.encode_ms, 2),
+        }
+
+
+def resolve_budget(provider: Optional[str] = None) -> EncoderBudget:
+    """Pick the budget for ``provider`` and apply TIP_GUI_IMAGE_* overrides."""
+    key = (provider or os.environ.get("TIP_LLM_PROVIDER") or "tip_cloud").lower()
+    budget = PROVIDER_BUDGETS.get(key, PROVIDER_BUDGETS["tip_cloud"])
+    overrides = {}
+    max_tokens = _env_int("TIP_GUI_IMAGE_MAX_TOKENS")
+    if max_tokens:
+        overrides["max_visual_tokens"] = max_tokens
+    max_bytes = _env_int("TIP_GUI_IMAGE_MAX_BYTES")
+    if max_bytes:
+        overrides["max_bytes"] = max_bytes
+    image_format = (os.environ.get("TIP_GUI_IMAGE_FORMAT") or "").strip().lower()
+    if image_format in {"jpeg", "webp"}:
+        overrides["image_format"] = image_format
+    return replace(budget, **overrides) if overrides else budget
+
+
+class AdaptiveImageEncoder:
+    """
+    Encode screenshots under a visual-token and byte budget.
+
+    The encoder starts at the full budget and walks a small ladder:
+    a run of successfully parsed steps lowers resolution/quality one notch
+    (faster prefill), while a parse failure immediately raises it again.
+    """
+
+    def __init__(self, budget: Optional[EncoderBudget] = None, *, provider: Optional[str] = None):
+        self.budget = budget or resolve_budget(provider)
+        if self.budget.image_format == "webp" and not features.check("webp"):
+            self.budget = replace(self.budget, image_format="jpeg")
+        self.reset()
+
+    def reset(self) -> None:
+        self.scale = 1.0
+        self.quality = self.budget.quality
+        self._success_streak = 0
+        self.parse_successes = 0
+        self.parse_failures = 0
+
+    @property
+    def token_budget(self) -> int:
+        return max(1, int(self.budget.max_visual_tokens * self.scale))
+
+    def encode(
+        self,
+        image: Union[bytes, Image.Image],
+        *,
+        token_budget: Optional[int] = None,
+        quality: Optional[int] = None,
+    ) -> EncodedImage:
+        """Encode raw screenshot bytes or an already decoded (e.g. cropped) image.
+
+        ``token_budget`` / ``quality`` override the adaptive values, which is used
+        for low-resolution context thumbnails.
+        """
+        started = time.perf_counter()
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(BytesIO(image))
+        original_width, original_height = image.size
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+
+        budget_tokens = token_budget or self.token_budget
+        image_ele = self._target_size(original_width, original_height, budget_tokens)
+        quality = quality or self.quality
+        data = self._save(image, image_ele, quality)
+        # 超出字节预算时先降质量，再缩分辨率，保证请求体不超过上限
+        while len(data) > self.budget.max_bytes and quality > self.budget.min_quality:
+            quality = max(self.budget.min_quality, quality - _QUALITY_STEP)
+            data = self._save(image, image_ele, quality)
+        tokens = budget_tokens
+        while len(data) > self.budget.max_bytes and tokens > 64:
+            tokens = int(tokens * 0.8)
+            image_ele = self._target_size(original_width, original_height, tokens)
+            data = self._save(image, image_ele, quality)
+
+        return EncodedImage(
+            base64=base64.b64encode(data).decode("utf-8"),
+            mime_type=f"image/{self.budget.image_format}",
+            width=image_ele["resized_width"],
+            height=image_ele["resized_height"],
+            original_width=original_width,
+            original_height=original_height,
+            visual_tokens=image_ele["seq_len"],
+            byte_size=len(data),
+            quality=quality,
+            image_format=self.budget.image_format,
+            encode_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def record_result(self, parsed_ok: bool) -> None:
+        """Feed back whether the model output for the last image parsed into an action."""
+        if parsed_ok:
+            self.parse_successes += 1
+            self._success_streak += 1
+            if self._success_streak >= _SUCCESS_STREAK_TO_SHRINK:
+                self._success_streak = 0
+                self.scale = max(self.budget.min_scale, round(self.scale - _SCALE_STEP, 3))
+                self.quality = max(self.budget.min_quality, self.quality - _QUALITY_STEP)
+            return
+        self.parse_failures += 1
+        self._success_streak = 0
+        # A failure jumps two notches back up; accuracy matters more than prefill time.
+        self.scale = min(1.0, round(self.scale + 2 * _SCALE_STEP, 3))
+        self.quality = min(self.budget.max_quality, self.quality + 2 * _QUALITY_STEP)
+
+    def state(self) -> Dict[str, object]:
+        return {
+            "token_budget": self.token_budget,
+            "scale": self.scale,
+            "target_quality": self.quality,
+            "parse_successes": self.parse_successes,
+            "parse_failures": self.parse_failures,
+        }
+
+    def _target_size(self, width: int, height: int, max_tokens: int) -> Dict[str, int]:
+        long_side = max(width, height)
+        if long_side > self.budget.max_long_side:
+            ratio = self.budget.max_long_side / long_side
+            width, height = int(width * ratio), int(height * ratio)
+        return update_image_size_(
+            {"height": height, "width": width},
+            max_tokens=max_tokens,
+            merge_base=self.budget.merge_base,
+            patch_size=self.budget.patch_size,
+        )
+
+    def _save(self, image: Image.Image, image_ele: Dict[str, int], quality: int) -> bytes:
+        resized = image.resize((image_ele["resized_width"], image_ele["resized_height"]))
+        buffer = BytesIO()
+        if self.budget.image_format == "webp":
+            resized.save(buffer, format="WEBP", quality=quality, method=4)
+        else:
+            resized.save(buffer, format="JPEG", quality=quality, optimize=True)
+        return buffer.getvalue()
+
+
+def _env_int(name: str) -> Optional[int]:
+    raw = os.environ.get(name)
+    if not raw:
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return None
+
+
+__all__ = [
+    "AdaptiveImageEncoder",
+    "EncodedImage",
+    "EncoderBudget",
+    "PROVIDER_BUDGETS",
+    "resolve_budget",
+]
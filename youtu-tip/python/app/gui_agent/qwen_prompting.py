@@ -9,12 +9,13 @@
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .prompts import load_prompt
 
 SYSTEM_PROMPT_TEMPLATE = load_prompt("system_prompt")
 TOOL_DESCRIPTION_PROMPT = load_prompt("tool_description_prompt")
+REGION_OBSERVATION_PROMPT = load_prompt("region_observation_prompt")
 
 
 class PromptBuilder:
@@ -34,17 +35,50 @@ class PromptBuilder:
             .replace("{{skill_section}}", skill_section)
         )
 
+    @staticmethod
+    def build_region_note(
+        *,
+        region: Dict[str, int],
+        has_context: bool,
+    ) -> str:
+        context_hint = (
+            "The first image is a low-resolution overview of the whole screen for context only."
+            if has_context
+            else ""
+        )
+        return (
+            REGION_OBSERVATION_PROMPT.replace("{left}", str(region["left"]))
+            .replace("{top}", str(region["top"]))
+            .replace("{right}", str(region["right"]))
+            .replace("{bottom}", str(region["bottom"]))
+            .replace("{context_hint}", context_hint)
+        )
+
     @staticmethod
     def build_user_message(
         *,
         text: Optional[str],
         image_base64: Optional[str],
+        mime_type: str = "image/png",
+        context_images: Optional[List[Tuple[str, str]]] = None,
+        note: Optional[str] = None,
     ) -> Dict:
         content: List[Dict] = []
         if text:
             content.append({"type": "text", "text": text})
+        if note:
+            content.append({"type": "text", "text": note})
+        # Context images (e.g. a full-frame thumbnail) go first; the image the
+        # model should act on is always the last one in the message.
+        for context_base64, context_mime in context_images or []:
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:{context_mime};base64,{context_base64}"},
+                }
+            )
         if image_base64:
-            img_url = f"data:image/png;base64,{image_base64}"
+            img_url = f"data:{mime_type};base64,{image_base64}"
             content.append({"type": "image_url", "image_url": {"url": img_url}})
         return {
             "role": "user",
@@ -1,6 +1,6 @@
 # File: python/app/gui_agent/qwen_response_parser.py
 # Project: Tip Desktop Assistant
-# Description: Parses LLM responses into low-level instructions and pyautogui code, handling tool_call blocks.
+# Description: Parses LLM responses into low-level instructions and typed actions, handling tool_call blocks.
 
 # Copyright (C) 2025 Tencent. All rights reserved.
 # License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
@@ -12,7 +12,12 @@ from __future__ import annotations
 import json
 import logging
 import re
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from .actions import Action
+
+if TYPE_CHECKING:
+    from .observation import CropTransform
 
 
 def parse_response(
@@ -24,13 +29,20 @@ def parse_response(
     original_height: Optional[int] = None,
     processed_width: Optional[int] = None,
     processed_height: Optional[int] = None,
-) -> Tuple[str, List[str]]:
+    crop_transform: Optional[CropTransform] = None,
+) -> Tuple[str, List[Action]]:
     """
-    Parse LLM response and convert it to low level instruction + pyautogui code.
+    Parse LLM response and convert it to low level instruction + typed actions.
+
+    Each ``Action`` is also the equivalent pyautogui code string, so callers
+    that log, persist or ``in``-test the result keep working.
+
+    When ``crop_transform`` is given the model saw only that region of the
+    screen, so coordinates are resolved inside the crop and then offset back.
     """
     # The parser is intentionally permissive to handle partially streamed outputs.
     low_level_instruction = ""
-    pyautogui_code: List[str] = []
+    pyautogui_code: List[Action] = []
 
     # Return early when there is nothing to parse; keeps downstream callers simple.
     if response is None or not response.strip():
@@ -46,24 +58,34 @@ def parse_response(
         if action_text:
             low_level_instruction = action_text
 
+    # The "view" is what the model actually saw: the whole screen or the crop.
+    view_width = crop_transform.width if crop_transform else original_width
+    view_height = crop_transform.height if crop_transform else original_height
+
     def adjust_coordinates(x: float, y: float) -> Tuple[int, int]:
+        view_x, view_y = _view_coordinates(x, y)
+        if crop_transform is None:
+            return view_x, view_y
+        return crop_transform.to_screen(view_x, view_y)
+
+    def _view_coordinates(x: float, y: float) -> Tuple[int, int]:
         # Convert model-relative coordinates into actual screen coordinates.
         # When original dimensions are missing, fallback to integers as-is.
         # Relative mode assumes a 0-1000 grid similar to the model's prompt template.
-        if not (original_width and original_height):
+        if not (view_width and view_height):
             return int(x), int(y)
         if coordinate_type == "absolute":
             if processed_width and processed_height:
-                x_scale = original_width / processed_width
-                y_scale = original_height / processed_height
+                x_scale = view_width / processed_width
+                y_scale = view_height / processed_height
                 return int(x * x_scale), int(y * y_scale)
             return int(x), int(y)
         if coordinate_type == "relative":
             base = 1000.0
         else:
             base = 999.0
-        x_scale = original_width / base
-        y_scale = original_height / base
+        x_scale = view_width / base
+        y_scale = view_height / base
         return int(x * x_scale), int(y * y_scale)
 
     def _coerce_json(text: str) -> Optional[dict]:
@@ -111,54 +133,24 @@ def parse_response(
             action = alias_map.get(action, action)
 
             # Map supported actions to pyautogui snippets with coordinate adjustment.
-            if action == "left_click":
-                if "coordinate" in args:
-                    x, y = args["coordinate"]
-                    adj_x, adj_y = adjust_coordinates(x, y)
-                    pyautogui_code.append(f"pyautogui.click({adj_x}, {adj_y})")
-                else:
-                    pyautogui_code.append("pyautogui.click()")
-
-            elif action == "right_click":
-                if "coordinate" in args:
-                    x, y = args["coordinate"]
-                    adj_x, adj_y = adjust_coordinates(x, y)
-                    pyautogui_code.append(
-                        f"pyautogui.rightClick({adj_x}, {adj_y})"
-                    )
-                else:
-                    pyautogui_code.append("pyautogui.rightClick()")
-
-            elif action == "middle_click":
-                if "coordinate" in args:
-                    x, y = args["coordinate"]
-                    adj_x, adj_y = adjust_coordinates(x, y)
-                    pyautogui_code.append(
-                        f"pyautogui.middleClick({adj_x}, {adj_y})"
-                    )
-                else:
-                    pyautogui_code.append("pyautogui.middleClick()")
-
-            elif action == "double_click":
+            click_variants = {
+                "left_click": ("left", 1),
+                "right_click": ("right", 1),
+                "middle_click": ("middle", 1),
+                "double_click": ("left", 2),
+            }
+            if action in click_variants:
+                button, clicks = click_variants[action]
                 if "coordinate" in args:
                     x, y = args["coordinate"]
                     adj_x, adj_y = adjust_coordinates(x, y)
-                    pyautogui_code.append(
-                        f"pyautogui.doubleClick({adj_x}, {adj_y})"
-                    )
+                    pyautogui_code.append(Action.click(adj_x, adj_y, button=button, clicks=clicks))
                 else:
-                    pyautogui_code.append("pyautogui.doubleClick()")
+                    pyautogui_code.append(Action.click(button=button, clicks=clicks))
 
             elif action == "type":
-                raw_text = args.get("text", "")
-                safe_text = json.dumps(str(raw_text), ensure_ascii=False)
-                # Use clipboard to avoid typing latency and preserve unicode.
-                pyautogui_code.append(
-                    "import pyperclip; "
-                    f"text_to_type = {safe_text}; "
-                    "pyperclip.copy(text_to_type); "
-                    "pyautogui.hotkey('command', 'v')"
-                )
+                # Backends decide how to enter text (clipboard paste or native unicode events).
+                pyautogui_code.append(Action.type_text(args.get("text", "")))
 
             elif action == "key":
                 keys = args.get("keys", [])
@@ -183,43 +175,38 @@ def parse_response(
                             cleaned_keys.append(key)
                     keys = cleaned_keys
 
-                keys_str = ", ".join([f"'{key}'" for key in keys])
-                if len(keys) > 1:
-                    pyautogui_code.append(f"pyautogui.hotkey({keys_str})")
-                else:
-                    pyautogui_code.append(f"pyautogui.press({keys_str})")
+                if not isinstance(keys, (list, tuple)):
+                    keys = [keys]
+                if keys:
+                    pyautogui_code.append(Action.hotkey(keys))
 
             elif action == "scroll":
-                pixels = args.get("pixels", 0)
-                pyautogui_code.append(f"pyautogui.scroll({pixels})")
+                pyautogui_code.append(Action.scroll(int(args.get("pixels", 0))))
 
             elif action == "wait":
                 # WAIT acts as a no-op placeholder for the executor loop.
-                pyautogui_code.append("WAIT")
+                pyautogui_code.append(Action.wait())
 
             elif action == "terminate":
                 # DONE is used by the executor to stop issuing further instructions.
-                pyautogui_code.append("DONE")
+                pyautogui_code.append(Action.done())
 
             elif action == "mouse_move":
                 if "coordinate" in args:
                     x, y = args["coordinate"]
                     adj_x, adj_y = adjust_coordinates(x, y)
-                    pyautogui_code.append(f"pyautogui.moveTo({adj_x}, {adj_y})")
+                    pyautogui_code.append(Action.move(adj_x, adj_y))
                 else:
-                    pyautogui_code.append("pyautogui.moveTo(0, 0)")
+                    pyautogui_code.append(Action.move(0, 0))
 
             elif action == "left_click_drag":
                 if "coordinate" in args:
                     x, y = args["coordinate"]
                     adj_x, adj_y = adjust_coordinates(x, y)
-                    duration = args.get("duration", 0.5)
-                    pyautogui_code.append(
-                        f"pyautogui.dragTo({adj_x}, {adj_y}, duration={duration})"
-                    )
+                    pyautogui_code.append(Action.drag(adj_x, adj_y, args.get("duration", 0.5)))
                 else:
-                    pyautogui_code.append("pyautogui.dragTo(0, 0)")
-        except (json.JSONDecodeError, KeyError) as exc:
+                    pyautogui_code.append(Action.drag(0, 0, 0.5))
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as exc:
             logger.error("Failed to parse tool call: %s", exc)
 
     normalized_response = (
@@ -278,8 +265,9 @@ def parse_response(
 
     if not low_level_instruction and len(pyautogui_code) > 0:
         first_cmd = pyautogui_code[0]
+        # Keep the legacy wording (pyautogui function name) for existing UI strings.
         if "." in first_cmd:
-            action_type = first_cmd.split(".", 1)[1].split("(", 1)[0]
+            action_type = first_cmd.rsplit("pyautogui.", 1)[-1].split("(", 1)[0]
         else:
             action_type = first_cmd
         # Provide a human-readable fallback when the model only returned tool calls.
@@ -287,3 +275,84 @@ def parse_response(
         low_level_instruction = f"Performing {action_type} action"
 
     return low_level_instruction, pyautogui_code
+
+
+class StreamingToolCallParser:
+    """
+    Incrementally consume streamed model output.
+
+    Text before the first ``<tool_call>`` / ``<skill>`` tag is surfaced as
+    thought deltas and ``blocks`` counts the closed action blocks. A turn may
+    carry several tool calls (executed in order, or as one batch), so by
+    default the whole turn is kept and ``complete`` stays False until the
+    stream ends. With ``stop_after_first`` the parser is ``complete`` as soon
+    as the first block closes and ``text`` is truncated right after it; only
+    use that when the model is known to emit one action per turn.
+    """
+
+    _OPEN_TAGS = ("<tool_call>", "<skill>")
+    _CLOSE_TAGS = ("</tool_call>", "</skill>")
+
+    def __init__(self, *, min_thought_chars: int = 24, stop_after_first: bool = False) -> None:
+        self.min_thought_chars = min_thought_chars
+        self.stop_after_first = stop_after_first
+        self._buffer = ""
+        self._thought_emitted = 0
+        self._thought_end: Optional[int] = None
+        self._close_scan = 0
+        self.blocks = 0
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Append ``chunk``; return a thought delta worth emitting, if any."""
+        if self.complete or not chunk:
+            return None
+        # Tags can straddle chunk boundaries, so rescan a short tail of the old buffer.
+        scan_from = max(0, len(self._buffer) - 16)
+        self._buffer += chunk
+        lowered = self._buffer.lower()
+
+        if self._thought_end is None:
+            opens = [idx for idx in (lowered.find(tag, scan_from) for tag in self._OPEN_TAGS) if idx >= 0]
+            if opens:
+                self._thought_end = min(opens)
+
+        while True:
+            start = max(scan_from, self._close_scan)
+            closes = [
+                idx + len(tag)
+                for tag, idx in ((tag, lowered.find(tag, start)) for tag in self._CLOSE_TAGS)
+                if idx >= 0
+            ]
+            if not closes:
+                break
+            self._close_scan = min(closes)
+            self.blocks += 1
+            if self.stop_after_first:
+                self._buffer = self._buffer[: self._close_scan]
+                self.complete = True
+                break
+
+        return self._pending_thought(force=self._thought_end is not None)
+
+    def flush(self) -> Optional[str]:
+        """Return any thought text not yet emitted (call when the stream ends)."""
+        return self._pending_thought(force=True)
+
+    def _pending_thought(self, *, force: bool) -> Optional[str]:
+        end = self._thought_end
+        if end is None:
+            # Hold back a possible partial opening tag at the tail.
+            tail = self._buffer.rfind("<")
+            end = tail if tail >= 0 and len(self._buffer) - tail < 12 else len(self._buffer)
+        pending = self._buffer[self._thought_emitted:end]
+        if not pending.strip():
+            return None
+        if not force and len(pending) < self.min_thought_chars and "\n" not in pending:
+            return None
+        self._thought_emitted = end
+        return pending
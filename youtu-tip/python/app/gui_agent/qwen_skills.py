@@ -10,10 +10,14 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional
+from typing import List, Optional, Set
 
 from .skills import Skill, SkillRepository, SkillSummary
 
+# 技能库超过该数量时只注入与任务最相关的前 K 个标题，避免系统提示膨胀。
+DEFAULT_CATALOG_TOP_K = 12
+MAX_STEP_SUGGESTIONS = 3
+
 
 class SkillManager:
     """Handle skill catalog caching and lookups for the Qwen agent."""
@@ -21,19 +25,55 @@ class SkillManager:
     def __init__(
         self,
         repo: Optional[SkillRepository],
+        *,
+        top_k: int = DEFAULT_CATALOG_TOP_K,
     ) -> None:
         self._repo = repo
         self._catalog: Optional[List[SkillSummary]] = None
+        self._catalog_version = -1
+        self.top_k = max(1, top_k)
+        # Titles already shown to the model this run (system prompt or step hints).
+        self._shown_titles: Set[str] = set()
+        self._ranked = False
+
+    def build_catalog_section(self, query: Optional[str] = None) -> str:
+        """List skill titles for the system prompt.
 
-    def build_catalog_section(self) -> str:
+        Small libraries are listed in full. Larger ones are ranked against
+        ``query`` (the task instruction) and only the top ``top_k`` are shown.
+        """
         summaries = self._get_catalog()
         if not summaries:
             return "(no skills available)"
 
-        lines = []
-        for summary in summaries:
-            lines.append(f"- {summary.title}")
-        return "\n".join(lines)
+        titles = [summary.title for summary in summaries]
+        self._ranked = bool(query) and len(summaries) > self.top_k
+        if self._ranked:
+            titles = [hit.title for hit in self._repo.search(query, self.top_k)]
+            if not titles:
+                self._shown_titles = set()
+                return "(no stored skill matches this task)"
+        self._shown_titles = set(titles)
+        return "\n".join(f"- {title}" for title in titles)
+
+    def build_step_hint(self, query: str) -> Optional[str]:
+        """Suggest newly relevant skills for the current step.
+
+        Only used when the catalog was truncated; the hint goes into the step's
+        user message so the system prompt (and its KV cache) stays unchanged.
+        """
+        if not self._ranked or not self._repo or not query:
+            return None
+        fresh = [
+            hit.title
+            for hit in self._repo.search(query, self.top_k)
+            if hit.title not in self._shown_titles
+        ][:MAX_STEP_SUGGESTIONS]
+        if not fresh:
+            return None
+        self._shown_titles.update(fresh)
+        listed = "\n".join(f"- {title}" for title in fresh)
+        return f"Additional skills that may help with this step:\n{listed}"
 
     def extract_requests(self, response: str) -> List[str]:
         if not response:
@@ -78,11 +118,18 @@ class SkillManager:
     def reset_cache(self) -> None:
         """Clear cached catalog data. Call when agent resets."""
         self._catalog = None
+        self._shown_titles = set()
+        self._ranked = False
 
     def _get_catalog(self) -> List[SkillSummary]:
-        if self._catalog is None and self._repo:
+        if not self._repo:
+            return []
+        # 仓库版本号变化（增量刷新/CRUD）才重新拉取标题列表。
+        version = self._repo.version
+        if self._catalog is None or self._catalog_version != version:
             try:
                 self._catalog = self._repo.list_titles()
             except Exception:
                 self._catalog = []
+            self._catalog_version = version
         return self._catalog or []
@@ -0,0 +1,464 @@
+# File: python/app/gui_agent/replay_cache.py
+# Project: Tip Desktop Assistant
+# Description: Trajectory cache that replays recorded successful runs for repeated instructions,
+# verifying each frame with a perceptual hash and falling back to the model on divergence.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Replay cache for repeated GUI instructions.
+
+Successful runs are distilled from ``traj.jsonl`` into a list of steps: the
+model response, the actions it produced and a tiled difference hash (dHash) of
+the frame the model was looking at. A later run with the same normalized
+instruction and a matching initial screen replays those steps without calling
+the model, checking each new frame against the recorded hash; the first frame
+that differs by more than ``tolerance`` bits hands control back to the model.
+
+Only runs the model terminated with DONE and in which no action raised are
+recorded. Hit counters are kept in memory and written by ``flush()`` (at the
+end of a run and at exit) instead of rewriting the file on every lookup.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from PIL import Image
+
+logger = logging.getLogger("desktopenv.replay_cache")
+
+GRID_SIZE = 8  # 8x8 tiles
+HASH_SIZE = 16  # 16x16 dHash per tile -> 256 bits
+DEFAULT_TOLERANCE = 4  # max differing bits in any single tile
+DEFAULT_MAX_ENTRIES = 200
+CACHE_VERSION = 1
+
+_PUNCT_RE = re.compile(r"[\s\.,!?;:，。！？；：、\"'“”‘’]+")
+_TILE_BITS = HASH_SIZE * HASH_SIZE
+_TILE_MASK = (1 << _TILE_BITS) - 1
+
+
+def normalize_instruction(text: str) -> str:
+    """Cache key: case-folded, punctuation and whitespace collapsed."""
+    return _PUNCT_RE.sub(" ", (text or "").casefold()).strip()
+
+
+def frame_hash(source: Union[bytes, Image.Image]) -> int:
+    """
+    Tiled difference hash of a screenshot, packed into one integer.
+
+    A single whole-screen dHash cannot see a few characters typed into a text
+    field, so the frame is split into ``GRID_SIZE`` x ``GRID_SIZE`` tiles, each
+    hashed separately from one shared downscale.
+    """
+    image = source if isinstance(source, Image.Image) else Image.open(BytesIO(source))
+    side = GRID_SIZE * HASH_SIZE
+    # draft() lets JPEG decoders skip full-resolution decoding; a no-op for PNG.
+    image.draft("L", (side * 2, side * 2))
+    small = image.convert("L").resize((side + 1, side), Image.Resampling.BOX)
+    pixels = small.tobytes()
+    value = 0
+    for tile_row in range(GRID_SIZE):
+        for tile_col in range(GRID_SIZE):
+            for row in range(HASH_SIZE):
+                offset = (tile_row * HASH_SIZE + row) * (side + 1) + tile_col * HASH_SIZE
+                for col in range(HASH_SIZE):
+                    value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(left: int, right: int) -> int:
+    """Largest per-tile bit distance between two ``frame_hash`` values."""
+    diff = left ^ right
+    worst = 0
+    while diff:
+        worst = max(worst, (diff & _TILE_MASK).bit_count())
+        diff >>= _TILE_BITS
+    return worst
+
+
+@dataclass
+class ReplayStep:
+    response: str
+    actions: List[str]
+    frame_hash: int
+
+
+@dataclass
+class CachedTrajectory:
+    key: str
+    instruction: str
+    initial_hash: int
+    screen_size: Tuple[int, int]
+    steps: List[ReplayStep]
+    source_dir: str = ""
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    hits: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        # JSON has no big ints; store hashes as hex.
+        payload["initial_hash"] = f"{self.initial_hash:x}"
+        payload["screen_size"] = list(self.screen_size)
+        for step in payload["steps"]:
+            step["frame_hash"] = f"{step['frame_hash']:x}"
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "CachedTrajectory":
+        steps = [
+            ReplayStep(
+                response=item.get("response") or "",
+                actions=list(item.get("actions") or []),
+                frame_hash=int(item.get("frame_hash") or "0", 16),
+            )
+            for item in payload.get("steps") or []
+        ]
+        width, height = payload.get("screen_size") or (0, 0)
+        return cls(
+            key=payload["key"],
+            instruction=payload.get("instruction") or "",
+            initial_hash=int(payload.get("initial_hash") or "0", 16),
+            screen_size=(int(width), int(height)),
+            steps=steps,
+            source_dir=payload.get("source_dir") or "",
+            created_at=float(payload.get("created_at") or time.time()),
+            last_used=float(payload.get("last_used") or time.time()),
+            hits=int(payload.get("hits") or 0),
+        )
+
+
+class ReplaySession:
+    """
+    Walks one cached trajectory for a single run.
+
+    ``next_step(frame)`` returns the recorded step while frames keep matching
+    and None from the first divergence (or when the recording is exhausted)
+    onwards; the caller then falls back to the live model.
+    """
+
+    def __init__(self, trajectory: CachedTrajectory, *, tolerance: int = DEFAULT_TOLERANCE) -> None:
+        self.trajectory = trajectory
+        self.tolerance = tolerance
+        self.index = 0
+        self.diverged = False
+        self.last_distance: Optional[int] = None
+
+    @property
+    def active(self) -> bool:
+        return not self.diverged and self.index < len(self.trajectory.steps)
+
+    def next_step(self, frame: Union[bytes, Image.Image]) -> Optional[ReplayStep]:
+        if not self.active:
+            return None
+        step = self.trajectory.steps[self.index]
+        self.last_distance = hamming(frame_hash(frame), step.frame_hash)
+        if self.last_distance > self.tolerance:
+            logger.info(
+                "Replay diverged at step %d (distance %d > %d)",
+                self.index + 1,
+                self.last_distance,
+                self.tolerance,
+            )
+            self.diverged = True
+            return None
+        self.index += 1
+        return step
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "key": self.trajectory.key,
+            "replayed": self.index,
+            "total": len(self.trajectory.steps),
+            "diverged": self.diverged,
+            "distance": self.last_distance,
+        }
+
+
+class TrajectoryCache:
+    """
+    JSON-backed store of replayable trajectories.
+
+    Several entries may share an instruction (e.g. recorded from different
+    starting screens); ``start_session`` picks the closest initial frame within
+    ``tolerance``. Entries are evicted least-recently-used beyond ``max_entries``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        tolerance: int = DEFAULT_TOLERANCE,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.tolerance = max(0, tolerance)
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        # 串行化落盘，保证较新的快照不会被较旧的覆盖
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._entries: Dict[str, List[CachedTrajectory]] = {}
+        self._load()
+        atexit.register(self.flush)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(items) for items in self._entries.values())
+
+    # ----------------------------
+    # Lookup
+    # ----------------------------
+    def start_session(self, instruction: str, frame: Union[bytes, Image.Image]) -> Optional[ReplaySession]:
+        """Return a session for the best matching trajectory, or None on a miss."""
+        key = normalize_instruction(instruction)
+        with self._lock:
+            candidates = list(self._entries.get(key) or [])
+        if not candidates:
+            return None
+        image = frame if isinstance(frame, Image.Image) else Image.open(BytesIO(frame))
+        current = frame_hash(image)
+        best: Optional[CachedTrajectory] = None
+        best_distance = self.tolerance + 1
+        for entry in candidates:
+            if entry.screen_size and tuple(entry.screen_size) != image.size:
+                continue
+            distance = hamming(current, entry.initial_hash)
+            if distance < best_distance:
+                best, best_distance = entry, distance
+        if best is None:
+            logger.info("Replay cache miss for %r: no initial frame within tolerance", key)
+            return None
+        with self._lock:
+            best.hits += 1
+            best.last_used = time.time()
+            # 命中只影响 LRU 统计，延迟到 flush() 再写盘
+            self._dirty = True
+        logger.info("Replay cache hit for %r (%d steps, distance %d)", key, len(best.steps), best_distance)
+        return ReplaySession(best, tolerance=self.tolerance)
+
+    # ----------------------------
+    # Recording
+    # ----------------------------
+    def record_run(self, instruction: str, result_dir: str) -> Optional[CachedTrajectory]:
+        """Distil a finished run directory into a cache entry if it ended with DONE."""
+        trajectory = build_trajectory(instruction, result_dir)
+        if trajectory is None:
+            return None
+        with self._lock:
+            items = self._entries.setdefault(trajectory.key, [])
+            # A new success from (nearly) the same screen supersedes the old recording.
+            items[:] = [
+                entry
+                for entry in items
+                if hamming(entry.initial_hash, trajectory.initial_hash) > self.tolerance
+                or tuple(entry.screen_size) != tuple(trajectory.screen_size)
+            ]
+            items.append(trajectory)
+            self._evict_locked()
+        self._save()
+        logger.info("Replay cache stored %r (%d steps)", trajectory.key, len(trajectory.steps))
+        return trajectory
+
+    def invalidate(self, instruction: str) -> int:
+        key = normalize_instruction(instruction)
+        with self._lock:
+            removed = len(self._entries.pop(key, []))
+        if removed:
+            self._save()
+        return removed
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    def flush(self) -> None:
+        """Persist pending hit/LRU updates; cheap no-op when nothing changed."""
+        with self._lock:
+            dirty = self._dirty
+        if dirty:
+            self._save()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Ignoring unreadable replay cache %s: %s", self.path, exc)
+            return
+        if payload.get("version") != CACHE_VERSION:
+            return
+        for item in payload.get("entries") or []:
+            try:
+                entry = CachedTrajectory.from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._entries.setdefault(entry.key, []).append(entry)
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path) or "."
+        with self._save_lock:
+            with self._lock:
+                payload = {
+                    "version": CACHE_VERSION,
+                    "entries": [entry.to_dict() for items in self._entries.values() for entry in items],
+                }
+                self._dirty = False
+            tmp_path = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                # 每次写入使用唯一的临时文件，多个进程同时保存也不会互相截断
+                with tempfile.NamedTemporaryFile(
+                    "w",
+                    encoding="utf-8",
+                    dir=directory,
+                    prefix=f".{os.path.basename(self.path)}.",
+                    suffix=".tmp",
+                    delete=False,
+                ) as handle:
+                    tmp_path = handle.name
+                    json.dump(payload, handle, ensure_ascii=False)
+                # 原子替换，避免并发运行读到半截文件
+                os.replace(tmp_path, self.path)
+            except OSError as exc:
+                logger.warning("Failed to persist replay cache %s: %s", self.path, exc)
+                with self._lock:
+                    self._dirty = True
+                if tmp_path is not None:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+
+    def _evict_locked(self) -> None:
+        entries = [entry for items in self._entries.values() for entry in items]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda entry: entry.last_used)
+        for entry in entries[: len(entries) - self.max_entries]:
+            items = self._entries.get(entry.key) or []
+            if entry in items:
+                items.remove(entry)
+            if not items:
+                self._entries.pop(entry.key, None)
+
+
+_CACHES: Dict[str, TrajectoryCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_trajectory_cache(path: str, *, tolerance: int = DEFAULT_TOLERANCE) -> TrajectoryCache:
+    """Process-wide cache instance per file so concurrent runs share one lock."""
+    resolved = os.path.abspath(path)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(resolved)
+        if cache is None:
+            cache = TrajectoryCache(resolved, tolerance=tolerance)
+            _CACHES[resolved] = cache
+        return cache
+
+
+def build_trajectory(instruction: str, result_dir: str) -> Optional[CachedTrajectory]:
+    """
+    Rebuild (frame seen by the model -> response -> actions) steps from ``traj.jsonl``.
+
+    Returns None unless the run terminated with DONE, no action reported an
+    error, and every step has the screenshot it was predicted from (skill-only
+    turns carry no action and are skipped).
+    """
+    traj_path = os.path.join(result_dir, "traj.jsonl")
+    try:
+        with open(traj_path, "r", encoding="utf-8") as handle:
+            records = [json.loads(line) for line in handle if line.strip()]
+    except (OSError, json.JSONDecodeError) as exc:
+        logger.warning("Cannot read trajectory %s: %s", traj_path, exc)
+        return None
+
+    if not records or records[-1].get("action") != "DONE" or not records[-1].get("done"):
+        return None
+    if any((record.get("info") or {}).get("error") for record in records):
+        # 中途有动作报错的运行即使最终 DONE 也不可靠，不作为回放样本
+        return None
+
+    steps: List[ReplayStep] = []
+    hashes: Dict[str, int] = {}
+    screen_size: Tuple[int, int] = (0, 0)
+    previous_frame: Optional[str] = None
+    current_step = None
+
+    def _hash(filename: str) -> int:
+        nonlocal screen_size
+        if filename not in hashes:
+            with Image.open(os.path.join(result_dir, filename)) as image:
+                screen_size = image.size
+                hashes[filename] = frame_hash(image)
+        return hashes[filename]
+
+    try:
+        for record in records:
+            action = record.get("action")
+            if action == "reset":
+                previous_frame = record.get("screenshot_file")
+                continue
+            if action == "skill":
+                continue
+            if previous_frame is None:
+                return None
+            step_num = record.get("step_num")
+            if step_num != current_step:
+                current_step = step_num
+                steps.append(
+                    ReplayStep(
+                        response=record.get("response") or "",
+                        actions=[],
+                        frame_hash=_hash(previous_frame),
+                    )
+                )
+            steps[-1].actions.append(str(action))
+            if record.get("screenshot_file"):
+                previous_frame = record["screenshot_file"]
+        initial = next(r.get("screenshot_file") for r in records if r.get("action") == "reset")
+        initial_hash = _hash(initial)
+    except (OSError, StopIteration) as exc:
+        logger.warning("Cannot build replay entry from %s: %s", result_dir, exc)
+        return None
+
+    if not steps:
+        return None
+    return CachedTrajectory(
+        key=normalize_instruction(instruction),
+        instruction=instruction,
+        initial_hash=initial_hash,
+        screen_size=screen_size,
+        steps=steps,
+        source_dir=result_dir,
+    )
+
+
+__all__ = [
+    "CachedTrajectory",
+    "ReplaySession",
+    "ReplayStep",
+    "TrajectoryCache",
+    "build_trajectory",
+    "frame_hash",
+    "get_trajectory_cache",
+    "hamming",
+    "normalize_instruction",
+]
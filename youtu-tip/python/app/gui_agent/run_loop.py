@@ -12,14 +12,16 @@
 本地MacOS Demo任务执行模块
 精简版 - 只包含本地MacOS环境所需的核心功能
 """
+import asyncio
 import datetime
 import time
-import json
 import logging
 import os
-from typing import Callable, Dict, Optional
+from typing import Callable, Dict, Generator, Optional, Union
 from threading import Event
 
+from .artifact_writer import ArtifactWriter
+
 logger = logging.getLogger("desktopenv.experiment")
 
 
@@ -51,12 +53,215 @@ def run_single_example(
     """
     runtime_logger = setup_logger(example, example_result_dir)
     log_dispatcher = _build_log_dispatcher(log_callback)
-    
-    # 重置Agent
+    # 截图与轨迹写入交给后台线程，避免磁盘延迟叠加到每一步
+    writer = ArtifactWriter(example_result_dir)
     try:
-        agent.reset(runtime_logger)
-    except Exception as e:
-        agent.reset()
+        _run_example_steps(
+            agent=agent,
+            env=env,
+            example=example,
+            max_steps=max_steps,
+            instruction=instruction,
+            args=args,
+            example_result_dir=example_result_dir,
+            scores=scores,
+            runtime_logger=runtime_logger,
+            log_dispatcher=log_dispatcher,
+            writer=writer,
+            cancel_event=cancel_event,
+        )
+    finally:
+        # 无论完成、取消还是异常，都要把队列中的产物落盘
+        writer.close()
+        logger.info("Artifact writer stats: %s", writer.stats())
+        # 释放 runtime.log 句柄，并发运行时避免文件句柄累积
+        for handler in list(runtime_logger.handlers):
+            runtime_logger.removeHandler(handler)
+            handler.close()
+
+
+async def arun_single_example(
+    agent,
+    env,
+    example,
+    max_steps,
+    instruction,
+    args,
+    example_result_dir,
+    scores,
+    *,
+    log_callback: Optional[Callable[[Dict], None]] = None,
+    cancel_event: Optional[Event] = None,
+):
+    """
+    run_single_example 的 asyncio 版本
+
+    LLM 请求通过 agent.apredict 直接 await，调用方取消任务即可中断进行中的请求；
+    环境操作与截图编码放到线程中执行，产物写入与事件分发由后台线程完成，
+    与下一次 LLM 请求重叠。
+
+    取消约定：调用方先 set cancel_event 再 cancel 任务，此时本函数会补发
+    cancelled 完成事件并正常返回；未设置 cancel_event 的取消（如进程退出）照常向上抛出。
+    线程中正在执行的环境动作无法打断，取消会等它结束后再收尾。
+    """
+    runtime_logger = setup_logger(example, example_result_dir)
+    log_dispatcher = _build_log_dispatcher(log_callback)
+    writer = ArtifactWriter(example_result_dir)
+    try:
+        await _arun_example_steps(
+            agent=agent,
+            env=env,
+            example=example,
+            max_steps=max_steps,
+            instruction=instruction,
+            args=args,
+            example_result_dir=example_result_dir,
+            scores=scores,
+            runtime_logger=runtime_logger,
+            log_dispatcher=log_dispatcher,
+            writer=writer,
+            cancel_event=cancel_event,
+        )
+    finally:
+        # close() 会等待队列写完，放到线程中避免阻塞事件循环
+        await asyncio.to_thread(writer.close)
+        logger.info("Artifact writer stats: %s", writer.stats())
+        for handler in list(runtime_logger.handlers):
+            runtime_logger.removeHandler(handler)
+            handler.close()
+
+
+class _Blocking:
+    """A blocking env call: run inline by the sync driver, in a worker thread by the async one."""
+
+    def __init__(self, func: Callable, *args, **kwargs) -> None:
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self):
+        return self.func(*self.args, **self.kwargs)
+
+    async def arun(self):
+        task = asyncio.ensure_future(asyncio.to_thread(self.func, *self.args, **self.kwargs))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 线程无法被打断：等当前动作执行完再向上传递取消，
+            # 避免 _finish_example（评估、结束录屏）与仍在操作屏幕的线程并行
+            while not task.done():
+                try:
+                    await asyncio.shield(task)
+                except asyncio.CancelledError:
+                    continue
+                except Exception:  # noqa: BLE001 - the run is being cancelled anyway
+                    break
+            raise
+
+
+class _Predict:
+    """Ask the agent for the next response and actions."""
+
+    def __init__(self, agent, instruction, obs) -> None:
+        self.agent = agent
+        self.instruction = instruction
+        self.obs = obs
+
+    def run(self):
+        return self.agent.predict(self.instruction, self.obs)
+
+    async def arun(self):
+        if hasattr(self.agent, "apredict"):
+            # LLM 请求直接 await，任务取消即可中断
+            return await self.agent.apredict(self.instruction, self.obs)
+        return await asyncio.to_thread(self.agent.predict, self.instruction, self.obs)
+
+
+def _run_example_steps(**kwargs) -> None:
+    """同步驱动：依次执行 _example_steps 产出的操作。"""
+    steps = _example_steps(**kwargs)
+    try:
+        result = None
+        while True:
+            try:
+                operation = steps.send(result)
+            except StopIteration:
+                break
+            result = operation.run()
+    finally:
+        steps.close()
+    _finish_example(
+        kwargs["env"],
+        kwargs["example"],
+        kwargs["example_result_dir"],
+        kwargs["scores"],
+        kwargs["writer"],
+        kwargs["log_dispatcher"],
+        kwargs["cancel_event"],
+    )
+
+
+async def _arun_example_steps(**kwargs) -> None:
+    """异步驱动：LLM 请求直接 await，环境操作放到线程中执行；步骤逻辑与同步版本共用。"""
+    cancel_event = kwargs["cancel_event"]
+    log_dispatcher = kwargs["log_dispatcher"]
+    steps = _example_steps(**kwargs)
+    try:
+        result = None
+        while True:
+            try:
+                operation = steps.send(result)
+            except StopIteration:
+                break
+            result = await operation.arun()
+    except asyncio.CancelledError:
+        if cancel_event is None or not cancel_event.is_set():
+            raise
+        # 用户取消：进行中的 LLM 请求已被中断，补发状态后按取消流程收尾
+        log_dispatcher(
+            {
+                "type": "status",
+                "message": "Execution cancelled by user",
+            }
+        )
+    finally:
+        steps.close()
+
+    # evaluate / 结束录屏可能较慢，放到线程中执行
+    await asyncio.to_thread(
+        _finish_example,
+        kwargs["env"],
+        kwargs["example"],
+        kwargs["example_result_dir"],
+        kwargs["scores"],
+        kwargs["writer"],
+        log_dispatcher,
+        cancel_event,
+    )
+
+
+def _example_steps(
+    *,
+    agent,
+    env,
+    example,
+    max_steps,
+    instruction,
+    args,
+    example_result_dir,
+    scores,
+    runtime_logger,
+    log_dispatcher,
+    writer: ArtifactWriter,
+    cancel_event: Optional[Event],
+) -> Generator[Union[_Blocking, _Predict], object, None]:
+    """
+    run_single_example 的主体，以生成器形式编写一次，供同步 / 异步两个驱动共用。
+
+    需要阻塞的调用（环境操作、模型预测）以 _Blocking / _Predict 形式 yield 出去，
+    由驱动执行后把结果 send 回来；产物写入统一交给 writer。
+    """
+    _reset_agent(agent, runtime_logger)
 
     # 重置环境
     logger.info("---------------------------reset env---------------------------")
@@ -67,39 +272,130 @@ def run_single_example(
             "message": "Initializing environment…",
         }
     )
+    obs = yield _Blocking(env.reset, task_config=example)
+    logger.info(f"reset time: {time.time() - t0:.2f}s")
+    obs = _record_reset(obs, instruction, writer, log_dispatcher)
+    yield _Blocking(_start_recording, env, log_dispatcher)
 
-    obs = env.reset(task_config=example)
-    t1 = time.time()
-    logger.info(f"reset time: {t1 - t0:.2f}s") 
+    # 执行任务循环
+    done = False
+    step_idx = 0
 
-    # 保存初始状态截图
-    action_timestamp = datetime.datetime.now().strftime("%Y%m%d@%H%M%S")
-    screenshot_data = _normalize_screenshot(obs['screenshot'])
-    obs['screenshot'] = screenshot_data
+    while not done and step_idx < max_steps:
+        if _check_cancelled(cancel_event, log_dispatcher):
+            break
+        logger.info("---------------------------agent predict---------------------------")
+        t0 = time.time()
+        if hasattr(agent, "event_callback"):
+            # Streaming agents push partial thoughts for this step through the same dispatcher.
+            agent.event_callback = _step_event_forwarder(log_dispatcher, step_idx + 1)
+        response, actions = yield _Predict(agent, instruction, obs)
+        step_details = _after_predict(agent, response, step_idx, t0, log_dispatcher)
 
-    reset_filename = f"step_reset_{action_timestamp}.png"
-    reset_filepath = os.path.join(example_result_dir, reset_filename)
-    with open(reset_filepath, "wb") as _f:
-        _f.write(obs['screenshot'])
+        # 检查是否获取到有效的actions
+        if not actions:
+            if _record_skill_turn(agent, response, step_idx, writer):
+                step_idx += 1
+                continue
+            break
+        _clear_skill_outputs(agent)
+
+        if _use_batch(actions, args, env):
+            # 同一回复中的多个动作连续执行，只截取批次结束后的一帧
+            action_timestamp = _timestamp()
+            obs, results = yield _Blocking(
+                env.step_batch,
+                actions,
+                args.sleep_after_execution,
+                settle=getattr(args, "batch_settle", 0.1),
+                on_action=_batch_step_announcer(log_dispatcher, step_idx + 1, actions, step_details),
+                stop_event=cancel_event,
+            )
+            obs, done = _record_batch(
+                obs,
+                results,
+                actions,
+                step_idx + 1,
+                action_timestamp,
+                response,
+                writer,
+                log_dispatcher,
+            )
+            if _check_cancelled(cancel_event, log_dispatcher):
+                break
+            step_idx += 1
+            continue
 
+        # 执行每个动作
+        for action in actions:
+            if _check_cancelled(cancel_event, log_dispatcher):
+                done = True
+                break
+            action_timestamp = _announce_step(log_dispatcher, step_idx + 1, action, step_details)
+            obs, reward, done, info = yield _Blocking(env.step, action, args.sleep_after_execution)
+            # 截图写盘与事件分发在 writer 线程完成，循环立即进入下一次 LLM 请求
+            obs = _record_step(
+                obs,
+                action,
+                reward,
+                done,
+                info,
+                step_idx + 1,
+                action_timestamp,
+                response,
+                writer,
+                log_dispatcher,
+            )
+            if done:
+                break
+
+        step_idx += 1
+
+
+# ----------------------------
+# Step helpers shared by the sync and asyncio loops
+# ----------------------------
+def _timestamp() -> str:
+    return datetime.datetime.now().strftime("%Y%m%d@%H%M%S")
+
+
+def _reset_agent(agent, runtime_logger) -> None:
+    try:
+        agent.reset(runtime_logger)
+    except Exception as e:
+        agent.reset()
+
+
+def _check_cancelled(cancel_event: Optional[Event], log_dispatcher) -> bool:
+    if not (cancel_event and cancel_event.is_set()):
+        return False
     log_dispatcher(
         {
-            "type": "screenshot",
-            "step": 0,
-            "message": "Initial screenshot captured",
-            "assets": [
-                {
-                    "type": "screenshot",
-                    "path": reset_filepath,
-                    "relative_path": reset_filename,
-                }
-            ],
+            "type": "status",
+            "message": "Execution cancelled by user",
         }
     )
+    return True
+
 
-    # 记录初始状态到轨迹文件
-    with open(os.path.join(example_result_dir, "traj.jsonl"), "a", encoding="utf-8") as f:
-        traj_json = {
+def _record_reset(obs, instruction, writer: ArtifactWriter, log_dispatcher):
+    """保存初始状态截图并写入轨迹首行。"""
+    action_timestamp = _timestamp()
+    obs['screenshot'] = _normalize_screenshot(obs['screenshot'])
+
+    reset_filename = f"step_reset_{action_timestamp}.png"
+    writer.write_screenshot(
+        reset_filename,
+        obs['screenshot'],
+        on_written=_screenshot_event(
+            log_dispatcher,
+            step=0,
+            filename=reset_filename,
+            message="Initial screenshot captured",
+        ),
+    )
+    writer.write_trajectory(
+        {
             "step_num": 0,
             "instruction": instruction,
             "action_timestamp": action_timestamp,
@@ -107,11 +403,13 @@ def run_single_example(
             "reward": 0,
             "done": False,
             "info": {},
-            "screenshot_file": f"step_reset_{action_timestamp}.png"
+            "screenshot_file": reset_filename,
         }
-        f.write(json.dumps(traj_json, ensure_ascii=False))
-        f.write("\n")
+    )
+    return obs
+
 
+def _start_recording(env, log_dispatcher) -> None:
     # 开始录屏（如果环境支持）
     if hasattr(env, 'controller') and env.controller is not None:
         env.controller.start_recording()
@@ -121,186 +419,275 @@ def run_single_example(
                 "message": "Screen recording started",
             }
         )
-    
-    # 执行任务循环
-    done = False
-    step_idx = 0
-    
-    while not done and step_idx < max_steps:
-        if cancel_event and cancel_event.is_set():
-            log_dispatcher(
-                {
-                    "type": "status",
-                    "message": "Execution cancelled by user",
-                }
-            )
-            break
-        logger.info("---------------------------agent predict---------------------------")
-        t0 = time.time()
-        response, actions = agent.predict(instruction, obs)
-        skill_outputs = getattr(agent, "latest_skill_outputs", [])
-        if skill_outputs:
-            for skill_item in skill_outputs:
-                log_dispatcher(
-                    {
-                        "type": "skill",
-                        "step": step_idx + 1,
-                        "message": f'Skill "{skill_item["title"]}" provided',
-                        "details": {
-                            "body": skill_item["body"],
-                            "available": skill_item.get("available", False),
-                        },
-                    }
-                )
-        t1 = time.time()
-        logger.info(f"agent predict time: {t1 - t0:.2f}s") 
-        
-        # 检查response是否包含HTML错误页面（如503错误）
-        if (
-            response
-            and isinstance(response, str)
-            and ("<html>" in response.lower() or "503 service" in response.lower())
-        ):
-            logger.error(
-                f"Agent predict returned HTML error page at step {step_idx}: {response[:200]}"
-            )
-            raise RuntimeError(
-                "LLM service returned error page (likely 503 or similar): "
-                f"{response[:100]}"
-            )
-        
-        # 检查是否获取到有效的actions
-        if not actions or len(actions) == 0:
-            if skill_outputs:
-                action_timestamp = datetime.datetime.now().strftime("%Y%m%d@%H%M%S")
-                skill_info = [
-                    {
-                        "title": item["title"],
-                        "body": item["body"],
-                        "available": item.get("available", False),
-                    }
-                    for item in skill_outputs
-                ]
-                with open(os.path.join(example_result_dir, "traj.jsonl"), "a", encoding="utf-8") as f:
-                    f.write(
-                        json.dumps(
-                            {
-                                "step_num": step_idx + 1,
-                                "action_timestamp": action_timestamp,
-                                "action": "skill",
-                                "response": response,
-                                "reward": 0,
-                                "done": False,
-                                "info": {"skills": skill_info},
-                                "screenshot_file": None,
-                            },
-                            ensure_ascii=False,
-                        )
-                    )
-                    f.write("\n")
-                if hasattr(agent, "latest_skill_outputs"):
-                    agent.latest_skill_outputs = []
-                step_idx += 1
-                continue
-            logger.warning(f"Agent predict returned empty actions at step {step_idx}")
-            if step_idx == 0:
-                raise RuntimeError("Agent predict failed at first step - LLM service may be unavailable")
-            break
-        if hasattr(agent, "latest_skill_outputs"):
-            agent.latest_skill_outputs = []
-            
-        # 执行每个动作
-        for action in actions:
-            if cancel_event and cancel_event.is_set():
-                log_dispatcher(
-                    {
-                        "type": "status",
-                        "message": "Execution cancelled by user",
-                    }
-                )
-                done = True
-                break
-            action_timestamp = datetime.datetime.now().strftime("%Y%m%d@%H%M%S")
-            logger.info("Step %d: %s", step_idx + 1, action)
 
-            log_dispatcher(
-                {
-                    "type": "step",
-                    "step": step_idx + 1,
-                    "message": action,
-                    "details": {
-                        "response": response,
-                    },
-                }
-            )
-            
-            # 执行动作
-            obs, reward, done, info = env.step(action, args.sleep_after_execution)
-
-            logger.info("Reward: %.2f", reward)
-            logger.info("Done: %s", done)
-            
-            # 保存截图
-            screenshot_data = _normalize_screenshot(obs['screenshot'])
-            obs['screenshot'] = screenshot_data
-            
-            screenshot_filename = f"step_{step_idx + 1}_{action_timestamp}.png"
-            screenshot_path = os.path.join(example_result_dir, screenshot_filename)
-            with open(screenshot_path, "wb") as _f:
-                _f.write(obs['screenshot'])
 
-            log_dispatcher(
-                {
-                    "type": "screenshot",
-                    "step": step_idx + 1,
-                    "message": "Screenshot captured",
-                    "assets": [
-                        {
-                            "type": "screenshot",
-                            "path": screenshot_path,
-                            "relative_path": screenshot_filename,
-                        }
-                    ],
-                    "details": {
-                        "reward": reward,
-                        "done": done,
-                        "info": info,
-                    },
-                }
-            )
-            
-            # 记录轨迹
-            with open(os.path.join(example_result_dir, "traj.jsonl"), "a", encoding="utf-8") as f:
-                f.write(json.dumps({
-                    "step_num": step_idx + 1,
-                    "action_timestamp": action_timestamp,
-                    "action": action,
-                    "response": response,
-                    "reward": reward,
-                    "done": done,
-                    "info": info,
-                    "screenshot_file": f"step_{step_idx + 1}_{action_timestamp}.png"
-                }, ensure_ascii=False))
-                f.write("\n")
-            
-            if done:
-                logger.info("The episode is done.")
-                log_dispatcher(
-                    {
-                        "type": "status",
-                        "step": step_idx + 1,
-                        "message": info.get("termination", "Task completed"),
-                        "details": {
-                            "reward": reward,
-                            "info": info,
-                        },
-                    }
-                )
-                break
-        
-        step_idx += 1
-    
-    # 评估结果
+def _after_predict(agent, response, step_idx: int, started: float, log_dispatcher) -> Dict:
+    """转发 skill 事件、记录预测统计并检查错误页面；返回 step 事件的 details。"""
+    skill_outputs = getattr(agent, "latest_skill_outputs", [])
+    for skill_item in skill_outputs or []:
+        log_dispatcher(
+            {
+                "type": "skill",
+                "step": step_idx + 1,
+                "message": f'Skill "{skill_item["title"]}" provided',
+                "details": {
+                    "body": skill_item["body"],
+                    "available": skill_item.get("available", False),
+                },
+            }
+        )
+    logger.info(f"agent predict time: {time.time() - started:.2f}s")
+    image_stats = getattr(agent, "latest_image_stats", None)
+    if image_stats:
+        logger.info(
+            "Image tokens: %s (%s bytes)",
+            image_stats.get("visual_tokens"),
+            image_stats.get("bytes"),
+        )
+    history_stats = getattr(agent, "latest_history_stats", None)
+    if history_stats:
+        logger.info(
+            "History %s: %s messages, prefix reuse %.1f%%",
+            history_stats.get("policy"),
+            history_stats.get("messages"),
+            100 * float(history_stats.get("prefix_reuse", 0.0)),
+        )
+
+    # 检查response是否包含HTML错误页面（如503错误）
+    if (
+        response
+        and isinstance(response, str)
+        and ("<html>" in response.lower() or "503 service" in response.lower())
+    ):
+        logger.error(
+            f"Agent predict returned HTML error page at step {step_idx}: {response[:200]}"
+        )
+        raise RuntimeError(
+            "LLM service returned error page (likely 503 or similar): "
+            f"{response[:100]}"
+        )
+    return {
+        "response": response,
+        "image": image_stats or None,
+        "history": history_stats or None,
+        "stream": getattr(agent, "latest_stream_stats", None) or None,
+    }
+
+
+def _record_skill_turn(agent, response, step_idx: int, writer: ArtifactWriter) -> bool:
+    """
+    处理没有动作的回复：仅返回 skill 的回合记入轨迹并返回 True（继续循环）；
+    否则返回 False（结束循环），第一步就失败时抛出异常。
+    """
+    skill_outputs = getattr(agent, "latest_skill_outputs", [])
+    if skill_outputs:
+        skill_info = [
+            {
+                "title": item["title"],
+                "body": item["body"],
+                "available": item.get("available", False),
+            }
+            for item in skill_outputs
+        ]
+        writer.write_skill_record(
+            {
+                "step_num": step_idx + 1,
+                "action_timestamp": _timestamp(),
+                "action": "skill",
+                "response": response,
+                "reward": 0,
+                "done": False,
+                "info": {"skills": skill_info},
+                "screenshot_file": None,
+            }
+        )
+        _clear_skill_outputs(agent)
+        return True
+    logger.warning(f"Agent predict returned empty actions at step {step_idx}")
+    if step_idx == 0:
+        raise RuntimeError("Agent predict failed at first step - LLM service may be unavailable")
+    return False
+
+
+def _clear_skill_outputs(agent) -> None:
+    if hasattr(agent, "latest_skill_outputs"):
+        agent.latest_skill_outputs = []
+
+
+def _use_batch(actions, args, env) -> bool:
+    return len(actions) > 1 and getattr(args, "batch_actions", False) and hasattr(env, "step_batch")
+
+
+def _announce_step(log_dispatcher, step_num: int, action, step_details: Dict) -> str:
+    action_timestamp = _timestamp()
+    logger.info("Step %d: %s", step_num, action)
+    log_dispatcher(
+        {
+            "type": "step",
+            "step": step_num,
+            "message": action,
+            "details": step_details,
+        }
+    )
+    return action_timestamp
+
+
+def _record_step(
+    obs,
+    action,
+    reward,
+    done,
+    info,
+    step_num: int,
+    action_timestamp: str,
+    response,
+    writer: ArtifactWriter,
+    log_dispatcher,
+):
+    """保存单个动作后的截图与轨迹，episode 结束时发送状态事件。"""
+    logger.info("Reward: %.2f", reward)
+    logger.info("Done: %s", done)
+
+    obs['screenshot'] = _normalize_screenshot(obs['screenshot'])
+    screenshot_filename = f"step_{step_num}_{action_timestamp}.png"
+    writer.write_screenshot(
+        screenshot_filename,
+        obs['screenshot'],
+        on_written=_screenshot_event(
+            log_dispatcher,
+            step=step_num,
+            filename=screenshot_filename,
+            details={
+                "reward": reward,
+                "done": done,
+                "info": info,
+            },
+        ),
+    )
+    writer.write_trajectory(
+        {
+            "step_num": step_num,
+            "action_timestamp": action_timestamp,
+            "action": action,
+            "response": response,
+            "reward": reward,
+            "done": done,
+            "info": info,
+            "screenshot_file": screenshot_filename,
+        }
+    )
+    if done:
+        _announce_done(log_dispatcher, step_num, reward, info)
+    return obs
+
+
+def _batch_step_announcer(log_dispatcher, step_num: int, actions, step_details: Dict):
+    def _on_action(index: int, action) -> None:
+        logger.info("Step %d.%d: %s", step_num, index + 1, action)
+        log_dispatcher(
+            {
+                "type": "step",
+                "step": step_num,
+                "message": action,
+                "details": dict(step_details, batch={"index": index, "size": len(actions)}),
+            }
+        )
+
+    return _on_action
+
+
+def _record_batch(
+    obs,
+    results,
+    actions,
+    step_num: int,
+    action_timestamp: str,
+    response,
+    writer: ArtifactWriter,
+    log_dispatcher,
+):
+    """
+    记录 env.step_batch 的结果：每个已执行动作写一行轨迹（带 batch 序号），
+    只有最后一个动作附带截图；返回 (obs, done)。
+    """
+    obs['screenshot'] = _normalize_screenshot(obs['screenshot'])
+    if not results:
+        return obs, False
+
+    last = results[-1]
+    reward, done, info = last["reward"], last["done"], last["info"]
+    logger.info("Batch executed %d/%d actions, reward %.2f, done %s", len(results), len(actions), reward, done)
+
+    screenshot_filename = f"step_{step_num}_{action_timestamp}.png"
+    writer.write_screenshot(
+        screenshot_filename,
+        obs['screenshot'],
+        on_written=_screenshot_event(
+            log_dispatcher,
+            step=step_num,
+            filename=screenshot_filename,
+            details={
+                "reward": reward,
+                "done": done,
+                "info": info,
+                "batch": {"executed": len(results), "size": len(actions)},
+            },
+        ),
+    )
+    for index, result in enumerate(results):
+        is_last = index == len(results) - 1
+        writer.write_trajectory(
+            {
+                "step_num": step_num,
+                "action_timestamp": action_timestamp,
+                "action": result["action"],
+                "response": response,
+                "reward": result["reward"],
+                "done": result["done"],
+                "info": result["info"],
+                "batch": {
+                    "index": index,
+                    "size": len(actions),
+                    "executed": len(results),
+                },
+                # 中间动作没有单独截图，回放时以批次最后一帧为准
+                "screenshot_file": screenshot_filename if is_last else None,
+            }
+        )
+
+    if done:
+        _announce_done(log_dispatcher, step_num, reward, info)
+    return obs, done
+
+
+def _announce_done(log_dispatcher, step_num: int, reward, info: Dict) -> None:
+    logger.info("The episode is done.")
+    log_dispatcher(
+        {
+            "type": "status",
+            "step": step_num,
+            "message": info.get("termination", "Task completed"),
+            "details": {
+                "reward": reward,
+                "info": info,
+            },
+        }
+    )
+
+
+def _finish_example(
+    env,
+    example,
+    example_result_dir,
+    scores,
+    writer: ArtifactWriter,
+    log_dispatcher,
+    cancel_event: Optional[Event],
+):
+    """等待产物落盘后评估并发送 complete 事件，最后结束录屏。"""
+    # 评估结果前先等待产物落盘，保证 complete 事件之后不会再有截图事件
+    writer.drain()
+    artifact_stats = writer.stats()
     if cancel_event and cancel_event.is_set():
         log_dispatcher(
             {
@@ -308,6 +695,9 @@ def run_single_example(
                 "status": "cancelled",
                 "message": "GUI agent run cancelled",
                 "result_dir": example_result_dir,
+                "details": {
+                    "artifacts": artifact_stats,
+                },
             }
         )
         scores.append(None)
@@ -317,8 +707,7 @@ def run_single_example(
         logger.info("Enhanced task detected (enhanced_task_id: %s), skipping evaluation. Result: %s", 
                    example['enhanced_task_id'], result)
         scores.append(None)  # 不计入统计
-        with open(os.path.join(example_result_dir, "result.txt"), "w", encoding="utf-8") as f:
-            f.write(f"{result}\n")
+        writer.write_text("result.txt", f"{result}\n")
         log_dispatcher(
             {
                 "type": "complete",
@@ -326,6 +715,7 @@ def run_single_example(
                 "message": "Waiting for RM evaluation",
                 "details": {
                     "enhanced_task_id": example['enhanced_task_id'],
+                    "artifacts": artifact_stats,
                 },
                 "result_dir": example_result_dir,
             }
@@ -335,8 +725,7 @@ def run_single_example(
         result = env.evaluate()
         logger.info("Result: %.2f", result)
         scores.append(result)
-        with open(os.path.join(example_result_dir, "result.txt"), "w", encoding="utf-8") as f:
-            f.write(f"{result}\n")
+        writer.write_text("result.txt", f"{result}\n")
         log_dispatcher(
             {
                 "type": "complete",
@@ -344,6 +733,9 @@ def run_single_example(
                 "score": result,
                 "message": "GUI agent run completed",
                 "result_dir": example_result_dir,
+                "details": {
+                    "artifacts": artifact_stats,
+                },
             }
         )
     
@@ -387,6 +779,61 @@ def setup_logger(example, example_result_dir):
     return runtime_logger
 
 
+def _screenshot_event(
+    log_dispatcher,
+    *,
+    step: int,
+    filename: str,
+    message: str = "Screenshot captured",
+    details: Optional[Dict] = None,
+):
+    """Build the callback that announces a screenshot once the writer persisted it."""
+    def _announce(path: Optional[str], thumbnail: Optional[Dict] = None) -> None:
+        if path is None:
+            # 截图落盘失败：仍发出事件，前端据此标记缺失的帧
+            event = {
+                "type": "screenshot",
+                "step": step,
+                "message": f"Failed to save screenshot {filename}",
+                "error": True,
+                "assets": [],
+            }
+            if details is not None:
+                event["details"] = details
+            log_dispatcher(event)
+            return
+        assets = [
+            {
+                "type": "screenshot",
+                "path": path,
+                "relative_path": filename,
+            }
+        ]
+        if thumbnail:
+            # 时间线优先加载缩略图，原图仅在用户点开时按需读取
+            assets.append({"type": "thumbnail", "source": filename, **thumbnail})
+        event = {
+            "type": "screenshot",
+            "step": step,
+            "message": message,
+            "assets": assets,
+        }
+        if details is not None:
+            event["details"] = details
+        log_dispatcher(event)
+
+    return _announce
+
+
+def _step_event_forwarder(log_dispatcher, step: int) -> Callable[[Dict], None]:
+    def _forward(payload: Dict) -> None:
+        event = {"step": step}
+        event.update(payload)
+        log_dispatcher(event)
+
+    return _forward
+
+
 def _build_log_dispatcher(callback: Optional[Callable[[Dict], None]]):
     def _dispatcher(payload: Dict) -> None:
         if callback is None:
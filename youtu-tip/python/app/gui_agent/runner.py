@@ -14,16 +14,20 @@ that takes a user instruction, prepares the environment/agent, and runs it.
 """
 
 import argparse
+import asyncio
 import datetime
 import json
 import os
+import uuid
+from dataclasses import dataclass
 from threading import Event
 from types import SimpleNamespace
 from typing import Any, Callable, Dict, Optional
 
 from . import run_loop
-from .local_env import LocalMacOSEnv
+from .llm_config import AgentLLMConfig
 from .qwen_agent import Qwen3VLAgent
+from .replay_cache import DEFAULT_TOLERANCE, get_trajectory_cache
 from .skills import SkillRepository
 
 
@@ -49,7 +53,23 @@ def build_default_args(**overrides: Any) -> SimpleNamespace:
         coord="relative",
         action_space="pyautogui",
         observation_type="screenshot",
+        observation_mode=os.environ.get("TIP_GUI_OBSERVATION_MODE") or "full",
+        history_policy=os.environ.get("TIP_GUI_HISTORY_POLICY") or "sliding",
+        stream=(os.environ.get("TIP_GUI_STREAM") or "").lower() in {"1", "true", "yes"},
+        # 仅在模型每轮只输出一个动作时开启：首个 </tool_call> 后即断开流
+        stream_stop_after_first=(os.environ.get("TIP_GUI_STREAM_STOP_EARLY") or "").lower()
+        in {"1", "true", "yes"},
         sleep_after_execution=0.5,
+        # pyautogui | quartz；Quartz 不可用时自动回退到 pyautogui
+        executor_backend=os.environ.get("TIP_GUI_EXECUTOR") or "pyautogui",
+        # 一次回复中的多个动作连续执行，只在批次结束后截图
+        # 默认关闭：批次内的中间动作不再产生截图与 screenshot 事件，需显式开启
+        batch_actions=(os.environ.get("TIP_GUI_BATCH_ACTIONS") or "0").lower() in {"1", "true", "yes"},
+        batch_settle=0.1,
+        # 重复指令命中轨迹缓存时直接回放，画面偏离后交回模型
+        # 默认关闭：本地环境没有真正的成功判定，需显式开启
+        replay_cache=(os.environ.get("TIP_GUI_REPLAY_CACHE") or "0").lower() in {"1", "true", "yes"},
+        replay_tolerance=int(os.environ.get("TIP_GUI_REPLAY_TOLERANCE") or DEFAULT_TOLERANCE),
         result_dir="results_core",
     )
 
@@ -78,6 +98,49 @@ def _create_task_config(instruction: str, task_id: str) -> Dict[str, Any]:
     }
 
 
+@dataclass
+class _PreparedRun:
+    """Run directory, env and agent built before the step loop starts."""
+
+    task_id: str
+    task_config: Dict[str, Any]
+    result_dir: str
+    args: SimpleNamespace
+    env: Any
+    agent: Qwen3VLAgent
+    emit: Callable[[Dict[str, Any]], None]
+
+    def remember(self, instruction: str, scores: list) -> None:
+        """
+        Store a successful run in the replay cache (unless it was replayed verbatim).
+
+        Success means the model terminated with DONE and no action failed
+        (checked by ``build_trajectory``). ``env.evaluate()`` only counts when
+        the env declares ``verifies_success``: LocalMacOSEnv always returns 1.0.
+        """
+        cache = self.agent.replay_cache
+        if cache is None:
+            return
+        try:
+            if not scores or scores[0] is None:
+                return  # cancelled or pending
+            if getattr(self.env, "verifies_success", False) and scores[0] < 1:
+                return
+            replay = self.agent.latest_replay_stats
+            if replay and not replay.get("diverged") and replay.get("replayed") == replay.get("total"):
+                return
+            cache.record_run(instruction, self.result_dir)
+        finally:
+            cache.flush()
+
+    def result(self, scores: list) -> Dict[str, Any]:
+        return {
+            "task_id": self.task_id,
+            "result_dir": self.result_dir,
+            "score": scores[0] if scores else None,
+        }
+
+
 def run_prompt(
     instruction: str,
     *,
@@ -86,13 +149,123 @@ def run_prompt(
     log_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
     cancel_event: Optional[Event] = None,
     skills_repo: Optional[SkillRepository] = None,
+    llm_config: Optional[AgentLLMConfig] = None,
+    env_factory: Optional[Callable[[SimpleNamespace], Any]] = None,
 ) -> Dict[str, Any]:
     """
     Execute a single instruction and return metadata about the run.
 
+    ``llm_config`` carries provider settings for this run only (falls back to
+    TIP_* env vars), and ``env_factory`` builds the environment from ``args``
+    (defaults to the local macOS desktop), so several runs can share a process.
+
     Returns:
         dict(task_id=str, result_dir=str, score=float|None)
     """
+    run = _prepare_run(
+        instruction,
+        args=args,
+        result_root=result_root,
+        log_callback=log_callback,
+        skills_repo=skills_repo,
+        llm_config=llm_config,
+        env_factory=env_factory,
+    )
+    # cancel_event allows callers (e.g., GUI) to abort mid-run; run_single_example honors it.
+    # Score list is mutated by run_single_example; keep it local to avoid shared state.
+    scores = []
+    _emit_start(run, instruction)
+    try:
+        run_loop.run_single_example(
+            agent=run.agent,
+            env=run.env,
+            example=run.task_config,
+            max_steps=run.args.max_steps,
+            instruction=instruction,
+            args=run.args,
+            example_result_dir=run.result_dir,
+            scores=scores,
+            log_callback=run.emit,
+            cancel_event=cancel_event,
+        )
+    except Exception as exc:
+        # Emit an error event before bubbling up so callers can log/clean up.
+        _emit_error(run, exc)
+        raise
+    finally:
+        # Always close environment to release OS hooks and temp files.
+        run.env.close()
+
+    run.remember(instruction, scores)
+    return run.result(scores)
+
+
+async def arun_prompt(
+    instruction: str,
+    *,
+    args: Optional[SimpleNamespace] = None,
+    result_root: Optional[str] = None,
+    log_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    cancel_event: Optional[Event] = None,
+    skills_repo: Optional[SkillRepository] = None,
+    llm_config: Optional[AgentLLMConfig] = None,
+    env_factory: Optional[Callable[[SimpleNamespace], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Asyncio variant of ``run_prompt``.
+
+    To cancel, set ``cancel_event`` and then cancel the awaiting task: the
+    in-flight LLM request is aborted immediately and the run completes with a
+    ``cancelled`` event. ``log_callback`` may be invoked from worker threads
+    (screenshot writes), so it must be thread-safe.
+    """
+    # Env construction may import pyautogui / probe the display; keep it off the loop.
+    run = await asyncio.to_thread(
+        _prepare_run,
+        instruction,
+        args=args,
+        result_root=result_root,
+        log_callback=log_callback,
+        skills_repo=skills_repo,
+        llm_config=llm_config,
+        env_factory=env_factory,
+    )
+    scores = []
+    _emit_start(run, instruction)
+    try:
+        await run_loop.arun_single_example(
+            agent=run.agent,
+            env=run.env,
+            example=run.task_config,
+            max_steps=run.args.max_steps,
+            instruction=instruction,
+            args=run.args,
+            example_result_dir=run.result_dir,
+            scores=scores,
+            log_callback=run.emit,
+            cancel_event=cancel_event,
+        )
+    except Exception as exc:
+        _emit_error(run, exc)
+        raise
+    finally:
+        await asyncio.to_thread(run.env.close)
+
+    await asyncio.to_thread(run.remember, instruction, scores)
+    return run.result(scores)
+
+
+def _prepare_run(
+    instruction: str,
+    *,
+    args: Optional[SimpleNamespace],
+    result_root: Optional[str],
+    log_callback: Optional[Callable[[Dict[str, Any]], None]],
+    skills_repo: Optional[SkillRepository],
+    llm_config: Optional[AgentLLMConfig],
+    env_factory: Optional[Callable[[SimpleNamespace], Any]],
+) -> _PreparedRun:
+    """Create the run directory, persist inputs and build env + agent."""
     if not instruction or not instruction.strip():
         raise ValueError("Instruction不能为空")
 
@@ -100,7 +273,8 @@ def run_prompt(
     base_result_dir = result_root or getattr(args, "result_dir", "results_core")
 
     # Generate a unique run directory; timestamp helps avoid collisions.
-    task_id = f"prompt_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    # A short random suffix keeps concurrent runs started in the same second apart.
+    task_id = f"prompt_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
     task_config = _create_task_config(instruction, task_id)
 
     def _emit_event(payload: Dict[str, Any]) -> None:
@@ -131,7 +305,7 @@ def run_prompt(
     with open(os.path.join(result_dir, "args.json"), "w", encoding="utf-8") as f:
         json.dump(vars(args), f, ensure_ascii=False, indent=2)
 
-    env = LocalMacOSEnv(action_space=args.action_space, platform="macos")
+    env = (env_factory or _default_env_factory)(args)
     # Agent mirrors runtime defaults but can be injected with custom skill repo for tests.
     agent = Qwen3VLAgent(
         model=args.model,
@@ -147,51 +321,59 @@ def run_prompt(
         history_n=args.history_n,
         platform="macos",
         observation_type=args.observation_type,
+        observation_mode=getattr(args, "observation_mode", "full"),
+        history_policy=getattr(args, "history_policy", "sliding"),
+        stream=getattr(args, "stream", False),
+        stream_stop_after_first=getattr(args, "stream_stop_after_first", False),
         skills_repo=skills_repo,
+        llm_config=llm_config,
+    )
+    if getattr(args, "replay_cache", False):
+        agent.replay_cache = get_trajectory_cache(
+            os.path.join(base_result_dir, "replay_cache.json"),
+            tolerance=getattr(args, "replay_tolerance", DEFAULT_TOLERANCE),
+        )
+    return _PreparedRun(
+        task_id=task_id,
+        task_config=task_config,
+        result_dir=result_dir,
+        args=args,
+        env=env,
+        agent=agent,
+        emit=_emit_event,
     )
 
-    # cancel_event allows callers (e.g., GUI) to abort mid-run; run_single_example honors it.
-    # Score list is mutated by run_single_example; keep it local to avoid shared state.
-    scores = []
-    _emit_event(
+
+def _emit_start(run: _PreparedRun, instruction: str) -> None:
+    run.emit(
         {
             "type": "start",
             "instruction": instruction,
-            "result_dir": result_dir,
+            "result_dir": run.result_dir,
         }
     )
-    try:
-        run_loop.run_single_example(
-            agent=agent,
-            env=env,
-            example=task_config,
-            max_steps=args.max_steps,
-            instruction=instruction,
-            args=args,
-            example_result_dir=result_dir,
-            scores=scores,
-            log_callback=_emit_event,
-            cancel_event=cancel_event,
-        )
-    except Exception as exc:
-        # Emit an error event before bubbling up so callers can log/clean up.
-        _emit_event(
-            {
-                "type": "error",
-                "message": str(exc),
-                "result_dir": result_dir,
-            }
-        )
-        raise
-    finally:
-        # Always close environment to release OS hooks and temp files.
-        env.close()
 
-    return {
-        "task_id": task_id,
-        "result_dir": result_dir,
-        "score": scores[0] if scores else None,
-    }
+
+def _emit_error(run: _PreparedRun, exc: Exception) -> None:
+    run.emit(
+        {
+            "type": "error",
+            "message": str(exc),
+            "result_dir": run.result_dir,
+        }
+    )
+
+
+def _default_env_factory(args: SimpleNamespace) -> Any:
+    # pyautogui needs a display at import time; keep it out of module import so
+    # headless callers (simulated env / benchmark) can use this module.
+    from .local_env import LocalMacOSEnv
+
+    return LocalMacOSEnv(
+        action_space=args.action_space,
+        platform="macos",
+        backend=getattr(args, "executor_backend", "pyautogui"),
+    )
 
 
 def _main() -> None:
@@ -0,0 +1,521 @@
+# File: python/app/gui_agent/simulated_env.py
+# Project: Tip Desktop Assistant
+# Description: Headless simulated desktop implementing the LocalMacOSEnv interface for CI and benchmarks.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+A synthetic desktop that runs anywhere Pillow does.
+
+The scene is a list of widgets (windows, buttons, text fields, checkboxes).
+Actions are the same pyautogui code strings the agent sends to
+``LocalMacOSEnv``; they are executed against a fake ``pyautogui`` /
+``pyperclip`` pair that mutates the scene instead of the real machine.
+Screens are re-rendered after every step and tasks are scored from the
+final scene state.
+"""
+
+from __future__ import annotations
+
+import builtins
+import copy
+import logging
+import threading
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+
+from .executor import ActionBackend, ActionExecutor
+from .timing import StageTimer, stage
+
+logger = logging.getLogger("desktopenv.simulated")
+
+
+@dataclass
+class SimWidget:
+    widget_id: str
+    kind: str  # window | button | textbox | checkbox | label
+    box: Tuple[int, int, int, int]
+    label: str = ""
+    text: str = ""
+    checked: bool = False
+    clicks: int = 0
+
+    def contains(self, x: int, y: int) -> bool:
+        left, top, right, bottom = self.box
+        return left <= x < right and top <= y < bottom
+
+
+@dataclass
+class SimScene:
+    width: int
+    height: int
+    widgets: List[SimWidget] = field(default_factory=list)
+    focus: Optional[str] = None
+    cursor: Tuple[int, int] = (0, 0)
+    clipboard: str = ""
+    scroll_offset: int = 0
+    key_log: List[str] = field(default_factory=list)
+
+    def widget(self, widget_id: str) -> Optional[SimWidget]:
+        return next((w for w in self.widgets if w.widget_id == widget_id), None)
+
+    def hit_test(self, x: int, y: int) -> Optional[SimWidget]:
+        # Later widgets are drawn on top, so search back to front; windows only catch clicks.
+        for widget in reversed(self.widgets):
+            if widget.kind != "window" and widget.contains(x, y):
+                return widget
+        return None
+
+
+def _login_scene(width: int, height: int) -> SimScene:
+    cx, cy = width // 2, height // 2
+    return SimScene(
+        width=width,
+        height=height,
+        widgets=[
+            SimWidget("login_window", "window", (cx - 260, cy - 180, cx + 260, cy + 180), label="Sign in"),
+            SimWidget("username", "textbox", (cx - 200, cy - 100, cx + 200, cy - 60), label="Username"),
+            SimWidget("password", "textbox", (cx - 200, cy - 30, cx + 200, cy + 10), label="Password"),
+            SimWidget("remember", "checkbox", (cx - 200, cy + 35, cx - 176, cy + 59), label="Remember me"),
+            SimWidget("sign_in", "button", (cx - 80, cy + 100, cx + 80, cy + 144), label="Sign in"),
+        ],
+    )
+
+
+def _settings_scene(width: int, height: int) -> SimScene:
+    return SimScene(
+        width=width,
+        height=height,
+        widgets=[
+            SimWidget("settings_window", "window", (120, 80, width - 120, height - 80), label="Settings"),
+            SimWidget("dark_mode", "checkbox", (200, 200, 224, 224), label="Dark mode"),
+            SimWidget("notifications", "checkbox", (200, 260, 224, 284), label="Notifications", checked=True),
+            SimWidget("search", "textbox", (200, 140, 700, 176), label="Search settings"),
+            SimWidget("apply", "button", (width - 340, height - 160, width - 180, height - 116), label="Apply"),
+        ],
+    )
+
+
+SCENES = {
+    "login": _login_scene,
+    "settings": _settings_scene,
+}
+
+_KEY_ALIASES = {"cmd": "command", "ctrl": "control", "return": "enter"}
+
+
+class _SimPyAutoGUI:
+    """Subset of the pyautogui API used by the response parser, applied to a SimScene."""
+
+    FAILSAFE = False
+    PAUSE = 0.0
+
+    def __init__(self, scene: SimScene) -> None:
+        self._scene = scene
+        self._held: List[str] = []
+
+    def size(self):
+        return self._scene.width, self._scene.height
+
+    def position(self):
+        return self._scene.cursor
+
+    def moveTo(self, x=None, y=None, *args, **kwargs):
+        self._move(x, y)
+
+    def moveRel(self, dx=0, dy=0, *args, **kwargs):
+        cx, cy = self._scene.cursor
+        self._move(cx + int(dx), cy + int(dy))
+
+    def click(self, x=None, y=None, *args, clicks=1, **kwargs):
+        self._move(x, y)
+        for _ in range(max(1, int(clicks))):
+            self._press_at_cursor()
+
+    def doubleClick(self, x=None, y=None, *args, **kwargs):
+        self.click(x, y, clicks=2)
+
+    def rightClick(self, x=None, y=None, *args, **kwargs):
+        self._move(x, y)
+
+    def middleClick(self, x=None, y=None, *args, **kwargs):
+        self._move(x, y)
+
+    def dragTo(self, x=None, y=None, *args, **kwargs):
+        self._move(x, y)
+
+    def scroll(self, clicks, *args, **kwargs):
+        self._scene.scroll_offset += int(clicks)
+
+    def typewrite(self, message, *args, **kwargs):
+        if isinstance(message, (list, tuple)):
+            for key in message:
+                self.press(key)
+            return
+        self._type(str(message))
+
+    write = typewrite
+
+    def press(self, keys, *args, **kwargs):
+        for key in keys if isinstance(keys, (list, tuple)) else [keys]:
+            self._key(str(key))
+
+    def hotkey(self, *keys, **kwargs):
+        normalized = [_KEY_ALIASES.get(str(k).lower(), str(k).lower()) for k in keys]
+        self._scene.key_log.append("+".join(normalized))
+        if normalized[-1:] == ["v"] and ("command" in normalized or "control" in normalized):
+            self._type(self._scene.clipboard)
+        elif normalized[-1:] == ["a"] and ("command" in normalized or "control" in normalized):
+            widget = self._focused()
+            if widget is not None and widget.kind == "textbox":
+                widget.text = ""
+
+    def keyDown(self, key, *args, **kwargs):
+        self._held.append(str(key).lower())
+
+    def keyUp(self, key, *args, **kwargs):
+        key = str(key).lower()
+        if key in self._held:
+            if len(self._held) > 1 and key == self._held[-1]:
+                self.hotkey(*self._held)
+            self._held.remove(key)
+
+    # ----------------------------
+    # Scene mutations
+    # ----------------------------
+    def _move(self, x, y) -> None:
+        if x is None or y is None:
+            return
+        x = min(max(int(x), 0), self._scene.width - 1)
+        y = min(max(int(y), 0), self._scene.height - 1)
+        self._scene.cursor = (x, y)
+
+    def _press_at_cursor(self) -> None:
+        widget = self._scene.hit_test(*self._scene.cursor)
+        if widget is None:
+            self._scene.focus = None
+            return
+        widget.clicks += 1
+        if widget.kind == "checkbox":
+            widget.checked = not widget.checked
+        if widget.kind in {"textbox", "checkbox", "button"}:
+            self._scene.focus = widget.widget_id
+
+    def _focused(self) -> Optional[SimWidget]:
+        return self._scene.widget(self._scene.focus) if self._scene.focus else None
+
+    def _type(self, text: str) -> None:
+        widget = self._focused()
+        if widget is not None and widget.kind == "textbox":
+            widget.text += text
+
+    def _key(self, key: str) -> None:
+        key = _KEY_ALIASES.get(key.lower(), key.lower())
+        self._scene.key_log.append(key)
+        widget = self._focused()
+        if widget is None:
+            return
+        if key == "backspace" and widget.kind == "textbox":
+            widget.text = widget.text[:-1]
+        elif key in {"enter", "space"} and widget.kind in {"button", "checkbox"}:
+            self._press_at_cursor_on(widget)
+        elif len(key) == 1 and widget.kind == "textbox":
+            widget.text += key
+
+    def _press_at_cursor_on(self, widget: SimWidget) -> None:
+        widget.clicks += 1
+        if widget.kind == "checkbox":
+            widget.checked = not widget.checked
+
+
+class _SimPyperclip:
+    def __init__(self, scene: SimScene) -> None:
+        self._scene = scene
+
+    def copy(self, text) -> None:
+        self._scene.clipboard = str(text)
+
+    def paste(self) -> str:
+        return self._scene.clipboard
+
+
+class _SimTime:
+    """Sleeps inside action code are skipped; simulated time is free."""
+
+    @staticmethod
+    def sleep(_seconds) -> None:
+        return None
+
+
+class SimulatedBackend(ActionBackend):
+    """Executor backend that applies actions to the env's current scene."""
+
+    name = "simulated"
+
+    def __init__(self, env: "SimulatedDesktopEnv") -> None:
+        self._env = env
+
+    @property
+    def _gui(self) -> _SimPyAutoGUI:
+        # reset() swaps the scene, so bind lazily.
+        return _SimPyAutoGUI(self._env.scene)
+
+    def click(self, x, y, *, button: str = "left", clicks: int = 1) -> None:
+        self._gui.click(x, y, clicks=clicks)
+
+    def move_to(self, x: int, y: int) -> None:
+        self._gui.moveTo(x, y)
+
+    def drag_to(self, x: int, y: int, duration: float = 0.5) -> None:
+        self._gui.dragTo(x, y)
+
+    def scroll(self, amount: int) -> None:
+        self._gui.scroll(amount)
+
+    def type_text(self, text: str) -> None:
+        _SimPyperclip(self._env.scene).copy(text)
+        self._gui.hotkey("command", "v")
+
+    def hotkey(self, keys) -> None:
+        self._gui.hotkey(*keys)
+
+    def press(self, key: str) -> None:
+        self._gui.press(key)
+
+    def run_code(self, code: str) -> None:
+        self._env._execute(code)
+
+
+class SimulatedDesktopEnv:
+    """
+    Drop-in replacement for ``LocalMacOSEnv`` that needs no display.
+
+    ``task_config["sim"]`` selects the scene and goal, e.g.::
+
+        {"scene": "login",
+         "goal": {"text": {"username": "alice"}, "clicked": ["sign_in"]}}
+
+    Supported goal keys: ``text`` (exact textbox contents), ``clicked``
+    (widgets clicked at least once) and ``checked`` (checkbox states).
+    ``evaluate`` returns the fraction of goal conditions met.
+    """
+
+    def __init__(
+        self,
+        action_space: str = "pyautogui",
+        screen_width: int = 1440,
+        screen_height: int = 900,
+        platform: str = "macos",
+        scene: str = "login",
+        *,
+        stage_timer: Optional[StageTimer] = None,
+        honor_pause: bool = False,
+    ):
+        self.action_space = action_space
+        self.platform = platform
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.default_scene = scene
+        self.stage_timer = stage_timer
+        self.honor_pause = honor_pause
+        self.env_id = "simulated_desktop"
+        self.env_url = None
+        self.env_port = None
+        self.current_task_config: Optional[Dict[str, Any]] = None
+        self.goal: Dict[str, Any] = {}
+        self.terminated: Optional[str] = None
+        self.steps = 0
+        self.scene = self._build_scene(scene)
+        self._controller = _SimRecordingController(self)
+        # Timing is recorded by step() so the whole execute stage is measured once.
+        self.executor = ActionExecutor(SimulatedBackend(self))
+
+    # ----------------------------
+    # LocalMacOSEnv interface
+    # ----------------------------
+    def reset(self, task_config: Dict[str, Any]) -> Dict[str, Any]:
+        self.current_task_config = task_config
+        sim = (task_config or {}).get("sim") or {}
+        self.scene = self._build_scene(sim.get("scene", self.default_scene))
+        self.goal = copy.deepcopy(sim.get("goal") or {})
+        self.terminated = None
+        self.steps = 0
+        return self._get_obs()
+
+    def step(self, action: str, pause: float = 0.5) -> Tuple[Dict[str, Any], float, bool, Dict[str, Any]]:
+        reward, done, info = self._apply_action(action)
+        if self.honor_pause and pause:
+            import time
+
+            time.sleep(pause)
+        return self._get_obs(), reward, done, info
+
+    def step_batch(
+        self,
+        actions: Sequence[str],
+        pause: float = 0.5,
+        *,
+        settle: float = 0.1,
+        on_action: Optional[Callable[[int, str], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Same contract as ``LocalMacOSEnv.step_batch``; the scene settles instantly."""
+        results: List[Dict[str, Any]] = []
+        for index, action in enumerate(actions):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if on_action is not None:
+                on_action(index, action)
+            reward, done, info = self._apply_action(action)
+            results.append({"action": action, "reward": reward, "done": done, "info": info})
+            if done or info.get("error"):
+                break
+        if self.honor_pause and pause:
+            import time
+
+            time.sleep(pause)
+        return self._get_obs(), results
+
+    def _apply_action(self, action: str) -> Tuple[float, bool, Dict[str, Any]]:
+        done = False
+        reward = 0.0
+        info: Dict[str, Any] = {}
+        self.steps += 1
+        with stage(self.stage_timer, "execute"):
+            if action == "DONE":
+                done, reward = True, 1.0
+                info["termination"] = "success"
+                self.terminated = "success"
+            elif action == "FAIL":
+                done = True
+                info["termination"] = "failure"
+                self.terminated = "failure"
+            elif action == "WAIT":
+                pass
+            else:
+                result = self.executor.execute(action)
+                info["action"] = result.to_dict()
+                if not result.ok:
+                    info["error"] = result.error
+        return reward, done, info
+
+    @property
+    def verifies_success(self) -> bool:
+        """evaluate() checks real goal conditions only when the task defines a goal."""
+        return bool(self.goal)
+
+    def evaluate(self) -> float:
+        checks = self._goal_checks()
+        if not checks:
+            return 1.0 if self.terminated == "success" else 0.0
+        return sum(1 for ok in checks if ok) / len(checks)
+
+    def close(self) -> None:
+        self.current_task_config = None
+
+    @property
+    def controller(self):
+        return self._controller
+
+    def _get_obs(self) -> Dict[str, Any]:
+        with stage(self.stage_timer, "capture"):
+            screenshot = self.render()
+        return {"screenshot": screenshot, "accessibility_tree": None}
+
+    # ----------------------------
+    # Scene helpers
+    # ----------------------------
+    def render(self) -> bytes:
+        scene = self.scene
+        image = Image.new("RGB", (scene.width, scene.height), (58, 110, 165))
+        draw = ImageDraw.Draw(image)
+        # Menu bar keeps the frame looking like a desktop and gives the diff detector a stable area.
+        draw.rectangle([0, 0, scene.width, 24], fill=(236, 236, 236))
+        draw.text((12, 6), "Simulated Desktop", fill=(30, 30, 30))
+        for widget in scene.widgets:
+            self._draw_widget(draw, widget, focused=widget.widget_id == scene.focus)
+        cx, cy = scene.cursor
+        draw.polygon([(cx, cy), (cx + 12, cy + 12), (cx + 5, cy + 12), (cx, cy + 17)], fill=(0, 0, 0))
+        buffer = BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def _draw_widget(draw: ImageDraw.ImageDraw, widget: SimWidget, *, focused: bool) -> None:
+        left, top, right, bottom = widget.box
+        outline = (0, 122, 255) if focused else (120, 120, 120)
+        if widget.kind == "window":
+            draw.rectangle(widget.box, fill=(248, 248, 248), outline=(90, 90, 90))
+            draw.rectangle([left, top, right, top + 28], fill=(220, 220, 220))
+            draw.text((left + 12, top + 8), widget.label, fill=(20, 20, 20))
+        elif widget.kind == "button":
+            fill = (0, 122, 255) if widget.clicks else (230, 230, 230)
+            draw.rectangle(widget.box, fill=fill, outline=outline)
+            draw.text((left + 16, top + (bottom - top) // 2 - 6), widget.label, fill=(0, 0, 0))
+        elif widget.kind == "textbox":
+            draw.text((left, top - 16), widget.label, fill=(60, 60, 60))
+            draw.rectangle(widget.box, fill=(255, 255, 255), outline=outline, width=2 if focused else 1)
+            draw.text((left + 8, top + (bottom - top) // 2 - 6), widget.text, fill=(0, 0, 0))
+        elif widget.kind == "checkbox":
+            draw.rectangle(widget.box, fill=(255, 255, 255), outline=outline)
+            if widget.checked:
+                draw.line([left + 4, top + 12, left + 10, bottom - 4, right - 4, top + 4], fill=(0, 122, 255), width=3)
+            draw.text((right + 10, top + 4), widget.label, fill=(20, 20, 20))
+        else:
+            draw.text((left, top), widget.label, fill=(20, 20, 20))
+
+    def _build_scene(self, name: str) -> SimScene:
+        factory = SCENES.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown simulated scene: {name}")
+        return factory(self.screen_width, self.screen_height)
+
+    def _execute(self, action: str) -> None:
+        fake_gui = _SimPyAutoGUI(self.scene)
+        fake_clip = _SimPyperclip(self.scene)
+        modules = {"pyautogui": fake_gui, "pyperclip": fake_clip, "time": _SimTime}
+
+        def _import(name, *args, **kwargs):
+            if name in modules:
+                return modules[name]
+            raise ImportError(f"Module {name} is not available in the simulated desktop")
+
+        sandbox_builtins = dict(vars(builtins))
+        sandbox_builtins["__import__"] = _import
+        exec(action, {"__builtins__": sandbox_builtins, **modules})
+
+    def _goal_checks(self) -> List[bool]:
+        checks: List[bool] = []
+        for widget_id, expected in (self.goal.get("text") or {}).items():
+            widget = self.scene.widget(widget_id)
+            checks.append(widget is not None and widget.text == expected)
+        for widget_id in self.goal.get("clicked") or []:
+            widget = self.scene.widget(widget_id)
+            checks.append(widget is not None and widget.clicks > 0)
+        for widget_id, expected in (self.goal.get("checked") or {}).items():
+            widget = self.scene.widget(widget_id)
+            checks.append(widget is not None and widget.checked == bool(expected))
+        return checks
+
+
+class _SimRecordingController:
+    """Recording is a no-op in simulation; kept so run_loop can call it unconditionally."""
+
+    def __init__(self, env: SimulatedDesktopEnv) -> None:
+        self.env = env
+        self.recording = False
+
+    def start_recording(self) -> None:
+        self.recording = True
+
+    def end_recording(self, filename: str) -> None:
+        self.recording = False
+
+
+__all__ = ["SCENES", "SimScene", "SimWidget", "SimulatedDesktopEnv"]
@@ -11,6 +11,8 @@
 python.app.gui_agent.skills package initialization.
 """
 
+from .index import SkillHit, SkillIndex
 from .repository import Skill, SkillSummary, SkillRepository
+from .watcher import SkillWatcher
 
-__all__ = ["Skill", "SkillSummary", "SkillRepository"]
+__all__ = ["Skill", "SkillHit", "SkillIndex", "SkillSummary", "SkillRepository", "SkillWatcher"]
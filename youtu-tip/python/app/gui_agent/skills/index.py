@@ -0,0 +1,180 @@
+# File: python/app/gui_agent/skills/index.py
+# Project: Tip Desktop Assistant
+# Description: Incremental BM25 (plus optional embedding) index for ranking skills against a task.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+Embedder = Callable[[str], Sequence[float]]
+
+_WORD_RE = re.compile(r"[a-z0-9]+|[㐀-鿿]+", re.UNICODE)
+_CJK_RE = re.compile(r"[㐀-鿿]")
+
+
+def normalize_title(title: str) -> str:
+    """标题查找键：忽略大小写与多余空白。"""
+    return " ".join((title or "").split()).casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    """Latin words as-is; CJK runs as single characters plus bigrams (no segmenter needed)."""
+    tokens: List[str] = []
+    for chunk in _WORD_RE.findall((text or "").lower()):
+        if _CJK_RE.match(chunk):
+            tokens.extend(chunk)
+            tokens.extend(chunk[i : i + 2] for i in range(len(chunk) - 1))
+        else:
+            tokens.append(chunk)
+    return tokens
+
+
+@dataclass(frozen=True)
+class SkillHit:
+    skill_id: str
+    title: str
+    score: float
+
+
+@dataclass
+class _Doc:
+    title: str
+    terms: Counter
+    length: int
+    vector: Optional[List[float]] = None
+
+
+class SkillIndex:
+    """
+    BM25 over skill titles and bodies, updated per document.
+
+    ``add``/``remove`` touch only the postings of one skill, so upserts on a
+    large library stay cheap. Titles are weighted above bodies because they
+    are what the model requests. When an ``embedder`` is supplied, its cosine
+    similarity is blended into the score (``embedding_weight``); embedding
+    failures fall back to BM25 alone.
+    """
+
+    def __init__(
+        self,
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        title_weight: int = 3,
+        embedder: Optional[Embedder] = None,
+        embedding_weight: float = 0.5,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.title_weight = max(1, title_weight)
+        self.embedder = embedder
+        self.embedding_weight = min(max(embedding_weight, 0.0), 1.0)
+        self._docs: Dict[str, _Doc] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, skill_id: str) -> bool:
+        return skill_id in self._docs
+
+    def clear(self) -> None:
+        self._docs.clear()
+        self._postings.clear()
+        self._total_length = 0
+
+    def add(self, skill_id: str, title: str, body: str) -> None:
+        """Index (or re-index) one skill."""
+        self.remove(skill_id)
+        terms = Counter(tokenize(title) * self.title_weight + tokenize(body))
+        doc = _Doc(title=title, terms=terms, length=sum(terms.values()))
+        if self.embedder is not None:
+            doc.vector = self._embed(f"{title}\n{body}")
+        self._docs[skill_id] = doc
+        self._total_length += doc.length
+        for term, freq in terms.items():
+            self._postings.setdefault(term, {})[skill_id] = freq
+
+    def remove(self, skill_id: str) -> None:
+        doc = self._docs.pop(skill_id, None)
+        if doc is None:
+            return
+        self._total_length -= doc.length
+        for term in doc.terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(skill_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query: str, top_k: int = 8) -> List[SkillHit]:
+        """Return up to ``top_k`` skills with a positive score, best first."""
+        if not self._docs or top_k <= 0:
+            return []
+        scores = self._bm25(tokenize(query))
+        if self.embedder is not None and self.embedding_weight > 0:
+            scores = self._blend(query, scores)
+        ranked = sorted(
+            ((score, skill_id) for skill_id, score in scores.items() if score > 0),
+            key=lambda item: (-item[0], self._docs[item[1]].title),
+        )
+        return [
+            SkillHit(skill_id=skill_id, title=self._docs[skill_id].title, score=round(score, 4))
+            for score, skill_id in ranked[:top_k]
+        ]
+
+    # ----------------------------
+    # Internal helpers
+    # ----------------------------
+    def _bm25(self, query_terms: List[str]) -> Dict[str, float]:
+        scores: Dict[str, float] = {}
+        total_docs = len(self._docs)
+        avg_length = self._total_length / total_docs if total_docs else 0.0
+        for term in set(query_terms):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for skill_id, freq in postings.items():
+                length = self._docs[skill_id].length
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length) if avg_length else self.k1
+                scores[skill_id] = scores.get(skill_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+        return scores
+
+    def _blend(self, query: str, scores: Dict[str, float]) -> Dict[str, float]:
+        query_vector = self._embed(query)
+        if query_vector is None:
+            return scores
+        top = max(scores.values(), default=0.0)
+        blended: Dict[str, float] = {}
+        for skill_id, doc in self._docs.items():
+            lexical = scores.get(skill_id, 0.0) / top if top > 0 else 0.0
+            semantic = _cosine(query_vector, doc.vector) if doc.vector else 0.0
+            blended[skill_id] = (1 - self.embedding_weight) * lexical + self.embedding_weight * max(semantic, 0.0)
+        return blended
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            return [float(x) for x in self.embedder(text)]  # type: ignore[misc]
+        except Exception:  # noqa: BLE001 - embeddings are an optional boost
+            return None
+
+
+def _cosine(left: Sequence[float], right: Sequence[float]) -> float:
+    dot = sum(a * b for a, b in zip(left, right))
+    norm = math.sqrt(sum(a * a for a in left)) * math.sqrt(sum(b * b for b in right))
+    return dot / norm if norm else 0.0
+
+
+__all__ = ["Embedder", "SkillHit", "SkillIndex", "normalize_title", "tokenize"]
@@ -9,11 +9,14 @@
 
 from __future__ import annotations
 
+import os
 import re
 import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .index import Embedder, SkillHit, SkillIndex, normalize_title
 
 
 @dataclass(frozen=True)
@@ -42,25 +45,71 @@ class SkillRepository:
       * 其余内容视为 body，可为空
     """
 
-    def __init__(self, skills_dir: Path | str) -> None:
+    def __init__(self, skills_dir: Path | str, *, embedder: Optional[Embedder] = None) -> None:
         self._skills_dir = Path(skills_dir).expanduser().resolve()
         self._skills_dir.mkdir(parents=True, exist_ok=True)
         self._lock = threading.RLock()
         self._skills: Dict[str, Skill] = {}
+        # 标题 -> id 的映射与检索索引随 upsert/delete 增量维护。
+        self._titles: Dict[str, str] = {}
+        self._index = SkillIndex(embedder=embedder)
+        # 每个文件的 (mtime_ns, size) 指纹；refresh 只重新解析指纹变化的文件。
+        self._fingerprints: Dict[str, Tuple[int, int]] = {}
+        self._version = 0
         self.refresh()
 
     # ----------------------------
     # Public API
     # ----------------------------
-    def refresh(self) -> None:
-        """重新扫描目录，更新缓存。"""
+    @property
+    def version(self) -> int:
+        """目录内容每变化一次递增，供上层缓存判断是否失效。"""
+        return self._version
+
+    @property
+    def skills_dir(self) -> Path:
+        return self._skills_dir
+
+    def refresh(self, *, full: bool = False) -> int:
+        """
+        增量扫描目录：只 stat 全部文件，重新解析新增/修改的文件并移除已删除的。
+        返回变化的文件数；full=True 时忽略指纹强制全部重读。
+        """
+        current = self._scan_fingerprints()
         with self._lock:
-            skills: Dict[str, Skill] = {}
-            for path in sorted(self._skills_dir.glob("*.md")):
-                skill = self._load_skill(path)
-                if skill:
-                    skills[skill.id] = skill
-            self._skills = skills
+            known = dict(self._fingerprints)
+        changed = sorted(
+            skill_id for skill_id, stamp in current.items() if full or known.get(skill_id) != stamp
+        )
+        removed = [skill_id for skill_id in known if skill_id not in current]
+        # 文件读取与解析放在锁外，避免大目录刷新时阻塞查询。
+        loaded = {skill_id: self._load_skill(self._skills_dir / f"{skill_id}.md") for skill_id in changed}
+
+        with self._lock:
+            for skill_id in removed:
+                if self._fingerprints.get(skill_id) != known.get(skill_id):
+                    continue  # re-created through upsert() while we were scanning
+                self._unindex_skill(skill_id)
+                self._skills.pop(skill_id, None)
+                self._fingerprints.pop(skill_id, None)
+            for skill_id, skill in list(loaded.items()):
+                if self._fingerprints.get(skill_id) != known.get(skill_id):
+                    # upsert()/delete() touched this file after the scan; its state wins.
+                    loaded.pop(skill_id)
+                    continue
+                self._unindex_skill(skill_id)
+                if skill is None:
+                    # Unreadable (e.g. mid-write); retry on the next refresh.
+                    self._skills.pop(skill_id, None)
+                    self._fingerprints.pop(skill_id, None)
+                    continue
+                self._skills[skill_id] = skill
+                self._index_skill(skill)
+                self._fingerprints[skill_id] = current[skill_id]
+            count = len(removed) + len(loaded)
+            if count:
+                self._version += 1
+            return count
 
     def list_titles(self) -> List[SkillSummary]:
         """返回全部技能的标题。"""
@@ -75,12 +124,19 @@ class SkillRepository:
             return self._skills[skill_id]
 
     def get_by_title(self, title: str) -> Optional[Skill]:
-        normalized = title.strip().lower()
+        normalized = normalize_title(title)
+        with self._lock:
+            skill_id = self._titles.get(normalized)
+            return self._skills.get(skill_id) if skill_id else None
+
+    def search(self, query: str, top_k: int = 8) -> List[SkillHit]:
+        """按与 query 的相关度返回前 top_k 个技能（BM25，可选向量加权）。"""
         with self._lock:
-            for skill in self._skills.values():
-                if skill.title.strip().lower() == normalized:
-                    return skill
-        return None
+            return self._index.search(query, top_k)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._skills)
 
     def upsert(self, *, title: str, body: str, skill_id: Optional[str] = None) -> Skill:
         """
@@ -103,6 +159,8 @@ class SkillRepository:
 
             content = self._compose_file(title, body)
             path.write_text(content, encoding="utf-8")
+            # Record our own write so the watcher does not re-parse it.
+            self._fingerprints[skill_id] = self._fingerprint(path)
 
             skill = Skill(
                 id=skill_id,
@@ -110,7 +168,10 @@ class SkillRepository:
                 body=body.strip(),
                 path=path,
             )
+            self._unindex_skill(skill.id)
             self._skills[skill.id] = skill
+            self._index_skill(skill)
+            self._version += 1
             return skill
 
     def delete(self, skill_id: str) -> None:
@@ -120,11 +181,54 @@ class SkillRepository:
                 raise KeyError(skill_id)
             if skill.path.exists():
                 skill.path.unlink()
+            self._unindex_skill(skill_id)
             self._skills.pop(skill_id, None)
+            self._fingerprints.pop(skill_id, None)
+            self._version += 1
 
     # ----------------------------
     # Internal helpers
     # ----------------------------
+    def _index_skill(self, skill: Skill) -> None:
+        # Duplicate titles resolve to the first skill indexed (sorted by filename on refresh).
+        self._titles.setdefault(normalize_title(skill.title), skill.id)
+        self._index.add(skill.id, skill.title, skill.body)
+
+    def _unindex_skill(self, skill_id: str) -> None:
+        previous = self._skills.get(skill_id)
+        if previous is None:
+            return
+        key = normalize_title(previous.title)
+        if self._titles.get(key) == skill_id:
+            del self._titles[key]
+            # Another skill may share the title; keep it reachable.
+            for other in self._skills.values():
+                if other.id != skill_id and normalize_title(other.title) == key:
+                    self._titles[key] = other.id
+                    break
+        self._index.remove(skill_id)
+
+    def _scan_fingerprints(self) -> Dict[str, Tuple[int, int]]:
+        stamps: Dict[str, Tuple[int, int]] = {}
+        try:
+            entries = list(os.scandir(self._skills_dir))
+        except OSError:
+            return stamps
+        for entry in entries:
+            if not entry.name.endswith(".md") or not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            stamps[entry.name[:-3]] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    @staticmethod
+    def _fingerprint(path: Path) -> Tuple[int, int]:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
     def _load_skill(self, path: Path) -> Optional[Skill]:
         try:
             data = path.read_text(encoding="utf-8")
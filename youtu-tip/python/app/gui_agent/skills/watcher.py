@@ -0,0 +1,130 @@
+# File: python/app/gui_agent/skills/watcher.py
+# Project: Tip Desktop Assistant
+# Description: Background watcher that keeps SkillRepository in sync with external edits to the skills directory.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+from .repository import SkillRepository
+
+try:  # watchdog 为可选依赖；缺失时退回轮询
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object  # type: ignore[assignment,misc]
+    Observer = None  # type: ignore[assignment]
+
+logger = logging.getLogger("desktopenv.skills")
+
+
+class _MarkdownEventHandler(FileSystemEventHandler):  # type: ignore[misc]
+    def __init__(self, watcher: "SkillWatcher") -> None:
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event) -> None:  # noqa: ANN001 - watchdog event type
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        if any(str(path).endswith(".md") for path in paths):
+            self._watcher.schedule_refresh()
+
+
+class SkillWatcher:
+    """
+    Call ``SkillRepository.refresh()`` when files under the skills directory change.
+
+    With watchdog installed, filesystem events trigger a debounced refresh
+    (editors emit several events per save). Otherwise a daemon thread polls
+    every ``poll_interval`` seconds; since refresh only stats files and
+    re-parses the ones whose mtime/size changed, polling stays cheap.
+    """
+
+    def __init__(
+        self,
+        repo: SkillRepository,
+        *,
+        poll_interval: float = 2.0,
+        debounce: float = 0.3,
+        use_watchdog: bool = True,
+    ) -> None:
+        self._repo = repo
+        self._poll_interval = max(0.2, poll_interval)
+        self._debounce = max(0.0, debounce)
+        self._use_watchdog = use_watchdog and Observer is not None
+        self._observer = None
+        self._poll_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Timer] = None
+        self._timer_lock = threading.Lock()
+
+    @property
+    def mode(self) -> str:
+        return "watchdog" if self._use_watchdog else "polling"
+
+    def start(self) -> None:
+        if self._observer is not None or self._poll_thread is not None:
+            return
+        self._stop.clear()
+        if self._use_watchdog:
+            try:
+                observer = Observer()
+                observer.schedule(_MarkdownEventHandler(self), str(self._repo.skills_dir), recursive=False)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                logger.info("Skill watcher started (watchdog): %s", self._repo.skills_dir)
+                return
+            except Exception as exc:  # noqa: BLE001 - e.g. inotify limits; fall back to polling
+                logger.warning("Skill watcher falling back to polling: %s", exc)
+                self._use_watchdog = False
+        self._poll_thread = threading.Thread(target=self._poll, name="skill-watcher", daemon=True)
+        self._poll_thread.start()
+        logger.info("Skill watcher started (polling every %.1fs): %s", self._poll_interval, self._repo.skills_dir)
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._poll_thread is not None:
+            self._poll_thread.join(timeout=self._poll_interval + 1)
+            self._poll_thread = None
+
+    def schedule_refresh(self) -> None:
+        """Coalesce bursts of events into a single refresh after ``debounce`` seconds."""
+        if self._stop.is_set():
+            return
+        with self._timer_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._debounce, self._refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self._poll_interval):
+            self._refresh()
+
+    def _refresh(self) -> None:
+        try:
+            changed = self._repo.refresh()
+        except Exception as exc:  # noqa: BLE001 - keep watching after transient IO errors
+            logger.warning("Skill refresh failed: %s", exc)
+            return
+        if changed:
+            logger.info("Skills reloaded: %d file(s) changed, version %d", changed, self._repo.version)
+
+
+__all__ = ["SkillWatcher"]
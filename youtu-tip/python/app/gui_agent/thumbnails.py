@@ -0,0 +1,77 @@
+# File: python/app/gui_agent/thumbnails.py
+# Project: Tip Desktop Assistant
+# Description: Small WebP previews for GUI agent screenshots used by the renderer timeline and debug reports.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional, Union
+
+from PIL import Image, features
+
+THUMBNAIL_DIR = "thumbs"
+DEFAULT_MAX_SIDE = 320
+DEFAULT_QUALITY = 60
+
+# Pillow may be built without libwebp; JPEG keeps previews small in that case.
+_WEBP_AVAILABLE = bool(features.check("webp"))
+
+
+@dataclass(frozen=True)
+class Thumbnail:
+    data: bytes
+    width: int
+    height: int
+    mime_type: str
+    extension: str
+
+
+def make_thumbnail(
+    source: Union[bytes, Image.Image],
+    *,
+    max_side: int = DEFAULT_MAX_SIDE,
+    quality: int = DEFAULT_QUALITY,
+) -> Thumbnail:
+    """Downscale ``source`` so its long side is at most ``max_side`` and encode it as WebP."""
+    image = source if isinstance(source, Image.Image) else Image.open(BytesIO(source))
+    # draft() lets JPEG decoders skip full-resolution decoding; a no-op for PNG.
+    image.draft("RGB", (max_side, max_side))
+    preview = image.convert("RGB")
+    preview.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+    buffer = BytesIO()
+    if _WEBP_AVAILABLE:
+        preview.save(buffer, format="WEBP", quality=quality, method=4)
+        mime_type, extension = "image/webp", ".webp"
+    else:
+        preview.save(buffer, format="JPEG", quality=quality, optimize=True)
+        mime_type, extension = "image/jpeg", ".jpg"
+    return Thumbnail(
+        data=buffer.getvalue(),
+        width=preview.width,
+        height=preview.height,
+        mime_type=mime_type,
+        extension=extension,
+    )
+
+
+def thumbnail_relative_path(filename: str, extension: Optional[str] = None) -> str:
+    """``step_3_x.png`` -> ``thumbs/step_3_x.webp`` (relative to the run directory)."""
+    stem, _ = os.path.splitext(os.path.basename(filename))
+    suffix = extension or (".webp" if _WEBP_AVAILABLE else ".jpg")
+    return os.path.join(THUMBNAIL_DIR, stem + suffix)
+
+
+__all__ = [
+    "DEFAULT_MAX_SIDE",
+    "THUMBNAIL_DIR",
+    "Thumbnail",
+    "make_thumbnail",
+    "thumbnail_relative_path",
+]
@@ -0,0 +1,80 @@
+# File: python/app/gui_agent/timing.py
+# Project: Tip Desktop Assistant
+# Description: Lightweight per-stage timer used to profile the GUI agent loop (capture, preprocess, LLM, ...).
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional
+
+STAGES = ("capture", "preprocess", "llm", "parse", "execute", "write")
+
+
+class StageTimer:
+    """Collect wall-clock samples per named stage; safe to share across threads."""
+
+    def __init__(self) -> None:
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000)
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples[name].append(elapsed_ms)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            snapshot = {name: list(values) for name, values in self._samples.items()}
+        ordered = [name for name in STAGES if name in snapshot]
+        ordered += sorted(name for name in snapshot if name not in STAGES)
+        return {name: _describe(snapshot[name]) for name in ordered}
+
+
+def stage(timer: Optional[StageTimer], name: str) -> ContextManager[None]:
+    """Time ``name`` on ``timer`` when profiling is enabled, otherwise do nothing."""
+    if timer is None:
+        return nullcontext()
+    return timer.stage(name)
+
+
+def _describe(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    count = len(ordered)
+    total = sum(ordered)
+    return {
+        "count": count,
+        "total_ms": round(total, 3),
+        "mean_ms": round(total / count, 3) if count else 0.0,
+        "p50_ms": round(_percentile(ordered, 0.5), 3),
+        "p95_ms": round(_percentile(ordered, 0.95), 3),
+        "max_ms": round(ordered[-1], 3) if count else 0.0,
+    }
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+__all__ = ["STAGES", "StageTimer", "stage"]
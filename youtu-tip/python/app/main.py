@@ -18,6 +18,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api import (
     routes_chat,
     routes_debug,
+    routes_documents,
     routes_gui_agent,
     routes_health,
     routes_intent,
@@ -27,7 +28,13 @@ from .api import (
     routes_youtu_agent,
     routes_settings,
 )
-from .core.config import CONFIG_DIR
+from .core.config import (
+    CONFIG_DIR,
+    GUI_AGENT_MAX_CONCURRENCY,
+    GUI_AGENT_MAX_QUEUE,
+    SKILLS_POLL_INTERVAL,
+    SKILLS_WATCH_ENABLED,
+)
 from .core.logging import setup_logging
 from .services.settings_manager import SettingsManager
 from .services.llm import LLMService
@@ -37,7 +44,8 @@ from .services.debug_report import DebugReportService
 from .services.text_selection import TextSelectionService
 from .services.gui_agent import GuiAgentService
 from .services.youtu_agent_service import YoutuAgentService
-from .gui_agent.skills import SkillRepository
+from .services.document_cache import get_document_cache
+from .gui_agent.skills import SkillRepository, SkillWatcher
 from .services.tip_cloud_auth import TipCloudAuth
 
 
@@ -54,7 +62,16 @@ async def lifespan(app: FastAPI):
     text_selection = TextSelectionService()
     skills_path = Path(__file__).resolve().parent / "gui_agent" / "skills"
     skill_repo = SkillRepository(skills_path)
-    gui_agent = GuiAgentService(settings_manager, skill_repo=skill_repo, tip_auth=tip_auth)
+    skill_watcher = SkillWatcher(skill_repo, poll_interval=SKILLS_POLL_INTERVAL) if SKILLS_WATCH_ENABLED else None
+    if skill_watcher:
+        skill_watcher.start()
+    gui_agent = GuiAgentService(
+        settings_manager,
+        skill_repo=skill_repo,
+        tip_auth=tip_auth,
+        max_concurrency=GUI_AGENT_MAX_CONCURRENCY,
+        max_queue=GUI_AGENT_MAX_QUEUE,
+    )
     debug_reporter = DebugReportService(
         settings_manager,
         chat_manager,
@@ -68,6 +85,9 @@ async def lifespan(app: FastAPI):
         tip_auth=tip_auth,
     )
 
+    # 文档解析缓存与 Youtu Agent 文档工具共享同一实例。
+    document_cache = get_document_cache()
+
     # 将服务实例挂载到 app.state，供路由层访问。
     app.state.settings_manager = settings_manager
     app.state.llm_service = llm_service
@@ -79,7 +99,17 @@ async def lifespan(app: FastAPI):
     app.state.gui_agent_service = gui_agent
     app.state.skill_repository = skill_repo
     app.state.youtu_agent_service = youtu_agent_service
-    yield
+    app.state.document_cache = document_cache
+    try:
+        yield
+    finally:
+        if skill_watcher:
+            skill_watcher.stop()
+        await youtu_agent_service.close()
+        await llm_service.close()
+        document_cache.close()
+        # 合并中的设置变更在退出前落盘
+        settings_manager.close()
 
 
 # FastAPI 应用：通过 lifespan 管理资源。
@@ -105,6 +135,7 @@ app.include_router(routes_gui_agent.router)
 app.include_router(routes_skills.router)
 app.include_router(routes_llm.router)
 app.include_router(routes_youtu_agent.router)
+app.include_router(routes_documents.router)
 
 
 @app.get('/')
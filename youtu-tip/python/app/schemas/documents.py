@@ -0,0 +1,24 @@
+# File: python/app/schemas/documents.py
+# Project: Tip Desktop Assistant
+# Description: Request/response models for document pre-parsing and cache statistics.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DocumentPrefetchRequest(BaseModel):
+    path: str = Field(..., min_length=1, description='本地文件路径（如“用 Tip 打开”传入的文件）')
+    parser: Optional[str] = Field(default=None, description='可选，解析器名称；缺省使用配置的解析器')
+
+
+class DocumentPrefetchResponse(BaseModel):
+    queued: bool
+    path: str
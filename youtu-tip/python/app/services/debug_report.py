@@ -19,6 +19,7 @@ from pathlib import Path
 from typing import Iterable, List, Optional
 
 from ..core.config import DEBUG_REPORT_DIR
+from ..gui_agent.thumbnails import THUMBNAIL_DIR, make_thumbnail
 from ..schemas.debug import (
     DebugGuiAgentRef,
     DebugLogAttachment,
@@ -194,16 +195,40 @@ class DebugReportService:
         if total == 0:
             return [], 0
         selected = image_paths
-        attachments = [
-            self._read_file_attachment(
-                path,
-                encoding='base64',
-                mime_type='image/png' if path.suffix.lower() == '.png' else 'image/jpeg',
-            )
-            for path in selected
-        ]
+        # 报告只内嵌缩略图，path 仍指向原图，需要细节时再按需读取。
+        attachments = [self._read_screenshot_preview(path) for path in selected]
         return attachments, total
 
+    def _read_screenshot_preview(self, path: Path) -> DebugLogAttachment:
+        # 优先复用运行时生成的 thumbs/ 预览；旧运行没有预览时现场生成。
+        thumb_dir = path.parent / THUMBNAIL_DIR
+        for suffix, mime_type in (('.webp', 'image/webp'), ('.jpg', 'image/jpeg')):
+            candidate = thumb_dir / f'{path.stem}{suffix}'
+            if candidate.is_file():
+                data = candidate.read_bytes()
+                break
+        else:
+            try:
+                preview = make_thumbnail(path.read_bytes())
+            except Exception as exc:  # noqa: BLE001
+                logger.warning('debug_report.thumbnail_failed', path=str(path), error=str(exc))
+                return self._read_file_attachment(
+                    path,
+                    encoding='base64',
+                    mime_type='image/png' if path.suffix.lower() == '.png' else 'image/jpeg',
+                )
+            data, mime_type = preview.data, preview.mime_type
+        return DebugLogAttachment(
+            name=path.name,
+            path=str(path),
+            truncated=False,
+            total_bytes=path.stat().st_size,
+            retained_bytes=len(data),
+            content=base64.b64encode(data).decode('ascii'),
+            encoding='base64',
+            mime_type=mime_type,
+        )
+
     def _collect_named_files(self, result_dir: Path, names: Iterable[str]) -> List[DebugLogAttachment]:
         # 只采集关键文本/日志文件，避免一次性打包整个目录。
         attachments: List[DebugLogAttachment] = []
@@ -0,0 +1,408 @@
+# File: python/app/services/document_cache.py
+# Project: Tip Desktop Assistant
+# Description: On-disk cache of parsed documents keyed by file fingerprint and content hash, with byte-bounded LRU eviction and background pre-parsing.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Parsed-document cache for the document toolkit.
+
+Parsing docx/pptx/pdf with ``unstructured`` takes seconds, and follow-up
+questions about the same file used to parse it again. Entries are stored as
+JSON (extracted text plus element structure) under the Tip cache dir:
+
+* a *stat key* (path, size, mtime, parser) answers repeat lookups without
+  reading the file;
+* on a stat miss the file's SHA-256 is computed, so a copied, renamed or merely
+  touched file still hits the *content key* (content hash, parser).
+
+Total size is bounded by evicting least-recently-used entries. ``prefetch``
+parses in a background thread (used when a file arrives via "Open with Tip")
+and concurrent requests for the same document wait for the in-flight parse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import structlog
+
+from ..core.config import CACHE_DIR, DOCUMENT_CACHE_MAX_MB, DOCUMENT_PARSER
+
+logger = structlog.get_logger(__name__)
+
+INDEX_VERSION = 1
+TEXT_EXTENSIONS = frozenset({".txt", ".md", ".markdown", ".csv", ".tsv", ".json", ".log", ".yaml", ".yml"})
+DOCUMENT_EXTENSIONS = frozenset({".pdf", ".docx", ".doc", ".pptx", ".ppt", ".xlsx", ".xls", ".rtf", ".html", ".htm"})
+
+
+@dataclass
+class ParsedDocument:
+    path: str
+    parser: str
+    text: str
+    # Element structure from the parser: [{"type", "text", "page"?}, ...]
+    elements: List[Dict[str, Any]] = field(default_factory=list)
+    content_hash: str = ""
+    cached: bool = False
+
+
+Parser = Callable[[str], Tuple[str, List[Dict[str, Any]]]]
+
+
+def _parse_text(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    text = Path(path).read_text(encoding="utf-8", errors="replace")
+    return text, [{"type": "Text", "text": text}]
+
+
+def _parse_unstructured(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    try:
+        from unstructured.partition.auto import partition
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("unstructured is not installed; cannot parse documents") from exc
+    elements: List[Dict[str, Any]] = []
+    for element in partition(filename=path):
+        text = str(element).strip()
+        if not text:
+            continue
+        item: Dict[str, Any] = {"type": getattr(element, "category", type(element).__name__), "text": text}
+        page = getattr(getattr(element, "metadata", None), "page_number", None)
+        if page is not None:
+            item["page"] = page
+        elements.append(item)
+    return "\n\n".join(item["text"] for item in elements), elements
+
+
+def _parse_pymupdf(path: str) -> Tuple[str, List[Dict[str, Any]]]:
+    try:
+        import fitz  # pymupdf
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError("pymupdf is not installed; cannot parse PDF") from exc
+    elements: List[Dict[str, Any]] = []
+    with fitz.open(path) as doc:
+        for index, page in enumerate(doc, start=1):
+            text = page.get_text().strip()
+            if text:
+                elements.append({"type": "Page", "text": text, "page": index})
+    return "\n\n".join(f"## Page {item['page']}\n\n{item['text']}" for item in elements), elements
+
+
+PARSERS: Dict[str, Parser] = {
+    "text": _parse_text,
+    "unstructured": _parse_unstructured,
+    "pymupdf": _parse_pymupdf,
+}
+
+
+def parser_for(path: str, preferred: str) -> str:
+    """Plain-text files skip the heavy parsers regardless of configuration."""
+    return "text" if Path(path).suffix.lower() in TEXT_EXTENSIONS else preferred
+
+
+def is_parseable(path: str) -> bool:
+    suffix = Path(path).suffix.lower()
+    return suffix in TEXT_EXTENSIONS or suffix in DOCUMENT_EXTENSIONS
+
+
+def _write_atomic(target: Path, text: str) -> None:
+    """Write via a unique temp file + rename, so concurrent writers never share or truncate one temp path."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path: Optional[str] = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=str(target.parent),
+            prefix=f".{target.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as handle:
+            tmp_path = handle.name
+            handle.write(text)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if tmp_path is not None:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+        raise
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """Parsed documents on disk, bounded to ``max_bytes`` with LRU eviction."""
+
+    def __init__(self, root: Path, *, max_bytes: int = 256 * 1024 * 1024, workers: int = 1) -> None:
+        self.root = Path(root)
+        self.max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        # 串行化索引写盘，保证后生成的快照最后落盘
+        self._save_lock = threading.Lock()
+        # content_key -> {"file", "bytes", "last_used", "path"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        # stat_key -> content_key
+        self._stat_index: Dict[str, str] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="doc-prefetch")
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+        self._load_index()
+
+    # ----------------------------
+    # Public API
+    # ----------------------------
+    def get(self, path: str, parser: str = DOCUMENT_PARSER) -> ParsedDocument:
+        """Return the parsed document, parsing (once, even under concurrency) on a miss."""
+        resolved = os.path.abspath(os.path.expanduser(path))
+        parser = parser_for(resolved, parser)
+        stat = os.stat(resolved)
+        stat_key = self._stat_key(resolved, stat, parser)
+
+        document = self._load_by_stat(stat_key, resolved)
+        if document is not None:
+            return document
+
+        content_hash = file_sha256(resolved)
+        content_key = f"{content_hash}-{parser}"
+        document = self._load_entry(content_key, resolved)
+        if document is not None:
+            with self._lock:
+                self._stat_index[stat_key] = content_key
+            self._save_index()
+            return document
+
+        with self._lock:
+            future = self._inflight.get(content_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[content_key] = future
+        if not owner:
+            return self._copy_for(future.result(), resolved)
+        try:
+            document = self._parse_and_store(resolved, parser, content_hash, content_key, stat_key)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(document)
+            return document
+        finally:
+            with self._lock:
+                self._inflight.pop(content_key, None)
+
+    def prefetch(self, path: str, parser: str = DOCUMENT_PARSER) -> bool:
+        """Parse ``path`` in the background; returns False for unsupported or missing files."""
+        resolved = os.path.abspath(os.path.expanduser(path))
+        if not os.path.isfile(resolved) or not is_parseable(resolved):
+            return False
+
+        def _run() -> None:
+            try:
+                self.get(resolved, parser)
+            except Exception as exc:  # noqa: BLE001 - background best effort
+                logger.warning("document_cache.prefetch_failed", path=resolved, error=str(exc))
+
+        self._executor.submit(_run)
+        logger.info("document_cache.prefetch_queued", path=resolved, parser=parser_for(resolved, parser))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(entry["bytes"] for entry in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evicted": self._evicted,
+                "inflight": len(self._inflight),
+            }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._save_index()
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    @staticmethod
+    def _stat_key(path: str, stat: os.stat_result, parser: str) -> str:
+        raw = f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{parser}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _load_by_stat(self, stat_key: str, path: str) -> Optional[ParsedDocument]:
+        with self._lock:
+            content_key = self._stat_index.get(stat_key)
+        if content_key is None:
+            return None
+        return self._load_entry(content_key, path)
+
+    def _load_entry(self, content_key: str, path: str) -> Optional[ParsedDocument]:
+        with self._lock:
+            entry = self._entries.get(content_key)
+        if entry is None:
+            return None
+        try:
+            payload = json.loads((self.root / entry["file"]).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            with self._lock:
+                self._entries.pop(content_key, None)
+            return None
+        with self._lock:
+            entry["last_used"] = time.time()
+            self._hits += 1
+        return ParsedDocument(
+            path=path,
+            parser=payload.get("parser") or "",
+            text=payload.get("text") or "",
+            elements=payload.get("elements") or [],
+            content_hash=payload.get("content_hash") or "",
+            cached=True,
+        )
+
+    @staticmethod
+    def _copy_for(document: ParsedDocument, path: str) -> ParsedDocument:
+        return ParsedDocument(
+            path=path,
+            parser=document.parser,
+            text=document.text,
+            elements=document.elements,
+            content_hash=document.content_hash,
+            cached=True,
+        )
+
+    def _parse_and_store(
+        self, path: str, parser: str, content_hash: str, content_key: str, stat_key: str
+    ) -> ParsedDocument:
+        parse = PARSERS.get(parser)
+        if parse is None:
+            raise ValueError(f"Unsupported document parser: {parser}")
+        with self._lock:
+            self._misses += 1
+        started = time.perf_counter()
+        text, elements = parse(path)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        document = ParsedDocument(
+            path=path, parser=parser, text=text, elements=elements, content_hash=content_hash
+        )
+        relative = f"{content_hash[:2]}/{content_key}.json"
+        target = self.root / relative
+        payload = json.dumps(
+            {"parser": parser, "content_hash": content_hash, "source": path, "text": text, "elements": elements},
+            ensure_ascii=False,
+        )
+        try:
+            _write_atomic(target, payload)
+        except OSError as exc:
+            logger.warning("document_cache.persist_failed", path=path, error=str(exc))
+            return document
+        with self._lock:
+            self._entries[content_key] = {
+                "file": relative,
+                "bytes": len(payload.encode("utf-8")),
+                "last_used": time.time(),
+                "path": path,
+            }
+            self._stat_index[stat_key] = content_key
+            evicted = self._evict_locked()
+        for relative_file in evicted:
+            try:
+                (self.root / relative_file).unlink()
+            except OSError:
+                pass
+        self._save_index()
+        logger.info("document_cache.parsed", path=path, parser=parser, parse_ms=elapsed_ms, chars=len(text))
+        return document
+
+    def _evict_locked(self) -> List[str]:
+        total = sum(entry["bytes"] for entry in self._entries.values())
+        removed: List[str] = []
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["bytes"]
+            removed.append(entry["file"])
+            del self._entries[key]
+            self._evicted += 1
+        if removed:
+            live = set(self._entries)
+            self._stat_index = {stat: content for stat, content in self._stat_index.items() if content in live}
+        return removed
+
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _load_index(self) -> None:
+        try:
+            payload = json.loads(self._index_path().read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return
+        if payload.get("version") != INDEX_VERSION:
+            return
+        self._entries = {
+            key: entry
+            for key, entry in (payload.get("entries") or {}).items()
+            if (self.root / entry.get("file", "")).is_file()
+        }
+        self._stat_index = {
+            stat: content for stat, content in (payload.get("stat_index") or {}).items() if content in self._entries
+        }
+
+    def _save_index(self) -> None:
+        # prefetch 线程与工具调用线程会并发保存：每次写独立临时文件，并按快照顺序落盘
+        with self._save_lock:
+            with self._lock:
+                payload = json.dumps(
+                    {"version": INDEX_VERSION, "entries": self._entries, "stat_index": self._stat_index},
+                    ensure_ascii=False,
+                )
+            try:
+                _write_atomic(self._index_path(), payload)
+            except OSError as exc:
+                logger.warning("document_cache.index_persist_failed", error=str(exc))
+
+
+_CACHE: Optional[DocumentCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_document_cache() -> DocumentCache:
+    """Process-wide cache shared by the document toolkit and the prefetch endpoint."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = DocumentCache(CACHE_DIR / "documents", max_bytes=DOCUMENT_CACHE_MAX_MB * 1024 * 1024)
+        return _CACHE
+
+
+__all__ = [
+    "DocumentCache",
+    "PARSERS",
+    "ParsedDocument",
+    "file_sha256",
+    "get_document_cache",
+    "is_parseable",
+    "parser_for",
+]
@@ -0,0 +1,210 @@
+# File: python/app/services/document_index.py
+# Project: Tip Desktop Assistant
+# Description: Splits parsed documents into offset-addressed chunks and ranks them with a local BM25 index.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Retrieval over parsed documents.
+
+Feeding a whole long document to an on-device model is slow to prefill and
+overflows the window, so documents are split into chunks that respect the
+parser's element boundaries where possible. Each chunk records its character
+offsets in ``ParsedDocument.text`` so results can be followed up with a range
+read. Ranking is BM25 over word tokens plus CJK character bigrams, which works
+for mixed Chinese/English documents without a tokenizer or embedding model.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .document_cache import ParsedDocument
+
+DEFAULT_CHUNK_CHARS = 1200
+DEFAULT_CHUNK_OVERLAP = 150
+
+_WORD_RE = re.compile(r"[0-9a-zA-Z_]+|[一-鿿㐀-䶿]+")
+_CJK_RE = re.compile(r"[一-鿿㐀-䶿]")
+_BREAK_RE = re.compile(r"\n\s*\n|(?<=[.!?。！？])\s+")
+
+
+@dataclass
+class DocumentChunk:
+    index: int
+    start: int
+    end: int
+    text: str
+    page: Optional[int] = None
+
+    def to_dict(self, score: Optional[float] = None) -> Dict[str, object]:
+        payload: Dict[str, object] = {"chunk": self.index, "start": self.start, "end": self.end}
+        if self.page is not None:
+            payload["page"] = self.page
+        if score is not None:
+            payload["score"] = round(score, 3)
+        payload["text"] = self.text
+        return payload
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for match in _WORD_RE.finditer(text.lower()):
+        word = match.group(0)
+        if _CJK_RE.match(word):
+            # 中文无空格分词：单字 + 相邻双字
+            tokens.extend(word)
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _element_spans(document: ParsedDocument) -> List[tuple]:
+    """Locate parser elements in ``document.text`` -> [(start, end, page)]."""
+    spans = []
+    cursor = 0
+    text = document.text
+    for element in document.elements:
+        snippet = (element.get("text") or "").strip()
+        if not snippet:
+            continue
+        start = text.find(snippet, cursor)
+        if start < 0:
+            continue
+        end = start + len(snippet)
+        spans.append((start, end, element.get("page")))
+        cursor = end
+    return spans or [(0, len(text), None)]
+
+
+def _split_long(start: int, end: int, text: str, limit: int) -> List[tuple]:
+    """Break an oversized span on paragraph/sentence boundaries, falling back to hard cuts."""
+    pieces = []
+    while end - start > limit:
+        window = text[start : start + limit]
+        cut = None
+        for match in _BREAK_RE.finditer(window):
+            if match.start() > limit // 2:
+                cut = match.end()
+        cut = cut or limit
+        pieces.append((start, start + cut))
+        start += cut
+    if end > start:
+        pieces.append((start, end))
+    return pieces
+
+
+def chunk_document(
+    document: ParsedDocument,
+    *,
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    overlap: int = DEFAULT_CHUNK_OVERLAP,
+) -> List[DocumentChunk]:
+    """Pack consecutive elements into ~``chunk_chars`` chunks; neighbours share ``overlap`` chars."""
+    text = document.text
+    chunk_chars = max(200, chunk_chars)
+    overlap = max(0, min(overlap, chunk_chars // 4))
+    chunks: List[DocumentChunk] = []
+    current_start: Optional[int] = None
+    current_end = 0
+    current_page: Optional[int] = None
+
+    def _flush() -> None:
+        nonlocal current_start
+        if current_start is None:
+            return
+        start = max(0, current_start - overlap) if chunks else current_start
+        chunks.append(
+            DocumentChunk(index=len(chunks), start=start, end=current_end, text=text[start:current_end], page=current_page)
+        )
+        current_start = None
+
+    for span_start, span_end, page in _element_spans(document):
+        for piece_start, piece_end in _split_long(span_start, span_end, text, chunk_chars):
+            if current_start is not None and piece_end - current_start > chunk_chars:
+                _flush()
+            if current_start is None:
+                current_start, current_page = piece_start, page
+            current_end = piece_end
+    _flush()
+    return chunks
+
+
+class BM25Index:
+    def __init__(self, chunks: List[DocumentChunk], *, k1: float = 1.5, b: float = 0.75) -> None:
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        self._tf = [Counter(tokenize(chunk.text)) for chunk in chunks]
+        self._lengths = [sum(tf.values()) for tf in self._tf]
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df: Counter = Counter()
+        for tf in self._tf:
+            df.update(tf.keys())
+        total = len(chunks)
+        self._idf = {term: math.log(1 + (total - freq + 0.5) / (freq + 0.5)) for term, freq in df.items()}
+
+    def search(self, query: str, top_k: int = 5) -> List[tuple]:
+        """Return [(chunk, score)] best first; chunks without any query term are skipped."""
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        if not terms:
+            return []
+        scored = []
+        for chunk, tf, length in zip(self.chunks, self._tf, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_len or 1.0))
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((chunk, score))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[: max(1, top_k)]
+
+
+class DocumentIndexCache:
+    """Chunked indexes for recently used documents, keyed by content hash and chunking parameters."""
+
+    def __init__(self, max_documents: int = 16) -> None:
+        self.max_documents = max(1, max_documents)
+        self._indexes: "OrderedDict[str, BM25Index]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        document: ParsedDocument,
+        *,
+        chunk_chars: int = DEFAULT_CHUNK_CHARS,
+        overlap: int = DEFAULT_CHUNK_OVERLAP,
+    ) -> BM25Index:
+        key = f"{document.content_hash or document.path}|{document.parser}|{chunk_chars}|{overlap}"
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = BM25Index(chunk_document(document, chunk_chars=chunk_chars, overlap=overlap))
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_documents:
+                self._indexes.popitem(last=False)
+        return index
+
+
+__all__ = [
+    "BM25Index",
+    "DocumentChunk",
+    "DocumentIndexCache",
+    "chunk_document",
+    "tokenize",
+]
@@ -0,0 +1,138 @@
+# File: python/app/services/event_log.py
+# Project: Tip Desktop Assistant
+# Description: Per-run ring-buffer event log with sequence numbers and independent subscriber cursors.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, List, Optional
+
+
+class RunEventLog:
+    """
+    Bounded, append-only event log shared by every viewer of one run.
+
+    Each event is stored once and stamped with a monotonically increasing
+    ``seq``. Subscribers only keep a cursor, so any number of them can read
+    concurrently without copying events or stealing them from each other.
+    The producer never blocks: a subscriber that falls further behind than the
+    ring (or its own ``max_lag``) skips ahead and receives a ``gap`` event
+    describing what it missed.
+
+    Must be used from the event loop thread (producers on worker threads go
+    through ``loop.call_soon_threadsafe``).
+    """
+
+    def __init__(self, capacity: int = 200) -> None:
+        self.capacity = max(1, capacity)
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=self.capacity)
+        self._next_seq = 1
+        self._closed = False
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._dropped = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def last_seq(self) -> int:
+        return self._next_seq - 1
+
+    @property
+    def first_seq(self) -> int:
+        """Oldest sequence number still retained (``last_seq + 1`` when empty)."""
+        return self._events[0]["seq"] if self._events else self._next_seq
+
+    def append(self, event: Dict[str, Any]) -> int:
+        if self._closed:
+            raise RuntimeError("Event log is closed")
+        stamped = dict(event)
+        stamped["seq"] = self._next_seq
+        self._next_seq += 1
+        self._events.append(stamped)
+        self._wake()
+        return stamped["seq"]
+
+    def close(self) -> None:
+        # Subscribers drain what is left and then stop.
+        self._closed = True
+        self._wake()
+
+    def snapshot(self, since: int = 0) -> List[Dict[str, Any]]:
+        """Retained events with ``seq > since`` in order."""
+        return [event for event in self._events if event["seq"] > since]
+
+    async def subscribe(
+        self,
+        since: Optional[int] = None,
+        *,
+        max_lag: Optional[int] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Yield events after ``since`` (all retained events when None) until closed.
+
+        ``max_lag`` bounds how far this subscriber may trail the head before
+        older events are skipped for it; defaults to the ring capacity.
+        """
+        cursor = max(0, since or 0)
+        lag_limit = min(max_lag or self.capacity, self.capacity)
+        self._subscribers += 1
+        try:
+            while True:
+                missed_to = max(self.first_seq - 1, self.last_seq - lag_limit)
+                if cursor < missed_to:
+                    # 订阅者跟不上：跳过已淘汰/过旧的事件，并告知缺口范围
+                    self._dropped += missed_to - cursor
+                    # Gap events carry seq=to_seq so clients can keep one cursor for resuming.
+                    yield {
+                        "type": "gap",
+                        "seq": missed_to,
+                        "from_seq": cursor + 1,
+                        "to_seq": missed_to,
+                        "missed": missed_to - cursor,
+                        "message": f"Skipped {missed_to - cursor} events",
+                    }
+                    cursor = missed_to
+                event = self._event_after(cursor)
+                if event is not None:
+                    cursor = event["seq"]
+                    yield event
+                    continue
+                if self._closed:
+                    return
+                await self._changed.wait()
+        finally:
+            self._subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "retained": len(self._events),
+            "first_seq": self.first_seq,
+            "last_seq": self.last_seq,
+            "subscribers": self._subscribers,
+            "dropped": self._dropped,
+            "closed": self._closed,
+        }
+
+    def _event_after(self, cursor: int) -> Optional[Dict[str, Any]]:
+        if not self._events or cursor >= self.last_seq:
+            return None
+        # seq is contiguous inside the ring, so the next event is found by offset.
+        return self._events[max(0, cursor + 1 - self.first_seq)]
+
+    def _wake(self) -> None:
+        # Replace the event so waiters wake once and later waits block again.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+__all__ = ["RunEventLog"]
@@ -1,6 +1,6 @@
 # File: python/app/services/gui_agent.py
 # Project: Tip Desktop Assistant
-# Description: Async manager for GUI Agent runs, invoking run_prompt with patched env vars and streaming events.
+# Description: Async manager for GUI Agent runs, scheduling arun_prompt with per-run LLM config and streaming events.
 
 # Copyright (C) 2025 Tencent. All rights reserved.
 # License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
@@ -10,41 +10,47 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import os
 import time
 import uuid
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
 
 import threading
 import structlog
 
 from ..core.settings import LLMProfile, Settings
-from ..gui_agent import build_default_args, run_prompt
+from ..gui_agent import AgentLLMConfig, arun_prompt, build_default_args
 from ..gui_agent.skills import SkillRepository
 from .llm import tip_cloud_api_key, tip_cloud_base_url, tip_cloud_model
+from .event_log import RunEventLog
+from .run_scheduler import RunScheduler
 from .settings_manager import SettingsManager
 
 logger = structlog.get_logger(__name__)
 
 
 @dataclass
-# 跟踪 GUI Agent 单次运行的状态、队列与产物目录。
+# 跟踪 GUI Agent 单次运行的状态、事件日志与产物目录。
 class GuiAgentRun:
     run_id: str
     session_id: str
     instruction: str
-    queue: asyncio.Queue[Dict[str, Any]]
+    events: RunEventLog
     status: str = "pending"
-    history: List[Dict[str, Any]] = field(default_factory=list)
     task: Optional[asyncio.Task[Any]] = None
     task_id: Optional[str] = None
     result_dir: Optional[str] = None
     created_at: float = field(default_factory=time.time)
     completed_at: Optional[float] = None
     cancel_event: threading.Event = field(default_factory=threading.Event)
+    complete_sent: bool = False
+
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        # 兼容旧调用方（调试报告等）：返回环形缓冲中仍保留的事件。
+        return self.events.snapshot()
 
 
 @dataclass
@@ -65,8 +71,11 @@ class GuiAgentService:
         retention_seconds: int = 300,
         skill_repo: Optional[SkillRepository] = None,
         tip_auth=None,
+        max_concurrency: int = 1,
+        max_queue: int = 0,
+        env_factory: Optional[Callable[[SimpleNamespace], Any]] = None,
     ) -> None:
-        # 管理单例 GUI Agent 运行状态与缓存，避免并发占用系统资源。
+        # 管理 GUI Agent 运行状态与缓存；并发度由调度器控制，默认单并发以独占桌面。
         self._settings_manager = settings_manager
         self._skill_repo = skill_repo
         self._runs: Dict[str, GuiAgentRun] = {}
@@ -74,6 +83,16 @@ class GuiAgentService:
         self._retention_seconds = retention_seconds
         self._lock = asyncio.Lock()
         self._tip_auth = tip_auth
+        self._env_factory = env_factory
+        if env_factory is None and max_concurrency > 1:
+            # 真实桌面只有一套键鼠焦点，只有注入模拟/无头环境时才允许并行。
+            logger.warning("gui_agent.concurrency_clamped", requested=max_concurrency)
+            max_concurrency = 1
+        self._scheduler = RunScheduler(
+            max_concurrency=max_concurrency,
+            max_queue=max_queue,
+            name="GUI agent",
+        )
 
     async def start_run(self, *, session_id: str, instruction: str) -> GuiAgentRunHandle:
         # 入口：创建唯一运行实例，避免多个 GUI 任务抢占输入焦点。
@@ -82,23 +101,32 @@ class GuiAgentService:
             raise ValueError("Instruction is required")
 
         async with self._lock:
-            active = self._active_run()
-            if active is not None and active.status in {"pending", "running"}:
-                raise RuntimeError("Another GUI agent task is already running")
-
             run_id = uuid.uuid4().hex
-            queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+            # 调度器已满时抛出 SchedulerFullError（RuntimeError 子类），路由层返回 409。
+            position = self._scheduler.reserve(run_id)
             run = GuiAgentRun(
                 run_id=run_id,
                 session_id=session_id,
                 instruction=normalized,
-                queue=queue,
+                events=RunEventLog(capacity=self._history_limit),
             )
             self._runs[run_id] = run
 
             loop = asyncio.get_running_loop()
-            run.status = "running"
-            # 在事件循环中异步启动执行线程，结果通过队列回传。
+            if position == 0:
+                run.status = "running"
+            else:
+                run.status = "queued"
+                self._handle_event(
+                    run_id,
+                    {
+                        "type": "status",
+                        "status": "queued",
+                        "message": f"任务排队中（第 {position} 位）",
+                        "details": {"position": position},
+                    },
+                )
+            # 在事件循环中异步启动执行线程，结果写入事件日志。
             run.task = loop.create_task(self._execute_run(run))
 
         return GuiAgentRunHandle(
@@ -107,28 +135,22 @@ class GuiAgentService:
             instruction=normalized,
         )
 
-    async def stream_events(self, run_id: str) -> AsyncGenerator[Dict[str, Any], None]:
+    async def stream_events(
+        self,
+        run_id: str,
+        since: Optional[int] = None,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
         run = self._runs.get(run_id)
         if not run:
             raise KeyError(run_id)
 
-        # 先补发历史事件，避免前端丢消息。
-        for event in run.history:
+        # 每个订阅者只持有自己的游标：新连接从 since 之后（默认从最早保留的事件）回放，
+        # 多个窗口同时订阅不会互相抢事件，事件本身也只存一份。
+        async for event in run.events.subscribe(since):
             yield event
 
-        while True:
-            event = await run.queue.get()
-            if event.get("__internal__") == "close":
-                break
-            # 队列事件按产生顺序流式返回给调用方。
-            yield event
-
-    def _active_run(self) -> Optional[GuiAgentRun]:
-        # 默认仅允许单并发；若未来需要并发可调整此逻辑。
-        for run in self._runs.values():
-            if run.status in {"pending", "running"}:
-                return run
-        return None
+    def scheduler_stats(self) -> Dict[str, Any]:
+        return self._scheduler.stats()
 
     def has_run(self, run_id: str) -> bool:
         # 仅检查是否存在，不验证状态。
@@ -144,33 +166,51 @@ class GuiAgentService:
             return False
         if run.status in {"completed", "error", "cancelled"}:
             return False
-        # 通过事件与标志通知执行线程退出。
+        # 先设置标志再取消协程：进行中的 LLM 请求立即中断，循环据此按“取消”收尾；
+        # 排队中的任务直接出队。
+        was_running = run.status == "running"
         run.status = "cancelled"
         run.cancel_event.set()
-        try:
-            run.queue.put_nowait(
-                {
-                    "type": "status",
-                    "message": "用户已请求中断",
-                    "status": "cancelled",
-                    "run_id": run_id,
-                }
-            )
-        except asyncio.QueueFull:
-            pass
+        self._scheduler.cancel(run_id)
+        if was_running and run.task is not None and not run.task.done():
+            run.task.cancel()
+        self._handle_event(
+            run_id,
+            {
+                "type": "status",
+                "message": "用户已请求中断",
+                "status": "cancelled",
+            },
+        )
         return True
 
     async def _execute_run(self, run: GuiAgentRun) -> None:
+        try:
+            await self._scheduler.acquire(run.run_id)
+        except asyncio.CancelledError:
+            # 排队期间被取消：不占用执行槽位，补发 complete 后结束，订阅者据此收尾。
+            self._scheduler.release(run.run_id)
+            self._send_cancelled_complete(run, "GUI agent run cancelled before it started")
+            self._finalize_run(run.run_id)
+            return
+        try:
+            if run.status == "queued":
+                run.status = "running"
+            await self._execute_acquired_run(run)
+        finally:
+            self._scheduler.release(run.run_id)
+
+    async def _execute_acquired_run(self, run: GuiAgentRun) -> None:
         settings = self._settings_manager.get_settings()
         profile = settings.get_active_vlm_profile()
         if profile is None:
             # 缺少视觉模型时直接返回错误事件。
-            run.queue.put_nowait(
+            self._handle_event(
+                run.run_id,
                 {
                     "type": "error",
                     "message": "未设置视觉模型，请在设置中选择 VLM 后再试。",
-                    "run_id": run.run_id,
-                }
+                },
             )
             self._finalize_run(run.run_id)
             return
@@ -179,23 +219,25 @@ class GuiAgentService:
         loop = asyncio.get_running_loop()
 
         def log_callback(event: Dict[str, Any]) -> None:
-            # 将 GUI Agent 线程内的事件转发回 asyncio 事件循环。
+            # 截图事件来自写盘线程，统一经 call_soon_threadsafe 回到事件循环。
             loop.call_soon_threadsafe(self._handle_event, run.run_id, event)
 
-        def worker() -> Dict[str, Any]:
-            return self._invoke_agent(run.instruction, profile, result_root, log_callback, run.cancel_event)
-
         try:
-            result = await loop.run_in_executor(None, worker)
+            result = await self._invoke_agent(run.instruction, profile, result_root, log_callback, run.cancel_event)
             run.task_id = result.get("task_id")
             run.result_dir = result.get("result_dir")
+        except asyncio.CancelledError:
+            # 用户取消发生在循环开始前（准备环境阶段）；其他来源的取消照常传播。
+            if not run.cancel_event.is_set():
+                raise
+            self._send_cancelled_complete(run, "GUI agent run cancelled")
         except Exception as exc:  # pragma: no cover - GUI automation side-effects
             # GUI 自动化易受环境影响，失败时仅记录警告。
             logger.warning("gui_agent.run_failed", error=str(exc))
         finally:
             self._finalize_run(run.run_id)
 
-    def _invoke_agent(
+    async def _invoke_agent(
         self,
         instruction: str,
         profile: LLMProfile,
@@ -203,50 +245,40 @@ class GuiAgentService:
         log_callback,
         cancel_event: threading.Event,
     ) -> Dict[str, Any]:
-        # 为 run_prompt 注入模型/鉴权环境变量，保证调用正确落在配置的后端。
-        env_patch = self._build_env_patch(profile)
+        # 模型/鉴权配置通过独立的 AgentLLMConfig 传入，不再修改进程级环境变量，
+        # 因此多个运行可以安全并行。
+        llm_config = self._build_llm_config(profile)
         args = build_default_args(
             result_dir=str(result_root),
-            model=profile.model,
+            model=llm_config.model or profile.model,
             temperature=profile.temperature,
             max_tokens=profile.maxTokens,
         )
+        # 循环运行在事件循环内，LLM 请求可被取消；环境操作由 arun_prompt 放入线程。
+        return await arun_prompt(
+            instruction,
+            args=args,
+            result_root=str(result_root),
+            log_callback=log_callback,
+            cancel_event=cancel_event,
+            skills_repo=self._skill_repo,
+            llm_config=llm_config,
+            env_factory=self._env_factory,
+        )
 
-        previous: Dict[str, Optional[str]] = {}
-        for key, value in env_patch.items():
-            previous[key] = os.environ.get(key)
-            os.environ[key] = value
-
-        try:
-            # run_prompt 在线程中执行；取消由 cancel_event 传递。
-            return run_prompt(
-                instruction,
-                args=args,
-                result_root=str(result_root),
-                log_callback=log_callback,
-                cancel_event=cancel_event,
-                skills_repo=self._skill_repo,
-            )
-        finally:
-            for key, value in previous.items():
-                if value is None:
-                    os.environ.pop(key, None)
-                else:
-                    os.environ[key] = value
-
-    def _build_env_patch(self, profile: LLMProfile) -> Dict[str, str]:
-        # 按 provider 填充通用的 TIP_* 环境变量，兼容 OpenAI/Ollama。
+    def _build_llm_config(self, profile: LLMProfile) -> AgentLLMConfig:
+        # 按 provider 组装单次运行的 LLM 配置，兼容 OpenAI/Ollama。
         provider = (profile.provider or "tip_cloud").strip()
         headers = profile.headers.to_dict()
-        payload: Dict[str, str] = {
-            "TIP_LLM_PROVIDER": provider,
-            "TIP_LLM_MODEL": profile.model,
-            "TIP_LLM_TIMEOUT": str(profile.timeoutMs / 1000),
+        payload: Dict[str, Any] = {
+            "provider": provider.lower(),
+            "model": profile.model,
+            "timeout": profile.timeoutMs / 1000,
         }
         if provider == "tip_cloud":
-            payload["TIP_LLM_MODEL"] = profile.model or tip_cloud_model()
-            payload["TIP_LLM_BASE_URL"] = tip_cloud_base_url()
-            payload["TIP_OPENAI_BASE_URL"] = tip_cloud_base_url()
+            payload["model"] = profile.model or tip_cloud_model()
+            payload["base_url"] = tip_cloud_base_url()
+            payload["openai_base_url"] = tip_cloud_base_url()
             token_headers: Dict[str, str] = {}
             if self._tip_auth:
                 try:
@@ -257,23 +289,24 @@ class GuiAgentService:
             token = token_headers.get("Authorization", "") or tip_cloud_api_key()
             if token.lower().startswith("bearer "):
                 token = token.split(" ", 1)[1].strip()
-            payload["TIP_OPENAI_API_KEY"] = token
+            payload["openai_api_key"] = token
             merged_headers = dict(headers)
             merged_headers.update({k: v for k, v in token_headers.items() if k})
             headers = merged_headers
         if profile.baseUrl:
-            payload["TIP_LLM_BASE_URL"] = profile.baseUrl.rstrip("/")
+            payload["base_url"] = profile.baseUrl.rstrip("/")
         if headers:
-            payload["TIP_LLM_HEADERS"] = json.dumps(headers)
+            payload["headers"] = dict(headers)
         if profile.apiKey:
-            payload["TIP_OPENAI_API_KEY"] = profile.apiKey
+            payload["openai_api_key"] = profile.apiKey
         if profile.openaiBaseUrl:
-            payload["TIP_OPENAI_BASE_URL"] = profile.openaiBaseUrl.rstrip("/")
+            payload["openai_base_url"] = profile.openaiBaseUrl.rstrip("/")
         if profile.ollamaBaseUrl:
-            payload["TIP_OLLAMA_BASE_URL"] = profile.ollamaBaseUrl.rstrip("/")
+            payload["ollama_base_url"] = profile.ollamaBaseUrl.rstrip("/")
         if profile.ollamaModel:
-            payload["TIP_OLLAMA_MODEL"] = profile.ollamaModel
-        return payload
+            payload["ollama_model"] = profile.ollamaModel
+        # 未显式配置的字段（如 OPENAI_API_KEY）沿用进程环境中的默认值，仅读取不修改。
+        return replace(AgentLLMConfig.from_env(), **payload)
 
     def _resolve_result_root(self, settings: Settings) -> Path:
         # 缓存目录按用户配置展开，避免污染代码仓库。
@@ -284,25 +317,36 @@ class GuiAgentService:
 
     def _handle_event(self, run_id: str, event: Dict[str, Any]) -> None:
         run = self._runs.get(run_id)
-        if not run:
+        if not run or run.events.closed:
             return
         enriched = dict(event)
         enriched.setdefault("run_id", run_id)
         if "task_id" not in enriched and run.task_id:
             enriched["task_id"] = run.task_id
-        # 维护有限历史，便于新订阅者快速回放。
-        run.history.append(enriched)
-        if len(run.history) > self._history_limit:
-            run.history.pop(0)
         if enriched.get("type") == "error":
             run.status = "error"
         elif enriched.get("type") == "complete":
             run.status = enriched.get("status", "completed")
+            run.complete_sent = True
         if not run.task_id:
             run.task_id = enriched.get("task_id")
         if not run.result_dir:
             run.result_dir = enriched.get("result_dir")
-        run.queue.put_nowait(enriched)
+        # 环形缓冲保留最近 history_limit 条事件，并分配递增 seq 供订阅者续传。
+        run.events.append(enriched)
+
+    def _send_cancelled_complete(self, run: GuiAgentRun, message: str) -> None:
+        # 运行循环没有机会发送 complete 时（排队中或准备阶段被取消）由服务层补发。
+        if run.complete_sent:
+            return
+        self._handle_event(
+            run.run_id,
+            {
+                "type": "complete",
+                "status": "cancelled",
+                "message": message,
+            },
+        )
 
     def _finalize_run(self, run_id: str) -> None:
         run = self._runs.get(run_id)
@@ -311,8 +355,8 @@ class GuiAgentService:
         if run.status not in {"completed", "error", "cancelled"}:
             run.status = "completed"
         run.completed_at = time.time()
-        # 通知事件流结束，并在一段时间后清理内存。
-        run.queue.put_nowait({"__internal__": "close"})
+        # 通知事件流结束（订阅者读完剩余事件后退出），并在一段时间后清理内存。
+        run.events.close()
         loop = asyncio.get_running_loop()
         # 延迟删除，允许调用方在短时间内读取历史。
         loop.call_later(self._retention_seconds, self._runs.pop, run_id, None)
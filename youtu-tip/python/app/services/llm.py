@@ -10,10 +10,13 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import threading
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Set
 
 import httpx
 import structlog
@@ -21,11 +24,15 @@ from openai import AsyncOpenAI, APIStatusError, AuthenticationError
 
 from ..core.settings import LLMProfile, Settings, default_tip_cloud_profile
 from ..schemas.common import SelectionRect
-from .settings_manager import SettingsManager
+from .llm_scheduler import PRIORITY_CHAT, PRIORITY_INTENT, get_llm_scheduler
+from .run_scheduler import SchedulerFullError
+from .settings_manager import SettingsManager, SettingsSnapshot
 from .tip_cloud_auth import TipCloudAuth, TIP_CLOUD_GATEWAY
 
 logger = structlog.get_logger(__name__)
 
+_MAX_OPENAI_CLIENTS = 8
+
 # Tip Cloud 相关的默认值，若环境变量提供则优先使用。
 # 这样在开发/测试环境可以快速切换网关或模型，无需修改配置文件。
 TIP_CLOUD_DEFAULT_BASE_URL = TIP_CLOUD_GATEWAY
@@ -239,6 +246,35 @@ class LLMService:
         # 负责聚合多个 LLM Provider，并按用户配置动态切换。
         self._settings_manager = settings_manager
         self._tip_auth = tip_auth or TipCloudAuth()
+        # OpenAI 客户端按 (key, base_url, headers) 复用连接池；设置变更时整体失效。
+        # 失效的客户端进入 _retired_clients，待其上正在进行的请求结束后在事件循环中关闭。
+        self._openai_clients: Dict[tuple, AsyncOpenAI] = {}
+        self._client_leases: Dict[int, int] = {}
+        self._retired_clients: List[AsyncOpenAI] = []
+        self._clients_lock = threading.Lock()
+        self._close_tasks: Set[asyncio.Task] = set()
+        self._settings_manager.subscribe(self._on_settings_changed)
+
+    def _on_settings_changed(self, snapshot: SettingsSnapshot) -> None:
+        # 可能在设置路由的工作线程中回调，这里只移交引用，关闭留给事件循环。
+        with self._clients_lock:
+            self._retired_clients.extend(self._openai_clients.values())
+            self._openai_clients = {}
+
+    async def close(self) -> None:
+        """Close every cached OpenAI client; called from the app lifespan on shutdown."""
+        with self._clients_lock:
+            clients = self._retired_clients + list(self._openai_clients.values())
+            self._retired_clients = []
+            self._openai_clients = {}
+        pending = list(self._close_tasks)
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as exc:  # pragma: no cover - best effort
+                logger.warning('llm.client_close_failed', error=str(exc))
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
 
     def _get_active_llm_profile(self, settings: Settings) -> LLMProfile:
         try:
@@ -394,36 +430,38 @@ class LLMService:
             ],
         }
         suggestions: List[str] = []
-        if self._use_tip_cloud(profile):
-            model_name = self._tip_model(needs_image)
-            try:
-                # Tip Cloud 支持多模态，优先尝试。
-                raw_response = await self._tip_cloud_complete(payload, profile, model=model_name)
-                suggestions = self._parse_intent_response(raw_response)
-            except LLMProviderUnavailableError:
-                raise
-            except Exception as exc:
-                logger.warning('llm.generate_intents_failed', provider='tip_cloud', error=str(exc))
-        elif self._use_static_openai(profile):
-            try:
-                # 静态 OpenAI 仅用于文本模型。
-                raw_response = await self._static_openai_complete(payload, profile)
-                suggestions = self._parse_intent_response(raw_response)
-            except LLMProviderUnavailableError:
-                raise
-            except Exception as exc:
-                logger.warning('llm.generate_intents_failed', provider='static_openai', error=str(exc))
-        elif self._use_ollama(profile):
-            try:
-                # 本地 Ollama 走 Chat API。
-                raw_response = await self._ollama_complete(system_prompt, user_content, profile)
-                suggestions = self._parse_intent_response(raw_response)
-            except LLMProviderUnavailableError:
-                raise
-            except Exception as exc:
-                logger.warning('llm.generate_intents_failed', error=str(exc))
-        else:
-            logger.warning('llm.generate_intents_failed', error='unsupported llm provider')
+        # 意图属于交互路径，在同一 provider 的准入队列中优先于聊天与 Agent。
+        async with self._admit(profile, PRIORITY_INTENT):
+            if self._use_tip_cloud(profile):
+                model_name = self._tip_model(needs_image)
+                try:
+                    # Tip Cloud 支持多模态，优先尝试。
+                    raw_response = await self._tip_cloud_complete(payload, profile, model=model_name)
+                    suggestions = self._parse_intent_response(raw_response)
+                except LLMProviderUnavailableError:
+                    raise
+                except Exception as exc:
+                    logger.warning('llm.generate_intents_failed', provider='tip_cloud', error=str(exc))
+            elif self._use_static_openai(profile):
+                try:
+                    # 静态 OpenAI 仅用于文本模型。
+                    raw_response = await self._static_openai_complete(payload, profile)
+                    suggestions = self._parse_intent_response(raw_response)
+                except LLMProviderUnavailableError:
+                    raise
+                except Exception as exc:
+                    logger.warning('llm.generate_intents_failed', provider='static_openai', error=str(exc))
+            elif self._use_ollama(profile):
+                try:
+                    # 本地 Ollama 走 Chat API。
+                    raw_response = await self._ollama_complete(system_prompt, user_content, profile)
+                    suggestions = self._parse_intent_response(raw_response)
+                except LLMProviderUnavailableError:
+                    raise
+                except Exception as exc:
+                    logger.warning('llm.generate_intents_failed', error=str(exc))
+            else:
+                logger.warning('llm.generate_intents_failed', error='unsupported llm provider')
         if not suggestions:
             logger.warning('llm.intent_empty_result')
         return IntentGenerationResult(
@@ -519,6 +557,31 @@ class LLMService:
             # 先回传 prompt 元数据，便于前端展示。
             on_metadata(metadata)
 
+        try:
+            async with self._admit(profile, PRIORITY_CHAT):
+                async for chunk in self._dispatch_chat(payload, metadata, profile, needs_image):
+                    yield chunk
+        except LLMProviderUnavailableError as exc:
+            # 仅准入队列已满时到达这里，provider 错误已在 _dispatch_chat 内部处理。
+            yield str(exc)
+
+    @asynccontextmanager
+    async def _admit(self, profile: LLMProfile, priority: int) -> AsyncIterator[None]:
+        # 同一 provider 端点共用一个准入队列；排队已满视为 provider 暂不可用。
+        try:
+            async with get_llm_scheduler(profile).admit(priority=priority):
+                yield
+        except SchedulerFullError as exc:
+            logger.warning('llm.admission_rejected', provider=profile.provider, priority=priority, error=str(exc))
+            raise LLMProviderUnavailableError('LLM 请求排队已满，请稍后重试。') from exc
+
+    async def _dispatch_chat(
+        self,
+        payload: Dict[str, Any],
+        metadata: ChatPromptMetadata,
+        profile: LLMProfile,
+        needs_image: bool,
+    ) -> AsyncGenerator[str, None]:
         if self._use_tip_cloud(profile):
             model_name = self._tip_model(needs_image)
             try:
@@ -839,14 +902,14 @@ class LLMService:
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> str:
         # 通用的非流式 ChatCompletion 调用。
-        client = self._build_openai_client(
+        request_body, timeout = self._build_openai_request(payload, profile, model_override=model_override)
+        async with self._lease_openai_client(
             profile,
             base_url_override=base_url_override,
             api_key_override=api_key_override,
             extra_headers=extra_headers,
-        )
-        request_body, timeout = self._build_openai_request(payload, profile, model_override=model_override)
-        response = await client.chat.completions.create(**request_body, timeout=timeout)
+        ) as client:
+            response = await client.chat.completions.create(**request_body, timeout=timeout)
         data = self._convert_openai_response(response)
         return self._extract_message_content(data)
 
@@ -861,27 +924,55 @@ class LLMService:
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> AsyncGenerator[str, None]:
         # 通用的流式 ChatCompletion 调用，封装 stream/non-stream 分支。
-        client = self._build_openai_client(
+        request_body, timeout = self._build_openai_request(payload, profile, model_override=model_override)
+        async with self._lease_openai_client(
             profile,
             base_url_override=base_url_override,
             api_key_override=api_key_override,
             extra_headers=extra_headers,
-        )
-        request_body, timeout = self._build_openai_request(payload, profile, model_override=model_override)
-        if profile.stream:
-            # SDK 的 stream 为异步迭代器，逐块提取 delta。
-            stream = await client.chat.completions.create(**request_body, stream=True, timeout=timeout)
-            async for chunk in stream:
-                text = self._extract_openai_stream_text(chunk)
+        ) as client:
+            if profile.stream:
+                # SDK 的 stream 为异步迭代器，逐块提取 delta。
+                stream = await client.chat.completions.create(**request_body, stream=True, timeout=timeout)
+                async for chunk in stream:
+                    text = self._extract_openai_stream_text(chunk)
+                    if text:
+                        yield text
+            else:
+                # 非流式模式下仍使用相同接口，保持行为一致。
+                response = await client.chat.completions.create(**request_body, timeout=timeout)
+                data = self._convert_openai_response(response)
+                text = self._extract_message_content(data)
                 if text:
                     yield text
-        else:
-            # 非流式模式下仍使用相同接口，保持行为一致。
-            response = await client.chat.completions.create(**request_body, timeout=timeout)
-            data = self._convert_openai_response(response)
-            text = self._extract_message_content(data)
-            if text:
-                yield text
+
+    @asynccontextmanager
+    async def _lease_openai_client(self, profile: LLMProfile, **overrides: Any) -> AsyncIterator[AsyncOpenAI]:
+        # 请求期间持有租约，保证失效的客户端不会在流式响应中途被关闭。
+        with self._clients_lock:
+            client = self._build_openai_client(profile, **overrides)
+            self._client_leases[id(client)] = self._client_leases.get(id(client), 0) + 1
+        try:
+            yield client
+        finally:
+            with self._clients_lock:
+                remaining = self._client_leases.pop(id(client)) - 1
+                if remaining:
+                    self._client_leases[id(client)] = remaining
+            self._close_retired_clients()
+
+    def _close_retired_clients(self) -> None:
+        # 在事件循环中调用：关闭已无租约的失效客户端，释放其 httpx 连接池。
+        with self._clients_lock:
+            idle = [client for client in self._retired_clients if id(client) not in self._client_leases]
+            if not idle:
+                return
+            self._retired_clients = [client for client in self._retired_clients if id(client) in self._client_leases]
+        loop = asyncio.get_running_loop()
+        for client in idle:
+            task = loop.create_task(client.close())
+            self._close_tasks.add(task)
+            task.add_done_callback(self._close_tasks.discard)
 
     def _build_openai_client(
         self,
@@ -891,7 +982,7 @@ class LLMService:
         api_key_override: Optional[str] = None,
         extra_headers: Optional[Dict[str, str]] = None,
     ) -> AsyncOpenAI:
-        # 构造 openai SDK 客户端，补齐 base_url 与 headers。
+        # 构造 openai SDK 客户端，补齐 base_url 与 headers；调用方持有 _clients_lock。
         api_key = api_key_override or self._resolve_openai_api_key(profile)
         base_url = (base_url_override or self._openai_base_url(profile)).rstrip('/')
         if not api_key:
@@ -902,10 +993,21 @@ class LLMService:
         if extra_headers:
             # tip cloud 的设备 header 与用户 header 合并。
             headers.update(extra_headers)
+        cache_key = (api_key, base_url, tuple(sorted(headers.items())))
+        clients = self._openai_clients
+        client = clients.get(cache_key)
+        if client is not None:
+            return client
         client_kwargs: Dict[str, Any] = {'api_key': api_key, 'base_url': base_url}
         if headers:
             client_kwargs['default_headers'] = headers
-        return AsyncOpenAI(**client_kwargs)
+        client = AsyncOpenAI(**client_kwargs)
+        if len(clients) >= _MAX_OPENAI_CLIENTS:
+            # 设备 token 轮换会产生新 key，超过上限时整体重建即可；旧客户端待租约结束后关闭。
+            self._retired_clients.extend(clients.values())
+            clients.clear()
+        clients[cache_key] = client
+        return client
 
     def _resolve_openai_api_key(self, profile: LLMProfile) -> str:
         # 多来源依次回退：配置字段、环境变量、Header。
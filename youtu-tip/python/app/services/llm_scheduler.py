@@ -0,0 +1,95 @@
+# File: python/app/services/llm_scheduler.py
+# Project: Tip Desktop Assistant
+# Description: Per-provider admission schedulers that rank intent, chat, and agent LLM calls by priority.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Shared admission control in front of each LLM endpoint.
+
+``LLMService`` (intents, chat) and Youtu-Agent model calls all target the same
+provider, and a local Ollama/Youtu-LLM serves one or two generations at a
+time. Every call therefore goes through the ``RunScheduler`` for its endpoint,
+so a background agent loop cannot starve a hotkey intent: queued intents are
+admitted before queued chat turns, which are admitted before agent calls.
+Admission is per LLM call, so an agent yields the slot between tool steps.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+from urllib.parse import urlparse
+
+from ..core.config import LLM_LOCAL_CONCURRENCY, LLM_MAX_QUEUE, LLM_REMOTE_CONCURRENCY
+from ..core.settings import LLMProfile
+from .run_scheduler import RunScheduler
+
+PRIORITY_INTENT = 0
+PRIORITY_CHAT = 1
+PRIORITY_AGENT = 2
+
+PRIORITY_NAMES = {PRIORITY_INTENT: "intent", PRIORITY_CHAT: "chat", PRIORITY_AGENT: "agent"}
+
+_DEFAULT_OLLAMA_URL = "http://127.0.0.1:11434"
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", "0.0.0.0"}
+
+_schedulers: Dict[str, RunScheduler] = {}
+_registry_lock = threading.Lock()
+
+
+def provider_endpoint(profile: LLMProfile) -> str:
+    """Key identifying the backend a profile talks to; profiles sharing it share a scheduler."""
+    provider = (profile.provider or "tip_cloud").lower()
+    if provider == "tip_cloud":
+        return "tip_cloud"
+    if provider == "ollama":
+        base_url = profile.ollamaBaseUrl or profile.baseUrl or _DEFAULT_OLLAMA_URL
+    elif provider == "static_openai":
+        base_url = profile.openaiBaseUrl or profile.baseUrl
+    else:
+        base_url = profile.baseUrl or profile.openaiBaseUrl
+    return f"{provider}:{(base_url or '').rstrip('/')}"
+
+
+def _is_local(profile: LLMProfile, endpoint: str) -> bool:
+    if (profile.provider or "").lower() == "ollama":
+        return True
+    _, _, url = endpoint.partition(":")
+    return (urlparse(url).hostname or "") in _LOCAL_HOSTS
+
+
+def get_llm_scheduler(profile: LLMProfile) -> RunScheduler:
+    """Scheduler for the profile's endpoint; local endpoints get ``LLM_LOCAL_CONCURRENCY`` slots."""
+    endpoint = provider_endpoint(profile)
+    with _registry_lock:
+        scheduler = _schedulers.get(endpoint)
+        if scheduler is None:
+            concurrency = LLM_LOCAL_CONCURRENCY if _is_local(profile, endpoint) else LLM_REMOTE_CONCURRENCY
+            scheduler = RunScheduler(
+                max_concurrency=concurrency,
+                max_queue=LLM_MAX_QUEUE,
+                name=f"LLM {endpoint}",
+                priority_names=PRIORITY_NAMES,
+            )
+            _schedulers[endpoint] = scheduler
+        return scheduler
+
+
+def llm_scheduler_stats() -> Dict[str, Any]:
+    with _registry_lock:
+        schedulers = dict(_schedulers)
+    return {endpoint: scheduler.stats() for endpoint, scheduler in schedulers.items()}
+
+
+__all__ = [
+    "PRIORITY_AGENT",
+    "PRIORITY_CHAT",
+    "PRIORITY_INTENT",
+    "get_llm_scheduler",
+    "llm_scheduler_stats",
+    "provider_endpoint",
+]
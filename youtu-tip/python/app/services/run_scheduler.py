@@ -0,0 +1,225 @@
+# File: python/app/services/run_scheduler.py
+# Project: Tip Desktop Assistant
+# Description: Async scheduler that bounds concurrent runs and queues the overflow by priority class.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Mapping, Optional, Set
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+
+class SchedulerFullError(RuntimeError):
+    """Raised when both the concurrency slots and the wait queue are exhausted."""
+
+
+@dataclass
+class _Waiter:
+    job_id: str
+    future: asyncio.Future
+    priority: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _ClassStats:
+    admitted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+
+class RunScheduler:
+    """
+    Bound the number of concurrently executing jobs with a priority wait queue.
+
+    ``reserve`` is synchronous so callers can reject work immediately (e.g. HTTP
+    409) when the queue is full; ``acquire`` then waits for the job's turn and
+    ``release`` hands the slot to the next waiter. Waiters are ordered by
+    ``priority`` (lower runs first) and FIFO within a class; with the default
+    priority the queue is plain FIFO. When the queue is full, a job of a
+    strictly higher class displaces the newest waiter of the lowest queued
+    class, whose ``acquire`` then raises ``SchedulerFullError``; otherwise the
+    new job is rejected. ``admit`` wraps all three for callers that simply wait.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int = 1,
+        max_queue: int = 0,
+        name: str = "runs",
+        priority_names: Optional[Mapping[int, str]] = None,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._priority_names = dict(priority_names or {})
+        self._active: Set[str] = set()
+        self._waiters: Deque[_Waiter] = deque()
+        self._class_stats: Dict[int, _ClassStats] = {}
+        self._completed = 0
+        self._admitted = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def reserve(self, job_id: str, *, priority: int = 0) -> int:
+        """Claim a slot or a queue position; return 0 when the job can start now."""
+        if job_id in self._active or any(w.job_id == job_id for w in self._waiters):
+            raise ValueError(f"Job {job_id} already scheduled")
+        if len(self._active) < self.max_concurrency and not self._waiters:
+            self._active.add(job_id)
+            self._admitted += 1
+            self._stats_for(priority).record(0.0)
+            return 0
+        if len(self._waiters) >= self.max_queue:
+            if self.max_queue == 0:
+                self._rejected += 1
+                raise SchedulerFullError(f"Another {self.name} task is already running")
+            # 队尾即最低优先级中最新的等待者；仅当新任务优先级严格更高时将其挤出
+            if self._waiters[-1].priority <= priority:
+                self._rejected += 1
+                raise SchedulerFullError(f"Too many {self.name} tasks are queued")
+            self._evict(self._waiters.pop())
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(job_id=job_id, future=loop.create_future(), priority=priority)
+        # 插到第一个优先级更低的等待者之前，同级保持 FIFO
+        position = next(
+            (idx for idx, queued in enumerate(self._waiters) if queued.priority > priority),
+            len(self._waiters),
+        )
+        self._waiters.insert(position, waiter)
+        return position + 1
+
+    async def acquire(self, job_id: str) -> None:
+        """Wait until ``job_id`` owns a slot.
+
+        Raises CancelledError if the job was cancelled (or never reserved), so
+        callers handle both the same way, and ``SchedulerFullError`` if a
+        higher-priority job displaced it from a full queue.
+        """
+        if job_id in self._active:
+            return
+        waiter = next((w for w in self._waiters if w.job_id == job_id), None)
+        if waiter is None:
+            raise asyncio.CancelledError()
+        await waiter.future
+
+    @asynccontextmanager
+    async def admit(self, job_id: Optional[str] = None, *, priority: int = 0) -> AsyncIterator[str]:
+        """Hold a slot for the duration of the block, waiting in ``priority``'s queue if needed."""
+        job_id = job_id or uuid.uuid4().hex
+        self.reserve(job_id, priority=priority)
+        try:
+            await self.acquire(job_id)
+            yield job_id
+        finally:
+            self.release(job_id)
+
+    def release(self, job_id: str) -> None:
+        if job_id in self._active:
+            self._active.discard(job_id)
+            self._completed += 1
+        else:
+            self.cancel(job_id)
+        self._promote()
+
+    def cancel(self, job_id: str) -> bool:
+        """Drop a job that is still waiting; running jobs are left to their owner."""
+        for waiter in list(self._waiters):
+            if waiter.job_id == job_id:
+                self._waiters.remove(waiter)
+                if not waiter.future.done():
+                    waiter.future.cancel()
+                return True
+        return False
+
+    def position(self, job_id: str) -> int:
+        """0 when running, 1-based queue position when waiting, -1 when unknown."""
+        if job_id in self._active:
+            return 0
+        for idx, waiter in enumerate(self._waiters, start=1):
+            if waiter.job_id == job_id:
+                return idx
+        return -1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": len(self._active),
+            "queued": len(self._waiters),
+            "admitted": self._admitted,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(self._total_wait / self._admitted * 1000, 1) if self._admitted else 0.0,
+            "max_wait_ms": round(self._max_wait * 1000, 1),
+            "classes": {
+                self._priority_names.get(priority, str(priority)): {
+                    "queued": sum(1 for waiter in self._waiters if waiter.priority == priority),
+                    "admitted": stats.admitted,
+                    "avg_wait_ms": round(stats.total_wait / stats.admitted * 1000, 1) if stats.admitted else 0.0,
+                    "max_wait_ms": round(stats.max_wait * 1000, 1),
+                }
+                for priority, stats in sorted(self._class_stats.items())
+            },
+        }
+
+    def _stats_for(self, priority: int) -> _ClassStats:
+        stats = self._class_stats.get(priority)
+        if stats is None:
+            stats = self._class_stats[priority] = _ClassStats()
+        return stats
+
+    def _evict(self, waiter: _Waiter) -> None:
+        self._rejected += 1
+        if not waiter.future.done():
+            waiter.future.set_exception(SchedulerFullError(f"Too many {self.name} tasks are queued"))
+        logger.info(
+            "run_scheduler.evicted",
+            scheduler=self.name,
+            job_id=waiter.job_id,
+            priority=waiter.priority,
+        )
+
+    def _promote(self) -> None:
+        while self._waiters and len(self._active) < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if waiter.future.done():
+                continue
+            waited = time.monotonic() - waiter.enqueued_at
+            self._admitted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._stats_for(waiter.priority).record(waited)
+            self._active.add(waiter.job_id)
+            waiter.future.set_result(None)
+            logger.info(
+                "run_scheduler.promoted",
+                scheduler=self.name,
+                job_id=waiter.job_id,
+                priority=waiter.priority,
+                waited_ms=round(waited * 1000, 1),
+            )
+
+
+__all__ = ["RunScheduler", "SchedulerFullError"]
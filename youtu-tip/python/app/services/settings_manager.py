@@ -1,6 +1,6 @@
 # File: python/app/services/settings_manager.py
 # Project: Tip Desktop Assistant
-# Description: Thread-safe settings loader/writer that merges defaults, 
+# Description: Thread-safe settings loader that merges defaults, persists through a debounced atomic writer,
 # enforces tip_cloud profile, and manages LLM profile CRUD.
 
 # Copyright (C) 2025 Tencent. All rights reserved.
@@ -10,15 +10,22 @@
 
 from __future__ import annotations
 
+from dataclasses import dataclass
 from pathlib import Path
 from threading import RLock
-from typing import Any, Dict, Type, TypeVar
+from typing import Any, Callable, Dict, Type, TypeVar
 import uuid
 
 import structlog
 from pydantic import BaseModel, ValidationError
 
-from ..core.config import DEFAULT_SETTINGS_FILE, USER_SETTINGS_FILE, _get_env_bool
+from ..core.config import (
+    DEFAULT_SETTINGS_FILE,
+    SETTINGS_WRITE_DEBOUNCE_MS,
+    SETTINGS_WRITE_MAX_DELAY_MS,
+    USER_SETTINGS_FILE,
+    _get_env_bool,
+)
 from ..core.settings import (
     Settings,
     DEFAULT_SETTINGS,
@@ -29,12 +36,24 @@ from ..core.settings import (
     TIP_CLOUD_PROFILE_ID,
     default_tip_cloud_profile,
 )
+from .settings_persistence import SettingsWriter
 
 TModel = TypeVar('TModel', bound=BaseModel)
 
 logger = structlog.get_logger(__name__)
 
 
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    """Immutable settings plus the version it was committed as (starts at 1, +1 per change)."""
+
+    version: int
+    settings: Settings
+
+
+SettingsListener = Callable[[SettingsSnapshot], None]
+
+
 class SettingsManager:
     def __init__(
         self,
@@ -59,7 +78,16 @@ class SettingsManager:
         )
         # RLock 确保跨线程 API 安全（FastAPI 请求/后台任务共用）
         self._lock = RLock()
+        # 写盘交给后台线程合并执行，变更路径上不再同步 write_text
+        self._writer = SettingsWriter(
+            self._user_path,
+            debounce=SETTINGS_WRITE_DEBOUNCE_MS / 1000,
+            max_delay=SETTINGS_WRITE_MAX_DELAY_MS / 1000,
+        )
         self._settings = self._load_settings()
+        # 每次变更递增；派生缓存（签名、客户端等）可按版本号或订阅回调失效
+        self._version = 1
+        self._listeners: list[SettingsListener] = []
 
     def _load_settings(self) -> Settings:
         # 优先读取用户文件，只有版本过旧或校验失败时回落到默认并覆盖写回
@@ -110,32 +138,56 @@ class SettingsManager:
         user_version = self._parse_version(getattr(user_settings, 'settingsVersion', ''))
         return user_version is None or user_version < default_version
 
+    @property
+    def version(self) -> int:
+        return self._version
+
     def get_settings(self) -> Settings:
-        # 返回副本以避免调用方修改内部状态
+        # Settings 为冻结快照，直接共享引用，无需深拷贝
+        return self._settings
+
+    def snapshot(self) -> SettingsSnapshot:
+        # 版本号与设置对象需一致，因此在锁内一并读取
+        with self._lock:
+            return SettingsSnapshot(version=self._version, settings=self._settings)
+
+    def subscribe(self, listener: SettingsListener) -> Callable[[], None]:
+        """
+        Call ``listener(snapshot)`` after every change; returns an unsubscribe function.
+
+        Listeners run on the mutating thread after the lock is released, so
+        concurrent writes may deliver snapshots out of order; compare
+        ``snapshot.version`` or simply drop derived state.
+        """
         with self._lock:
-            return self._settings.model_copy(deep=True)
+            self._listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+
+        return _unsubscribe
 
     def save_settings(self, payload: Dict[str, Any]) -> Settings:
         with self._lock:
             # 标准化局部更新，避免调用方传入非模型对象导致的类型漂移
             normalized = self._normalize_payload(payload)
             updated = self._settings.model_copy(update=normalized)
-            updated = self._ensure_tip_cloud(updated)
-            self._settings = updated
-            self._write_settings_file(updated)
-            return updated
+            snapshot = self._commit(self._ensure_tip_cloud(updated))
+        self._notify(snapshot)
+        return snapshot.settings
 
     def reset_to_default(self) -> Settings:
         # 强制回滚到默认配置并写盘
         with self._lock:
-            self._settings = self._ensure_tip_cloud(Settings.from_file(self._default_path))
-            self._write_settings_file(self._settings)
-            return self._settings
+            snapshot = self._commit(self._ensure_tip_cloud(Settings.from_file(self._default_path)))
+        self._notify(snapshot)
+        return snapshot.settings
 
     def list_llm_profiles(self) -> list[LLMProfile]:
-        # 返回深拷贝以防调用方持有引用修改内部列表
-        with self._lock:
-            return [profile.model_copy(deep=True) for profile in self._settings.llmProfiles]
+        # 配置对象不可变，返回新列表即可避免调用方改动内部列表
+        return list(self._settings.llmProfiles)
 
     def add_llm_profile(self, payload: Dict[str, Any]) -> LLMProfile:
         provider = (payload.get('provider') or '').strip()
@@ -154,9 +206,9 @@ class SettingsManager:
             profile = LLMProfile.model_validate(data)
             # 追加新配置后重新注入 tip_cloud 以确保锁定状态
             profiles = list(self._settings.llmProfiles) + [profile]
-            self._settings = self._ensure_tip_cloud(self._settings.model_copy(update={'llmProfiles': profiles}))
-            self._write_settings_file(self._settings)
-            return profile.model_copy(deep=True)
+            snapshot = self._commit(self._ensure_tip_cloud(self._settings.model_copy(update={'llmProfiles': profiles})))
+        self._notify(snapshot)
+        return profile
 
     def update_llm_profile(self, profile_id: str, patch: Dict[str, Any]) -> LLMProfile:
         with self._lock:
@@ -169,12 +221,17 @@ class SettingsManager:
                 payload = dict(patch)
                 if payload.get('provider') == 'tip_cloud':
                     raise ValueError('tip_cloud 配置不可用于用户自定义')
-                updated = profile.model_copy(update=payload)
+                # 重新校验，保证 headers 等嵌套字段仍是冻结的模型而不是普通 dict
+                updated = LLMProfile.model_validate({**profile.model_dump(), **payload})
                 profiles[idx] = updated
-                self._settings = self._ensure_tip_cloud(self._settings.model_copy(update={'llmProfiles': profiles}))
-                self._write_settings_file(self._settings)
-                return updated.model_copy(deep=True)
-        raise KeyError(profile_id)
+                snapshot = self._commit(
+                    self._ensure_tip_cloud(self._settings.model_copy(update={'llmProfiles': profiles}))
+                )
+                break
+            else:
+                raise KeyError(profile_id)
+        self._notify(snapshot)
+        return updated
 
     def delete_llm_profile(self, profile_id: str) -> None:
         with self._lock:
@@ -193,21 +250,38 @@ class SettingsManager:
             if active_id == profile_id:
                 active_id = TIP_CLOUD_PROFILE_ID
             # 删除后重置活跃配置，避免指向不存在的 ID
-            self._settings = self._ensure_tip_cloud(
-                self._settings.model_copy(update={'llmProfiles': profiles, 'llmActiveId': active_id})
+            snapshot = self._commit(
+                self._ensure_tip_cloud(
+                    self._settings.model_copy(update={'llmProfiles': profiles, 'llmActiveId': active_id})
+                )
             )
-            self._write_settings_file(self._settings)
+        self._notify(snapshot)
 
     def set_active_llm(self, profile_id: str) -> LLMProfile:
         with self._lock:
-            for profile in self._settings.llmProfiles:
-                if profile.id == profile_id:
-                    # 更新活跃配置同时重新注入 tip_cloud 以保证特性标记一致
-                    self._settings = self._settings.model_copy(update={'llmActiveId': profile_id})
-                    self._settings = self._ensure_tip_cloud(self._settings)
-                    self._write_settings_file(self._settings)
-                    return profile.model_copy(deep=True)
-        raise KeyError(profile_id)
+            target = next((profile for profile in self._settings.llmProfiles if profile.id == profile_id), None)
+            if target is None:
+                raise KeyError(profile_id)
+            # 更新活跃配置同时重新注入 tip_cloud 以保证特性标记一致
+            snapshot = self._commit(self._ensure_tip_cloud(self._settings.model_copy(update={'llmActiveId': profile_id})))
+        self._notify(snapshot)
+        return target
+
+    def _commit(self, settings: Settings) -> SettingsSnapshot:
+        # 调用方须持有锁：替换快照、递增版本号并登记异步写盘
+        self._settings = settings
+        self._version += 1
+        self._write_settings_file(settings)
+        return SettingsSnapshot(version=self._version, settings=settings)
+
+    def _notify(self, snapshot: SettingsSnapshot) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception as exc:  # pragma: no cover - listener bugs must not break settings writes
+                logger.warning("settings.listener_failed", error=str(exc), exc_info=True)
 
     def _normalize_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         normalized = dict(payload)
@@ -272,7 +346,7 @@ class SettingsManager:
             vlm_id = ''
         # 确保 llmActiveId/vlmActiveId 总是指向有效配置
         with_tip = settings.model_copy(
-            update={'llmProfiles': profiles, 'llmActiveId': active_id, 'vlmActiveId': vlm_id}
+            update={'llmProfiles': tuple(profiles), 'llmActiveId': active_id, 'vlmActiveId': vlm_id}
         )
         return self._ensure_feature_flags(with_tip)
 
@@ -288,10 +362,14 @@ class SettingsManager:
         # 如果存在合法的 VLM 配置，则保持 features 原样
         return settings.model_copy(update={'features': features})
 
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every committed change is on disk."""
+        return self._writer.flush(timeout)
+
+    def close(self) -> None:
+        # lifespan 退出时调用：落盘未写入的变更并停止写线程
+        self._writer.close()
+
     def _write_settings_file(self, settings: Settings) -> None:
-        try:
-            self._user_path.parent.mkdir(parents=True, exist_ok=True)
-            self._user_path.write_text(settings.model_dump_json(indent=2), encoding='utf-8')
-        except Exception as exc:  # pragma: no cover - best effort
-            # 写入失败仅记录日志，不抛异常以避免中断主流程
-            logger.warning("settings.write_failed", error=str(exc), path=str(self._user_path))
+        # 仅登记最新快照；后台线程以临时文件 + fsync + rename 原子替换
+        self._writer.schedule(settings)
@@ -0,0 +1,193 @@
+# File: python/app/services/settings_persistence.py
+# Project: Tip Desktop Assistant
+# Description: Debounced background writer that persists settings snapshots atomically (temp file, fsync, rename).
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Settings persistence off the request path.
+
+``SettingsManager`` used to rewrite ``settings.json`` with ``write_text`` on
+every mutation while holding its lock, on whatever thread made the change
+(including the event loop). ``SettingsWriter`` instead takes the latest frozen
+snapshot and writes it on a background thread. A burst of updates coalesces
+into one write after ``debounce`` seconds of quiet, and ``max_delay`` caps how
+long a busy stream can postpone it. Each write goes to a temp file in the same
+directory, is fsynced, and is renamed over the target, so a crash leaves
+either the old or the new file, never a torn one.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import structlog
+
+from ..core.settings import Settings
+
+logger = structlog.get_logger(__name__)
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Replace ``path`` with ``text`` via temp file + fsync + rename; keeps the existing file mode."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            handle.flush()
+            os.fsync(handle.fileno())
+        try:
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+        except FileNotFoundError:
+            pass  # 新文件保持 mkstemp 的 0600（含 API Key）
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    # rename 本身也需落盘；部分平台不支持目录 fsync，忽略即可
+    try:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+class SettingsWriter:
+    """
+    Coalescing writer for one settings file.
+
+    ``schedule`` only records the newest snapshot and returns immediately;
+    ``flush`` blocks until everything scheduled so far is on disk; ``close``
+    flushes and stops the thread, after which writes happen inline. Pending
+    data is also flushed at interpreter exit.
+    """
+
+    def __init__(self, path: Path, *, debounce: float = 0.25, max_delay: float = 2.0) -> None:
+        self.path = Path(path)
+        self.debounce = max(0.0, debounce)
+        self.max_delay = max(self.debounce, max_delay)
+        self._cond = threading.Condition()
+        self._pending: Optional[Settings] = None
+        self._first_pending_at = 0.0
+        self._last_pending_at = 0.0
+        self._writing = False
+        self._flush_requested = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._writes = 0
+        self._coalesced = 0
+        self._failures = 0
+        self._last_write_ms = 0.0
+        atexit.register(self.close)
+
+    def schedule(self, settings: Settings) -> None:
+        with self._cond:
+            if self._closed:
+                inline = True
+            else:
+                inline = False
+                now = time.monotonic()
+                if self._pending is None:
+                    self._first_pending_at = now
+                else:
+                    self._coalesced += 1
+                self._pending = settings
+                self._last_pending_at = now
+                self._ensure_thread()
+                self._cond.notify_all()
+        if inline:
+            self._write(settings)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Write any pending snapshot now; False if it did not finish within ``timeout``."""
+        with self._cond:
+            if self._pending is None and not self._writing:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if not self.flush(timeout):
+            logger.warning("settings.flush_timeout", path=str(self.path))
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "writes": self._writes,
+                "coalesced": self._coalesced,
+                "failures": self._failures,
+                "pending": self._pending is not None,
+                "last_write_ms": round(self._last_write_ms, 3),
+            }
+
+    def _ensure_thread(self) -> None:
+        # 调用方持有 _cond
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="tip-settings-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                # 静默 debounce 秒后再写；持续更新最多推迟 max_delay 秒
+                while not (self._flush_requested or self._closed):
+                    deadline = min(self._last_pending_at + self.debounce, self._first_pending_at + self.max_delay)
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                settings = self._pending
+                self._pending = None
+                self._flush_requested = False
+                self._writing = True
+            try:
+                self._write(settings)
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, settings: Settings) -> None:
+        started = time.perf_counter()
+        try:
+            write_atomic(self.path, settings.model_dump_json(indent=2))
+        except Exception as exc:  # pragma: no cover - best effort
+            # 写入失败仅记录日志，不抛异常以避免中断主流程
+            with self._cond:
+                self._failures += 1
+            logger.warning("settings.write_failed", error=str(exc), path=str(self.path))
+            return
+        with self._cond:
+            self._writes += 1
+            self._last_write_ms = (time.perf_counter() - started) * 1000
+
+
+__all__ = ["SettingsWriter", "write_atomic"]
@@ -0,0 +1,221 @@
+# File: python/app/services/shell_pool.py
+# Project: Tip Desktop Assistant
+# Description: Pool of long-lived bash processes per workspace with sentinel-delimited output and per-call timeouts.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Persistent shells for tool calls.
+
+Spawning ``/bin/bash`` per ``run_bash`` call costs tens of milliseconds and
+loses nothing useful, so ``ShellPool`` keeps a few idle shells per workspace.
+Each command is followed by a ``printf`` of a per-shell sentinel carrying the
+exit status; reading up to the sentinel delimits the output without relying on
+prompts. A command that exceeds its timeout is interrupted with SIGINT and the
+shell is resynchronised; only a shell that does not come back is replaced.
+
+Shells are shared by every session working in the same workspace, so each
+command runs in a subshell with stdin from ``/dev/null``. ``export``, ``alias``,
+``set -e``, functions, ``ulimit`` or ``exit`` cannot leak into the next caller,
+and a command that reads stdin gets EOF instead of consuming the sentinel.
+"""
+
+from __future__ import annotations
+
+import re
+import shlex
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency (POSIX only)
+    import pexpect
+except ImportError:  # pragma: no cover
+    pexpect = None  # type: ignore
+
+_ANSI_RE = re.compile(r"\x1B\[[0-?]*[ -/]*[@-~]")
+_RESYNC_TIMEOUT = 2.0
+
+
+class ShellTimeout(RuntimeError):
+    """The command did not finish in time; it was interrupted and the shell kept alive."""
+
+
+@dataclass
+class ShellResult:
+    output: str
+    exit_code: int
+    elapsed_ms: float
+
+
+class ShellSession:
+    """One bash process; not thread-safe, the pool hands it to one caller at a time."""
+
+    def __init__(self, workspace: str) -> None:
+        if pexpect is None:
+            raise RuntimeError("pexpect is required for persistent shell sessions")
+        self.workspace = workspace
+        self._token = uuid.uuid4().hex[:12]
+        self._sentinel = re.compile(rf"\r?\n__TIP_{self._token}__:(\d+)\r?\n")
+        self._child = pexpect.spawn(
+            "/bin/bash",
+            ["--noprofile", "--norc"],
+            encoding="utf-8",
+            codec_errors="replace",
+            echo=False,
+        )
+        self._child.delaybeforesend = None
+        self.last_used = time.monotonic()
+        # 关闭回显/提示符，之后只靠哨兵切分输出
+        self._send("stty -echo -onlcr 2>/dev/null; unset PROMPT_COMMAND; PS1=''; PS2=''")
+        self._sync(_RESYNC_TIMEOUT * 5)
+
+    @property
+    def alive(self) -> bool:
+        return self._child.isalive()
+
+    def run(self, command: str, timeout: float) -> ShellResult:
+        started = time.perf_counter()
+        # 每次调用都从工作区根目录开始；命令在子 shell 中执行，状态不会带给下一个调用方
+        self._send(f"cd -- {shlex.quote(self.workspace)}")
+        # 右括号单独成行，命令末尾的注释或 heredoc 不会把它吞掉
+        self._send(f"(\n{command}\n) </dev/null")
+        self._send_sentinel()
+        try:
+            self._child.expect(self._sentinel, timeout=timeout)
+        except pexpect.TIMEOUT as exc:
+            self._interrupt()
+            raise ShellTimeout(f"Command timed out after {timeout:g}s and was interrupted") from exc
+        self.last_used = time.monotonic()
+        output = _ANSI_RE.sub("", self._child.before or "").replace("\r\n", "\n")
+        return ShellResult(
+            output=output.strip("\n"),
+            exit_code=int(self._child.match.group(1)),
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def close(self) -> None:
+        try:
+            self._child.close(force=True)
+        except Exception:  # pragma: no cover - already gone
+            pass
+
+    def _send(self, line: str) -> None:
+        self._child.sendline(line)
+
+    def _send_sentinel(self) -> None:
+        self._send(f"printf '\\n__TIP_{self._token}__:%d\\n' \"$?\"")
+
+    def _sync(self, timeout: float) -> None:
+        self._send_sentinel()
+        self._child.expect(self._sentinel, timeout=timeout)
+
+    def _interrupt(self) -> None:
+        """SIGINT the foreground job and drain until the shell answers again."""
+        self._child.sendintr()
+        try:
+            self._sync(_RESYNC_TIMEOUT)
+        except (pexpect.TIMEOUT, pexpect.EOF):
+            # e.g. an unterminated quote swallowed the sentinel; give up on this shell
+            logger.warning("shell_pool.resync_failed", workspace=self.workspace)
+            self.close()
+
+
+class ShellPool:
+    """
+    Idle ``ShellSession`` objects keyed by workspace.
+
+    ``run`` borrows a shell (spawning only when none is idle), executes the
+    command and returns the shell; up to ``max_idle`` shells per workspace are
+    kept and shells idle longer than ``idle_ttl`` seconds are closed lazily.
+    """
+
+    def __init__(self, *, max_idle: int = 2, idle_ttl: float = 600.0) -> None:
+        self.max_idle = max(1, max_idle)
+        self.idle_ttl = max(1.0, idle_ttl)
+        self._idle: Dict[str, Deque[ShellSession]] = {}
+        self._lock = threading.Lock()
+        self._spawns = 0
+        self._calls = 0
+        self._timeouts = 0
+        self._total_ms = 0.0
+
+    def run(self, workspace: str, command: str, *, timeout: float = 60.0) -> ShellResult:
+        session = self._acquire(workspace)
+        try:
+            result = session.run(command, timeout)
+        except ShellTimeout:
+            with self._lock:
+                self._timeouts += 1
+            raise
+        except Exception:
+            session.close()
+            raise
+        finally:
+            self._release(session)
+        with self._lock:
+            self._calls += 1
+            self._total_ms += result.elapsed_ms
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = [session for queue in self._idle.values() for session in queue]
+            self._idle.clear()
+        for session in sessions:
+            session.close()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "idle": sum(len(queue) for queue in self._idle.values()),
+                "spawns": self._spawns,
+                "calls": self._calls,
+                "timeouts": self._timeouts,
+                "avg_call_ms": round(self._total_ms / self._calls, 3) if self._calls else 0.0,
+            }
+
+    def _acquire(self, workspace: str) -> ShellSession:
+        expired = []
+        session: Optional[ShellSession] = None
+        now = time.monotonic()
+        with self._lock:
+            queue = self._idle.get(workspace)
+            while queue:
+                candidate = queue.pop()
+                if candidate.alive and now - candidate.last_used < self.idle_ttl:
+                    session = candidate
+                    break
+                expired.append(candidate)
+        for stale in expired:
+            stale.close()
+        if session is not None:
+            return session
+        session = ShellSession(workspace)
+        with self._lock:
+            self._spawns += 1
+        logger.info("shell_pool.spawned", workspace=workspace)
+        return session
+
+    def _release(self, session: ShellSession) -> None:
+        if not session.alive:
+            return
+        with self._lock:
+            queue = self._idle.setdefault(session.workspace, deque())
+            if len(queue) < self.max_idle:
+                queue.append(session)
+                return
+        session.close()
+
+
+__all__ = ["ShellPool", "ShellResult", "ShellSession", "ShellTimeout"]
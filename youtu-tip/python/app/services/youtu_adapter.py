@@ -11,7 +11,7 @@ from __future__ import annotations
 
 import os
 import structlog
-from typing import Optional, Tuple
+from typing import Any, AsyncIterator, Optional, Tuple
 
 try:  # pragma: no cover - optional dependency
     os.environ.setdefault("UTU_LLM_MODEL", "tip-placeholder")
@@ -32,9 +32,56 @@ from .llm import (
     tip_cloud_base_url,
     tip_cloud_model,
 )
+from .llm_scheduler import PRIORITY_AGENT, get_llm_scheduler
+from .run_scheduler import RunScheduler
 from .tip_cloud_auth import TipCloudAuth
 
 
+if Model is not None:
+
+    class ScheduledModel(Model):
+        """
+        Admit every model call of an agent through the provider's scheduler.
+
+        The slot is held for one ``get_response``/``stream_response`` only, so
+        between tool steps a queued intent or chat turn can take the provider
+        before the agent's next call.
+
+        This is a delegating wrapper, not a subclass of the wrapped model:
+        attribute reads fall through to it, but ``isinstance(model,
+        OpenAIChatCompletionsModel)`` is False. Code that needs the concrete
+        type (e.g. to reach its ``openai_client``) should check ``wrapped``.
+        """
+
+        def __init__(self, model: Model, scheduler: RunScheduler, *, priority: int = PRIORITY_AGENT) -> None:
+            self._model = model
+            self._scheduler = scheduler
+            self._priority = priority
+
+        @property
+        def wrapped(self) -> Model:
+            """The underlying provider model, for type checks that must see the concrete class."""
+            return self._model
+
+        async def get_response(self, *args: Any, **kwargs: Any):
+            async with self._scheduler.admit(priority=self._priority):
+                return await self._model.get_response(*args, **kwargs)
+
+        async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+            async with self._scheduler.admit(priority=self._priority):
+                async for event in self._model.stream_response(*args, **kwargs):
+                    yield event
+
+        def __getattr__(self, name: str) -> Any:
+            # model 名称、openai_client 等属性透传给被包装的模型
+            if name == "_model":
+                raise AttributeError(name)
+            return getattr(self._model, name)
+
+else:  # pragma: no cover - openai-agents not installed
+    ScheduledModel = None  # type: ignore
+
+
 def build_youtu_model(
     settings: Settings,
     profile: Optional[LLMProfile] = None,
@@ -124,6 +171,10 @@ def build_youtu_model(
             provider=provider,
         )
 
+    # Agent 的每次模型调用与意图/聊天共用 provider 准入队列，优先级最低。
+    if ScheduledModel is not None:
+        model = ScheduledModel(model, get_llm_scheduler(profile))
+
     # Extra OpenAI body options keep stream mode consistent with desktop settings.
     extra_body = {"stream": profile.stream}
     model_settings = ModelSettings(
@@ -0,0 +1,238 @@
+# File: python/app/services/youtu_agent_pool.py
+# Project: Tip Desktop Assistant
+# Description: Pool of pre-built Youtu-Agent instances with checkout/checkin, background warm-up and idle eviction.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+# (agent config name, LLM settings signature)
+PoolKey = Tuple[str, str]
+AgentFactory = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class _IdleAgent:
+    agent: Any
+    idle_since: float = field(default_factory=time.monotonic)
+
+
+def reset_agent_history(agent: Any) -> None:
+    """Drop conversation state so a pooled agent starts the next lease fresh."""
+    clear = getattr(agent, "clear_input_items", None)
+    if callable(clear):
+        clear()
+    elif hasattr(agent, "input_items"):
+        agent.input_items = []
+
+
+async def _cleanup(agent: Any) -> None:
+    try:
+        await agent.cleanup()
+    except Exception as exc:  # pragma: no cover - best effort teardown
+        logger.warning("youtu_agent_pool.cleanup_failed", error=str(exc), exc_info=True)
+
+
+class YoutuAgentPool:
+    """
+    Keep built agents per (config, signature) so new sessions skip ``build()``.
+
+    ``checkout`` hands out an idle agent (history cleared) or builds one, then
+    tops the key back up to ``warm_size`` idle agents in the background so the
+    next one-off request is a hit. ``checkin`` returns an agent; idle agents
+    beyond ``max_size`` or older than ``idle_ttl`` seconds are cleaned up.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 2,
+        warm_size: int = 1,
+        idle_ttl: float = 600.0,
+        reap_interval: float = 30.0,
+    ) -> None:
+        self.max_size = max(0, max_size)
+        self.warm_size = max(0, min(warm_size, self.max_size))
+        self.idle_ttl = max(0.0, idle_ttl)
+        self.reap_interval = max(1.0, reap_interval)
+        self._idle: Dict[PoolKey, Deque[_IdleAgent]] = {}
+        self._leased = 0
+        self._refills: Dict[PoolKey, asyncio.Task] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._hooks: Set[Callable[[float], Awaitable[None]]] = set()
+        self._hits = 0
+        self._misses = 0
+        self._builds = 0
+        self._build_failures = 0
+        self._total_build = 0.0
+        self._max_build = 0.0
+        self._evicted = 0
+
+    # ----------------------------
+    # Lease
+    # ----------------------------
+    async def checkout(self, key: PoolKey, factory: AgentFactory) -> Any:
+        """Return an agent for ``key``; builds inline only on a pool miss."""
+        self._ensure_reaper()
+        idle = self._idle.get(key)
+        if idle:
+            entry = idle.pop()
+            if not idle:
+                self._idle.pop(key, None)
+            reset_agent_history(entry.agent)
+            self._hits += 1
+            agent = entry.agent
+            logger.info("youtu_agent_pool.hit", config=key[0], idle_ms=round((time.monotonic() - entry.idle_since) * 1000))
+        else:
+            self._misses += 1
+            logger.info("youtu_agent_pool.miss", config=key[0])
+            agent = await self._build(factory)
+        self._leased += 1
+        self._schedule_refill(key, factory)
+        return agent
+
+    async def checkin(self, key: PoolKey, agent: Any) -> None:
+        """Give a leased agent back; it is kept warm unless the pool is full."""
+        self._leased = max(0, self._leased - 1)
+        if agent is None:
+            return
+        if self.idle_count() >= self.max_size:
+            self._evicted += 1
+            await _cleanup(agent)
+            return
+        reset_agent_history(agent)
+        self._idle.setdefault(key, deque()).append(_IdleAgent(agent=agent))
+
+    async def discard(self, agent: Any) -> None:
+        """Drop a leased agent that must not be reused (e.g. settings changed)."""
+        self._leased = max(0, self._leased - 1)
+        if agent is not None:
+            await _cleanup(agent)
+
+    # ----------------------------
+    # Maintenance
+    # ----------------------------
+    def add_reap_hook(self, hook: Callable[[float], Awaitable[None]]) -> None:
+        """Run ``hook(now)`` on every reaper tick (used to expire idle sessions)."""
+        self._hooks.add(hook)
+
+    async def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        expired = []
+        for key in list(self._idle):
+            queue = self._idle[key]
+            keep = deque(entry for entry in queue if now - entry.idle_since < self.idle_ttl)
+            expired.extend(entry.agent for entry in queue if now - entry.idle_since >= self.idle_ttl)
+            if keep:
+                self._idle[key] = keep
+            else:
+                self._idle.pop(key, None)
+        if expired:
+            self._evicted += len(expired)
+            logger.info("youtu_agent_pool.evicted", count=len(expired))
+            await asyncio.gather(*(_cleanup(agent) for agent in expired))
+        return len(expired)
+
+    async def clear(self) -> None:
+        """Clean up every idle agent and pending warm-up; leased agents are untouched."""
+        for task in self._refills.values():
+            task.cancel()
+        self._refills.clear()
+        agents = [entry.agent for queue in self._idle.values() for entry in queue]
+        self._idle.clear()
+        await asyncio.gather(*(_cleanup(agent) for agent in agents))
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        await self.clear()
+
+    def idle_count(self) -> int:
+        return sum(len(queue) for queue in self._idle.values())
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "max_size": self.max_size,
+            "warm_size": self.warm_size,
+            "idle_ttl_s": self.idle_ttl,
+            "idle": self.idle_count(),
+            "leased": self._leased,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+            "builds": self._builds,
+            "build_failures": self._build_failures,
+            "avg_build_ms": round(self._total_build / self._builds * 1000, 1) if self._builds else 0.0,
+            "max_build_ms": round(self._max_build * 1000, 1),
+            "evicted": self._evicted,
+        }
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    async def _build(self, factory: AgentFactory) -> Any:
+        started = time.monotonic()
+        try:
+            agent = await factory()
+        except Exception:
+            self._build_failures += 1
+            raise
+        elapsed = time.monotonic() - started
+        self._builds += 1
+        self._total_build += elapsed
+        self._max_build = max(self._max_build, elapsed)
+        logger.info("youtu_agent_pool.built", build_ms=round(elapsed * 1000, 1))
+        return agent
+
+    def _schedule_refill(self, key: PoolKey, factory: AgentFactory) -> None:
+        if self.warm_size == 0 or key in self._refills:
+            return
+        if len(self._idle.get(key) or ()) >= self.warm_size:
+            return
+        task = asyncio.create_task(self._refill(key, factory))
+        self._refills[key] = task
+        task.add_done_callback(lambda _task, key=key: self._refills.pop(key, None))
+
+    async def _refill(self, key: PoolKey, factory: AgentFactory) -> None:
+        # 后台预热：在请求路径之外构建，下一次一次性请求即可命中
+        try:
+            while len(self._idle.get(key) or ()) < self.warm_size and self.idle_count() < self.max_size:
+                agent = await self._build(factory)
+                self._idle.setdefault(key, deque()).append(_IdleAgent(agent=agent))
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("youtu_agent_pool.warm_failed", config=key[0], error=str(exc), exc_info=True)
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def _reap_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            now = time.monotonic()
+            try:
+                for hook in list(self._hooks):
+                    await hook(now)
+                await self.evict_idle(now)
+            except Exception as exc:  # pragma: no cover - keep the reaper alive
+                logger.warning("youtu_agent_pool.reap_failed", error=str(exc), exc_info=True)
+
+
+__all__ = ["PoolKey", "YoutuAgentPool", "reset_agent_history"]
@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 import uuid
 from dataclasses import dataclass
 from typing import Any, AsyncGenerator, Optional
@@ -20,10 +21,22 @@ from pathlib import Path
 
 import structlog
 
-from ..core.config import CONFIG_DIR
+from ..core.config import (
+    CACHE_DIR,
+    CONFIG_DIR,
+    YOUTU_AGENT_IDLE_TTL,
+    YOUTU_AGENT_POOL_SIZE,
+    YOUTU_AGENT_POOL_WARM,
+    YOUTU_AGENT_SESSION_TTL,
+)
 from ..core.settings import LLMProfile, Settings
-from .settings_manager import SettingsManager
+from .settings_manager import SettingsManager, SettingsSnapshot
 from .youtu_adapter import build_youtu_model
+from .youtu_agent_pool import PoolKey, YoutuAgentPool
+from .youtu_config_cache import AgentConfigCache, normalize_config_name
+from .youtu_bash_toolkit import PooledBashToolkit
+from .youtu_document_toolkit import CachedDocumentToolkit
+from .youtu_toolkit_host import ToolkitHost, register_toolkit
 
 logger = structlog.get_logger(__name__)
 
@@ -50,16 +63,28 @@ except ImportError:  # pragma: no cover - handled at runtime
 
 __all__ = ["YoutuAgentService"]
 
+if PooledBashToolkit is not None:
+    # bash 工具改用常驻 shell 池，命令不再每次付出进程启动开销
+    register_toolkit("bash", PooledBashToolkit)
+if CachedDocumentToolkit is not None:
+    # 文档解析结果走共享缓存，追问同一文件无需重新解析
+    register_toolkit("document", CachedDocumentToolkit)
+
 @dataclass
 class _SessionState:
-    # Each session keeps a built agent, its config signature, and a lock to serialize calls.
+    # Each session leases a pooled agent, keeps its pool key, and a lock to serialize calls.
     agent: SimpleAgent
     signature: str
     lock: asyncio.Lock
+    key: PoolKey
+    last_used: float = 0.0
+
+    def touch(self) -> None:
+        self.last_used = time.monotonic()
 
 
 class YoutuAgentService:
-    """Manage a singleton SimpleAgent that reuses our Tip settings."""
+    """Manage SimpleAgent sessions leased from a warm pool that reuses our Tip settings."""
 
     def __init__(
         self,
@@ -68,17 +93,37 @@ class YoutuAgentService:
         agent_config_name: str = "agents/examples/file_manager",
         config_dir: Optional[Path] = None,
         tip_auth=None,
+        pool: Optional[YoutuAgentPool] = None,
+        session_ttl: float = YOUTU_AGENT_SESSION_TTL,
     ) -> None:
         # Settings manager is long-lived; we reuse it to detect config changes.
         self._settings_manager = settings_manager
         self._agent_config_name = agent_config_name
         self._default_agent_config_name = agent_config_name
-        self._config_cache: Optional[Any] = None
-        self._config_cache_name: Optional[str] = None
+        self._active_config_name: Optional[str] = None
         self._build_lock = asyncio.Lock()
         self._sessions: dict[str, _SessionState] = {}
         self._config_dir = config_dir or self._detect_config_dir()
+        # 多份已解析配置按 defaults 链指纹缓存，并落盘供冷启动跳过 Hydra。
+        self._config_cache = (
+            AgentConfigCache(self._config_dir, cache_dir=CACHE_DIR / "youtu-agent-configs")
+            if self._config_dir
+            else None
+        )
         self._tip_auth = tip_auth
+        # 预构建的 Agent 池：新会话直接租用，空闲会话到期后归还池中复用。
+        self._pool = pool or YoutuAgentPool(
+            max_size=YOUTU_AGENT_POOL_SIZE,
+            warm_size=YOUTU_AGENT_POOL_WARM,
+            idle_ttl=YOUTU_AGENT_IDLE_TTL,
+        )
+        self._session_ttl = session_ttl
+        # 工具包按 (名称, 配置) 只启动一份，新建 Agent 仅挂接已运行的工具。
+        self._toolkit_host = ToolkitHost()
+        self._pool.add_reap_hook(self._expire_sessions)
+        # 签名按设置版本缓存一次；设置变更时由订阅回调清空
+        self._signature_cache: Optional[tuple[int, str]] = None
+        self._settings_manager.subscribe(self._on_settings_changed)
 
     async def run(self, prompt: str, *, save_history: bool = True, session_id: Optional[str] = None) -> tuple[str, str]:
         """Run the agent once and return (output, session_id)."""
@@ -94,6 +139,7 @@ class YoutuAgentService:
         async with lock:
             recorder: TaskRecorder = await agent.run(prompt, save=save_history, log_to_db=False)
             output = recorder.final_output or ""
+            self._touch(session)
             logger.info("youtu_agent.run.done", session=session, output_len=len(output))
             return output, session
 
@@ -118,6 +164,7 @@ class YoutuAgentService:
                 async for event in recorder.stream_events():
                     yield event
                 yield {"event": "final_output", "output": recorder.final_output or ""}
+                self._touch(session)
                 logger.info(
                     "youtu_agent.stream.done",
                     session=session,
@@ -127,11 +174,12 @@ class YoutuAgentService:
         return session, _gen()
 
     async def close(self) -> None:
-        # Clean up all tracked sessions; useful for app shutdown or reload.
+        # Clean up all tracked sessions and pooled agents; useful for app shutdown or reload.
         async with self._build_lock:
-            await asyncio.gather(*(state.agent.cleanup() for state in self._sessions.values() if state.agent))
+            await asyncio.gather(*(self._pool.discard(state.agent) for state in self._sessions.values()))
             self._sessions.clear()
-            self._config_cache = None
+            await self._pool.close()
+            await self._toolkit_host.close()
             logger.info("youtu_agent.sessions.cleared")
 
     async def reload(self) -> str:
@@ -146,20 +194,30 @@ class YoutuAgentService:
         agent = await self._ensure_agent(self._generate_session_id(force_default=True))
         logger.info(
             "youtu_agent.reload_success",
-            active_config=self._config_cache_name or self._default_agent_config_name,
+            active_config=self._active_config_name or self._default_agent_config_name,
             provider=self.current_provider(),
             agent_built=bool(agent),
         )
         # Return the active config name so UI callers can display it.
-        return self._config_cache_name or self._default_agent_config_name
+        return self._active_config_name or self._default_agent_config_name
 
     async def reset_session(self, session_id: str) -> None:
         # Allow user to drop a single session while keeping the rest intact.
         state = self._sessions.pop(session_id, None)
-        if state and state.agent:
-            await state.agent.cleanup()
+        if state:
+            # Wait for an in-flight run, then hand the agent back to the pool (history is cleared there).
+            async with state.lock:
+                await self._pool.checkin(state.key, state.agent)
         logger.info("youtu_agent.session.reset", session=session_id, existed=bool(state))
 
+    def pool_stats(self) -> dict[str, Any]:
+        stats = self._pool.stats()
+        stats["sessions"] = len(self._sessions)
+        if self._config_cache is not None:
+            stats["config_cache"] = self._config_cache.stats()
+        stats["toolkit_host"] = self._toolkit_host.stats()
+        return stats
+
     async def _ensure_agent(self, session_id: str) -> tuple[SimpleAgent, asyncio.Lock]:
         if SimpleAgent is None or ConfigLoader is None:
             raise RuntimeError(
@@ -168,7 +226,8 @@ class YoutuAgentService:
             )
 
         # Load current settings and guard against feature flag disablement.
-        settings = self._settings_manager.get_settings()
+        snapshot = self._settings_manager.snapshot()
+        settings = snapshot.settings
         profile = settings.get_active_llm_profile()
         features = getattr(settings, "features", None)
         enabled = bool(getattr(features, "youtuAgentEnabled", False)) if features else False
@@ -179,43 +238,34 @@ class YoutuAgentService:
             getattr(features, "youtuAgentConfig", None) or self._default_agent_config_name
         ).strip() or self._default_agent_config_name
         # Signature ties a session to LLM config; rebuild when user switches provider/model.
-        signature = self._signature(profile, settings)
+        signature = self._current_signature(snapshot, profile)
         existing = self._sessions.get(session_id)
         if existing and existing.signature == signature:
             logger.info("youtu_agent.session.reuse", session=session_id, config=config_name)
+            existing.touch()
             return existing.agent, existing.lock
 
         async with self._build_lock:
             existing = self._sessions.get(session_id)
             if existing and existing.signature == signature:
+                existing.touch()
                 return existing.agent, existing.lock
 
-            # Tear down stale agent before building a new one to avoid leaking resources.
-            if existing and existing.agent:
-                await existing.agent.cleanup()
+            # Tear down stale agent before leasing a new one to avoid leaking resources.
+            if existing:
                 self._sessions.pop(session_id, None)
+                await self._pool.discard(existing.agent)
 
-            if not self._config_cache or self._config_cache_name != config_name:
-                # Cache Hydra-loaded configs to avoid re-reading disk on every prompt.
-                logger.info(
-                    "youtu_agent.load_config",
-                    config_name=config_name,
-                    config_dir=str(self._config_dir) if self._config_dir else None,
-                )
-                config = self._load_agent_config(config_name)
-                self._sanitize_toolkits(config)
-                self._config_cache = config
-                self._config_cache_name = config_name
-            else:
-                config = self._config_cache
-            # Build model with current settings so features like device token headers are respected.
-            model, model_settings = build_youtu_model(settings, profile, tip_auth=self._tip_auth)
-            # SimpleAgent build may download tools/config; keep it behind the session lock.
-            agent = SimpleAgent(config=config, model=model, model_settings=model_settings)
-            await agent.build()
+            key: PoolKey = (config_name, signature)
+
+            async def _factory() -> SimpleAgent:
+                return await self._build_agent(config_name, settings, profile)
 
+            agent = await self._pool.checkout(key, _factory)
             lock = asyncio.Lock()
-            self._sessions[session_id] = _SessionState(agent=agent, signature=signature, lock=lock)
+            state = _SessionState(agent=agent, signature=signature, lock=lock, key=key)
+            state.touch()
+            self._sessions[session_id] = state
             logger.info(
                 "youtu_agent.ready",
                 config=config_name,
@@ -224,6 +274,53 @@ class YoutuAgentService:
             )
             return agent, lock
 
+    async def _build_agent(self, config_name: str, settings: Settings, profile: LLMProfile) -> SimpleAgent:
+        # Compiled configs are cached per name and invalidated when their YAML chain changes.
+        config = self._load_agent_config(config_name)
+        self._sanitize_toolkits(config)
+        self._active_config_name = config_name
+        # Build model with current settings so features like device token headers are respected.
+        model, model_settings = build_youtu_model(settings, profile, tip_auth=self._tip_auth)
+        tools = None
+        if self._toolkit_host.supports(config):
+            lease = await self._toolkit_host.attach(config)
+            tools = lease.tools or None
+        # SimpleAgent build may download tools/config; the pool keeps it off the request path when warm.
+        agent = SimpleAgent(config=config, model=model, model_settings=model_settings, tools=tools)
+        await agent.build()
+        return agent
+
+    def _touch(self, session_id: str) -> None:
+        state = self._sessions.get(session_id)
+        if state:
+            state.touch()
+
+    async def _expire_sessions(self, now: float) -> None:
+        # Sessions idle past the TTL give their agent back to the pool instead of holding it forever.
+        expired = [
+            session_id
+            for session_id, state in self._sessions.items()
+            if not state.lock.locked() and now - state.last_used >= self._session_ttl
+        ]
+        for session_id in expired:
+            state = self._sessions.pop(session_id, None)
+            if state:
+                await self._pool.checkin(state.key, state.agent)
+        if expired:
+            logger.info("youtu_agent.sessions.expired", count=len(expired))
+
+    def _on_settings_changed(self, snapshot: SettingsSnapshot) -> None:
+        # May run on a settings-route worker thread; only drop the cached value here.
+        self._signature_cache = None
+
+    def _current_signature(self, snapshot: SettingsSnapshot, profile: LLMProfile) -> str:
+        cached = self._signature_cache
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[1]
+        signature = self._signature(profile, snapshot.settings)
+        self._signature_cache = (snapshot.version, signature)
+        return signature
+
     def _signature(self, profile: LLMProfile, settings: Settings) -> str:
         # Serialize key LLM settings; any change forces rebuild of agent/model caches.
         # This keeps per-session caching deterministic and easy to debug.
@@ -301,35 +398,12 @@ class YoutuAgentService:
 
     def _load_agent_config(self, config_name: Optional[str] = None):
         target_name = config_name or self._agent_config_name
-        if self._config_dir and compose and initialize_config_dir and AgentConfig:
-            config_root = self._config_dir
-            normalized_name = target_name
-            if not normalized_name.startswith("agents/"):
-                normalized_name = f"agents/{normalized_name}"
-            logger.info(
-                "youtu_agent.hydra.compose",
-                config_root=str(config_root),
-                config_name=normalized_name,
+        if self._config_cache is not None and compose and initialize_config_dir and AgentConfig:
+            return self._config_cache.get(
+                target_name,
+                self._compose_agent_config,
+                lambda data: AgentConfig(**data),
             )
-            try:
-                # initialize_config_dir must wrap compose; errors propagate for visibility.
-                with initialize_config_dir(
-                    config_dir=str(config_root),
-                    version_base=ConfigLoader.version_base,
-                ):  # type: ignore[arg-type]
-                    cfg = compose(config_name=normalized_name)
-                    OmegaConf.resolve(cfg)
-                data = OmegaConf.to_container(cfg, resolve=True)
-                return AgentConfig(**data)
-            except Exception as exc:
-                logger.warning(
-                    "youtu_agent.hydra.compose_failed",
-                    error=str(exc),
-                    config_root=str(config_root),
-                    config_name=normalized_name,
-                    exc_info=True,
-                )
-                raise
         if ConfigLoader is None:
             raise RuntimeError("缺少 Youtu-Agent 配置，无法加载默认 Agent。")
         try:
@@ -339,6 +413,34 @@ class YoutuAgentService:
             logger.warning("youtu_agent.config_loader_failed", error=str(exc), config_name=target_name, exc_info=True)
             raise
 
+    def _compose_agent_config(self, config_name: str) -> dict[str, Any]:
+        """Run Hydra compose + resolve; only reached on a config cache miss."""
+        config_root = self._config_dir
+        normalized_name = normalize_config_name(config_name)
+        logger.info(
+            "youtu_agent.hydra.compose",
+            config_root=str(config_root),
+            config_name=normalized_name,
+        )
+        try:
+            # initialize_config_dir must wrap compose; errors propagate for visibility.
+            with initialize_config_dir(
+                config_dir=str(config_root),
+                version_base=ConfigLoader.version_base,
+            ):  # type: ignore[arg-type]
+                cfg = compose(config_name=normalized_name)
+                OmegaConf.resolve(cfg)
+            return OmegaConf.to_container(cfg, resolve=True)
+        except Exception as exc:
+            logger.warning(
+                "youtu_agent.hydra.compose_failed",
+                error=str(exc),
+                config_root=str(config_root),
+                config_name=normalized_name,
+                exc_info=True,
+            )
+            raise
+
     def _sanitize_toolkits(self, config: Any) -> None:
         """Normalize toolkit workspaces to writable directories."""
         try:
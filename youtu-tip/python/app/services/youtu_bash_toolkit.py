@@ -0,0 +1,94 @@
+# File: python/app/services/youtu_bash_toolkit.py
+# Project: Tip Desktop Assistant
+# Description: Bash toolkit for Youtu-Agent backed by the persistent shell pool instead of a single pexpect shell.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+import structlog
+
+from .shell_pool import ShellPool, ShellTimeout
+from .youtu_toolkit_host import CURRENT_WORKSPACE
+
+logger = structlog.get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    from utu.tools.base import AsyncBaseToolkit, register_tool
+except ImportError:  # pragma: no cover - handled at runtime
+    AsyncBaseToolkit = None  # type: ignore
+    register_tool = None  # type: ignore
+
+# 与内置 BashToolkit 保持一致的禁用命令
+BANNED_COMMAND_STRS = ("git init", "git commit", "git add")
+
+
+if AsyncBaseToolkit is not None:
+
+    class PooledBashToolkit(AsyncBaseToolkit):
+        """
+        Drop-in replacement for the builtin ``bash`` toolkit.
+
+        Commands run in pooled long-lived shells keyed by the caller's workspace
+        (``CURRENT_WORKSPACE``), so one hosted instance serves every session
+        concurrently. Each command runs in a subshell with stdin closed, so
+        shell state set by one call (exports, aliases, ``cd``) does not carry
+        over to the next. ``timeout`` from ``tools/bash.yaml`` is enforced per
+        call by interrupting the command, not by respawning the shell.
+        """
+
+        workspace_aware = True
+
+        def __init__(self, config: Any = None) -> None:
+            super().__init__(config)
+            options: Dict[str, Any] = self.config.config or {}
+            self.timeout = float(options.get("timeout", 60))
+            self.pool = ShellPool(
+                max_idle=int(options.get("pool_size", 2)),
+                idle_ttl=float(options.get("idle_ttl", 600)),
+            )
+            self.workspace_root = ""
+            self.setup_workspace(options.get("workspace_root", "/tmp/"))
+
+        def setup_workspace(self, workspace_root: str) -> None:
+            Path(workspace_root).mkdir(parents=True, exist_ok=True)
+            self.workspace_root = str(workspace_root)
+
+        def cleanup(self) -> None:
+            self.pool.close()
+
+        @register_tool
+        async def run_bash(self, command: str) -> str:
+            """Execute a bash command in your workspace and return its output.
+
+            Args:
+                command: The command to execute
+            """
+            for banned_str in BANNED_COMMAND_STRS:
+                if banned_str in command:
+                    return f"Command not executed due to banned string in command: {banned_str} found in {command}."
+            workspace = CURRENT_WORKSPACE.get() or self.workspace_root
+            try:
+                result = await asyncio.to_thread(self.pool.run, workspace, command, timeout=self.timeout)
+            except ShellTimeout as exc:
+                return str({"error": str(exc)})
+            except Exception as exc:  # noqa: BLE001 - surface to the model like the builtin toolkit
+                logger.warning("youtu_bash.run_failed", error=str(exc), exc_info=True)
+                return str({"error": str(exc)})
+            payload: Dict[str, Any] = {"command output": result.output}
+            if result.exit_code:
+                payload["exit code"] = result.exit_code
+            return str(payload)
+
+else:  # pragma: no cover - youtu-agent not installed
+    PooledBashToolkit = None  # type: ignore
+
+
+__all__ = ["PooledBashToolkit"]
@@ -0,0 +1,289 @@
+# File: python/app/services/youtu_config_cache.py
+# Project: Tip Desktop Assistant
+# Description: Multi-entry cache of composed Youtu-Agent configs keyed by the fingerprint of their Hydra defaults chain.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency (ships with hydra/omegaconf)
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None  # type: ignore
+
+CACHE_VERSION = 1
+_ENV_RE = re.compile(r"\$\{oc\.env:([A-Za-z_][A-Za-z0-9_]*)")
+
+
+def normalize_config_name(name: str) -> str:
+    """Hydra agent configs live under ``agents/``; accept both ``simple/base`` and ``agents/simple/base``."""
+    name = (name or "").strip().strip("/")
+    if name.endswith(".yaml"):
+        name = name[: -len(".yaml")]
+    return name if name.startswith("agents/") else f"agents/{name}"
+
+
+def _package_version() -> str:
+    # AgentConfig 的字段随 youtu-agent 版本变化，版本号参与指纹
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # pragma: no cover
+        return ""
+    for dist in ("youtu-agent", "utu"):
+        try:
+            return version(dist)
+        except PackageNotFoundError:
+            continue
+    return ""
+
+
+def _default_targets(entry: Any) -> List[str]:
+    """Config paths referenced by one ``defaults`` entry (``_self_`` and nulls yield nothing)."""
+    if isinstance(entry, str):
+        items = [entry]
+    elif isinstance(entry, dict):
+        items = []
+        for group, option in entry.items():
+            options = option if isinstance(option, list) else [option]
+            for value in options:
+                if value is None or str(value) == "null":
+                    continue
+                items.append(f"{group}/{value}")
+    else:
+        return []
+    targets = []
+    for item in items:
+        item = str(item).strip()
+        for prefix in ("override ", "optional "):
+            if item.startswith(prefix):
+                item = item[len(prefix):].strip()
+        # "/tools/bash@toolkits.BashTool" -> "/tools/bash"
+        item = item.split("@", 1)[0].strip()
+        if item and item != "_self_":
+            targets.append(item)
+    return targets
+
+
+def defaults_chain(config_root: Path, name: str) -> List[Path]:
+    """
+    Files Hydra reads to compose ``name``: the primary config and, recursively, its ``defaults``.
+
+    Relative entries are looked up next to the including file first, then from
+    the config root. Missing files are kept in the list so that creating them
+    later changes the fingerprint.
+    """
+    chain: List[Path] = []
+    seen = set()
+    pending = [config_root / f"{normalize_config_name(name)}.yaml"]
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        chain.append(path)
+        if yaml is None or not path.is_file():
+            continue
+        try:
+            data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        except (OSError, yaml.YAMLError):
+            continue
+        defaults = data.get("defaults") if isinstance(data, dict) else None
+        for entry in defaults or []:
+            for target in _default_targets(entry):
+                if target.startswith("/"):
+                    pending.append(config_root / f"{target.lstrip('/')}.yaml")
+                    continue
+                local = path.parent / f"{target}.yaml"
+                pending.append(local if local.exists() else config_root / f"{target}.yaml")
+    return chain
+
+
+def chain_fingerprint(config_root: Path, name: str) -> str:
+    """Hash of every file in the defaults chain plus the env vars they interpolate."""
+    digest = hashlib.sha256()
+    digest.update(f"v{CACHE_VERSION}|{_package_version()}".encode())
+    if yaml is None:
+        # 无法解析 defaults 时退化为整个配置目录
+        files = sorted(config_root.rglob("*.yaml"))
+    else:
+        files = defaults_chain(config_root, name)
+    for path in files:
+        digest.update(str(path.relative_to(config_root) if path.is_relative_to(config_root) else path).encode())
+        try:
+            content = path.read_bytes()
+        except OSError:
+            digest.update(b"<missing>")
+            continue
+        digest.update(hashlib.sha256(content).digest())
+        # ${oc.env:X} 在解析时写死到配置里，环境变量变化也要失效
+        for var in sorted(set(_ENV_RE.findall(content.decode("utf-8", "replace")))):
+            digest.update(f"{var}={os.environ.get(var, '')}".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class _CacheEntry:
+    fingerprint: str
+    config: Any
+
+
+class AgentConfigCache:
+    """
+    Compiled ``AgentConfig`` objects keyed by config name and defaults-chain fingerprint.
+
+    Lookups re-hash the (small) YAML files in the chain; Hydra ``compose`` only
+    runs when the fingerprint is new. Resolved configs are also written to
+    ``cache_dir`` as JSON so a cold start skips Hydra when nothing changed.
+    """
+
+    def __init__(
+        self,
+        config_root: Path,
+        *,
+        cache_dir: Optional[Path] = None,
+        max_entries: int = 16,
+    ) -> None:
+        self.config_root = Path(config_root)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+    def get(
+        self,
+        name: str,
+        compose: Callable[[str], Dict[str, Any]],
+        build: Callable[[Dict[str, Any]], Any],
+    ) -> Any:
+        """
+        Return the compiled config for ``name``.
+
+        ``compose(name)`` produces the resolved config dict (the Hydra path) and
+        ``build(data)`` turns it into an ``AgentConfig``.
+        """
+        key = normalize_config_name(name)
+        fingerprint = chain_fingerprint(self.config_root, key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.fingerprint == fingerprint:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry.config
+
+        data = self._read_disk(key, fingerprint)
+        if data is not None:
+            try:
+                config = build(data)
+            except Exception as exc:  # noqa: BLE001 - stale schema, recompose
+                logger.warning("youtu_config_cache.disk_invalid", config_name=key, error=str(exc))
+                data = None
+            else:
+                self._disk_hits += 1
+                logger.info("youtu_config_cache.disk_hit", config_name=key)
+        if data is None:
+            self._misses += 1
+            data = compose(key)
+            config = build(data)
+            self._write_disk(key, fingerprint, data)
+        self._store(key, fingerprint, config)
+        return config
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_config_name(name), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+            }
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    def _store(self, key: str, fingerprint: str, config: Any) -> None:
+        with self._lock:
+            self._entries[key] = _CacheEntry(fingerprint=fingerprint, config=config)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{key.replace('/', '__')}.json"
+
+    def _read_disk(self, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if payload.get("fingerprint") != fingerprint or not isinstance(payload.get("config"), dict):
+            return None
+        return payload["config"]
+
+    def _write_disk(self, key: str, fingerprint: str, data: Dict[str, Any]) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        tmp_path: Optional[str] = None
+        try:
+            payload = json.dumps({"name": key, "fingerprint": fingerprint, "config": data}, ensure_ascii=False)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # 同一配置可能被并发构建并落盘：每次写独立的临时文件再原子替换
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=str(path.parent),
+                prefix=f".{path.name}.",
+                suffix=".tmp",
+                delete=False,
+            ) as handle:
+                tmp_path = handle.name
+                handle.write(payload)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning("youtu_config_cache.persist_failed", config_name=key, error=str(exc))
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+
+
+__all__ = [
+    "AgentConfigCache",
+    "chain_fingerprint",
+    "defaults_chain",
+    "normalize_config_name",
+]
@@ -0,0 +1,206 @@
+# File: python/app/services/youtu_document_toolkit.py
+# Project: Tip Desktop Assistant
+# Description: Document toolkit for Youtu-Agent that reads parsed documents through the shared document cache.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Dict, List
+
+import structlog
+
+from .document_cache import ParsedDocument, get_document_cache
+from .document_index import (
+    DEFAULT_CHUNK_CHARS,
+    DEFAULT_CHUNK_OVERLAP,
+    BM25Index,
+    DocumentChunk,
+    DocumentIndexCache,
+)
+from .youtu_toolkit_host import CURRENT_WORKSPACE
+
+logger = structlog.get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    from utu.tools.base import TOOL_PROMPTS, AsyncBaseToolkit, register_tool
+    from utu.utils import SimplifiedAsyncOpenAI
+except ImportError:  # pragma: no cover - handled at runtime
+    AsyncBaseToolkit = None  # type: ignore
+    register_tool = None  # type: ignore
+    TOOL_PROMPTS = {}  # type: ignore
+    SimplifiedAsyncOpenAI = None  # type: ignore
+
+
+if AsyncBaseToolkit is not None:
+
+    class CachedDocumentToolkit(AsyncBaseToolkit):
+        """
+        Replacement for the builtin ``document`` toolkit.
+
+        Parsing goes through ``DocumentCache`` so follow-up questions (and files
+        pre-parsed via "Open with Tip") skip the parser entirely. Supports the
+        ``unstructured`` and ``pymupdf`` parsers from ``tools/document.yaml``.
+
+        Long documents are not pasted into the prompt whole: ``search_document``
+        returns the best-matching chunks with their offsets, ``read_document_range``
+        pages through the text sequentially, and ``document_qa`` answers questions
+        from retrieved chunks once the text exceeds ``qa_context_chars``.
+        """
+
+        workspace_aware = True
+
+        def __init__(self, config: Any = None) -> None:
+            super().__init__(config)
+            options: Dict[str, Any] = self.config.config or {}
+            self.parser = options.get("parser") or "unstructured"
+            self.text_limit = int(options.get("text_limit", 100_000))
+            self.chunk_chars = int(options.get("chunk_chars", DEFAULT_CHUNK_CHARS))
+            self.chunk_overlap = int(options.get("chunk_overlap", DEFAULT_CHUNK_OVERLAP))
+            self.top_k = int(options.get("top_k", 5))
+            self.qa_context_chars = int(options.get("qa_context_chars", 8000))
+            self.read_limit = int(options.get("read_limit", 8000))
+            self.indexes = DocumentIndexCache()
+            self.workspace_root = str(options.get("workspace_root") or os.path.expanduser("~"))
+            self.cache = get_document_cache()
+            self.llm = SimplifiedAsyncOpenAI(**self.config.config_llm.model_provider.model_dump())
+
+        def setup_workspace(self, workspace_root: str) -> None:
+            self.workspace_root = str(workspace_root)
+
+        def resolve_path(self, document_path: str) -> str:
+            # 相对路径按调用会话的工作区解析，与 bash 工具保持一致
+            path = os.path.expanduser(document_path)
+            if not os.path.isabs(path):
+                path = os.path.join(CURRENT_WORKSPACE.get() or self.workspace_root, path)
+            return path
+
+        async def load_document(self, document_path: str) -> ParsedDocument:
+            document = await asyncio.to_thread(self.cache.get, self.resolve_path(document_path), self.parser)
+            logger.info(
+                "youtu_document.loaded",
+                path=document.path,
+                parser=document.parser,
+                cached=document.cached,
+                chars=len(document.text),
+            )
+            return document
+
+        async def load_index(self, document: ParsedDocument) -> BM25Index:
+            return await asyncio.to_thread(
+                self.indexes.get, document, chunk_chars=self.chunk_chars, overlap=self.chunk_overlap
+            )
+
+        async def retrieve_context(self, document: ParsedDocument, question: str) -> str:
+            """Top chunks for ``question`` in document order, capped at ``qa_context_chars``."""
+            index = await self.load_index(document)
+            hits = index.search(question, top_k=max(self.top_k, 1) * 2)
+            selected: List[DocumentChunk] = []
+            budget = self.qa_context_chars
+            for chunk, _score in hits:
+                if len(chunk.text) > budget:
+                    continue
+                selected.append(chunk)
+                budget -= len(chunk.text)
+            if not selected:
+                return document.text[: self.qa_context_chars] + "\n..."
+            selected.sort(key=lambda chunk: chunk.start)
+            return "\n\n".join(f"[chars {chunk.start}-{chunk.end}]\n{chunk.text}" for chunk in selected)
+
+        @register_tool
+        async def document_qa(self, document_path: str, question: str | None = None) -> str:
+            """Get file content summary or answer questions about attached document.
+
+            Supported file types: pdf, docx, pptx, xlsx, xls, ppt, doc, txt, md
+
+            Args:
+                document_path (str): Local path to a document.
+                question (str, optional): The question to answer. If not provided, return a summary of the document.
+            """
+            try:
+                document = await self.load_document(document_path)
+            except (OSError, RuntimeError, ValueError) as exc:
+                return f"Failed to read document {document_path}: {exc}"
+            document_markdown = document.text
+            if question and len(document_markdown) > self.qa_context_chars:
+                # 长文档只带入与问题相关的片段，缩短端侧模型的 prefill
+                document_markdown = await self.retrieve_context(document, question)
+            elif len(document_markdown) > self.text_limit:
+                document_markdown = document_markdown[: self.text_limit] + "\n..."
+            messages = [
+                {"role": "system", "content": TOOL_PROMPTS["document_sp"]},
+                {"role": "user", "content": document_markdown},
+            ]
+            if question:
+                messages.append({"role": "user", "content": TOOL_PROMPTS["document_qa"].format(question=question)})
+            else:
+                messages.append({"role": "user", "content": TOOL_PROMPTS["document_summary"]})
+            output = await self.llm.query_one(messages=messages, **self.config.config_llm.model_params.model_dump())
+            if not question:
+                output = (
+                    "You did not provide a particular question, so here is a detailed caption for the document: "
+                    f"{output}"
+                )
+            return output
+
+        @register_tool
+        async def search_document(self, document_path: str, query: str, top_k: int = 5) -> str:
+            """Search inside a (long) document and return the most relevant passages with their character offsets.
+
+            Use this instead of reading a whole large document. Follow up with `read_document_range` to read around a hit.
+
+            Args:
+                document_path (str): Local path to a document.
+                query (str): Keywords or a question describing what to find.
+                top_k (int, optional): Number of passages to return. Defaults to 5.
+            """
+            try:
+                document = await self.load_document(document_path)
+            except (OSError, RuntimeError, ValueError) as exc:
+                return f"Failed to read document {document_path}: {exc}"
+            index = await self.load_index(document)
+            hits = index.search(query, top_k=max(1, min(int(top_k), 20)))
+            payload = {
+                "document": document_path,
+                "total_chars": len(document.text),
+                "chunks": len(index.chunks),
+                "results": [chunk.to_dict(score) for chunk, score in hits],
+            }
+            if not hits:
+                payload["note"] = "No passage matched the query; try other keywords or read_document_range."
+            return str(payload)
+
+        @register_tool
+        async def read_document_range(self, document_path: str, offset: int = 0, length: int = 4000) -> str:
+            """Read a slice of a document's extracted text, starting at a character offset.
+
+            Call repeatedly with the returned `next_offset` to read a long document sequentially.
+
+            Args:
+                document_path (str): Local path to a document.
+                offset (int, optional): Character offset to start from. Defaults to 0.
+                length (int, optional): Number of characters to read. Defaults to 4000.
+            """
+            try:
+                document = await self.load_document(document_path)
+            except (OSError, RuntimeError, ValueError) as exc:
+                return f"Failed to read document {document_path}: {exc}"
+            total = len(document.text)
+            start = max(0, min(int(offset), total))
+            end = min(total, start + max(1, min(int(length), self.read_limit)))
+            payload: Dict[str, Any] = {"document": document_path, "start": start, "end": end, "total_chars": total}
+            if end < total:
+                payload["next_offset"] = end
+            payload["text"] = document.text[start:end]
+            return str(payload)
+
+else:  # pragma: no cover - youtu-agent not installed
+    CachedDocumentToolkit = None  # type: ignore
+
+
+__all__ = ["CachedDocumentToolkit"]
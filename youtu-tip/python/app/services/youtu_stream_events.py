@@ -0,0 +1,170 @@
+# File: python/app/services/youtu_stream_events.py
+# Project: Tip Desktop Assistant
+# Description: Per-event-type serializers that turn Youtu-Agent stream events into compact websocket payloads.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+"""
+Stream event serialization.
+
+A run emits one ``RawResponsesStreamEvent`` per token, so serialization is on
+the hot path. Each known event class gets a dedicated serializer that reads
+only the fields the renderer consumes (``youtuAgentClient.ts``): the text
+delta for ``*.delta`` events and the function-call identity for
+``response.output_item.*``. Other raw events are reduced to their ``type``.
+Unknown events still go through the generic ``json_safe`` walk.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, is_dataclass
+import json
+from typing import Any, Callable, Dict
+
+RAW_RESPONSE_EVENT = "RawResponsesStreamEvent"
+
+# 渲染端按 data.type 分发，只需要 delta 文本
+_DELTA_TYPES = frozenset(
+    {
+        "response.output_text.delta",
+        "response.reasoning_text.delta",
+        "response.reasoning_summary_text.delta",
+        "response.function_call_arguments.delta",
+    }
+)
+_ITEM_TYPES = frozenset({"response.output_item.added", "response.output_item.done"})
+_ITEM_FIELDS = ("type", "name", "arguments")
+
+
+def _field(value: Any, name: str) -> Any:
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def serialize_raw_response(data: Any) -> Dict[str, Any]:
+    """Compact payload for one raw model stream event (the per-token hot path)."""
+    event_type = _field(data, "type")
+    if event_type in _DELTA_TYPES:
+        delta = _field(data, "delta")
+        return {"type": event_type, "delta": delta if isinstance(delta, str) else json_safe(delta)}
+    if event_type in _ITEM_TYPES:
+        item = _field(data, "item")
+        payload: Dict[str, Any] = {"type": event_type}
+        if item is not None:
+            payload["item"] = {
+                key: value for key in _ITEM_FIELDS if (value := json_safe(_field(item, key))) is not None
+            }
+        return payload
+    return {"type": event_type}
+
+
+def simplify_run_item(item: Any) -> Dict[str, Any]:
+    # Flatten frequently used fields so the frontend does not need the full model.
+    payload: Dict[str, Any] = {
+        "type": getattr(item, "type", item.__class__.__name__),
+    }
+    # Optional agent meta when present (e.g., nested agent orchestration).
+    agent = getattr(item, "agent", None)
+    agent_name = getattr(agent, "name", None)
+    if agent_name:
+        payload["agent"] = agent_name
+    output = getattr(item, "output", None)
+    if output:
+        payload["output"] = output
+    raw_item = getattr(item, "raw_item", None)
+    if raw_item:
+        payload["raw_item"] = simplify_raw_tool_item(raw_item)
+    return payload
+
+
+def simplify_raw_tool_item(raw_item: Any) -> Dict[str, Any]:
+    # Convert raw tool outputs into a minimal JSON-friendly shape.
+    payload: Dict[str, Any] = {}
+    for key in ("name", "arguments", "output", "type"):
+        value = _field(raw_item, key)
+        if value:
+            payload[key] = value
+    return payload
+
+
+def simplify_agent(agent: Any) -> Dict[str, Any]:
+    # AgentUpdated events only need identity information.
+    return {
+        "name": getattr(agent, "name", None),
+        "id": getattr(agent, "id", None),
+    }
+
+
+_EVENT_SERIALIZERS: Dict[str, Callable[[Any], Any]] = {
+    RAW_RESPONSE_EVENT: lambda event: serialize_raw_response(event.data),
+    "RunItemStreamEvent": lambda event: {"item": json_safe(simplify_run_item(event.item))},
+    "AgentUpdatedStreamEvent": lambda event: {"new_agent": json_safe(simplify_agent(event.new_agent))},
+}
+
+
+def serialize_stream_event(event: Any) -> Dict[str, Any]:
+    """Convert a Youtu-Agent stream event into the ``{type, data}`` chunk sent to the renderer."""
+    # 按类名分发：agents 包缺失时同样适用，未知事件回退到通用转换
+    name = event.__class__.__name__
+    serializer = _EVENT_SERIALIZERS.get(name)
+    data = serializer(event) if serializer is not None else json_safe(event)
+    return {"type": name, "data": data}
+
+
+def is_raw_response_event(event: Any) -> bool:
+    """Check whether the stream event contains the raw LLM response."""
+    return event.__class__.__name__ == RAW_RESPONSE_EVENT
+
+
+def raw_response_summary(event: Any) -> Dict[str, Any]:
+    """Loggable digest of a raw event: its type and delta size instead of the full payload."""
+    data = getattr(event, "data", event)
+    summary: Dict[str, Any] = {"type": _field(data, "type")}
+    delta = _field(data, "delta")
+    if isinstance(delta, str):
+        summary["delta_len"] = len(delta)
+    sequence = _field(data, "sequence_number")
+    if sequence is not None:
+        summary["seq"] = sequence
+    return summary
+
+
+def json_safe(value: Any) -> Any:
+    """Best-effort conversion to JSON-serializable structures."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, dict):
+        return {str(key): json_safe(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple, set)):
+        return [json_safe(item) for item in value]
+    if hasattr(value, "model_dump"):
+        try:
+            return json_safe(value.model_dump())
+        except TypeError:
+            try:
+                return json_safe(json.loads(value.model_dump_json()))
+            except Exception:
+                return repr(value)
+    if is_dataclass(value):
+        try:
+            return json_safe(asdict(value))
+        except Exception:
+            return repr(value)
+    if hasattr(value, "__dict__"):
+        # Drop private attributes to avoid leaking internals (e.g., clients, locks).
+        return json_safe({k: v for k, v in value.__dict__.items() if not k.startswith("_")})
+    # Fallback to repr for objects with no obvious serialisation hooks.
+    return repr(value)
+
+
+__all__ = [
+    "is_raw_response_event",
+    "json_safe",
+    "raw_response_summary",
+    "serialize_raw_response",
+    "serialize_stream_event",
+]
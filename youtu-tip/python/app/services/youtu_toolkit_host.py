@@ -0,0 +1,213 @@
+# File: python/app/services/youtu_toolkit_host.py
+# Project: Tip Desktop Assistant
+# Description: Hosts one Youtu-Agent toolkit instance per (name, config) and hands per-session tool views to agents.
+
+# Copyright (C) 2025 Tencent. All rights reserved.
+# License: Licensed under the License Terms of Youtu-Tip (see license at repository root).
+# Warranty: Provided on an "AS IS" basis, without warranties or conditions of any kind.
+# Modifications must retain this notice.
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import inspect
+import json
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+try:  # pragma: no cover - optional dependency
+    from utu.tools import TOOLKIT_MAP
+    from utu.utils import load_class_from_file
+except ImportError:  # pragma: no cover - handled at runtime
+    TOOLKIT_MAP = {}  # type: ignore
+    load_class_from_file = None  # type: ignore
+
+# 当前工具调用所属会话的工作目录；感知工作区的工具包据此隔离会话。
+CURRENT_WORKSPACE: ContextVar[Optional[str]] = ContextVar("tip_toolkit_workspace", default=None)
+
+# Tip-side replacements for builtin toolkits, registered by name.
+_TOOLKIT_OVERRIDES: Dict[str, Type[Any]] = {}
+
+
+def register_toolkit(name: str, toolkit_cls: Type[Any]) -> None:
+    """Use ``toolkit_cls`` instead of the builtin ``TOOLKIT_MAP[name]`` for hosted toolkits."""
+    _TOOLKIT_OVERRIDES[name] = toolkit_cls
+
+
+def _config_fingerprint(toolkit_config: Any) -> str:
+    dump = toolkit_config.model_dump() if hasattr(toolkit_config, "model_dump") else dict(toolkit_config)
+    payload = json.dumps(dump, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+async def _shutdown_toolkit(toolkit: Any) -> None:
+    for name in ("cleanup", "close"):
+        method = getattr(toolkit, name, None)
+        if callable(method):
+            try:
+                result = method()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:  # pragma: no cover - best effort teardown
+                logger.warning("youtu_toolkit_host.shutdown_failed", toolkit=type(toolkit).__name__, error=str(exc))
+            return
+    # 内置 BashToolkit 没有清理方法，直接结束其 pexpect 子进程
+    child = getattr(toolkit, "child", None)
+    if child is not None and hasattr(child, "close"):
+        try:
+            child.close(force=True)
+        except Exception:  # pragma: no cover
+            pass
+
+
+@dataclass
+class _HostedToolkit:
+    name: str
+    toolkit: Any
+    tools: List[Any]
+    # Toolkits with per-process state (e.g. a shell's cwd) but no workspace awareness
+    # are serialized and re-pointed at the caller's workspace on every switch.
+    exclusive: bool
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    workspace: Optional[str] = None
+    attaches: int = 0
+
+
+@dataclass
+class ToolkitLease:
+    """Per-agent view of hosted toolkits: shared tool functions bound to this lease's workspace."""
+
+    tools: List[Any]
+    workspace: Optional[str]
+    keys: List[Tuple[str, str]]
+
+
+class ToolkitHost:
+    """
+    Keep one toolkit instance per (toolkit name, config fingerprint).
+
+    ``attach(config)`` returns a ``ToolkitLease`` whose tools wrap the hosted
+    instances, so building a new SimpleAgent only attaches to tools that are
+    already running. Each invocation publishes the lease's workspace through
+    ``CURRENT_WORKSPACE``; toolkits that keep process state without reading it
+    (``setup_workspace`` but no ``workspace_aware``) are serialized and moved to
+    the caller's workspace when the caller changes.
+    """
+
+    def __init__(self) -> None:
+        self._hosted: Dict[Tuple[str, str], _HostedToolkit] = {}
+        self._lock = asyncio.Lock()
+        self._attaches = 0
+        self._starts = 0
+
+    def supports(self, config: Any) -> bool:
+        """MCP servers are owned by the agent; configs using them build their own tools."""
+        toolkits = getattr(config, "toolkits", None) or {}
+        return all(getattr(tk, "mode", "builtin") in ("builtin", "customized") for tk in toolkits.values())
+
+    async def attach(self, config: Any, *, workspace: Optional[str] = None) -> ToolkitLease:
+        tools: List[Tuple[_HostedToolkit, Any]] = []
+        keys: List[Tuple[str, str]] = []
+        lease_workspace = workspace
+        for toolkit_config in (getattr(config, "toolkits", None) or {}).values():
+            hosted = await self._get_or_start(toolkit_config)
+            hosted.attaches += 1
+            keys.append((hosted.name, _config_fingerprint(toolkit_config)))
+            if lease_workspace is None:
+                lease_workspace = (toolkit_config.config or {}).get("workspace_root")
+            tools.extend((hosted, tool) for tool in hosted.tools)
+        self._attaches += 1
+        lease = ToolkitLease(tools=[], workspace=lease_workspace, keys=keys)
+        lease.tools = [self._bind(hosted, tool, lease) for hosted, tool in tools]
+        return lease
+
+    async def close(self) -> None:
+        async with self._lock:
+            hosted = list(self._hosted.values())
+            self._hosted.clear()
+        await asyncio.gather(*(_shutdown_toolkit(item.toolkit) for item in hosted))
+        if hosted:
+            logger.info("youtu_toolkit_host.closed", toolkits=len(hosted))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "toolkits": [
+                {"name": item.name, "attaches": item.attaches, "exclusive": item.exclusive}
+                for item in self._hosted.values()
+            ],
+            "starts": self._starts,
+            "attaches": self._attaches,
+        }
+
+    # ----------------------------
+    # Internals
+    # ----------------------------
+    async def _get_or_start(self, toolkit_config: Any) -> _HostedToolkit:
+        key = (toolkit_config.name, _config_fingerprint(toolkit_config))
+        hosted = self._hosted.get(key)
+        if hosted is not None:
+            return hosted
+        async with self._lock:
+            hosted = self._hosted.get(key)
+            if hosted is not None:
+                return hosted
+            toolkit_cls = self._resolve_class(toolkit_config)
+            # 构造可能启动子进程（如 bash），放到线程中避免阻塞事件循环
+            toolkit = await asyncio.to_thread(toolkit_cls, toolkit_config)
+            exclusive = hasattr(toolkit, "setup_workspace") and not getattr(toolkit, "workspace_aware", False)
+            hosted = _HostedToolkit(
+                name=toolkit_config.name,
+                toolkit=toolkit,
+                tools=list(toolkit.get_tools_in_agents()),
+                exclusive=exclusive,
+                workspace=getattr(toolkit, "workspace_root", None),
+            )
+            self._hosted[key] = hosted
+            self._starts += 1
+            logger.info(
+                "youtu_toolkit_host.started",
+                toolkit=toolkit_config.name,
+                cls=toolkit_cls.__name__,
+                exclusive=exclusive,
+            )
+            return hosted
+
+    @staticmethod
+    def _resolve_class(toolkit_config: Any) -> Type[Any]:
+        if toolkit_config.mode == "customized":
+            if load_class_from_file is None:
+                raise RuntimeError("Youtu-Agent 依赖未安装，无法加载自定义工具包。")
+            return load_class_from_file(toolkit_config.customized_filepath, toolkit_config.customized_classname)
+        toolkit_cls = _TOOLKIT_OVERRIDES.get(toolkit_config.name) or TOOLKIT_MAP.get(toolkit_config.name)
+        if toolkit_cls is None:
+            raise RuntimeError(f"Unknown toolkit: {toolkit_config.name}")
+        return toolkit_cls
+
+    @staticmethod
+    def _bind(hosted: _HostedToolkit, tool: Any, lease: ToolkitLease) -> Any:
+        inner = tool.on_invoke_tool
+
+        async def _invoke(ctx: Any, arguments: str) -> Any:
+            token = CURRENT_WORKSPACE.set(lease.workspace)
+            try:
+                if not hosted.exclusive:
+                    return await inner(ctx, arguments)
+                async with hosted.lock:
+                    if lease.workspace and hosted.workspace != lease.workspace:
+                        await asyncio.to_thread(hosted.toolkit.setup_workspace, lease.workspace)
+                        hosted.workspace = lease.workspace
+                    return await inner(ctx, arguments)
+            finally:
+                CURRENT_WORKSPACE.reset(token)
+
+        return dataclasses.replace(tool, on_invoke_tool=_invoke)
+
+
+__all__ = ["CURRENT_WORKSPACE", "ToolkitHost", "ToolkitLease", "register_toolkit"]
@@ -0,0 +1,69 @@
+import pickle
+
+import pytest
+
+from app.gui_agent.actions import Action, parse_action_code
+
+ROUND_TRIP_ACTIONS = [
+    Action.click(10, 20),
+    Action.click(10, 20, button="right"),
+    Action.click(10, 20, clicks=2),
+    Action.click(5, 6, button="middle"),
+    Action.click(),
+    Action.move(300, 400),
+    Action.drag(30, 40, 1.5),
+    Action.scroll(-5),
+    Action.type_text('say "hi" \\ 你好'),
+    Action.hotkey(["command", "shift", "4"]),
+    Action.press("enter"),
+    Action.wait(),
+    Action.done(),
+    Action.fail(),
+]
+
+
+@pytest.mark.parametrize("action", ROUND_TRIP_ACTIONS, ids=lambda action: action.kind)
+def test_code_string_round_trips(action):
+    parsed = parse_action_code(str(action))
+    assert parsed is not None
+    assert parsed.kind == action.kind
+    assert dict(parsed.params) == dict(action.params)
+    assert str(parsed) == str(action)
+
+
+@pytest.mark.parametrize("action", ROUND_TRIP_ACTIONS, ids=lambda action: action.kind)
+def test_pickle_keeps_kind_and_params(action):
+    restored = pickle.loads(pickle.dumps(action))
+    assert restored.kind == action.kind
+    assert restored.params == action.params
+    assert restored == action
+
+
+def test_single_key_hotkey_becomes_press():
+    assert Action.hotkey(["enter"]).kind == "press"
+
+
+def test_existing_action_is_returned_as_is():
+    action = Action.scroll(3)
+    assert parse_action_code(action) is action
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "",
+        "os.system('rm -rf /')",
+        "pyautogui.click(__import__('os'))",
+        "pyautogui.locateOnScreen('x.png')",
+        "pyautogui.scroll()",
+        "pyautogui.click(1, 2); pyautogui.click(3, 4)",
+    ],
+)
+def test_unrecognised_code_returns_none(code):
+    assert parse_action_code(code) is None
+
+
+def test_control_and_terminal_flags():
+    assert Action.wait().is_control and not Action.wait().is_terminal
+    assert Action.done().is_terminal and Action.fail().is_terminal
+    assert not Action.click(1, 1).is_control
@@ -0,0 +1,49 @@
+import threading
+
+from app.gui_agent.artifact_writer import ArtifactWriter
+
+
+def test_screenshot_callback_receives_path_and_preview(tmp_path):
+    calls = []
+    with ArtifactWriter(str(tmp_path), thumbnail_max_side=None) as writer:
+        writer.write_screenshot("step_1.png", b"png-bytes", on_written=lambda *args: calls.append(args))
+        writer.drain()
+    assert calls == [(str(tmp_path / "step_1.png"), None)]
+    assert (tmp_path / "step_1.png").read_bytes() == b"png-bytes"
+
+
+def test_failed_write_still_invokes_callback(tmp_path):
+    calls = []
+    with ArtifactWriter(str(tmp_path), thumbnail_max_side=None) as writer:
+        writer.write_screenshot("missing/step_1.png", b"png", on_written=lambda *args: calls.append(args))
+        writer.drain()
+        stats = writer.stats()
+    assert calls == [(None, None)]
+    assert stats["errors"] == 1
+    assert stats["written"] == 0
+
+
+def test_trajectory_lines_are_flushed_on_close(tmp_path):
+    writer = ArtifactWriter(str(tmp_path), flush_every=100, flush_interval=60)
+    writer.write_trajectory({"step_num": 1, "action": "click"})
+    writer.write_skill_record({"skill": "open_app"})
+    writer.close()
+    lines = (tmp_path / "traj.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    assert '"action": "skill"' in lines[1]
+
+
+def test_unexpected_write_error_keeps_worker_alive(tmp_path):
+    calls = []
+    with ArtifactWriter(str(tmp_path), thumbnail_max_side=None) as writer:
+        writer.write_screenshot("bad.png", None, on_written=lambda *args: calls.append(("bad",) + args))
+        drainer = threading.Thread(target=writer.drain, daemon=True)
+        drainer.start()
+        drainer.join(5)
+        assert not drainer.is_alive(), "drain() hung after a failed item"
+        writer.write_screenshot("good.png", b"png", on_written=lambda *args: calls.append(("good",) + args))
+        writer.drain()
+        stats = writer.stats()
+    assert calls == [("bad", None, None), ("good", str(tmp_path / "good.png"), None)]
+    assert stats["errors"] == 1
+    assert stats["written"] == 1
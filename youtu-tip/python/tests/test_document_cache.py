@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import threading
+
+from app.services import document_cache
+from app.services.document_cache import DocumentCache
+
+
+def _counting_parser(monkeypatch):
+    calls = []
+
+    def _parse(path):
+        calls.append(path)
+        with open(path, encoding="utf-8") as handle:
+            text = handle.read()
+        return text, [{"type": "Text", "text": text}]
+
+    monkeypatch.setitem(document_cache.PARSERS, "counting", _parse)
+    return calls
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_stat_hit_skips_hashing_and_parsing(tmp_path, monkeypatch):
+    calls = _counting_parser(monkeypatch)
+    source = _write(tmp_path / "report.pdf", "quarterly numbers")
+    cache = DocumentCache(tmp_path / "cache")
+
+    first = cache.get(source, "counting")
+    hashed = []
+    original = document_cache.file_sha256
+    monkeypatch.setattr(document_cache, "file_sha256", lambda path: hashed.append(path) or original(path))
+    second = cache.get(source, "counting")
+
+    assert first.cached is False and second.cached is True
+    assert second.text == "quarterly numbers"
+    assert calls == [source]
+    assert hashed == []
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cache.close()
+
+
+def test_content_hit_after_touch_and_copy(tmp_path, monkeypatch):
+    calls = _counting_parser(monkeypatch)
+    source = _write(tmp_path / "report.pdf", "same bytes")
+    cache = DocumentCache(tmp_path / "cache")
+    cache.get(source, "counting")
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    touched = cache.get(source, "counting")
+    copy = str(tmp_path / "copy.pdf")
+    shutil.copyfile(source, copy)
+    copied = cache.get(copy, "counting")
+
+    assert calls == [source]
+    assert touched.cached and copied.cached
+    assert copied.path == copy
+    assert copied.content_hash == touched.content_hash
+    cache.close()
+
+
+def test_changed_content_is_reparsed(tmp_path, monkeypatch):
+    calls = _counting_parser(monkeypatch)
+    source = tmp_path / "report.pdf"
+    _write(source, "version one")
+    cache = DocumentCache(tmp_path / "cache")
+    cache.get(str(source), "counting")
+
+    _write(source, "version two, longer")
+    document = cache.get(str(source), "counting")
+
+    assert document.cached is False
+    assert document.text == "version two, longer"
+    assert len(calls) == 2
+    cache.close()
+
+
+def test_index_survives_restart(tmp_path, monkeypatch):
+    calls = _counting_parser(monkeypatch)
+    source = _write(tmp_path / "report.pdf", "persisted")
+    DocumentCache(tmp_path / "cache").get(source, "counting")
+
+    reopened = DocumentCache(tmp_path / "cache")
+    document = reopened.get(source, "counting")
+
+    assert document.cached and document.text == "persisted"
+    assert len(calls) == 1
+    reopened.close()
+
+
+def test_lru_eviction_keeps_recent_entries_within_budget(tmp_path, monkeypatch):
+    calls = _counting_parser(monkeypatch)
+    sources = [_write(tmp_path / f"doc{index}.pdf", f"{index}" * 400) for index in range(3)]
+    probe = DocumentCache(tmp_path / "probe")
+    probe.get(sources[0], "counting")
+    entry_bytes = probe.stats()["bytes"]
+    probe.close()
+
+    cache = DocumentCache(tmp_path / "cache", max_bytes=entry_bytes * 2)
+    cache.get(sources[0], "counting")
+    cache.get(sources[1], "counting")
+    cache.get(sources[0], "counting")  # doc0 becomes most recently used
+    cache.get(sources[2], "counting")  # evicts doc1
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evicted"] == 1
+    assert stats["bytes"] <= cache.max_bytes
+    del calls[:]
+    assert cache.get(sources[0], "counting").cached
+    assert cache.get(sources[2], "counting").cached
+    assert not cache.get(sources[1], "counting").cached
+    assert calls == [sources[1]]
+    leftover = [name for _, _, files in os.walk(tmp_path / "cache") for name in files if name.endswith(".json")]
+    assert len(leftover) == 2 + 1  # two entries plus index.json
+    cache.close()
+
+
+def test_concurrent_requests_share_one_parse(tmp_path, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _slow(path):
+        calls.append(path)
+        started.set()
+        release.wait(5)
+        return "slow", [{"type": "Text", "text": "slow"}]
+
+    monkeypatch.setitem(document_cache.PARSERS, "slow", _slow)
+    source = _write(tmp_path / "big.pdf", "payload")
+    cache = DocumentCache(tmp_path / "cache")
+    results = []
+    owner = threading.Thread(target=lambda: results.append(cache.get(source, "slow")))
+    owner.start()
+    assert started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(cache.get(source, "slow")))
+    waiter.start()
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+
+    assert calls == [source]
+    assert sorted(document.cached for document in results) == [False, True]
+    cache.close()
+
+
+def test_concurrent_index_saves_leave_a_complete_index(tmp_path, monkeypatch):
+    _counting_parser(monkeypatch)
+    sources = [_write(tmp_path / f"doc{index}.pdf", f"document {index}") for index in range(8)]
+    cache = DocumentCache(tmp_path / "cache", workers=4)
+    threads = [threading.Thread(target=cache.get, args=(source, "counting")) for source in sources]
+    threads += [threading.Thread(target=cache._save_index) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    cache.close()
+
+    index = json.loads((tmp_path / "cache" / "index.json").read_text(encoding="utf-8"))
+    assert len(index["entries"]) == len(sources)
+    leftover = [name for _, _, files in os.walk(tmp_path / "cache") for name in files if name.endswith(".tmp")]
+    assert leftover == []
+
+
+def test_failed_index_write_keeps_previous_index_and_cleans_up(tmp_path, monkeypatch):
+    _counting_parser(monkeypatch)
+    source = _write(tmp_path / "report.pdf", "kept")
+    cache = DocumentCache(tmp_path / "cache")
+    cache.get(source, "counting")
+    before = (tmp_path / "cache" / "index.json").read_text(encoding="utf-8")
+
+    def _boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(document_cache.os, "replace", _boom)
+    cache._save_index()
+
+    assert (tmp_path / "cache" / "index.json").read_text(encoding="utf-8") == before
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from app.services.event_log import RunEventLog
+
+
+async def _collect(log, **kwargs):
+    return [event async for event in log.subscribe(**kwargs)]
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_append_stamps_contiguous_sequence_numbers():
+    log = RunEventLog(capacity=10)
+    seqs = [log.append({"type": "step", "n": n}) for n in range(3)]
+    assert seqs == [1, 2, 3]
+    assert log.first_seq == 1
+    assert log.last_seq == 3
+    assert [event["n"] for event in log.snapshot(since=1)] == [1, 2]
+
+
+def test_closed_log_rejects_appends():
+    log = RunEventLog()
+    log.close()
+    with pytest.raises(RuntimeError):
+        log.append({"type": "step"})
+
+
+def test_subscriber_resumes_after_cursor():
+    async def scenario():
+        log = RunEventLog(capacity=10)
+        for n in range(5):
+            log.append({"type": "step", "n": n})
+        log.close()
+        return await _collect(log, since=3)
+
+    events = _run(scenario())
+    assert [event["seq"] for event in events] == [4, 5]
+
+
+def test_evicted_events_are_reported_as_gap():
+    async def scenario():
+        log = RunEventLog(capacity=3)
+        for n in range(6):
+            log.append({"type": "step", "n": n})
+        log.close()
+        events = await _collect(log, since=1)
+        return log, events
+
+    log, events = _run(scenario())
+    gap = events[0]
+    assert gap["type"] == "gap"
+    assert (gap["from_seq"], gap["to_seq"], gap["missed"]) == (2, 3, 2)
+    # The gap carries seq=to_seq so a client can resume from a single cursor.
+    assert gap["seq"] == 3
+    assert [event["seq"] for event in events[1:]] == [4, 5, 6]
+    assert log.stats()["dropped"] == 2
+
+
+def test_max_lag_skips_slow_subscriber_ahead():
+    async def scenario():
+        log = RunEventLog(capacity=100)
+        for n in range(10):
+            log.append({"type": "step", "n": n})
+        log.close()
+        return await _collect(log, max_lag=2)
+
+    events = _run(scenario())
+    assert events[0]["type"] == "gap"
+    assert events[0]["missed"] == 8
+    assert [event["seq"] for event in events[1:]] == [9, 10]
+
+
+def test_live_subscribers_share_events_without_stealing():
+    async def scenario():
+        log = RunEventLog(capacity=10)
+        first = asyncio.create_task(_collect(log))
+        second = asyncio.create_task(_collect(log))
+        await asyncio.sleep(0)
+        assert log.stats()["subscribers"] == 2
+        for n in range(3):
+            log.append({"type": "step", "n": n})
+            await asyncio.sleep(0)
+        log.close()
+        return await first, await second, log.stats()["subscribers"]
+
+    first, second, subscribers = _run(scenario())
+    assert [event["seq"] for event in first] == [1, 2, 3]
+    assert first == second
+    assert subscribers == 0
@@ -0,0 +1,55 @@
+import pytest
+
+from app.gui_agent.actions import Action
+from app.gui_agent.executor import ActionBackend, ActionExecutor
+
+
+class _RecordingBackend(ActionBackend):
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+
+    def click(self, x, y, *, button="left", clicks=1):
+        self.calls.append(("click", x, y, button, clicks))
+
+    def move_to(self, x, y):
+        self.calls.append(("move_to", x, y))
+
+    def drag_to(self, x, y, duration=0.5):
+        self.calls.append(("drag_to", x, y, duration))
+
+    def scroll(self, amount):
+        self.calls.append(("scroll", amount))
+
+    def type_text(self, text):
+        self.calls.append(("type_text", text))
+
+    def hotkey(self, keys):
+        self.calls.append(("hotkey", tuple(keys)))
+
+    def press(self, key):
+        self.calls.append(("press", key))
+
+
+def test_incomplete_backend_fails_at_construction():
+    class _ClickOnly(ActionBackend):
+        def click(self, x, y, *, button="left", clicks=1):
+            pass
+
+    with pytest.raises(TypeError, match="abstract"):
+        _ClickOnly()
+
+
+def test_complete_backend_rejects_raw_code_by_default():
+    backend = _RecordingBackend()
+    with pytest.raises(NotImplementedError, match="recording backend cannot run raw code"):
+        backend.run_code("pyautogui.click(1, 2)")
+
+
+def test_executor_dispatches_to_backend_primitives():
+    backend = _RecordingBackend()
+    executor = ActionExecutor(backend)
+    for action in (Action.click(10, 20), Action.scroll(-3), Action.press("enter")):
+        executor.execute(action)
+    assert backend.calls == [("click", 10, 20, "left", 1), ("scroll", -3), ("press", "enter")]
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.gui_agent import GuiAgentService
+
+
+class _StubSettingsManager:
+    def __init__(self, cache_dir):
+        self._settings = SimpleNamespace(
+            paths=SimpleNamespace(cacheDir=str(cache_dir)),
+            get_active_vlm_profile=lambda: SimpleNamespace(),
+        )
+
+    def get_settings(self):
+        return self._settings
+
+
+def _service(tmp_path):
+    service = GuiAgentService(_StubSettingsManager(tmp_path), max_queue=2, retention_seconds=60)
+    release = asyncio.Event()
+
+    async def invoke_agent(instruction, profile, result_root, log_callback, cancel_event):
+        await release.wait()
+        log_callback({"type": "complete", "status": "success", "message": "done"})
+        # log_callback hops through call_soon_threadsafe, like events from the run loop's threads.
+        await asyncio.sleep(0)
+        return {"task_id": instruction}
+
+    service._invoke_agent = invoke_agent
+    return service, release
+
+
+async def _drain(service, run_id):
+    return [event async for event in service.stream_events(run_id)]
+
+
+def test_cancelling_queued_run_emits_complete(tmp_path):
+    async def scenario():
+        service, release = _service(tmp_path)
+        first = await service.start_run(session_id="s", instruction="first")
+        second = await service.start_run(session_id="s", instruction="second")
+        assert service.get_run(second.run_id).status == "queued"
+
+        assert await service.cancel_run(second.run_id) is True
+        queued_events = await asyncio.wait_for(_drain(service, second.run_id), 1)
+
+        release.set()
+        first_events = await asyncio.wait_for(_drain(service, first.run_id), 1)
+        return service, first, second, queued_events, first_events
+
+    service, first, second, queued_events, first_events = asyncio.run(scenario())
+    complete = [event for event in queued_events if event["type"] == "complete"]
+    assert len(complete) == 1
+    assert complete[0]["status"] == "cancelled"
+    assert queued_events[-1] is complete[0]
+    assert service.get_run(second.run_id).status == "cancelled"
+    assert first_events[-1]["type"] == "complete"
+    assert service.get_run(first.run_id).status == "completed"
+    assert service.scheduler_stats()["active"] == 0
+
+
+def test_cancel_before_loop_starts_emits_single_complete(tmp_path):
+    async def scenario():
+        service, _ = _service(tmp_path)
+        handle = await service.start_run(session_id="s", instruction="only")
+        await asyncio.sleep(0)
+        await service.cancel_run(handle.run_id)
+        return await asyncio.wait_for(_drain(service, handle.run_id), 1)
+
+    events = asyncio.run(scenario())
+    assert [event["status"] for event in events if event["type"] == "complete"] == ["cancelled"]
@@ -0,0 +1,63 @@
+import pytest
+
+from app.gui_agent.qwen_agent import Qwen3VLAgent, _TurnContext
+
+
+def _tool_call(arguments: str) -> str:
+    return f'Action: next step\n<tool_call>\n{{"name": "computer_use", "arguments": {arguments}}}\n</tool_call>'
+
+
+@pytest.fixture
+def agent():
+    agent = Qwen3VLAgent(observation_mode="crop")
+    agent.reset()
+    return agent
+
+
+@pytest.fixture
+def turn():
+    return _TurnContext(width=2000, height=1000, processed_width=1000, processed_height=500, crop_transform=None)
+
+
+def test_wait_requests_full_frame_next_turn(agent, turn):
+    agent._finish_turn(_tool_call('{"action": "wait", "time": 1}'), turn)
+    assert agent._force_full_frame is True
+
+
+def test_click_keeps_crop_observation(agent, turn):
+    agent._finish_turn(_tool_call('{"action": "left_click", "coordinate": [10, 10]}'), turn)
+    assert agent._force_full_frame is False
+
+
+def test_unparseable_turn_requests_full_frame(agent, turn):
+    agent._finish_turn("Action: nothing useful", turn)
+    assert agent._force_full_frame is True
+
+
+def _deltas(text, closed):
+    try:
+        for index in range(0, len(text), 5):
+            yield text[index : index + 5]
+    finally:
+        closed.append(True)
+
+
+_TWO_CALLS = _tool_call('{"action": "type", "text": "hi"}') + "\n" + _tool_call('{"action": "key", "keys": ["enter"]}')
+
+
+def test_stream_collects_whole_turn(agent):
+    closed = []
+    text = agent._collect_stream(_deltas(_TWO_CALLS, closed))
+    assert text == _TWO_CALLS
+    assert closed == [True]
+    assert agent.latest_stream_stats["blocks"] == 2
+    assert agent.latest_stream_stats["stopped_early"] is False
+
+
+def test_stream_stop_after_first_closes_generator(agent):
+    agent.stream_stop_after_first = True
+    closed = []
+    text = agent._collect_stream(_deltas(_TWO_CALLS, closed))
+    assert text.count("<tool_call>") == 1
+    assert closed == [True]
+    assert agent.latest_stream_stats["stopped_early"] is True
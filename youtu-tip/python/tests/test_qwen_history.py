@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app.gui_agent.qwen_history import (
+    AppendOnlyHistory,
+    HistoryPolicy,
+    SlidingWindowHistory,
+    build_history_policy,
+)
+
+
+def _system(text="You are a GUI agent."):
+    return {"role": "system", "content": [{"type": "text", "text": text}]}
+
+
+def _observation(step, text=None):
+    content = [{"type": "image_url", "image_url": {"url": f"data:image/png;base64,frame{step}"}}]
+    if text:
+        content.insert(0, {"type": "text", "text": text})
+    return {"role": "user", "content": content}
+
+
+def _reply(step):
+    return {"role": "assistant", "content": [{"type": "text", "text": f"Action: click item {step}"}]}
+
+
+def _dump(messages):
+    return [json.dumps(message, sort_keys=True) for message in messages]
+
+
+def test_base_policy_is_abstract():
+    with pytest.raises(TypeError):
+        HistoryPolicy()
+
+
+def test_unknown_policy_name_is_rejected():
+    with pytest.raises(ValueError):
+        build_history_policy("bogus")
+
+
+def test_append_only_keeps_previous_payload_as_prefix():
+    policy = AppendOnlyHistory(max_messages=100, max_images=100)
+    messages = [_system(), _observation(0, "open settings")]
+    previous = _dump(policy.prepare(messages))
+    for step in range(1, 6):
+        messages += [_reply(step), _observation(step)]
+        current = _dump(policy.prepare(messages))
+        assert current[: len(previous)] == previous
+        assert policy.last_stats["prefix_reuse"] > 0
+        previous = current
+    assert policy.last_stats["compactions"] == 0
+
+
+def test_append_only_compacts_once_then_stays_stable():
+    policy = AppendOnlyHistory(max_messages=8, max_images=3, keep_recent=4)
+    messages = [_system(), _observation(0, "open settings")]
+    policy.prepare(messages)
+    for step in range(1, 4):
+        messages += [_reply(step), _observation(step)]
+        policy.prepare(messages)
+    assert policy.compactions == 1
+    assert policy.last_stats["compacted"] is True
+    compacted = _dump(policy.prepare(messages))
+    assert policy.last_stats["compacted"] is False
+    assert policy.last_stats["prefix_reuse"] == 1.0
+
+    messages += [_reply(4), _observation(4)]
+    current = _dump(policy.prepare(messages))
+    assert current[: len(compacted)] == compacted
+    summary = json.loads(current[1])["content"][0]["text"]
+    assert summary.startswith("Summary of earlier steps")
+    assert "Task: open settings" in summary
+
+
+def test_sliding_window_keeps_only_latest_images():
+    policy = SlidingWindowHistory(max_messages=4, max_images=1)
+    messages = [_system(), _observation(0, "open settings")]
+    for step in range(1, 4):
+        messages += [_reply(step), _observation(step)]
+    payload = policy.prepare(messages)
+    assert payload[0]["role"] == "system"
+    assert len(payload) == 5
+    assert policy.last_stats["images"] == 1
+
+
+def test_in_place_system_prompt_edit_is_not_served_from_cache():
+    policy = AppendOnlyHistory(max_messages=100, max_images=100)
+    messages = [_system("width 1000"), _observation(0, "open settings")]
+    policy.prepare(messages)
+    # Qwen3VLAgent._ensure_system_prompt rewrites messages[0] in place on resize.
+    messages[0]["content"] = [{"type": "text", "text": "width 2000"}]
+    policy.prepare(messages)
+    assert policy.last_stats["reused_bytes"] == 0
+    assert policy.last_stats["prefix_reuse"] == 0.0
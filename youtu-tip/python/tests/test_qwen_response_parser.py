@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+
+from app.gui_agent.observation import CropTransform
+from app.gui_agent.qwen_response_parser import StreamingToolCallParser, parse_response
+
+logger = logging.getLogger("tests.qwen_response_parser")
+
+
+def _click(x, y):
+    return (
+        "Action: click the button\n"
+        f'<tool_call>\n{{"name": "computer_use", "arguments": {{"action": "left_click", "coordinate": [{x}, {y}]}}}}\n</tool_call>'
+    )
+
+
+def _parse(response, **kwargs):
+    kwargs.setdefault("coordinate_type", "relative")
+    return parse_response(response, logger=logger, **kwargs)
+
+
+def test_relative_coordinates_scale_to_full_screen():
+    _, actions = _parse(_click(500, 250), original_width=2000, original_height=1000)
+    assert actions[0].params["x"] == 1000
+    assert actions[0].params["y"] == 250
+
+
+@pytest.mark.parametrize(
+    "point, expected",
+    [
+        ((0, 0), (100, 50)),
+        ((500, 500), (300, 150)),
+        ((1000, 1000), (500, 250)),
+    ],
+)
+def test_crop_coordinates_map_back_to_screen(point, expected):
+    crop = CropTransform(left=100, top=50, width=400, height=200)
+    _, actions = _parse(_click(*point), original_width=2000, original_height=1000, crop_transform=crop)
+    assert (actions[0].params["x"], actions[0].params["y"]) == expected
+
+
+def test_absolute_coordinates_use_processed_size_of_crop():
+    crop = CropTransform(left=10, top=20, width=400, height=200)
+    _, actions = _parse(
+        _click(100, 50),
+        coordinate_type="absolute",
+        original_width=2000,
+        original_height=1000,
+        processed_width=200,
+        processed_height=100,
+        crop_transform=crop,
+    )
+    assert (actions[0].params["x"], actions[0].params["y"]) == (210, 120)
+
+
+def test_wait_action_is_parsed():
+    response = '<tool_call>\n{"name": "computer_use", "arguments": {"action": "wait", "time": 2}}\n</tool_call>'
+    _, actions = _parse(response)
+    assert [action.kind for action in actions] == ["wait"]
+
+
+def _chunks(text, size):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+_TWO_ACTIONS = (
+    "I will type the user name and then submit the form.\n"
+    "Action: fill the login form\n"
+    '<tool_call>\n{"name": "computer_use", "arguments": {"action": "type", "text": "alice"}}\n</tool_call>\n'
+    '<tool_call>\n{"name": "computer_use", "arguments": {"action": "key", "keys": ["enter"]}}\n</tool_call>'
+)
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64])
+def test_streaming_parser_keeps_every_tool_call(size):
+    parser = StreamingToolCallParser()
+    thoughts = [thought for chunk in _chunks(_TWO_ACTIONS, size) if (thought := parser.feed(chunk))]
+    tail = parser.flush()
+    if tail:
+        thoughts.append(tail)
+    assert parser.text == _TWO_ACTIONS
+    assert parser.blocks == 2
+    assert parser.complete is False
+    assert "".join(thoughts).strip() == _TWO_ACTIONS.split("<tool_call>", 1)[0].strip()
+    _, actions = _parse(parser.text)
+    assert [action.kind for action in actions] == ["type", "press"]
+
+
+@pytest.mark.parametrize("size", [1, 5, 64])
+def test_streaming_parser_can_stop_after_first_block(size):
+    parser = StreamingToolCallParser(stop_after_first=True)
+    for chunk in _chunks(_TWO_ACTIONS, size):
+        parser.feed(chunk)
+        if parser.complete:
+            break
+    assert parser.blocks == 1
+    assert parser.text.endswith("</tool_call>")
+    assert parser.text.count("<tool_call>") == 1
+    assert parser.feed("more") is None
+
+
+def test_streaming_parser_holds_back_partial_open_tag():
+    parser = StreamingToolCallParser(min_thought_chars=1)
+    assert parser.feed("Looking at the screen.\n<tool") == "Looking at the screen.\n"
+    assert parser.feed('_call>\n{"action": "wait"}') is None
+    assert parser.flush() is None
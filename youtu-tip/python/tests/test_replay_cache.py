@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+from PIL import Image, ImageDraw
+
+from app.gui_agent.replay_cache import TrajectoryCache, build_trajectory
+from app.gui_agent.runner import _PreparedRun, build_default_args
+
+INSTRUCTION = "Open the settings window"
+
+
+def _frame(path, shade):
+    image = Image.new("RGB", (320, 200), "white")
+    ImageDraw.Draw(image).rectangle((20, 20, 20 + shade, 120), fill="black")
+    image.save(path)
+
+
+def _record_run(result_dir, *, error_step=None, final="DONE"):
+    os.makedirs(result_dir, exist_ok=True)
+    _frame(os.path.join(result_dir, "reset.png"), 40)
+    _frame(os.path.join(result_dir, "step_1.png"), 120)
+    records = [
+        {"step_num": 0, "action": "reset", "instruction": INSTRUCTION, "screenshot_file": "reset.png"},
+        {
+            "step_num": 1,
+            "action": "pyautogui.click(10, 10)",
+            "response": "Action: click",
+            "done": False,
+            "info": {"error": "boom"} if error_step == 1 else {},
+            "screenshot_file": "step_1.png",
+        },
+        {
+            "step_num": 2,
+            "action": final,
+            "response": "Action: finish",
+            "done": True,
+            "info": {},
+            "screenshot_file": None,
+        },
+    ]
+    with open(os.path.join(result_dir, "traj.jsonl"), "w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record) + "\n")
+    return result_dir
+
+
+def _reset_frame(result_dir):
+    with open(os.path.join(result_dir, "reset.png"), "rb") as handle:
+        return handle.read()
+
+
+def test_replay_cache_is_opt_in(monkeypatch):
+    monkeypatch.delenv("TIP_GUI_REPLAY_CACHE", raising=False)
+    assert build_default_args().replay_cache is False
+
+
+def test_only_clean_done_runs_are_distilled(tmp_path):
+    assert build_trajectory(INSTRUCTION, _record_run(str(tmp_path / "ok"))) is not None
+    assert build_trajectory(INSTRUCTION, _record_run(str(tmp_path / "fail"), final="FAIL")) is None
+    assert build_trajectory(INSTRUCTION, _record_run(str(tmp_path / "error"), error_step=1)) is None
+
+
+def test_hits_are_persisted_on_flush_not_on_lookup(tmp_path):
+    cache_path = tmp_path / "replay_cache.json"
+    run_dir = _record_run(str(tmp_path / "run"))
+    cache = TrajectoryCache(str(cache_path))
+    cache.record_run(INSTRUCTION, run_dir)
+    written = cache_path.stat().st_mtime_ns
+
+    session = cache.start_session(INSTRUCTION, _reset_frame(run_dir))
+    assert session is not None
+    assert cache_path.stat().st_mtime_ns == written
+    assert json.loads(cache_path.read_text())["entries"][0]["hits"] == 0
+
+    cache.flush()
+    assert json.loads(cache_path.read_text())["entries"][0]["hits"] == 1
+
+
+def test_concurrent_saves_leave_one_valid_file(tmp_path):
+    cache = TrajectoryCache(str(tmp_path / "replay_cache.json"))
+    cache.record_run(INSTRUCTION, _record_run(str(tmp_path / "run")))
+    threads = [threading.Thread(target=cache._save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(os.listdir(tmp_path)) == ["replay_cache.json", "run"]
+    assert len(json.loads((tmp_path / "replay_cache.json").read_text())["entries"]) == 1
+
+
+def _prepared(tmp_path, cache, *, verifies_success):
+    agent = SimpleNamespace(replay_cache=cache, latest_replay_stats={})
+    env = SimpleNamespace(verifies_success=verifies_success)
+    return _PreparedRun(
+        task_id="t",
+        task_config={},
+        result_dir=_record_run(str(tmp_path / "run")),
+        args=SimpleNamespace(),
+        env=env,
+        agent=agent,
+        emit=lambda event: None,
+    )
+
+
+def test_unverified_env_score_is_not_required(tmp_path):
+    cache = TrajectoryCache(str(tmp_path / "replay_cache.json"))
+    _prepared(tmp_path, cache, verifies_success=False).remember(INSTRUCTION, [1.0])
+    assert len(cache) == 1
+
+
+def test_verified_env_failure_is_not_recorded(tmp_path):
+    cache = TrajectoryCache(str(tmp_path / "replay_cache.json"))
+    _prepared(tmp_path, cache, verifies_success=True).remember(INSTRUCTION, [0.5])
+    assert len(cache) == 0
+
+
+def test_cancelled_run_is_not_recorded(tmp_path):
+    cache = TrajectoryCache(str(tmp_path / "replay_cache.json"))
+    _prepared(tmp_path, cache, verifies_success=False).remember(INSTRUCTION, [None])
+    assert len(cache) == 0
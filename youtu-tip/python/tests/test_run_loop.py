@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.gui_agent import run_loop
+from app.gui_agent.actions import Action
+from app.gui_agent.benchmark import BUILTIN_BATCH_TRAJECTORY, BUILTIN_TRAJECTORY, run_benchmark
+from app.gui_agent.runner import build_default_args
+
+
+def _event_shape(events):
+    return [(event.get("type"), event.get("step"), event.get("status")) for event in events]
+
+
+def test_sync_and_async_drivers_replay_identically(tmp_path):
+    for batch in (False, True):
+        for trajectory in (BUILTIN_TRAJECTORY, BUILTIN_BATCH_TRAJECTORY):
+            sync = run_benchmark(trajectory, result_root=str(tmp_path / "sync"), batch_actions=batch)
+            asynchronous = run_benchmark(
+                trajectory, result_root=str(tmp_path / "async"), use_async=True, batch_actions=batch
+            )
+            assert sync["scores"] == asynchronous["scores"] == [1.0]
+            assert sync["steps"] == asynchronous["steps"]
+
+
+def test_batch_mode_is_opt_in(monkeypatch):
+    monkeypatch.delenv("TIP_GUI_BATCH_ACTIONS", raising=False)
+    assert build_default_args().batch_actions is False
+    monkeypatch.setenv("TIP_GUI_BATCH_ACTIONS", "1")
+    assert build_default_args().batch_actions is True
+
+
+class _SlowEnv:
+    """Env whose single action keeps running after the caller is cancelled."""
+
+    controller = None
+
+    def __init__(self):
+        self.step_started = threading.Event()
+        self.step_finished_at = None
+        self.evaluated_at = None
+
+    def reset(self, task_config):
+        return {"screenshot": b"frame"}
+
+    def step(self, action, pause=0.5):
+        self.step_started.set()
+        time.sleep(0.3)
+        self.step_finished_at = time.monotonic()
+        return {"screenshot": b"frame"}, 0.0, False, {}
+
+    def evaluate(self):
+        self.evaluated_at = time.monotonic()
+        return 0.0
+
+
+class _OneClickAgent:
+    def reset(self, _logger=None):
+        pass
+
+    async def apredict(self, instruction, obs):
+        return "Action: click", [Action.click(1, 1)]
+
+
+def test_cancel_waits_for_running_action_before_finishing(tmp_path):
+    env = _SlowEnv()
+    events = []
+    completed_at = []
+    cancel_event = threading.Event()
+
+    def log_callback(event):
+        events.append(event)
+        if event.get("type") == "complete":
+            completed_at.append(time.monotonic())
+
+    async def scenario():
+        task = asyncio.create_task(
+            run_loop.arun_single_example(
+                _OneClickAgent(),
+                env,
+                {"id": "cancel"},
+                3,
+                "click",
+                SimpleNamespace(sleep_after_execution=0.0, batch_actions=False),
+                str(tmp_path),
+                [],
+                log_callback=log_callback,
+                cancel_event=cancel_event,
+            )
+        )
+        while not env.step_started.is_set():
+            await asyncio.sleep(0.01)
+        cancel_event.set()
+        task.cancel()
+        await task
+
+    asyncio.run(scenario())
+    assert env.step_finished_at is not None
+    assert completed_at and completed_at[0] >= env.step_finished_at
+    # Cancelled runs are not evaluated; the completion event must follow the action.
+    assert env.evaluated_at is None
+    complete = [event for event in events if event.get("type") == "complete"]
+    assert [event["status"] for event in complete] == ["cancelled"]
+    assert _event_shape(events)[-1] == ("complete", None, "cancelled")
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from app.services.run_scheduler import RunScheduler, SchedulerFullError
+
+
+def test_waiters_admitted_by_priority_then_fifo():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=8)
+        order = []
+        scheduler.reserve("running")
+        for job_id, priority in (("agent-1", 2), ("chat-1", 1), ("agent-2", 2), ("intent", 0), ("chat-2", 1)):
+            scheduler.reserve(job_id, priority=priority)
+        assert scheduler.position("intent") == 1
+        assert scheduler.position("agent-2") == 5
+
+        async def worker(job_id):
+            await scheduler.acquire(job_id)
+            order.append(job_id)
+            scheduler.release(job_id)
+
+        tasks = [asyncio.create_task(worker(job_id)) for job_id in ("agent-1", "chat-1", "agent-2", "intent", "chat-2")]
+        await asyncio.sleep(0)
+        scheduler.release("running")
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["intent", "chat-1", "chat-2", "agent-1", "agent-2"]
+
+
+def test_cancel_removes_waiter_and_acquire_raises():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=2)
+        scheduler.reserve("running")
+        scheduler.reserve("queued")
+        pending = asyncio.create_task(scheduler.acquire("queued"))
+        await asyncio.sleep(0)
+        assert scheduler.cancel("queued") is True
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        assert scheduler.position("queued") == -1
+        with pytest.raises(asyncio.CancelledError):
+            await scheduler.acquire("never-reserved")
+        scheduler.release("running")
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+    assert stats["completed"] == 1
+
+
+def test_full_queue_rejects_equal_or_lower_priority():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=1)
+        scheduler.reserve("running", priority=1)
+        scheduler.reserve("queued", priority=1)
+        for priority in (1, 2):
+            with pytest.raises(SchedulerFullError):
+                scheduler.reserve(f"late-{priority}", priority=priority)
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 2 and stats["queued"] == 1
+
+
+def test_full_queue_evicts_newest_lowest_priority_waiter():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=2)
+        scheduler.reserve("running")
+        scheduler.reserve("agent-old", priority=2)
+        scheduler.reserve("agent-new", priority=2)
+        old = asyncio.create_task(scheduler.acquire("agent-old"))
+        new = asyncio.create_task(scheduler.acquire("agent-new"))
+        await asyncio.sleep(0)
+
+        assert scheduler.reserve("intent", priority=0) == 1
+        with pytest.raises(SchedulerFullError):
+            await new
+        assert scheduler.position("agent-new") == -1
+        assert scheduler.position("agent-old") == 2
+
+        scheduler.release("running")
+        await scheduler.acquire("intent")
+        scheduler.release("intent")
+        await old
+        scheduler.release("agent-old")
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+
+
+def test_admit_surfaces_eviction_and_releases_cleanly():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=1)
+        scheduler.reserve("running")
+
+        async def agent_call():
+            async with scheduler.admit(priority=2):
+                pass
+
+        agent = asyncio.create_task(agent_call())
+        await asyncio.sleep(0)
+        scheduler.reserve("intent", priority=0)
+        with pytest.raises(SchedulerFullError):
+            await agent
+        scheduler.release("running")
+        await scheduler.acquire("intent")
+        scheduler.release("intent")
+        return scheduler.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+def test_avg_wait_counts_every_admission_once():
+    async def scenario():
+        scheduler = RunScheduler(max_concurrency=1, max_queue=4, priority_names={0: "intent"})
+        scheduler.reserve("first")
+        scheduler.reserve("second")
+        await asyncio.sleep(0.05)
+        scheduler.release("first")
+        await scheduler.acquire("second")
+        # "second" 仍在运行：平均值按已准入数计算，而不是已释放数
+        mid_run = scheduler.stats()
+        scheduler.reserve("dropped")
+        scheduler.cancel("dropped")
+        scheduler.release("dropped")
+        scheduler.release("second")
+        return mid_run, scheduler.stats()
+
+    mid_run, stats = asyncio.run(scenario())
+    assert mid_run["completed"] == 1
+    assert mid_run["avg_wait_ms"] == stats["avg_wait_ms"]
+    assert stats["admitted"] == 2
+    assert stats["completed"] == 2
+    second_wait = stats["max_wait_ms"]
+    assert second_wait >= 40
+    assert stats["avg_wait_ms"] == pytest.approx(second_wait / 2, abs=0.2)
+    assert stats["classes"]["intent"]["admitted"] == 2
+    assert stats["classes"]["intent"]["avg_wait_ms"] == stats["avg_wait_ms"]
@@ -0,0 +1,118 @@
+import json
+import os
+import stat
+import time
+
+import pytest
+
+from app.core.settings import DEFAULT_SETTINGS
+from app.services import settings_persistence
+from app.services.settings_persistence import SettingsWriter, write_atomic
+
+
+def _snapshot(language):
+    return DEFAULT_SETTINGS.model_copy(update={"language": language})
+
+
+def _read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_burst_of_schedules_coalesces_into_one_write(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = SettingsWriter(path, debounce=0.05, max_delay=1.0)
+    for language in ("en", "fr", "de", "zh"):
+        writer.schedule(_snapshot(language))
+
+    assert writer.flush() is True
+    stats = writer.stats()
+    assert stats["writes"] == 1
+    assert stats["coalesced"] == 3
+    assert stats["pending"] is False
+    assert _read(path)["language"] == "zh"
+    writer.close()
+
+
+def test_debounce_defers_the_write_until_quiet(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = SettingsWriter(path, debounce=0.2, max_delay=5.0)
+    writer.schedule(_snapshot("en"))
+    time.sleep(0.05)
+    assert not path.exists()
+
+    deadline = time.monotonic() + 2
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert _read(path)["language"] == "en"
+    assert writer.stats()["writes"] == 1
+    writer.close()
+
+
+def test_max_delay_caps_a_busy_stream(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = SettingsWriter(path, debounce=0.1, max_delay=0.2)
+    started = time.monotonic()
+    while time.monotonic() - started < 0.5:
+        writer.schedule(_snapshot("en"))
+        time.sleep(0.02)
+
+    assert writer.stats()["writes"] >= 1
+    writer.close()
+
+
+def test_flush_writes_pending_snapshot_immediately(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = SettingsWriter(path, debounce=30.0, max_delay=60.0)
+    writer.schedule(_snapshot("fr"))
+
+    started = time.monotonic()
+    assert writer.flush(timeout=2) is True
+    assert time.monotonic() - started < 2
+    assert _read(path)["language"] == "fr"
+    assert writer.flush() is True  # nothing pending
+    writer.close()
+
+
+def test_close_flushes_and_later_writes_happen_inline(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = SettingsWriter(path, debounce=30.0, max_delay=60.0)
+    writer.schedule(_snapshot("de"))
+    writer.close()
+    assert _read(path)["language"] == "de"
+
+    writer.schedule(_snapshot("zh"))
+    assert _read(path)["language"] == "zh"
+    assert writer.stats()["writes"] == 2
+
+
+def test_write_atomic_keeps_mode_and_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text("{}", encoding="utf-8")
+    os.chmod(path, 0o640)
+
+    write_atomic(path, '{"language": "en"}')
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+    assert _read(path) == {"language": "en"}
+    assert sorted(os.listdir(tmp_path)) == ["settings.json"]
+
+
+def test_new_file_is_private(tmp_path):
+    path = tmp_path / "nested" / "settings.json"
+    write_atomic(path, "{}")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+def test_failed_write_keeps_old_file_and_cleans_up(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    path.write_text('{"language": "old"}', encoding="utf-8")
+
+    def _boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(settings_persistence.os, "replace", _boom)
+    with pytest.raises(OSError):
+        write_atomic(path, '{"language": "new"}')
+
+    assert _read(path) == {"language": "old"}
+    assert sorted(os.listdir(tmp_path)) == ["settings.json"]
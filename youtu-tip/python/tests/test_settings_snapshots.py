@@ -0,0 +1,159 @@
+import asyncio
+import copy
+import json
+import pickle
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.settings import LLMHeaders
+from app.services.llm import LLMService
+from app.services.settings_manager import SettingsManager
+
+CUSTOM = {
+    "id": "local",
+    "name": "Local",
+    "provider": "static_openai",
+    "apiKey": "sk-test",
+    "openaiBaseUrl": "http://127.0.0.1:9/v1",
+    "headers": {"X-Team": "tip"},
+}
+
+
+def _manager(tmp_path):
+    manager = SettingsManager(user_path=tmp_path / "settings.json", force_override=True)
+    manager.add_llm_profile(dict(CUSTOM))
+    return manager
+
+
+def test_snapshot_containers_are_immutable(tmp_path):
+    manager = _manager(tmp_path)
+    settings = manager.get_settings()
+    profile = next(p for p in settings.llmProfiles if p.id == "local")
+
+    assert isinstance(settings.llmProfiles, tuple)
+    assert isinstance(settings.shortcuts.holdToSense, tuple)
+    with pytest.raises(AttributeError):
+        settings.llmProfiles.append(profile)
+    with pytest.raises(TypeError):
+        profile.headers.root["X-Team"] = "other"
+    with pytest.raises(TypeError):
+        profile.headers.root.update({"Authorization": "Bearer leaked"})
+    with pytest.raises(ValidationError):
+        profile.name = "renamed"
+
+    headers = profile.headers.to_dict()
+    headers["X-Team"] = "other"
+    assert next(p for p in manager.get_settings().llmProfiles if p.id == "local").headers.to_dict() == {
+        "X-Team": "tip"
+    }
+    manager.close()
+
+
+def test_updates_produce_new_frozen_snapshots(tmp_path):
+    manager = _manager(tmp_path)
+    before = manager.get_settings()
+
+    updated = manager.update_llm_profile("local", {"headers": {"X-Team": "core"}, "name": "Renamed"})
+    after = manager.get_settings()
+
+    assert isinstance(updated.headers, LLMHeaders)
+    with pytest.raises(TypeError):
+        updated.headers.root["X-Team"] = "again"
+    assert updated.headers.to_dict() == {"X-Team": "core"}
+    assert next(p for p in before.llmProfiles if p.id == "local").headers.to_dict() == {"X-Team": "tip"}
+    assert after is not before and isinstance(after.llmProfiles, tuple)
+
+    manager.save_settings({"llmProfiles": [p.model_dump() for p in after.llmProfiles]})
+    assert isinstance(manager.get_settings().llmProfiles, tuple)
+    manager.close()
+
+
+def test_snapshots_serialize_and_copy(tmp_path):
+    manager = _manager(tmp_path)
+    settings = manager.get_settings()
+    manager.flush()
+
+    on_disk = json.loads((tmp_path / "settings.json").read_text(encoding="utf-8"))
+    local = next(p for p in on_disk["llmProfiles"] if p["id"] == "local")
+    assert local["headers"] == {"X-Team": "tip"}
+    assert isinstance(on_disk["llmProfiles"], list)
+
+    assert copy.deepcopy(settings) == settings
+    restored = pickle.loads(pickle.dumps(settings))
+    assert restored == settings
+    with pytest.raises(TypeError):
+        next(p for p in restored.llmProfiles if p.id == "local").headers.root.clear()
+    manager.close()
+
+
+def test_replaced_openai_clients_close_after_their_requests(tmp_path, monkeypatch):
+    manager = _manager(tmp_path)
+    service = LLMService(manager)
+    profile = next(p for p in manager.get_settings().llmProfiles if p.id == "local")
+    closed = []
+
+    async def scenario():
+        started = asyncio.Event()
+        release = asyncio.Event()
+        clients = []
+
+        async def in_flight():
+            async with service._lease_openai_client(profile) as client:
+                clients.append(client)
+                monkeypatch.setattr(client, "close", _recording_close(client))
+                started.set()
+                await release.wait()
+
+        def _recording_close(client):
+            async def _close():
+                closed.append(client)
+
+            return _close
+
+        task = asyncio.create_task(in_flight())
+        await asyncio.wait_for(started.wait(), 1)
+        # 设置变更发生在请求进行中：旧客户端不能被立即关闭
+        manager.update_llm_profile("local", {"name": "Renamed"})
+        async with service._lease_openai_client(profile) as fresh:
+            assert fresh is not clients[0]
+            monkeypatch.setattr(fresh, "close", _recording_close(fresh))
+        await asyncio.sleep(0)
+        assert closed == []
+
+        release.set()
+        await task
+        await asyncio.sleep(0)
+        assert closed == [clients[0]]
+
+        await service.close()
+        return fresh
+
+    fresh = asyncio.run(scenario())
+    assert closed[-1] is fresh
+    manager.close()
+
+
+def test_cache_overflow_retires_clients_for_closing(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.services.llm._MAX_OPENAI_CLIENTS", 2)
+    manager = _manager(tmp_path)
+    service = LLMService(manager)
+    profile = next(p for p in manager.get_settings().llmProfiles if p.id == "local")
+    closed = []
+
+    async def scenario():
+        created = []
+        for index in range(3):
+            async with service._lease_openai_client(profile, api_key_override=f"sk-{index}") as client:
+                created.append(client)
+
+                async def _close(client=client):
+                    closed.append(client)
+
+                monkeypatch.setattr(client, "close", _close)
+        await asyncio.sleep(0)
+        return created
+
+    created = asyncio.run(scenario())
+    assert closed == created[:2]
+    manager.close()
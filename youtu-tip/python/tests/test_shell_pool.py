@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("pexpect")
+
+from app.services.shell_pool import ShellPool, ShellTimeout  # noqa: E402
+
+
+@pytest.fixture
+def pool():
+    pool = ShellPool(max_idle=1)
+    yield pool
+    pool.close()
+
+
+def test_output_and_exit_code(pool, tmp_path):
+    result = pool.run(str(tmp_path), "echo hello; pwd; false")
+    assert result.output.splitlines() == ["hello", str(tmp_path)]
+    assert result.exit_code == 1
+
+
+def test_shell_is_reused_between_calls(pool, tmp_path):
+    pool.run(str(tmp_path), "true")
+    pool.run(str(tmp_path), "true")
+    assert pool.stats()["spawns"] == 1
+
+
+def test_state_does_not_leak_between_calls(pool, tmp_path):
+    pool.run(str(tmp_path), "export TIP_LEAK=1; alias ll='ls -l'; set -e; cd /; leak() { :; }")
+    result = pool.run(str(tmp_path), "echo ${TIP_LEAK:-unset}; type ll leak >/dev/null 2>&1; echo $?; pwd")
+    assert result.output.splitlines() == ["unset", "1", str(tmp_path)]
+    assert pool.stats()["spawns"] == 1
+
+
+def test_exit_only_ends_the_command(pool, tmp_path):
+    assert pool.run(str(tmp_path), "exit 3").exit_code == 3
+    assert pool.run(str(tmp_path), "echo ok").output == "ok"
+    assert pool.stats()["spawns"] == 1
+
+
+def test_stdin_reader_sees_eof(pool, tmp_path):
+    result = pool.run(str(tmp_path), "cat; read -r line; echo read=$?", timeout=5)
+    assert result.output == "read=1"
+
+
+def test_heredoc_and_trailing_comment(pool, tmp_path):
+    result = pool.run(str(tmp_path), "cat <<'EOF'\nline one\nEOF\necho done # trailing comment")
+    assert result.output.splitlines() == ["line one", "done"]
+
+
+def test_timeout_interrupts_and_resyncs(pool, tmp_path):
+    with pytest.raises(ShellTimeout):
+        pool.run(str(tmp_path), "sleep 30", timeout=0.5)
+    result = pool.run(str(tmp_path), "echo back", timeout=5)
+    assert result.output == "back"
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["spawns"] == 1
+
+
+def test_workspaces_get_separate_shells(pool, tmp_path):
+    first, second = tmp_path / "a", tmp_path / "b"
+    first.mkdir()
+    second.mkdir()
+    assert pool.run(str(first), "pwd").output == str(first)
+    assert pool.run(str(second), "pwd").output == str(second)
+    assert pool.stats()["spawns"] == 2
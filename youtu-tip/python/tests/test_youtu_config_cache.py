@@ -0,0 +1,33 @@
+import os
+import threading
+
+from app.services import youtu_config_cache
+from app.services.youtu_config_cache import AgentConfigCache
+
+
+def test_concurrent_disk_writes_leave_a_readable_entry(tmp_path):
+    cache = AgentConfigCache(tmp_path / "configs", cache_dir=tmp_path / "cache")
+    config = {"agent": {"name": "base", "instructions": "x" * 50_000}}
+    threads = [
+        threading.Thread(target=cache._write_disk, args=("simple/base", "fp", config)) for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert cache._read_disk("simple/base", "fp") == config
+    assert not [name for name in os.listdir(tmp_path / "cache") if name.endswith(".tmp")]
+
+
+def test_failed_disk_write_cleans_up_temp_file(tmp_path, monkeypatch):
+    cache = AgentConfigCache(tmp_path / "configs", cache_dir=tmp_path / "cache")
+
+    def _boom(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(youtu_config_cache.os, "replace", _boom)
+    cache._write_disk("simple/base", "fp", {"agent": {}})
+
+    assert cache._read_disk("simple/base", "fp") is None
+    assert os.listdir(tmp_path / "cache") == []
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Youtu-Agent stream event serialization.
+
+Usage:
+    python scripts/bench_youtu_stream_events.py [--input EVENTS.jsonl] [--tokens 2000] [--repeat 5]
+
+Replays a recorded event stream through the previous path (recursive
+``json_safe`` of every raw event, done twice: once for the INFO log and once
+for the websocket chunk) and through ``serialize_stream_event``. Reports the
+per-event cost and the bytes sent, and checks that the renderer would extract
+the same deltas and tool calls from both payloads.
+
+``--input`` takes JSONL with one raw model event per line, either bare
+(``{"type": "response.output_text.delta", ...}``) or as a websocket chunk
+payload (``{"type": "RawResponsesStreamEvent", "data": {...}}``). Without it a
+synthetic run with ``--tokens`` text deltas and one tool call is generated.
+Events are rebuilt as openai pydantic models when the package is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'python'))
+
+from app.services.youtu_stream_events import json_safe, serialize_stream_event  # noqa: E402
+
+try:
+    import pydantic
+    from openai.types.responses import ResponseStreamEvent
+
+    _EVENT_ADAPTER = pydantic.TypeAdapter(ResponseStreamEvent)
+except ImportError:  # pragma: no cover - optional
+    _EVENT_ADAPTER = None
+
+
+@dataclass
+class RawResponsesStreamEvent:
+    """Same shape as ``agents.stream_events.RawResponsesStreamEvent``."""
+
+    data: Any
+    type: str = 'raw_response_event'
+
+
+def _synthetic_events(tokens: int) -> Iterable[dict]:
+    seq = iter(range(1_000_000))
+    message = {'id': 'msg_1', 'type': 'message', 'role': 'assistant', 'status': 'in_progress', 'content': []}
+    yield {'type': 'response.output_item.added', 'item': message, 'output_index': 0, 'sequence_number': next(seq)}
+    for index in range(tokens):
+        yield {
+            'type': 'response.output_text.delta',
+            'delta': f'tok{index} ',
+            'item_id': 'msg_1',
+            'output_index': 0,
+            'content_index': 0,
+            'logprobs': [],
+            'sequence_number': next(seq),
+        }
+    call = {
+        'id': 'fc_1',
+        'type': 'function_call',
+        'call_id': 'call_1',
+        'name': 'run_bash',
+        'arguments': '',
+        'status': 'in_progress',
+    }
+    yield {'type': 'response.output_item.added', 'item': call, 'output_index': 1, 'sequence_number': next(seq)}
+    arguments = json.dumps({'command': 'ls -F "Documents/"'})
+    for start in range(0, len(arguments), 4):
+        yield {
+            'type': 'response.function_call_arguments.delta',
+            'delta': arguments[start : start + 4],
+            'item_id': 'fc_1',
+            'output_index': 1,
+            'sequence_number': next(seq),
+        }
+    done = dict(call, arguments=arguments, status='completed')
+    yield {'type': 'response.output_item.done', 'item': done, 'output_index': 1, 'sequence_number': next(seq)}
+
+
+def _recorded_events(path: Path) -> Iterable[dict]:
+    with path.open('r', encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get('type') == 'RawResponsesStreamEvent' and isinstance(record.get('data'), dict):
+                record = record['data']
+            yield record
+
+
+def _build(raw: dict) -> RawResponsesStreamEvent:
+    data: Any = raw
+    if _EVENT_ADAPTER is not None:
+        try:
+            data = _EVENT_ADAPTER.validate_python(raw)
+        except pydantic.ValidationError:
+            data = raw
+    return RawResponsesStreamEvent(data=data)
+
+
+def legacy_serialize(event: RawResponsesStreamEvent) -> dict:
+    json_safe(event.data)  # INFO log of the full payload
+    return {'type': event.__class__.__name__, 'data': json_safe(event.data)}
+
+
+def _renderer_view(payload: dict) -> tuple:
+    """What youtuAgentClient.ts reads from a raw chunk."""
+    data = payload['data']
+    item = data.get('item') or {}
+    return (data.get('type'), data.get('delta'), item.get('type'), item.get('name'), item.get('arguments'))
+
+
+def _time(events: list, serializer, repeat: int) -> tuple[float, int]:
+    runs = []
+    payloads: list = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payloads = [serializer(event) for event in events]
+        runs.append(time.perf_counter() - started)
+    size = sum(len(json.dumps({'event': 'chunk', 'payload': payload})) for payload in payloads)
+    return statistics.median(runs), size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', type=Path, help='recorded raw events (JSONL)')
+    parser.add_argument('--tokens', type=int, default=2000, help='text deltas in the synthetic stream')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    source = _recorded_events(args.input) if args.input else _synthetic_events(args.tokens)
+    events = [_build(raw) for raw in source]
+    if not events:
+        print('no events to replay')
+        return 1
+
+    mismatches = sum(
+        _renderer_view(legacy_serialize(event)) != _renderer_view(serialize_stream_event(event)) for event in events
+    )
+    legacy_s, legacy_bytes = _time(events, legacy_serialize, args.repeat)
+    fast_s, fast_bytes = _time(events, serialize_stream_event, args.repeat)
+
+    models = 'openai models' if _EVENT_ADAPTER is not None else 'plain dicts'
+    print(f'events: {len(events)} ({models})')
+    print(f'legacy : {legacy_s * 1e6 / len(events):8.2f} us/event  {legacy_bytes / 1024:8.1f} KiB sent')
+    print(f'compact: {fast_s * 1e6 / len(events):8.2f} us/event  {fast_bytes / 1024:8.1f} KiB sent')
+    print(f'speedup: {legacy_s / fast_s:.1f}x, renderer mismatches: {mismatches}')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())